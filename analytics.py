@@ -0,0 +1,192 @@
+# 理解度チェックの解答の記録（attemptsテーブル）を集計するモジュール
+# 記録を列ごとの配列（単語の番号、ジャンルの番号、解答した日、正解かどうか、前回の解答からの経過の区分）として読み込み、
+# 配列の演算でまとめて集計する。NumPyがあればNumPyの配列で、なければ標準ライブラリのarrayと辞書で集計する（結果は同じ）
+# 画面に表示する集計はModelが集計テーブルから読むため、ここでは期間やジャンルを絞った集計と、集計テーブルの確認・作り直しに使う
+import array
+from collections import Counter
+from itertools import compress
+from typing import Optional
+
+try:
+    import numpy
+except ImportError:
+    # NumPyがない場合は純粋なPythonで集計する
+    numpy = None
+
+from model import Model, RETENTION_BUCKET_DAYS
+
+# 読み込む列の名前と、標準ライブラリのarrayの型（bucketは初回の解答を-1、firstは初回の解答なら1）
+# wordとgenreは単語とジャンルのuidに読み込んだ順に0から付けた番号（番号→uidは'word_uids'と'genre_uids'のリスト）
+ATTEMPT_COLUMNS = (
+    ('word', 'q'),
+    ('genre', 'q'),
+    ('day', 'q'),
+    ('correct', 'b'),
+    ('bucket', 'b'),
+    ('first', 'b'),
+)
+
+# NumPyの配列にする時の型（arrayの型→NumPyの型）
+NUMPY_TYPES = {'q': 'int64', 'b': 'int8'}
+
+# 記録を読み込む時に1回に取り出す行数
+ATTEMPT_FETCH_SIZE = 10000
+
+
+# NumPyで集計するかどうか（use_numpyがNoneの場合はNumPyがあれば使う）
+def numpy_enabled(use_numpy: Optional[bool] = None) -> bool:
+    if use_numpy is None:
+        return numpy is not None
+    if use_numpy and numpy is None:
+        raise ValueError("NumPyがインストールされていません")
+    return use_numpy
+
+
+# 解答の記録を列ごとの配列として読み込み、列の名前→配列の辞書を返す
+# （'word_uids'と'genre_uids'には単語とジャンルの番号→uidのリストを入れる）
+# genre_idとsince_dayを指定すると、そのジャンルとその日以降の解答に絞り込む
+# use_numpyがTrueの場合（Noneの場合はNumPyがあれば）NumPyの配列、Falseの場合は標準ライブラリのarrayにする
+def load_attempt_columns(model: Model, genre_id: int = None, since_day: int = None, use_numpy: bool = None) -> dict:
+    # 書き込み待ちの解答も含めるため、先に書き込む
+    model.flush_reviews()
+    conditions = []
+    params = []
+    if genre_id is not None:
+        conditions.append('genre_uid = (SELECT uid FROM genres WHERE id = ?)')
+        params.append(genre_id)
+    if since_day is not None:
+        conditions.append('day >= ?')
+        params.append(since_day)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    columns = [array.array(type_code) for _, type_code in ATTEMPT_COLUMNS]
+    # 一時的なカーソルで読む（読み込み中に他のメソッドがmodel.cursorを使っても影響しないように）
+    cursor = model.connection.execute(f'''
+        SELECT word_uid, genre_uid, day, correct, coalesce(bucket, -1), elapsed IS NULL FROM attempts {where}
+    ''', params)
+    # 単語とジャンルのuid→番号（uidはBLOBのため、番号にして整数の配列で集計する）
+    word_numbers = {}
+    genre_numbers = {}
+    while True:
+        rows = cursor.fetchmany(ATTEMPT_FETCH_SIZE)
+        if not rows:
+            break
+        # 行のリストを列ごとに組み替えて配列に追加する
+        word_uids, genre_uids, *values = zip(*rows)
+        columns[0].extend([word_numbers.setdefault(uid, len(word_numbers)) for uid in word_uids])
+        columns[1].extend([genre_numbers.setdefault(uid, len(genre_numbers)) for uid in genre_uids])
+        for column, column_values in zip(columns[2:], values):
+            column.extend(column_values)
+    cursor.close()
+    if numpy_enabled(use_numpy):
+        result = {name: numpy.frombuffer(column, dtype=NUMPY_TYPES[type_code]) if len(column) else
+                  numpy.zeros(0, dtype=NUMPY_TYPES[type_code])
+                  for (name, type_code), column in zip(ATTEMPT_COLUMNS, columns)}
+    else:
+        result = {name: column for (name, _), column in zip(ATTEMPT_COLUMNS, columns)}
+    result['word_uids'] = list(word_numbers)
+    result['genre_uids'] = list(genre_numbers)
+    return result
+
+
+# keysの列の値の組ごとに、件数とvaluesの列（0か1の列）の合計を求める
+# 結果は{キーの組: (件数, valuesの1つ目の合計, ...)}。列がNumPyの配列の場合はNumPyで集計する
+def aggregate(columns: dict, keys: tuple, values: tuple = ()) -> dict:
+    key_columns = [columns[key] for key in keys]
+    value_columns = [columns[value] for value in values]
+    if numpy is not None and isinstance(key_columns[0], numpy.ndarray):
+        if not len(key_columns[0]):
+            return {}
+        # キーの組を行にした2次元配列の重複しない行と、各解答がどの行にあたるかを求め、行ごとに数える
+        unique, inverse = numpy.unique(numpy.stack(key_columns, axis=1), axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        counts = numpy.bincount(inverse, minlength=len(unique))
+        sums = [numpy.bincount(inverse, weights=column, minlength=len(unique)).astype('int64') for column in value_columns]
+        return {tuple(key): (count, *values)
+                for key, count, *values in zip(unique.tolist(), counts.tolist(), *(column.tolist() for column in sums))}
+    # 1行ずつ足す代わりに、キーの列をCounterで数え、値が1の行のキーだけをcompressで取り出して数える
+    # （ループがC言語で実装された関数の中で回るため、行数が多くても速い。キーが1つの場合は組を作らない）
+    key_values = key_columns[0] if len(keys) == 1 else list(zip(*key_columns))
+    counts = Counter(key_values)
+    sums = [Counter(compress(key_values, column)) for column in value_columns]
+    result = {key: (count, *(total[key] for total in sums)) for key, count in counts.items()}
+    return {(key,): totals for key, totals in result.items()} if len(keys) == 1 else result
+
+
+# 単語ごとの正解率を、正解率が低い順（同じ場合は解答数が多い順、uid順）に返す（各要素は(単語のuid, 解答数, 正解数, 正解率)）
+def word_accuracy(columns: dict) -> list:
+    uids = columns['word_uids']
+    rows = [(uids[word], attempts, correct, correct / attempts)
+            for (word,), (attempts, correct) in aggregate(columns, ('word',), ('correct',)).items()]
+    rows.sort(key=lambda row: (row[3], -row[1], row[0]))
+    return rows
+
+
+# ジャンルごとの記憶の定着の曲線を返す（ジャンルのuid→(経過の区分, 解答数, 正解数, 正解率)のリスト。区分の順）
+# 初回の解答は前回からの経過がないため含めない
+def retention_curves(columns: dict) -> dict:
+    uids = columns['genre_uids']
+    curves = {}
+    for (genre, bucket), (attempts, correct) in sorted(aggregate(columns, ('genre', 'bucket'), ('correct',)).items()):
+        if bucket >= 0:
+            curves.setdefault(uids[genre], []).append((bucket, attempts, correct, correct / attempts))
+    return curves
+
+
+# 日ごとの解答数を古い日から順に返す（各要素は(日, 解答数, 正解数, 初めて解答した単語の数)）
+def daily_activity(columns: dict) -> list:
+    return [(day, *totals) for (day,), totals in sorted(aggregate(columns, ('day',), ('correct', 'first')).items())]
+
+
+# 経過の区分を表す文字列（例: "1〜2日"、"365日以上"）
+def bucket_label(bucket: int) -> str:
+    if bucket == 0:
+        return f"{RETENTION_BUCKET_DAYS[0]}日未満"
+    if bucket >= len(RETENTION_BUCKET_DAYS):
+        return f"{RETENTION_BUCKET_DAYS[-1]}日以上"
+    return f"{RETENTION_BUCKET_DAYS[bucket - 1]}〜{RETENTION_BUCKET_DAYS[bucket]}日"
+
+
+# 解答の記録を集計し直した結果を、集計テーブルの行と同じ形で返す
+# (日ごとの{(ジャンルのuid, 日): (解答数, 正解数, 初めて解答した単語の数)}, 定着の{(ジャンルのuid, 区分): (解答数, 正解数)},
+#  単語ごとの{(単語のuid,): (解答数, 正解数)})
+def compute_rollups(columns: dict) -> tuple:
+    genre_uids = columns['genre_uids']
+    daily = {(genre_uids[genre], day): totals
+             for (genre, day), totals in aggregate(columns, ('genre', 'day'), ('correct', 'first')).items()}
+    retention = {(genre_uids[genre], bucket): totals
+                 for (genre, bucket), totals in aggregate(columns, ('genre', 'bucket'), ('correct',)).items() if bucket >= 0}
+    word_uids = columns['word_uids']
+    words = {(word_uids[word],): totals for (word,), totals in aggregate(columns, ('word',), ('correct',)).items()}
+    return daily, retention, words
+
+
+# 集計テーブルの数を解答の記録から集計し直した数と比べ、食い違う行の一覧を返す
+# 各要素は(テーブル名, キーの組, 集計テーブルの数, 集計し直した数)。行がない場合の数はNone
+# rebuildがTrueで食い違いがある場合は、集計テーブルを作り直す
+def check_attempt_stats(model: Model, rebuild: bool = False, use_numpy: bool = None) -> list:
+    daily, retention, words = compute_rollups(load_attempt_columns(model, use_numpy=use_numpy))
+    tables = (
+        ('attempt_daily_stats', ('genre_uid', 'day'), ('attempts', 'correct', 'new_words'), daily),
+        ('attempt_retention_stats', ('genre_uid', 'bucket'), ('attempts', 'correct'), retention),
+        ('word_attempt_stats', ('word_uid',), ('attempts', 'correct'), words),
+    )
+    mismatches = []
+    for table, keys, values, actual in tables:
+        cursor = model.connection.execute(f'''SELECT {', '.join(keys + values)} FROM {table}''')
+        stored = {row[:len(keys)]: row[len(keys):] for row in cursor}
+        for key in sorted(stored.keys() | actual.keys()):
+            if stored.get(key) != actual.get(key):
+                mismatches.append((table, key, stored.get(key), actual.get(key)))
+    if mismatches and rebuild:
+        try:
+            for table, keys, values, actual in tables:
+                model.cursor.execute(f'''DELETE FROM {table}''')
+                model.cursor.executemany(f'''
+                    INSERT INTO {table} ({', '.join(keys + values)}) VALUES ({', '.join('?' * len(keys + values))})
+                ''', [(*key, *totals) for key, totals in actual.items()])
+        except BaseException:
+            model.connection.rollback()
+            raise
+        model.connection.commit()
+        model.notify_change()
+    return mismatches
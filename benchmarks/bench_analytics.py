@@ -0,0 +1,127 @@
+# 理解度チェックの解答の記録（attempts）と集計のベンチマーク
+# 合成した数百万件の解答を記録したデータベースで、次の時間を測る
+#   - 解答の記録: queue_reviewで書き込み待ちにためた解答を、pending_limit件ずつまとめて書き込む時間
+#   - 画面の表示: 集計テーブルから読む日ごとの解答数・定着の曲線・単語ごとの正解率（Modelのメソッド）と、
+#     同じ集計を解答の記録からSQLのGROUP BYで求めた場合の比較
+#   - analytics: 記録を列ごとの配列に読み込む時間と、純粋なPython・NumPy（インストールされている場合）での集計の時間
+# 使い方: python benchmarks/bench_analytics.py [--attempts 2000000] [--words 30000] [--days 365]
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import analytics
+from model import Model, local_day, SECONDS_PER_DAY
+
+# 解答の記録を作る時に1つのトランザクションで追記する件数
+GENERATE_BATCH_SIZE = 10000
+
+
+# 3つのジャンルに単語を追加し、days日間に合計attempts件の解答を記録したデータベースを作成
+# 各解答は無作為な単語への評価（正解の割合は単語ごとに異なる）で、日時の順に追記する
+def create_database(db_name: str, words: int, attempts: int, days: int, seed: int) -> tuple:
+    rng = random.Random(seed)
+    model = Model(db_name)
+    for genre_id in range(1, 4):
+        model.add_genre(f"genre{genre_id}")
+        model.bulk_import(genre_id, ((f"word{genre_id}_{i}", f"単語{i}の詳細", False) for i in range(words // 3)),
+                          batch_size=10000)
+    word_count = words // 3 * 3
+    difficulty = [rng.random() for _ in range(word_count + 1)]
+    start_at = int(time.time()) - days * SECONDS_PER_DAY
+    step = days * SECONDS_PER_DAY / attempts
+    start = time.perf_counter()
+    for offset in range(0, attempts, GENERATE_BATCH_SIZE):
+        batch = []
+        for i in range(offset, min(offset + GENERATE_BATCH_SIZE, attempts)):
+            word_id = rng.randint(1, word_count)
+            batch.append((word_id, 4 if rng.random() > difficulty[word_id] * 0.6 else 1, int(start_at + i * step)))
+        model.insert_attempts(batch)
+        model.connection.commit()
+    elapsed = time.perf_counter() - start
+    model.close()
+    return word_count, elapsed
+
+
+# 関数をrepeat回呼び出し、実行時間の中央値（ミリ秒）と最後の結果を返す
+def measure(function, repeat: int = 5) -> tuple:
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
+
+
+# 解答をqueue_reviewで1件ずつ記録し、書き込み（pending_limit件ごと）1回あたりの時間（ミリ秒）を返す
+def measure_recording(model: Model, word_count: int, answers: int, rng: random.Random) -> float:
+    cards = {}
+    now = time.time()
+    start = time.perf_counter()
+    for i in range(answers):
+        word_id = rng.randint(1, word_count)
+        card = cards.get(word_id) or (word_id, "", False, 0, 2.5, 0)
+        model.queue_review(card, rng.choice([1, 4, 5]), now + i)
+    model.flush_pending()
+    return (time.perf_counter() - start) * 1000 / (answers / model.pending_limit)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--attempts', type=int, default=2000000, help="記録する解答の数")
+    parser.add_argument('--words', type=int, default=30000, help="単語数（3つのジャンルに分ける）")
+    parser.add_argument('--days', type=int, default=365, help="解答を記録する日数")
+    parser.add_argument('--answers', type=int, default=20000, help="queue_reviewで記録する解答の数")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, "bench_analytics.db")
+        word_count, elapsed = create_database(db_name, args.words, args.attempts, args.days, args.seed)
+        print(f"解答の記録の作成: {elapsed:.1f}秒（{args.attempts}件、{args.attempts / elapsed:.0f}件/秒、"
+              f"{os.path.getsize(db_name) / 1024 / 1024:.1f} MB）")
+        model = Model(db_name)
+        per_flush = measure_recording(model, word_count, args.answers, rng)
+        print(f"解答の記録の書き込み: {model.pending_limit}件ごとに {per_flush:.2f} ms")
+
+        print("画面の表示（集計テーブル）とGROUP BYでの集計:")
+        today = local_day(time.time())
+        screens = [
+            ("今日の解答数", lambda: model.get_daily_activity(None, today),
+             '''SELECT day, count(*), sum(correct), sum(elapsed IS NULL) FROM attempts WHERE day >= ? GROUP BY day''', (today,)),
+            ("日ごとの解答数", lambda: model.get_daily_activity(1),
+             '''SELECT day, count(*), sum(correct), sum(elapsed IS NULL) FROM attempts WHERE genre_uid = (SELECT uid FROM genres WHERE id = 1) GROUP BY day''', ()),
+            ("定着の曲線", lambda: model.get_retention_curve(1),
+             '''SELECT bucket, count(*), sum(correct) FROM attempts WHERE genre_uid = (SELECT uid FROM genres WHERE id = 1) AND bucket IS NOT NULL GROUP BY bucket''', ()),
+            ("単語ごとの正解率", lambda: model.get_word_accuracy(1),
+             '''SELECT word_uid, count(*), sum(correct) FROM attempts WHERE genre_uid = (SELECT uid FROM genres WHERE id = 1) GROUP BY word_uid''', ()),
+        ]
+        for label, method, sql, params in screens:
+            rollup, _ = measure(method)
+            raw, _ = measure(lambda: model.connection.execute(sql, params).fetchall(), repeat=3)
+            print(f"  {label:10s} 集計テーブル {rollup:9.2f} ms  GROUP BY {raw:9.1f} ms（{raw / rollup:7.0f}倍）")
+
+        modes = [False] + ([True] if analytics.numpy is not None else [])
+        for use_numpy in modes:
+            label = "NumPy" if use_numpy else "純粋なPython"
+            load, columns = measure(lambda: analytics.load_attempt_columns(model, use_numpy=use_numpy), repeat=1)
+            print(f"analytics（{label}）: 列ごとの配列への読み込み {load / 1000:.2f}秒")
+            for name, function in (("日ごとの解答数", analytics.daily_activity), ("定着の曲線", analytics.retention_curves),
+                                   ("単語ごとの正解率", analytics.word_accuracy)):
+                elapsed, _ = measure(lambda: function(columns), repeat=1)
+                print(f"  {name:10s} {elapsed:9.1f} ms")
+            elapsed, mismatches = measure(lambda: analytics.check_attempt_stats(model, use_numpy=use_numpy), repeat=1)
+            print(f"  集計テーブルの確認 {elapsed / 1000:.2f}秒（食い違い {len(mismatches)}件）")
+        model.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+# 1件ずつのadd_wordとbulk_importのスループットを比較するベンチマーク
+# 使い方: python benchmarks/bench_bulk_import.py [--rows 50000] [--loop-rows 2000]
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model import Model, read_word_file
+
+
+# ベンチマーク用の単語CSVファイルを作成
+def write_word_csv(path: str, rows: int):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['word', 'details', 'confidence'])
+        for i in range(rows):
+            writer.writerow([f"word{i}", f"これは単語{i}の詳細です。" * 3, i % 2])
+
+
+# add_wordを1件ずつ呼び出した場合の1秒あたりの件数を計測
+def bench_add_word_loop(db_path: str, csv_path: str) -> float:
+    model = Model(db_path)
+    model.add_genre("bench")
+    start = time.perf_counter()
+    count = 0
+    for word, details, confidence in read_word_file(csv_path):
+        model.add_word(1, word, details, confidence)
+        count += 1
+    elapsed = time.perf_counter() - start
+    model.connection.close()
+    return count / elapsed
+
+
+# bulk_importを使った場合の1秒あたりの件数を計測
+def bench_bulk_import(db_path: str, csv_path: str, batch_size: int) -> float:
+    model = Model(db_path)
+    model.add_genre("bench")
+    start = time.perf_counter()
+    count = model.bulk_import(1, read_word_file(csv_path), batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    model.connection.close()
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=50000, help="bulk_importで追加する件数")
+    parser.add_argument('--loop-rows', type=int, default=2000, help="add_wordのループで追加する件数")
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        loop_csv = os.path.join(tmp, "loop.csv")
+        bulk_csv = os.path.join(tmp, "bulk.csv")
+        write_word_csv(loop_csv, args.loop_rows)
+        write_word_csv(bulk_csv, args.rows)
+
+        loop_rate = bench_add_word_loop(os.path.join(tmp, "loop.db"), loop_csv)
+        bulk_rate = bench_bulk_import(os.path.join(tmp, "bulk.db"), bulk_csv, args.batch_size)
+
+    print(f"add_word ループ : {loop_rate:12.0f} 件/秒 ({args.loop_rows}件)")
+    print(f"bulk_import     : {bulk_rate:12.0f} 件/秒 ({args.rows}件, batch_size={args.batch_size})")
+    print(f"倍率            : {bulk_rate / loop_rate:12.1f} 倍")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# 長い詳細の圧縮のベンチマーク。辞書の見出し語のような長い詳細を持つデータベースを、圧縮しない場合・zlibで圧縮した場合・
+# ジャンルごとに学習した辞書で圧縮した場合の3通りで作り、ファイルの大きさ、バックアップの時間、
+# SQLiteのページキャッシュを一定の大きさにした時の詳細の読み込み時間（中央値、p99）とキャッシュの当たり具合を比較する
+# キャッシュに当たらなかったページはファイルから読まれるため、読み込み1回あたりのread系のシステムコールの回数（/proc/self/io）で数える
+# 使い方: python benchmarks/bench_compression.py [--words 200000] [--lookups 20000] [--cache-mb 32]
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from model import Model
+
+# 合成する詳細に使う、決まった書式と、よく現れる文
+TEMPLATE = "【品詞】{pos}。【発音】/{word}/\n【意味】{meaning}\n【例文】{example}\n【解説】{notes}\n【類義語】{synonyms}"
+PARTS_OF_SPEECH = ["名詞", "動詞", "形容詞", "副詞", "前置詞", "接続詞"]
+COMMON_SENTENCES = [
+    "日常会話でもよく使われる基本的な語です。",
+    "書き言葉では、より改まった表現が好まれることがあります。",
+    "文脈によって意味が大きく変わるため、例文とあわせて覚えるとよいでしょう。",
+    "イギリス英語とアメリカ英語で綴りが異なる場合があります。",
+    "口語では短縮した形で使われることが多いです。",
+    "この意味では通常、複数形で用いられます。",
+    "似た意味の語と比べて、やや硬い印象を与えます。",
+    "ビジネスの場面で頻繁に使われる表現です。",
+]
+
+
+# 合成データの(単語名, 詳細, 自信度)を順に返すジェネレータ（詳細は500〜1500文字程度）
+def generate_words(words: int, seed: int):
+    rng = random.Random(seed)
+    for i in range(words):
+        word = f"word{i}"
+        details = TEMPLATE.format(
+            pos=rng.choice(PARTS_OF_SPEECH), word=word,
+            meaning=f"{word}の意味{rng.randrange(10 ** 6)}。" + "".join(rng.sample(COMMON_SENTENCES, 2)),
+            example=" ".join(f"This is example {rng.randrange(10 ** 6)} showing how {word} is used." for _ in range(rng.randint(1, 4))),
+            notes="".join(rng.choice(COMMON_SENTENCES) for _ in range(rng.randint(4, 16))),
+            synonyms="、".join(f"word{rng.randrange(words)}" for _ in range(rng.randint(2, 6))))
+        yield (word, details, rng.random() < 0.5)
+
+
+# 3つのジャンルに単語を追加した、詳細を圧縮しないデータベースを作成
+def create_database(db_name: str, words: int, seed: int):
+    model = Model(db_name)
+    model.compress_threshold = None
+    for genre_id in range(1, 4):
+        model.add_genre(f"genre{genre_id}")
+        model.bulk_import(genre_id, generate_words(words // 3, seed + genre_id), batch_size=10000)
+    model.close()
+
+
+# データベースの詳細を圧縮し直し（trainがTrueの場合はジャンルごとに辞書を学習し）、空いた領域を除く
+def compress_database(db_name: str, train: bool) -> float:
+    model = Model(db_name)
+    start = time.perf_counter()
+    for genre_id, _ in model.get_genres():
+        if not train or model.train_details_dictionary(genre_id) is None:
+            model.recompress_details(genre_id)
+    elapsed = time.perf_counter() - start
+    model.connection.execute('''VACUUM''')
+    model.close()
+    return elapsed
+
+
+# このプロセスがこれまでに呼び出したread系のシステムコールの回数
+def read_syscalls() -> int:
+    with open('/proc/self/io') as f:
+        for line in f:
+            if line.startswith('syscr:'):
+                return int(line.split()[1])
+    return 0
+
+
+# 新しい接続でページキャッシュをcache_mbにし、ランダムな単語の詳細の読み込み時間（ミリ秒）と、
+# ファイルからの読み込みが起きなかった（キャッシュに当たった）読み込みの割合、1回あたりのread系のシステムコールの回数を返す
+# 最初のlookups回でキャッシュを温めてから、次のlookups回を計測する
+def measure_reads(db_name: str, word_ids: list, lookups: int, cache_mb: int, seed: int) -> tuple:
+    model = Model(db_name)
+    model.cursor.execute(f'''PRAGMA cache_size = -{cache_mb * 1024}''')
+    rng = random.Random(seed)
+    for _ in range(lookups):
+        model.load_word_details(rng.choice(word_ids))
+    # キャッシュに載っている単語を読む時の回数（/proc/self/ioの読み込みと、読み込みのトランザクションの開始時にファイルの変更を確かめる分）を差し引く
+    overhead = None
+    for word_id in word_ids[:10]:
+        model.load_word_details(word_id)
+        before = read_syscalls()
+        model.load_word_details(word_id)
+        count = read_syscalls() - before
+        overhead = count if overhead is None else min(overhead, count)
+    timings = []
+    hits = 0
+    reads = 0
+    for _ in range(lookups):
+        word_id = rng.choice(word_ids)
+        before = read_syscalls()
+        start = time.perf_counter()
+        model.load_word_details(word_id)
+        timings.append((time.perf_counter() - start) * 1000)
+        count = read_syscalls() - before - overhead
+        reads += count
+        hits += count == 0
+    model.close()
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99)], hits / lookups, reads / lookups
+
+
+# バックアップにかかる時間（秒）
+def measure_backup(db_name: str, backup_name: str) -> float:
+    model = Model(db_name)
+    start = time.perf_counter()
+    model.backup(backup_name, pages=-1)
+    elapsed = time.perf_counter() - start
+    model.close()
+    os.remove(backup_name)
+    return elapsed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--words', type=int, default=200000, help="単語数（3つのジャンルに分ける）")
+    parser.add_argument('--lookups', type=int, default=20000, help="計測する詳細の読み込み回数")
+    parser.add_argument('--cache-mb', type=int, default=32, help="SQLiteのページキャッシュの大きさ（MB）")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plain_name = os.path.join(tmp, "bench_compression_plain.db")
+        create_database(plain_name, args.words, args.seed)
+        variants = [("圧縮なし", plain_name, None)]
+        for label, train in (("zlib", False), ("zlib+辞書", True)):
+            db_name = os.path.join(tmp, f"bench_compression_{int(train)}.db")
+            shutil.copyfile(plain_name, db_name)
+            elapsed = compress_database(db_name, train)
+            variants.append((label, db_name, elapsed))
+        word_ids = list(range(1, args.words // 3 * 3 + 1))
+        print(f"{args.words}語、ページキャッシュ {args.cache_mb} MB、{args.lookups}回の読み込み")
+        plain_size = os.path.getsize(plain_name)
+        for label, db_name, elapsed in variants:
+            size = os.path.getsize(db_name)
+            model = Model(db_name)
+            details_size = model.connection.execute('''SELECT sum(length(CAST(details AS BLOB))) FROM words''').fetchone()[0]
+            model.close()
+            backup = measure_backup(db_name, os.path.join(tmp, "backup.db"))
+            median, p99, hit_rate, reads = measure_reads(db_name, word_ids, args.lookups, args.cache_mb, args.seed)
+            compress = "" if elapsed is None else f"  圧縮し直し {elapsed:6.1f}秒"
+            print(f"  {label:10s} {size / 1024 / 1024:8.1f} MB（{size / plain_size:6.1%}、詳細 {details_size / 1024 / 1024:6.1f} MB）"
+                  f"  バックアップ {backup:6.2f}秒"
+                  f"  読み込み 中央値 {median * 1000:7.1f} µs  p99 {p99 * 1000:7.1f} µs"
+                  f"  キャッシュに当たった割合 {hit_rate:6.1%}  1回あたりのread {reads:5.2f}回{compress}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
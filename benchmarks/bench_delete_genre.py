@@ -0,0 +1,121 @@
+# 大きなジャンルの削除で、削除中に別の接続（アプリの画面側）からの書き込みがどれだけ待たされるかを計測するベンチマーク
+# 1つのDELETE文でジャンルの単語をまとめて削除する場合と、削除済みの印を付けてから少しずつ削除する場合を比較する
+# 少しずつ削除する場合は、画面（FrameSwitcher）と同じように数回削除するごとに間を空ける
+# 使い方: python benchmarks/bench_delete_genre.py [--words 200000] [--chunk-size 1000] [--chunks-per-step 1] [--interval-ms 30]
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model import Model, DELETE_CHUNK_SIZE
+
+# 削除中の書き込みの間隔（秒）
+WRITE_INTERVAL = 0.01
+
+
+# 合成データの(単語名, 詳細, 自信度)を順に返すジェネレータ
+def generate_words(words: int, seed: int):
+    rng = random.Random(seed)
+    for i in range(words):
+        yield (f"word{i}", f"これは単語{i}の詳細です。" * 3, rng.random() < 0.5)
+
+
+# 削除したいジャンルと、削除中に書き込むジャンルを持つデータベースを作成
+def create_database(db_name: str, words: int, seed: int):
+    model = Model(db_name)
+    model.add_genre("deleted")
+    model.add_genre("kept")
+    model.bulk_import(1, generate_words(words, seed), batch_size=10000)
+    model.bulk_import(2, generate_words(100, seed + 1))
+    model.connection.close()
+
+
+# deleteを実行している間、別のスレッドの接続から自信度を更新し続け、(削除の秒数, 書き込みの応答時間のリスト)を返す
+def measure_while_writing(db_name: str, delete) -> tuple:
+    done = threading.Event()
+    latencies = []
+
+    def write_while_deleting():
+        writer = Model(db_name)
+        word_ids = [row[0] for row in writer.get_word_summaries(2)]
+        while not done.is_set():
+            start = time.perf_counter()
+            writer.update_word_confidence(random.choice(word_ids), random.random() < 0.5)
+            latencies.append((time.perf_counter() - start) * 1000)
+            time.sleep(WRITE_INTERVAL)
+        writer.connection.close()
+
+    worker = threading.Thread(target=write_while_deleting)
+    worker.start()
+    start = time.perf_counter()
+    try:
+        delete()
+    finally:
+        elapsed = time.perf_counter() - start
+        done.set()
+        worker.join()
+    return elapsed, latencies
+
+
+# 計測結果を表示
+def report(label: str, elapsed: float, latencies: list):
+    latencies = sorted(latencies) or [0.0]
+    print(f"{label:28s} 削除 {elapsed:7.2f} 秒  同時の書き込み 中央値 {statistics.median(latencies):8.2f} ms"
+          f"  最大 {latencies[-1]:8.2f} ms  ({len(latencies)}回)")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--words', type=int, default=200000, help="削除するジャンルの単語数")
+    parser.add_argument('--chunk-size', type=int, default=DELETE_CHUNK_SIZE, help="1つのトランザクションで削除する単語数")
+    parser.add_argument('--chunks-per-step', type=int, default=1, help="間を空けずに続けて削除する回数（FrameSwitcher.PURGE_CHUNKS_PER_STEP）")
+    parser.add_argument('--interval-ms', type=float, default=30, help="削除の間隔（ミリ秒、FrameSwitcher.PURGE_INTERVAL_MS）")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # 1つのDELETE文でまとめて削除する場合（以前のdelete_genre）
+        db_name = os.path.join(tmp, "single.db")
+        create_database(db_name, args.words, args.seed)
+        model = Model(db_name)
+
+        def delete_at_once():
+            model.cursor.execute('''DELETE FROM words WHERE genre_id = ?''', (1,))
+            model.cursor.execute('''DELETE FROM genres WHERE id = ?''', (1,))
+            model.connection.commit()
+        report("1つのDELETE文", *measure_while_writing(db_name, delete_at_once))
+        model.connection.close()
+
+        # 削除済みの印を付けてから少しずつ削除する場合
+        db_name = os.path.join(tmp, "chunked.db")
+        create_database(db_name, args.words, args.seed)
+        model = Model(db_name)
+        start = time.perf_counter()
+        model.delete_genre(1)
+        print(f"{'削除済みの印を付ける':28s} {(time.perf_counter() - start) * 1000:7.2f} ms")
+        chunk_timings = []
+
+        def delete_in_chunks():
+            while True:
+                chunk_start = time.perf_counter()
+                deleted, finished = model.purge_deleted_genres(args.chunk_size, max_chunks=args.chunks_per_step)
+                chunk_timings.append((time.perf_counter() - chunk_start) * 1000)
+                if finished:
+                    return
+                # 間を空けて、他の接続が書き込めるようにする
+                time.sleep(args.interval_ms / 1000)
+        report(f"{args.chunk_size}件ずつ削除", *measure_while_writing(db_name, delete_in_chunks))
+        print(f"{'続けて削除する時間':28s} 中央値 {statistics.median(chunk_timings):8.2f} ms"
+              f"  最大 {max(chunk_timings):8.2f} ms  ({len(chunk_timings)}回)")
+        model.connection.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+# 大きなデータベースの書き出しとバックアップの時間と最大メモリ使用量（ピークRSS）を計測するベンチマーク
+# 書き出し方ごとに新しいPythonのプロセスで計測する（ピークRSSは前の計測の影響を受けないようにするため）
+# 既定では数GBのデータベースを作成する。--dbで既存のファイルを指定すると、2回目からは作成を省略する
+# 使い方: python benchmarks/bench_export.py [--words 1000000] [--details-chars 1000] [--db bench_export.db]
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from model import Model
+
+# 子プロセスで実行するスクリプト（引数は書き出し方、データベース、書き出し先。最後の行に計測結果のJSONを出力する）
+# ピークRSSはプロセス全体の最大値なので、書き出しの前の値との差を書き出しに使ったメモリとする
+EXPORT_SCRIPT = '''
+import json, resource, sys, threading, time
+from model import Model, write_word_stream
+method, db_name, path = sys.argv[1:4]
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linuxではキロバイト、macOSではバイト単位
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+model = Model(db_name)
+genre_id = model.get_genres()[0][0]
+before = peak_rss_mb()
+latencies = []
+start = time.perf_counter()
+if method == "stream":
+    count = model.export_word_file(path, genre_id, "jsonl")
+elif method == "pages":
+    with open(path, "w", encoding="utf-8") as f:
+        rows = ((w[2], w[3], w[4]) for page in model.iter_word_pages(genre_id, 1000) for w in page)
+        count = write_word_stream(f, "jsonl", rows)
+elif method == "fetchall":
+    with open(path, "w", encoding="utf-8") as f:
+        count = write_word_stream(f, "jsonl", [(w[2], w[3], w[4]) for w in model.get_words(genre_id)])
+elif method == "backup":
+    # バックアップ中に別のスレッドの接続（アプリの画面側）から読み込み、応答時間を計測する
+    done = threading.Event()
+    def read_while_backup():
+        reader = Model(db_name)
+        while not done.is_set():
+            query_start = time.perf_counter()
+            reader.get_word_summary(1)
+            latencies.append((time.perf_counter() - query_start) * 1000)
+            time.sleep(0.01)
+        reader.connection.close()
+    worker = threading.Thread(target=read_while_backup)
+    worker.start()
+    try:
+        model.backup(path)
+    finally:
+        done.set()
+        worker.join()
+    count = None
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "count": count, "rss_before_mb": before, "rss_peak_mb": peak_rss_mb(),
+                  "max_read_ms": max(latencies) if latencies else None}))
+'''
+
+# 計測する書き出し方と表示名
+METHODS = [
+    ('stream', "カーソルで1件ずつ（export_word_file）"),
+    ('pages', "ページ単位（iter_word_pages）"),
+    ('fetchall', "全件取得（get_words）"),
+    ('backup', "オンラインバックアップ（backup）"),
+]
+
+
+# 合成データの(単語名, 詳細, 自信度)を順に返すジェネレータ
+def generate_words(words: int, details_chars: int, seed: int):
+    rng = random.Random(seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyz      "
+    for i in range(words):
+        details = ''.join(rng.choice(alphabet) for _ in range(64))
+        yield (f"word{i}", (details * (details_chars // 64 + 1))[:details_chars], rng.random() < 0.5)
+
+
+# 書き出し方を新しいプロセスで実行し、計測結果を返す
+def run_method(method: str, db_name: str, path: str) -> dict:
+    completed = subprocess.run([sys.executable, '-c', EXPORT_SCRIPT, method, db_name, path], cwd=ROOT,
+                               capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--words', type=int, default=1000000, help="単語数")
+    parser.add_argument('--details-chars', type=int, default=1000, help="1単語あたりの詳細の文字数")
+    parser.add_argument('--db', help="使用するデータベースファイル（存在しない場合は作成し、終了後も残す）")
+    parser.add_argument('--methods', nargs='+', choices=[m for m, _ in METHODS], default=[m for m, _ in METHODS],
+                        help="計測する書き出し方（fetchallは単語をすべてメモリに載せるため、メモリが足りない場合は除く）")
+    parser.add_argument('--output', help="計測結果を書き出すJSONファイル")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = args.db or os.path.join(tmp, "bench_export.db")
+        if not os.path.exists(db_name):
+            model = Model(db_name)
+            model.add_genre("bench")
+            start = time.perf_counter()
+            model.bulk_import(1, generate_words(args.words, args.details_chars, args.seed), batch_size=10000)
+            model.connection.close()
+            print(f"{args.words}件の生成: {time.perf_counter() - start:.1f} 秒")
+        print(f"データベースの大きさ: {os.path.getsize(db_name) / 1024 ** 3:.2f} GB")
+
+        results = {}
+        labels = dict(METHODS)
+        for method in args.methods:
+            path = os.path.join(tmp, f"export_{method}")
+            result = run_method(method, db_name, path)
+            result['output_mb'] = os.path.getsize(path) / 1024 ** 2
+            os.remove(path)
+            results[method] = result
+            line = (f"{labels[method]:36s} {result['seconds']:8.1f} 秒  ピークRSS {result['rss_peak_mb']:8.1f} MB"
+                    f"（書き出し前 {result['rss_before_mb']:6.1f} MB）  出力 {result['output_mb']:8.1f} MB")
+            if result['max_read_ms'] is not None:
+                line += f"  同時読み込みの最大 {result['max_read_ms']:.1f} ms"
+            print(line)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+# 単語名のあいまい検索（fuzzy_lookup）の応答時間と再現率を、全単語の編集距離を計算する総当たりと比較するベンチマーク
+# 既にある単語名に1〜2文字のつづりの間違い（挿入・削除・置換）を加えた語で検索する
+# 使い方: python benchmarks/bench_fuzzy.py [--words 1000000] [--queries 200] [--brute-queries 20] [--k 10]
+import argparse
+import heapq
+import os
+import random
+import statistics
+import string
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model import Model, edit_distance, normalize_word, FUZZY_MAX_DISTANCE
+
+
+# ランダムな単語名を作成
+def random_word(rng: random.Random) -> str:
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 12)))
+
+
+# 合成データの(単語名, 詳細, 自信度)を順に返すジェネレータ
+def generate_words(words: int, seed: int):
+    rng = random.Random(seed)
+    for i in range(words):
+        yield (random_word(rng), f"これは単語{i}の詳細です。", False)
+
+
+# 単語名にedits回のつづりの間違い（挿入・削除・置換のいずれか）を加える
+def add_typos(word: str, edits: int, rng: random.Random) -> str:
+    for _ in range(edits):
+        position = rng.randrange(len(word))
+        kind = rng.choice(('insert', 'delete', 'replace'))
+        if kind == 'insert':
+            word = word[:position] + rng.choice(string.ascii_lowercase) + word[position:]
+        elif kind == 'delete' and len(word) > 1:
+            word = word[:position] + word[position + 1:]
+        else:
+            word = word[:position] + rng.choice(string.ascii_lowercase) + word[position + 1:]
+    return word
+
+
+# 総当たりでtextとの編集距離がmax_distance以下の単語をすべて探し、(編集距離, id)の近い順に返す
+def brute_force_lookup(keys: list, text: str, max_distance: int) -> list:
+    key = normalize_word(text)
+    matches = []
+    for word_id, norm_key in keys:
+        distance = edit_distance(key, norm_key, max_distance)
+        if distance <= max_distance:
+            matches.append((distance, word_id))
+    return sorted(matches)
+
+
+# 応答時間（ミリ秒）のリストを表示
+def report(label: str, timings: list):
+    timings = sorted(timings)
+    print(f"{label:28s} 中央値 {statistics.median(timings):10.3f} ms  p95 {timings[int(len(timings) * 0.95)]:10.3f} ms"
+          f"  最大 {timings[-1]:10.3f} ms  ({len(timings)}回)")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--words', type=int, default=1000000, help="単語数")
+    parser.add_argument('--queries', type=int, default=200, help="fuzzy_lookupで検索する回数")
+    parser.add_argument('--brute-queries', type=int, default=20, help="総当たりと比較する回数（総当たりは1回に数秒かかる）")
+    parser.add_argument('--k', type=int, default=10, help="取得する件数")
+    parser.add_argument('--max-distance', type=int, default=FUZZY_MAX_DISTANCE, help="最大の編集距離")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model = Model(os.path.join(tmp, "bench_fuzzy.db"))
+        model.add_genre("bench")
+        start = time.perf_counter()
+        model.bulk_import(1, generate_words(args.words, args.seed), batch_size=10000)
+        print(f"{args.words}件の生成（重複は除く）: {time.perf_counter() - start:.1f} 秒")
+        keys = model.connection.execute('''SELECT id, norm_key FROM words WHERE genre_id = 1''').fetchall()
+        queries = []
+        for _ in range(args.queries):
+            word_id, norm_key = rng.choice(keys)
+            queries.append((word_id, add_typos(norm_key, rng.randint(1, args.max_distance), rng)))
+
+        timings = []
+        found = 0
+        results = []
+        for word_id, query in queries:
+            start = time.perf_counter()
+            rows = model.fuzzy_lookup(query, 1, args.k, args.max_distance)
+            timings.append((time.perf_counter() - start) * 1000)
+            found += any(row[0] == word_id for row in rows)
+            results.append(rows)
+        report("fuzzy_lookup", timings)
+        print(f"{'元の単語が見つかった割合':28s} {found / len(queries):.3f}")
+
+        # 総当たりとの比較（総当たりは読み込み済みの単語名のリストを調べる時間だけを計測する）
+        brute_timings = []
+        recalls = []
+        exact = 0
+        for (word_id, query), rows in list(zip(queries, results))[:args.brute_queries]:
+            start = time.perf_counter()
+            matches = brute_force_lookup(keys, query, args.max_distance)
+            brute_timings.append((time.perf_counter() - start) * 1000)
+            expected = [distance for distance, _ in heapq.nsmallest(args.k, matches)]
+            if expected:
+                # fuzzy_lookupの結果はすべて編集距離の条件を満たすため、総当たりで見つかった件数（k件まで）に対する割合を再現率とする
+                recalls.append(len(rows) / len(expected))
+            exact += [row[3] for row in rows] == expected
+        if brute_timings:
+            report("総当たり", brute_timings)
+            print(f"{'再現率（総当たりとの比較）':28s} 平均 {statistics.mean(recalls):.3f}  "
+                  f"編集距離の並びが一致 {exact}/{len(brute_timings)}")
+        model.connection.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
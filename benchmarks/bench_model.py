@@ -0,0 +1,177 @@
+# 合成データでModelの主なメソッドの応答時間とメモリ使用量を計測するベンチマーク
+# 結果をJSONで書き出し、保存済みの基準値と比較して遅くなったメソッドがあれば終了コード1で終了する
+# 使い方: python benchmarks/bench_model.py [--sizes 1000,100000,1000000] [--output result.json]
+#                                          [--baseline benchmarks/baseline.json] [--tolerance 0.5]
+# 基準値は計測するマシンごとに異なるため、基準にしたい状態で --output benchmarks/baseline.json を指定して作り直すこと
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model import Model
+
+# 計測の対象になるジャンル（sizeの件数の単語を持つ）
+TARGET_GENRE_ID = 1
+# delete_genreの計測で1回に削除するジャンルの単語数
+SMALL_GENRE_WORDS = 100
+# 基準値との差がこのミリ秒未満の場合は、割合が大きくても遅くなったとみなさない（計測誤差）
+MIN_REGRESSION_MS = 0.05
+
+
+# 合成データの(単語名, 詳細, 自信度)を順に返すジェネレータ
+def generate_words(count: int, rng: random.Random, prefix: str = "word"):
+    for i in range(count):
+        yield (f"{prefix}{i}", f"これは単語{i}の詳細です。" * rng.randint(1, 5), rng.random() < 0.5)
+
+
+# 応答時間（ミリ秒）のリストからパーセンタイルを計算
+def percentile(timings: list, p: float) -> float:
+    timings = sorted(timings)
+    return timings[min(int(len(timings) * p), len(timings) - 1)]
+
+
+# 関数をrepeat回実行した応答時間の統計と、1回の実行で確保されたメモリの最大量を計測
+# argsは実行ごとの引数を返す関数
+def measure(function, args, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        call_args = args()
+        start = time.perf_counter()
+        function(*call_args)
+        timings.append((time.perf_counter() - start) * 1000)
+    # tracemallocは処理を遅くするため、応答時間とは別に1回だけ実行して計測する
+    call_args = args()
+    tracemalloc.start()
+    try:
+        function(*call_args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'count': len(timings),
+        'p50_ms': percentile(timings, 0.50),
+        'p95_ms': percentile(timings, 0.95),
+        'p99_ms': percentile(timings, 0.99),
+        'max_ms': max(timings),
+        'peak_kb': peak / 1024,
+    }
+
+
+# sizeの件数の単語を持つデータベースを作り、各メソッドを計測
+def bench_size(db_path: str, size: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    model = Model(db_path)
+    model.add_genre("bench")
+    model.bulk_import(TARGET_GENRE_ID, generate_words(size, rng), batch_size=10000)
+    word_ids = [row[0] for row in model.cursor.execute('''SELECT id FROM words WHERE genre_id = ?''', (TARGET_GENRE_ID,))]
+    # 1回の読み込みが重いメソッドは件数に応じて回数を減らす
+    read_repeat = max(5, min(50, 5_000_000 // max(size, 1)))
+    write_repeat = 200
+
+    results = {}
+    # 同じ単語は追加できないため、毎回異なる単語を追加する
+    added = iter(range(write_repeat + 1))
+    results['add_word'] = measure(model.add_word, lambda: (TARGET_GENRE_ID, f"added{next(added)}", "added details", False),
+                                  write_repeat)
+    # 重複の判定（大文字・全角で表記の異なる既存の単語を一意なインデックスで探す）
+    results['find_duplicate'] = measure(model.find_duplicate, lambda: (TARGET_GENRE_ID, f"ＷＯＲＤ{rng.randrange(size)}"),
+                                        write_repeat)
+    results['add_word_duplicate'] = measure(model.add_word, lambda: (TARGET_GENRE_ID, f"WORD{rng.randrange(size)}",
+                                                                     "added details", False, 'merge'), write_repeat)
+    results['get_words'] = measure(model.get_words, lambda: (TARGET_GENRE_ID,), read_repeat)
+    results['sort_confidence'] = measure(model.sort_confidence, lambda: (TARGET_GENRE_ID,), read_repeat)
+    # スタート画面の表示（ジャンルごとの単語数）
+    results['get_genres_with_stats'] = measure(model.get_genres_with_stats, lambda: (), write_repeat)
+    results['update_word_confidence'] = measure(model.update_word_confidence,
+                                                lambda: (rng.choice(word_ids), rng.random() < 0.5), write_repeat)
+    word_list = model.get_words(TARGET_GENRE_ID)
+    results['make_shuffle_list'] = measure(model.make_shuffle_list, lambda: (word_list,), read_repeat)
+    del word_list
+
+    # delete_genreは小さなジャンルを作ってから1つずつ削除する（大きなデータベースの中での削除の速さを計測）
+    genre_ids = []
+    for i in range(read_repeat + 1):
+        model.add_genre(f"small {i}")
+        genre_ids.append(model.cursor.lastrowid)
+        model.bulk_import(genre_ids[-1], generate_words(SMALL_GENRE_WORDS, rng, "small"))
+    results['delete_genre'] = measure(model.delete_genre, lambda: (genre_ids.pop(),), read_repeat)
+    model.connection.close()
+    return results
+
+
+# 計測結果を表示
+def report(size: int, results: dict):
+    print(f"--- {size}件 ---")
+    for name, stats in results.items():
+        print(f"{name:24s} p50 {stats['p50_ms']:10.3f} ms  p95 {stats['p95_ms']:10.3f} ms  "
+              f"p99 {stats['p99_ms']:10.3f} ms  最大メモリ {stats['peak_kb']:10.1f} KB  ({stats['count']}回)")
+
+
+# 基準値と比較し、p50がtolerance（割合）を超えて遅くなったメソッドの説明のリストを返す
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for size, methods in results.items():
+        for name, stats in methods.items():
+            base = baseline.get(size, {}).get(name)
+            if base is None:
+                continue
+            limit = base['p50_ms'] * (1 + tolerance)
+            if stats['p50_ms'] > limit and stats['p50_ms'] - base['p50_ms'] >= MIN_REGRESSION_MS:
+                regressions.append(f"{size}件 {name}: p50 {stats['p50_ms']:.3f} ms（基準 {base['p50_ms']:.3f} ms, "
+                                   f"{stats['p50_ms'] / base['p50_ms']:.2f}倍）")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default="1000,100000,1000000", help="計測する単語数（カンマ区切り）")
+    parser.add_argument('--output', help="計測結果を書き出すJSONファイル")
+    parser.add_argument('--baseline', help="比較する基準値のJSONファイル")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="遅くなったとみなすp50の増加の割合（既定: 0.5 = 1.5倍）")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (int(s) for s in args.sizes.split(',')):
+            results[str(size)] = bench_size(os.path.join(tmp, f"bench_{size}.db"), size, args.seed)
+            report(size, results[str(size)])
+
+    document = {
+        'environment': {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            # Linuxではキロバイト単位
+            'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(document, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline['results'], args.tolerance)
+        if regressions:
+            print("基準値より遅くなったメソッドがあります:", file=sys.stderr)
+            for line in regressions:
+                print("  " + line, file=sys.stderr)
+            return 1
+        print("基準値からの遅延はありません")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+# ランダム出題（Model.sample_words）と全単語のシャッフルで、理解度チェックを始めるまでの時間を比較するベンチマーク
+# 使い方: python benchmarks/bench_quiz.py [--words 1000000] [--size 20] [--repeat 50]
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model import Model, QuizSession
+
+
+# 合成データの(単語名, 詳細, 自信度)を順に返すジェネレータ
+def generate_words(words: int, seed: int):
+    rng = random.Random(seed)
+    for i in range(words):
+        yield (f"word{i}", f"これは単語{i}の詳細です。", rng.random() < 0.7)
+
+
+# 応答時間の統計を表示
+def report(label: str, timings: list):
+    timings = sorted(timings)
+    p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+    print(f"{label:24s} 中央値 {statistics.median(timings):9.3f} ms  p95 {p95:9.3f} ms  最大 {timings[-1]:9.3f} ms")
+
+
+# 関数をrepeat回実行し、応答時間（ミリ秒）のリストを返す
+def time_calls(function, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--words', type=int, default=1000000, help="ジャンルの単語数")
+    parser.add_argument('--size', type=int, default=20, help="1回の理解度チェックで出題する単語数")
+    parser.add_argument('--repeat', type=int, default=50, help="計測の回数")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        model = Model(os.path.join(tmp, "bench_quiz.db"))
+        model.add_genre("bench A")
+        model.add_genre("bench B")
+        start = time.perf_counter()
+        model.bulk_import(1, generate_words(args.words, args.seed), batch_size=10000)
+        model.bulk_import(2, generate_words(args.words // 10, args.seed + 1), batch_size=10000)
+        print(f"{args.words + args.words // 10}件の生成: {time.perf_counter() - start:.1f} 秒")
+
+        report("1問目まで", time_calls(lambda: QuizSession(model.sample_words([1], args.size, rng=rng)), args.repeat))
+        report("全問の抽出", time_calls(lambda: list(model.sample_words([1], args.size, rng=rng)), args.repeat))
+        report("全問の抽出(自信なし優先)",
+               time_calls(lambda: list(model.sample_words([1], args.size, weak_weight=3, rng=rng)), args.repeat))
+        report("全問の抽出(2ジャンル)", time_calls(lambda: list(model.sample_words([1, 2], args.size, rng=rng)), args.repeat))
+        report("全単語のシャッフル", time_calls(lambda: model.make_shuffle_list(model.get_words(1)), 3))
+        model.connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# 復習スケジュールで1年分の理解度チェックを再現し、出題と評価の書き込みにかかる時間を計測するベンチマーク
+# 使い方: python benchmarks/bench_scheduler.py [--cards 1000000] [--days 365] [--reviews-per-day 5000]
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model import Model, GRADE_AGAIN, GRADE_GOOD, GRADE_EASY, SECONDS_PER_DAY
+
+# 評価の出現割合（もう一度、正解、簡単）
+GRADE_WEIGHTS = ((GRADE_AGAIN, 0.1), (GRADE_GOOD, 0.8), (GRADE_EASY, 0.1))
+
+
+# 合成データの(単語名, 詳細, 自信度)を順に返すジェネレータ
+def generate_cards(cards: int):
+    for i in range(cards):
+        yield (f"word{i}", f"これは単語{i}の詳細です。", False)
+
+
+# 応答時間の統計を表示
+def report(label: str, timings: list):
+    timings = sorted(timings)
+    p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+    print(f"{label:24s} 中央値 {statistics.median(timings):8.3f} ms  p95 {p95:8.3f} ms  最大 {timings[-1]:8.3f} ms"
+          f"  ({len(timings)}回)")
+
+
+# 従来の方法（ジャンルの全単語を読み込んでシャッフル）で1回分の出題を作る時間を計測
+def time_shuffle(model: Model, genre_id: int, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        model.make_shuffle_list(model.get_words(genre_id))
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cards', type=int, default=1000000, help="単語数")
+    parser.add_argument('--days', type=int, default=365, help="再現する日数")
+    parser.add_argument('--reviews-per-day', type=int, default=5000, help="1日に評価する単語数の上限")
+    parser.add_argument('--session-size', type=int, default=20, help="1回の理解度チェックで出題する単語数")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    grades = [grade for grade, _ in GRADE_WEIGHTS]
+    weights = [weight for _, weight in GRADE_WEIGHTS]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model = Model(os.path.join(tmp, "bench_scheduler.db"))
+        model.add_genre("bench")
+        start = time.perf_counter()
+        model.bulk_import(1, generate_cards(args.cards), batch_size=10000)
+        print(f"{args.cards}件の生成: {time.perf_counter() - start:.1f} 秒")
+
+        fetch_timings = []
+        queue_timings = []
+        reviews = 0
+        start_time = time.time()
+        simulation_start = time.perf_counter()
+        for day in range(args.days):
+            now = start_time + day * SECONDS_PER_DAY
+            reviewed = 0
+            while reviewed < args.reviews_per_day:
+                start = time.perf_counter()
+                cards = model.get_due_words(1, min(args.session_size, args.reviews_per_day - reviewed), now)
+                fetch_timings.append((time.perf_counter() - start) * 1000)
+                if not cards:
+                    break
+                for card in cards:
+                    start = time.perf_counter()
+                    model.queue_review(card, rng.choices(grades, weights)[0], now)
+                    queue_timings.append((time.perf_counter() - start) * 1000)
+                reviewed += len(cards)
+            reviews += reviewed
+        model.flush_pending()
+        elapsed = time.perf_counter() - simulation_start
+
+        print(f"{args.days}日分 {reviews}回の評価: {elapsed:.1f} 秒")
+        report("出題の取得", fetch_timings)
+        report("評価の記録", queue_timings)
+        report("全単語のシャッフル", time_shuffle(model, 1, 5))
+        model.connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# Model.searchの応答時間を計測するベンチマーク
+# 使い方: python benchmarks/bench_search.py [--rows 1000000] [--queries 200] [--db path]
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model import Model
+
+# 詳細文の生成に使う語彙
+VOCABULARY = ["果物", "動物", "名詞", "動詞", "形容詞", "英語", "例文", "意味", "発音", "用法",
+              "history", "science", "music", "travel", "market", "weather", "garden", "language"]
+
+
+# ランダムな単語名を作成
+def random_word(rng: random.Random) -> str:
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 10)))
+
+
+# 合成データの(単語名, 詳細, 自信度)を順に返すジェネレータ
+def generate_rows(rows: int, seed: int):
+    rng = random.Random(seed)
+    for _ in range(rows):
+        details = ' '.join(rng.choice(VOCABULARY) for _ in range(rng.randint(5, 20)))
+        yield (random_word(rng), details, rng.random() < 0.5)
+
+
+# 検索をqueries回実行し、応答時間（ミリ秒）のリストを返す
+def time_queries(model: Model, queries: list, genre_id=None) -> list:
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        model.search(query, genre_id)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+# 応答時間の統計を表示
+def report(label: str, timings: list):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:24s} 中央値 {statistics.median(timings):8.2f} ms  p95 {p95:8.2f} ms  最大 {timings[-1]:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000, help="生成する単語数")
+    parser.add_argument('--queries', type=int, default=200, help="種類ごとの検索回数")
+    parser.add_argument('--db', help="既存のベンチマーク用データベース（指定しない場合は一時ファイルに生成）")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db or os.path.join(tmp, "bench_search.db")
+        model = Model(db_path)
+        if not model.get_genres():
+            model.add_genre("bench A")
+            model.add_genre("bench B")
+            start = time.perf_counter()
+            half = args.rows // 2
+            model.bulk_import(1, generate_rows(half, args.seed), batch_size=10000)
+            model.bulk_import(2, generate_rows(args.rows - half, args.seed + 1), batch_size=10000)
+            print(f"{args.rows}件の生成と索引作成: {time.perf_counter() - start:.1f} 秒")
+
+        rng = random.Random(args.seed)
+        # 実在する単語名の一部（ほとんどの場合ヒット数が少ない）
+        max_id = model.cursor.execute('''SELECT max(id) FROM words''').fetchone()[0]
+        word_queries = []
+        for _ in range(args.queries):
+            word = model.get_word(rng.randint(1, max_id))[2]
+            word_queries.append(word[:rng.randint(3, len(word))])
+        # 詳細文の語彙（ヒット数が非常に多い）
+        common_queries = [rng.choice(VOCABULARY) + ' ' + rng.choice(VOCABULARY) for _ in range(args.queries // 10)]
+
+        report("単語名の部分一致", time_queries(model, word_queries))
+        report("単語名の部分一致(ジャンル)", time_queries(model, word_queries, 1))
+        report("頻出語の組み合わせ", time_queries(model, common_queries))
+        model.connection.close()
+
+
+if __name__ == "__main__":
+    main()
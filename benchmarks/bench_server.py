@@ -0,0 +1,124 @@
+# サーバー（server.py）の負荷試験。サーバーを別のプロセスで起動し、複数のクライアントのスレッドから読み書きを混ぜて送り続ける
+# 1秒あたりのリクエスト数と応答時間（中央値、p99）を、WALモードと従来のジャーナルモード（delete）で比較する
+# 使い方: python benchmarks/bench_server.py [--words 100000] [--clients 8] [--seconds 10] [--write-ratio 0.1] [--journal-modes wal,delete]
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from model import Model
+from remote import RemoteModel
+
+
+# 合成データの(単語名, 詳細, 自信度)を順に返すジェネレータ
+def generate_words(words: int, seed: int):
+    rng = random.Random(seed)
+    for i in range(words):
+        yield (f"word{i}", f"これは単語{i}の詳細です。" * 3, rng.random() < 0.5)
+
+
+# 3つのジャンルに単語を追加したデータベースを作成
+def create_database(db_name: str, words: int, seed: int):
+    model = Model(db_name)
+    for genre_id in range(1, 4):
+        model.add_genre(f"genre{genre_id}")
+        model.bulk_import(genre_id, generate_words(words // 3, seed + genre_id), batch_size=10000)
+    model.close()
+
+
+# サーバーを別のプロセスで起動し、(プロセス, URL)を返す（空いているポートで起動し、表示されたURLを読み取る）
+def start_server(db_name: str, readers: int, journal_mode: str) -> tuple:
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "server.py"), "--db", db_name, "--port", "0",
+         "--readers", str(readers), "--journal-mode", journal_mode],
+        stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    return process, line.split()[0]
+
+
+# 1つのクライアントとして、終了時刻まで読み書きを送り続け、種類ごとの応答時間（ミリ秒）をlatenciesに追加する
+def run_client(url: str, word_ids: list, write_ratio: float, deadline: float, seed: int, latencies: dict):
+    rng = random.Random(seed)
+    client = RemoteModel(url)
+    reads = [
+        ('get_word_summary', lambda: client.call('get_word_summary', rng.choice(word_ids))),
+        ('load_word_details', lambda: client.call('load_word_details', rng.choice(word_ids))),
+        ('get_words_page', lambda: client.call('get_words_page', rng.randint(1, 3), None, 50)),
+        ('search', lambda: client.call('search', f"word{rng.choice(word_ids) - 1}", None, 20)),
+        ('sample_words', lambda: client.call('sample_words', [rng.randint(1, 3)], 20)),
+    ]
+    while time.perf_counter() < deadline:
+        if rng.random() < write_ratio:
+            # 画面の書き込み待ちと同じく、数件の自信度の更新を1回で送る
+            label = 'write_confidence'
+            updates = [[rng.choice(word_ids), rng.random() < 0.5] for _ in range(5)]
+            start = time.perf_counter()
+            client.call('write_confidence', updates)
+        else:
+            label, request = rng.choice(reads)
+            start = time.perf_counter()
+            request()
+        latencies.setdefault(label, []).append((time.perf_counter() - start) * 1000)
+    client.close()
+
+
+# 応答時間（ミリ秒）のリストを表示
+def report(label: str, timings: list, seconds: float):
+    timings = sorted(timings)
+    print(f"  {label:20s} {len(timings) / seconds:9.1f} req/s  中央値 {statistics.median(timings):8.2f} ms"
+          f"  p99 {timings[int(len(timings) * 0.99)]:8.2f} ms  最大 {timings[-1]:8.2f} ms")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--words', type=int, default=100000, help="単語数（3つのジャンルに分ける）")
+    parser.add_argument('--clients', type=int, default=8, help="同時に接続するクライアントの数")
+    parser.add_argument('--readers', type=int, default=4, help="サーバーの読み込み用の接続の数")
+    parser.add_argument('--seconds', type=float, default=10, help="1つのジャーナルモードで負荷をかける秒数")
+    parser.add_argument('--write-ratio', type=float, default=0.1, help="書き込みの割合")
+    parser.add_argument('--journal-modes', default='wal,delete', help="比較するジャーナルモード（カンマ区切り）")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for journal_mode in args.journal_modes.split(','):
+            db_name = os.path.join(tmp, f"bench_server_{journal_mode}.db")
+            create_database(db_name, args.words, args.seed)
+            word_ids = list(range(1, args.words // 3 * 3 + 1))
+            process, url = start_server(db_name, args.readers, journal_mode)
+            try:
+                latencies = [{} for _ in range(args.clients)]
+                deadline = time.perf_counter() + args.seconds
+                threads = [threading.Thread(target=run_client,
+                                            args=(url, word_ids, args.write_ratio, deadline, args.seed + i, latencies[i]))
+                           for i in range(args.clients)]
+                start = time.perf_counter()
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                elapsed = time.perf_counter() - start
+            finally:
+                process.terminate()
+                process.wait()
+            merged = {}
+            for client_latencies in latencies:
+                for label, timings in client_latencies.items():
+                    merged.setdefault(label, []).extend(timings)
+            print(f"{journal_mode}（クライアント {args.clients}、読み込み用の接続 {args.readers}、書き込みの割合 {args.write_ratio}）")
+            report("全体", [timing for timings in merged.values() for timing in timings], elapsed)
+            for label in sorted(merged):
+                report(label, merged[label], elapsed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+# Modelの読み込み時間と、最初のウィンドウが表示されるまでの時間を別々に計測するベンチマーク
+# それぞれ新しいPythonのプロセスで計測する（モジュールのキャッシュの影響を受けないようにするため）
+# 使い方: python benchmarks/bench_startup.py [--repeat 10] [--output startup.json]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 子プロセスで実行するスクリプト（最後の行に計測結果のJSONを出力する）
+IMPORT_MODEL_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+from model import Model
+print(json.dumps({"ms": (time.perf_counter() - start) * 1000, "tkinter": "tkinter" in sys.modules}))
+'''
+
+IMPORT_APP_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+from app import Model
+print(json.dumps({"ms": (time.perf_counter() - start) * 1000, "tkinter": "tkinter" in sys.modules}))
+'''
+
+FIRST_WINDOW_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+import app
+try:
+    window, switcher = app.create_window(sys.argv[1])
+except Exception as e:
+    print(json.dumps({"error": str(e)}))
+    sys.exit(0)
+window.update()
+elapsed = (time.perf_counter() - start) * 1000
+switcher.close()
+window.destroy()
+print(json.dumps({"ms": elapsed}))
+'''
+
+
+# スクリプトを新しいプロセスで実行し、(プロセス全体の時間, スクリプトが出力した計測結果)を返す
+def run_script(script: str, *args) -> tuple:
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-c', script, *args], cwd=ROOT, capture_output=True, text=True,
+                               check=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    return elapsed, json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+# スクリプトをrepeat回実行した計測結果をまとめる（計測できなかった場合はerrorを含む）
+def measure(script: str, repeat: int, *args) -> dict:
+    process_timings = []
+    timings = []
+    result = {}
+    for _ in range(repeat):
+        process_ms, result = run_script(script, *args)
+        if 'error' in result:
+            return {'error': result['error']}
+        process_timings.append(process_ms)
+        timings.append(result['ms'])
+    summary = {'median_ms': statistics.median(timings), 'max_ms': max(timings),
+               'process_median_ms': statistics.median(process_timings)}
+    if 'tkinter' in result:
+        summary['loads_tkinter'] = result['tkinter']
+    return summary
+
+
+# 計測結果を表示
+def report(label: str, summary: dict):
+    if 'error' in summary:
+        print(f"{label:24s} 計測できませんでした: {summary['error']}")
+        return
+    line = (f"{label:24s} 中央値 {summary['median_ms']:8.1f} ms  最大 {summary['max_ms']:8.1f} ms"
+            f"  （プロセス全体 {summary['process_median_ms']:8.1f} ms）")
+    if 'loads_tkinter' in summary:
+        line += "  tkinterを読み込む" if summary['loads_tkinter'] else "  tkinterを読み込まない"
+    print(line)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=10, help="計測の回数")
+    parser.add_argument('--output', help="計測結果を書き出すJSONファイル")
+    args = parser.parse_args(argv)
+
+    results = {
+        'import_model': measure(IMPORT_MODEL_SCRIPT, args.repeat),
+        'import_app': measure(IMPORT_APP_SCRIPT, args.repeat),
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        # 表示できる環境（DISPLAYなど）がない場合は計測できない
+        results['first_window'] = measure(FIRST_WINDOW_SCRIPT, args.repeat, os.path.join(tmp, "startup.db"))
+
+    report("from model import Model", results['import_model'])
+    report("from app import Model", results['import_app'])
+    report("最初のウィンドウまで", results['first_window'])
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
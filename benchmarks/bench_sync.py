@@ -0,0 +1,136 @@
+# 2つのデータベースの同期（Model.sync_with）の速さを測るベンチマーク
+# 大きなデータベースAをコピーしてBを作り、同期済みの状態にしてから両方で数百件ずつ変更し、
+# 同期にかかる時間とやり取りした行数を測る（変更した行だけを送るため、単語数によらず短い時間で済むことを確認する）
+# 最後に両方の内容が一致することを確かめる。--initial-wordsを指定すると、空のデータベースへの最初の同期も測る
+# 使い方: python benchmarks/bench_sync.py [--words 1000000] [--edits 300] [--initial-words 100000]
+import argparse
+import hashlib
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from model import Model, make_details_sql
+
+
+# 合成データの(単語名, 詳細, 自信度)を順に返すジェネレータ
+def generate_words(words: int, seed: int):
+    rng = random.Random(seed)
+    for i in range(words):
+        yield (f"word{i}", f"これは単語{i}の詳細です。" * 3, rng.random() < 0.5)
+
+
+# 3つのジャンルに単語を追加したデータベースを作成
+def create_database(db_name: str, words: int, seed: int):
+    model = Model(db_name)
+    for genre_id in range(1, 4):
+        model.add_genre(f"genre{genre_id}")
+        model.bulk_import(genre_id, generate_words(words // 3, seed + genre_id), batch_size=10000)
+    model.close()
+
+
+# 単語の内容（同期用のIDの順）のハッシュ値と単語数を返す
+def digest(model: Model) -> tuple:
+    hasher = hashlib.blake2b()
+    count = 0
+    cursor = model.connection.execute(f'''
+        SELECT words.uid, genres.uid, word, {make_details_sql()}, confidence, review_interval, ease, repetitions, due
+        FROM words JOIN genres ON genres.id = words.genre_id WHERE genres.deleted = 0 ORDER BY words.uid
+    ''')
+    for row in cursor:
+        hasher.update(repr(row).encode('utf-8'))
+        count += 1
+    return hasher.hexdigest(), count
+
+
+# 単語の編集、追加、削除、自信度の更新を混ぜてedits件の変更を加える
+def make_edits(model: Model, edits: int, max_word_id: int, label: str, rng: random.Random):
+    for i in range(edits):
+        word_id = rng.randint(1, max_word_id)
+        kind = i % 4
+        if model.get_word(word_id) is None:
+            continue
+        if kind == 0:
+            model.edit_word(word_id, model.get_word(word_id)[2], f"{label}で編集した詳細{i}")
+        elif kind == 1:
+            model.add_word(rng.randint(1, 3), f"{label}_new{i}", f"{label}で追加した単語")
+        elif kind == 2:
+            model.delete_word(word_id)
+        else:
+            model.queue_word_confidence(word_id, rng.random() < 0.5)
+    model.flush_pending()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--words', type=int, default=1000000, help="単語数（3つのジャンルに分ける）")
+    parser.add_argument('--edits', type=int, default=300, help="それぞれのデータベースで加える変更の数")
+    parser.add_argument('--initial-words', type=int, default=0, help="空のデータベースへの最初の同期を測る単語数（0で測らない）")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        a_name = os.path.join(tmp, "bench_sync_a.db")
+        b_name = os.path.join(tmp, "bench_sync_b.db")
+        start = time.perf_counter()
+        create_database(a_name, args.words, args.seed)
+        print(f"データベースの作成: {time.perf_counter() - start:.1f}秒（{args.words}語、"
+              f"{os.path.getsize(a_name) / 1024 / 1024:.1f} MB）")
+        shutil.copyfile(a_name, b_name)
+
+        a = Model(a_name)
+        b = Model(b_name)
+        # コピーしたBを別のデータベースにし、お互いの今の版番号まで同期済みとして記録する
+        b.cursor.execute('''UPDATE sync_state SET replica_id = randomblob(16) WHERE id = 1''')
+        b.connection.commit()
+        (a_id, a_clock), (b_id, b_clock) = a.get_sync_state(), b.get_sync_state()
+        a.set_peer_version(b_id, b_clock)
+        a.connection.commit()
+        b.set_peer_version(a_id, a_clock)
+        b.connection.commit()
+
+        max_word_id = args.words // 3 * 3
+        make_edits(a, args.edits, max_word_id, "A", rng)
+        make_edits(b, args.edits, max_word_id, "B", rng)
+        # 両方で同じ単語を編集した競合も含める
+        for word_id in rng.sample(range(1, max_word_id + 1), 20):
+            for model, label in ((a, "A"), (b, "B")):
+                word = model.get_word(word_id)
+                if word is not None:
+                    model.edit_word(word_id, word[2], f"{label}で同時に編集した詳細")
+
+        start = time.perf_counter()
+        sent, received = a.sync_with(b)
+        elapsed = time.perf_counter() - start
+        print(f"差分の同期: {elapsed * 1000:.1f} ms（{sent}行を送り、{received}行を受け取った）")
+        start = time.perf_counter()
+        again = a.sync_with(b)
+        print(f"変更がない場合の同期: {(time.perf_counter() - start) * 1000:.1f} ms（{again[0]}行、{again[1]}行）")
+        a_digest, b_digest = digest(a), digest(b)
+        print(f"内容の一致: {'OK' if a_digest == b_digest else 'NG'}（{a_digest[1]}語）")
+        a.close()
+        b.close()
+
+        if args.initial_words:
+            c_name = os.path.join(tmp, "bench_sync_c.db")
+            d_name = os.path.join(tmp, "bench_sync_d.db")
+            create_database(c_name, args.initial_words, args.seed)
+            c = Model(c_name)
+            d = Model(d_name)
+            start = time.perf_counter()
+            sent, received = c.sync_with(d)
+            elapsed = time.perf_counter() - start
+            print(f"最初の同期: {elapsed:.2f}秒（{sent}行、{sent / elapsed:.0f}行/秒）")
+            print(f"内容の一致: {'OK' if digest(c) == digest(d) else 'NG'}")
+            c.close()
+            d.close()
+        return 0 if a_digest == b_digest else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
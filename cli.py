@@ -0,0 +1,384 @@
+# My単語帳のデータベースをコマンドラインから操作するモジュール（画面を使わないため、表示できない環境でも動く）
+# 使い方: python cli.py [--db ファイル] <サブコマンド> ...（python cli.py -h で一覧を表示）
+# 各サブコマンドは1つの接続で実行され、書き込みは1つのトランザクションにまとめられる
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+from analytics import bucket_label, check_attempt_stats
+from model import (Model, read_word_file, read_word_stream, write_word_stream, day_to_date, local_day,
+                   BACKUP_PAGES_PER_STEP, DELETE_CHUNK_SIZE, DUPLICATE_STRATEGIES, EXPORT_FETCH_SIZE, RECOMPRESS_CHUNK_SIZE)
+
+# ファイル形式の選択肢
+FORMATS = ['csv', 'tsv', 'jsonl']
+
+
+# インポートの進捗を標準エラー出力に表示
+def print_progress(count: int):
+    print(f"\r{count}件 読み込み済み", end='', file=sys.stderr, flush=True)
+
+
+# 書き出し先のファイルを開く（"-"の場合は標準出力を使い、閉じない）
+@contextlib.contextmanager
+def open_output(path: str):
+    if path == '-':
+        yield sys.stdout
+        sys.stdout.flush()
+    else:
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            yield f
+
+
+# ファイル形式を決める（指定されていない場合は拡張子から判定し、標準入出力の場合はcsv）
+def resolve_format(path: str, fmt: str = None) -> str:
+    if fmt is not None:
+        return fmt
+    if path == '-':
+        return 'csv'
+    return os.path.splitext(path)[1].lower().lstrip('.')
+
+
+# ジャンルが存在することを確認（存在しない場合はエラーを表示してFalseを返す）
+def check_genre(model: Model, genre_id: int) -> bool:
+    if model.get_genre(genre_id) is None:
+        print(f"ジャンルが見つかりません: {genre_id}", file=sys.stderr)
+        return False
+    return True
+
+
+# "import"サブコマンドの処理
+def command_import(model: Model, args) -> int:
+    if not check_genre(model, args.genre_id):
+        return 1
+    if args.file == '-':
+        # "-"が指定された場合は標準入力から読み込む
+        rows = read_word_stream(sys.stdin, args.format or 'csv')
+    else:
+        rows = read_word_file(args.file, args.format)
+    count = model.bulk_import(args.genre_id, rows, batch_size=args.batch_size, progress=print_progress,
+                              on_duplicate=args.on_duplicate)
+    print(file=sys.stderr)
+    print(f"{count}件の単語を読み込みました")
+    return 0
+
+
+# "export"サブコマンドの処理（1件ずつ読み込みながら書き出すため、単語数によらず一定のメモリで動く）
+def command_export(model: Model, args) -> int:
+    if not check_genre(model, args.genre_id):
+        return 1
+    with open_output(args.file) as f:
+        count = write_word_stream(f, resolve_format(args.file, args.format),
+                                  model.iter_words(args.genre_id, args.fetch_size))
+    print(f"{count}件の単語を書き出しました", file=sys.stderr)
+    return 0
+
+
+# バックアップの進捗を標準エラー出力に表示
+def print_backup_progress(copied: int, total: int):
+    print(f"\r{copied}/{total}ページ コピー済み", end='', file=sys.stderr, flush=True)
+
+
+# "backup"サブコマンドの処理（アプリの使用中でも実行できる）
+def command_backup(model: Model, args) -> int:
+    pages = model.backup(args.file, args.pages, progress=print_backup_progress)
+    print(file=sys.stderr)
+    print(f"{pages}ページをバックアップしました", file=sys.stderr)
+    return 0
+
+
+# "stats"サブコマンドの処理（ジャンルごとの単語数をタブ区切りで表示）
+def command_stats(model: Model, args) -> int:
+    print("id\tname\twords\tconfident\tnot_confident")
+    for genre_id, name, words, confident in model.get_genres_with_stats():
+        print(f"{genre_id}\t{name}\t{words}\t{confident}\t{words - confident}")
+    return 0
+
+
+# "check-stats"サブコマンドの処理（ジャンルごとの単語数の集計が単語テーブルと食い違っていないか確認する）
+def command_check_stats(model: Model, args) -> int:
+    mismatches = model.check_genre_stats(rebuild=args.rebuild)
+    if not mismatches:
+        print("ジャンルごとの単語数の集計は正しく更新されています", file=sys.stderr)
+        return 0
+    print("genre_id\tstored_words\tstored_confident\twords\tconfident")
+    for genre_id, (stored_words, stored_confident), (words, confident) in mismatches:
+        print(f"{genre_id}\t{stored_words}\t{stored_confident}\t{words}\t{confident}")
+    if args.rebuild:
+        print(f"{len(mismatches)}件のジャンルの集計を作り直しました", file=sys.stderr)
+        return 0
+    print(f"{len(mismatches)}件のジャンルの集計が食い違っています（--rebuildで作り直せます）", file=sys.stderr)
+    return 1
+
+
+# "activity"サブコマンドの処理（理解度チェックの解答の集計をタブ区切りで表示する）
+# daily: 日ごとの解答数、retention: 前回の解答からの経過ごとの正解率、words: 単語ごとの正解率（低い順）
+def command_activity(model: Model, args) -> int:
+    if args.genre is not None and not check_genre(model, args.genre):
+        return 1
+    if args.view == 'daily':
+        since_day = None if args.days is None else local_day(time.time()) - args.days + 1
+        print("date\tattempts\tcorrect\taccuracy\tnew_words")
+        for day, attempts, correct, new_words in model.get_daily_activity(args.genre, since_day):
+            print(f"{day_to_date(day)}\t{attempts}\t{correct}\t{correct / attempts:.3f}\t{new_words}")
+        return 0
+    genre_ids = [genre_id for genre_id, _ in model.get_genres()] if args.genre is None else [args.genre]
+    if args.view == 'retention':
+        print("genre_id\telapsed\tattempts\tcorrect\taccuracy")
+        for genre_id in genre_ids:
+            for bucket, attempts, correct in model.get_retention_curve(genre_id):
+                print(f"{genre_id}\t{bucket_label(bucket)}\t{attempts}\t{correct}\t{correct / attempts:.3f}")
+        return 0
+    print("genre_id\tid\tword\tattempts\tcorrect\taccuracy")
+    for genre_id in genre_ids:
+        for word_id, word, attempts, correct in model.get_word_accuracy(genre_id)[:args.limit]:
+            print(f"{genre_id}\t{word_id}\t{word}\t{attempts}\t{correct}\t{correct / attempts:.3f}")
+    return 0
+
+
+# "check-activity"サブコマンドの処理（解答の集計が解答の記録と食い違っていないか確認する）
+def command_check_activity(model: Model, args) -> int:
+    mismatches = check_attempt_stats(model, rebuild=args.rebuild)
+    if not mismatches:
+        print("解答の集計は正しく更新されています", file=sys.stderr)
+        return 0
+    print("table\tkey\tstored\tactual")
+    for table, key, stored, actual in mismatches:
+        print(f"{table}\t{key}\t{stored}\t{actual}")
+    if args.rebuild:
+        print(f"{len(mismatches)}件の集計を作り直しました", file=sys.stderr)
+        return 0
+    print(f"{len(mismatches)}件の集計が食い違っています（--rebuildで作り直せます）", file=sys.stderr)
+    return 1
+
+
+# "dedupe"サブコマンドの処理（同じジャンルの重複した単語を1つにまとめる）
+def command_dedupe(model: Model, args) -> int:
+    removed = model.dedupe_words(args.strategy)
+    print(f"{removed}件の重複した単語をまとめました", file=sys.stderr)
+    return 0
+
+
+# "compress"サブコマンドの処理（ジャンルの長い詳細を圧縮し直す）
+# --trainでジャンルごとに圧縮用の辞書を学習し、--vacuumで圧縮して空いた領域をデータベースファイルから除く
+def command_compress(model: Model, args) -> int:
+    genre_ids = [genre_id for genre_id, _ in model.get_genres()] if args.genre is None else [args.genre]
+    before = os.path.getsize(args.db)
+    for genre_id in genre_ids:
+        dictionary_id = model.train_details_dictionary(genre_id) if args.train else None
+        if dictionary_id is None:
+            # 辞書を学習した場合は、学習の後に圧縮し直している
+            model.recompress_details(genre_id, args.chunk_size)
+        else:
+            print(f"ジャンル{genre_id}の辞書を学習しました（辞書ID: {dictionary_id}）", file=sys.stderr)
+    if args.vacuum:
+        model.connection.execute('''VACUUM''')
+    print(f"{len(genre_ids)}件のジャンルの詳細を圧縮し直しました（{before}バイト → {os.path.getsize(args.db)}バイト）",
+          file=sys.stderr)
+    return 0
+
+
+# "sync"サブコマンドの処理（別のデータベースと前回の同期以降の変更だけをやり取りする）
+# 相手で削除されたジャンルの単語は、両方のデータベースでそのまま少しずつ削除する
+def command_sync(model: Model, args) -> int:
+    if not os.path.exists(args.other_db):
+        print(f"データベースが見つかりません: {args.other_db}", file=sys.stderr)
+        return 1
+    other = Model(args.other_db)
+    try:
+        sent, received = model.sync_with(other)
+        for target in (model, other):
+            target.purge_deleted_genres(args.chunk_size)
+    finally:
+        other.close()
+    print(f"{sent}件を送り、{received}件を受け取りました", file=sys.stderr)
+    return 0
+
+
+# "search"サブコマンドの処理（検索結果をタブ区切りで表示）
+def command_search(model: Model, args) -> int:
+    print("id\tgenre_id\tword\tsnippet")
+    for word_id, genre_id, word, snippet in model.search(args.query, args.genre, args.limit, args.offset):
+        print(f"{word_id}\t{genre_id}\t{word}\t{snippet}")
+    return 0
+
+
+# "reset-confidence"サブコマンドの処理
+def command_reset_confidence(model: Model, args) -> int:
+    if not check_genre(model, args.genre_id):
+        return 1
+    count = model.reset_confidence(args.genre_id, args.value)
+    print(f"{count}件の単語の自信度を{'あり' if args.value else 'なし'}にしました", file=sys.stderr)
+    return 0
+
+
+# "genre add"サブコマンドの処理（追加したジャンルのIDを表示）
+def command_genre_add(model: Model, args) -> int:
+    model.add_genre(args.name)
+    print(model.cursor.lastrowid)
+    return 0
+
+
+# "genre rename"サブコマンドの処理
+def command_genre_rename(model: Model, args) -> int:
+    if not check_genre(model, args.genre_id):
+        return 1
+    model.edit_genre(args.genre_id, args.name)
+    return 0
+
+
+# 削除した単語の数を標準エラー出力に表示
+def print_delete_progress(count: int):
+    print(f"\r{count}件 削除済み", end='', file=sys.stderr, flush=True)
+
+
+# "genre delete"サブコマンドの処理
+# ジャンルに削除済みの印を付けてから単語を少しずつ削除する（途中で中断しても、次に削除した時やアプリの起動時に続きを削除する）
+def command_genre_delete(model: Model, args) -> int:
+    if not check_genre(model, args.genre_id):
+        return 1
+    model.delete_genre(args.genre_id)
+    deleted, finished = model.purge_deleted_genres(args.chunk_size, progress=print_delete_progress)
+    print(file=sys.stderr)
+    print(f"{deleted}件の単語を削除しました", file=sys.stderr)
+    return 0
+
+
+# "quiz"サブコマンドの処理（理解度チェック用の単語の組を単語ファイルの形式で書き出す）
+def command_quiz(model: Model, args) -> int:
+    if not all(check_genre(model, genre_id) for genre_id in args.genre_ids):
+        return 1
+    if args.due:
+        # 復習日時が来た単語をジャンルの順に選ぶ
+        cards = []
+        for genre_id in args.genre_ids:
+            cards.extend(model.get_due_words(genre_id, args.count - len(cards)))
+    else:
+        cards = model.sample_words(args.genre_ids, args.count, weak_weight=args.weak_weight)
+    rows = ((card[1], model.get_word_details(card[0]), card[2]) for card in cards)
+    with open_output(args.file) as f:
+        count = write_word_stream(f, resolve_format(args.file, args.format), rows)
+    print(f"{count}件の単語を書き出しました", file=sys.stderr)
+    return 0
+
+
+# コマンドライン引数の定義を作成
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="My単語帳のデータベースをコマンドラインから操作します")
+    parser.add_argument('--db', default="my_word_app.db", help="データベースファイル（既定: my_word_app.db）")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help="CSV/TSV/JSONLファイルから単語をまとめて追加")
+    import_parser.add_argument('genre_id', type=int, help="追加先のジャンルID")
+    import_parser.add_argument('file', help="読み込むファイル（\"-\"で標準入力）")
+    import_parser.add_argument('--format', choices=FORMATS, help="ファイル形式（省略時は拡張子から判定）")
+    import_parser.add_argument('--batch-size', type=int, default=1000, help="1回のexecutemanyで挿入する件数")
+    import_parser.add_argument('--on-duplicate', choices=DUPLICATE_STRATEGIES, default='skip',
+                               help="既にある単語の扱い（skip: 追加しない、merge: 詳細を追記、overwrite: 上書き。既定: skip）")
+    import_parser.set_defaults(func=command_import)
+
+    export_parser = subparsers.add_parser('export', help="ジャンルの単語をCSV/TSV/JSONLで書き出す")
+    export_parser.add_argument('genre_id', type=int, help="書き出すジャンルID")
+    export_parser.add_argument('file', nargs='?', default='-', help="書き出し先のファイル（省略時または\"-\"で標準出力）")
+    export_parser.add_argument('--format', choices=FORMATS, help="ファイル形式（省略時は拡張子から判定、標準出力ではcsv）")
+    export_parser.add_argument('--fetch-size', type=int, default=EXPORT_FETCH_SIZE, help="1回に読み込む件数")
+    export_parser.set_defaults(func=command_export)
+
+    backup_parser = subparsers.add_parser('backup', help="データベースを別のファイルにバックアップ（アプリの使用中でも実行可）")
+    backup_parser.add_argument('file', help="バックアップ先のファイル")
+    backup_parser.add_argument('--pages', type=int, default=BACKUP_PAGES_PER_STEP, help="1回にコピーするページ数")
+    backup_parser.set_defaults(func=command_backup)
+
+    stats_parser = subparsers.add_parser('stats', help="ジャンルごとの単語数を表示")
+    stats_parser.set_defaults(func=command_stats)
+
+    check_stats_parser = subparsers.add_parser('check-stats', help="ジャンルごとの単語数の集計が正しいか確認")
+    check_stats_parser.add_argument('--rebuild', action='store_true', help="食い違いがあれば集計を作り直す")
+    check_stats_parser.set_defaults(func=command_check_stats)
+
+    activity_parser = subparsers.add_parser('activity', help="理解度チェックの解答の集計（日ごと・経過ごと・単語ごとの正解率）を表示")
+    activity_parser.add_argument('view', nargs='?', choices=['daily', 'retention', 'words'], default='daily',
+                                 help="daily: 日ごとの解答数、retention: 前回の解答からの経過ごとの正解率、"
+                                      "words: 単語ごとの正解率（既定: daily）")
+    activity_parser.add_argument('--genre', type=int, help="対象のジャンルID（省略時は全ジャンル）")
+    activity_parser.add_argument('--days', type=int, help="dailyで表示する日数（今日まで。省略時はすべて）")
+    activity_parser.add_argument('--limit', type=int, default=20, help="wordsでジャンルごとに表示する単語数")
+    activity_parser.set_defaults(func=command_activity)
+
+    check_activity_parser = subparsers.add_parser('check-activity', help="解答の集計が解答の記録と一致するか確認")
+    check_activity_parser.add_argument('--rebuild', action='store_true', help="食い違いがあれば集計を作り直す")
+    check_activity_parser.set_defaults(func=command_check_activity)
+
+    dedupe_parser = subparsers.add_parser('dedupe', help="同じジャンルの重複した単語（大文字・小文字や全角・半角の違いを含む）を1つにまとめる")
+    dedupe_parser.add_argument('--strategy', choices=DUPLICATE_STRATEGIES, default='merge',
+                               help="残す単語への反映方法（skip: そのまま、merge: 詳細を追記、overwrite: 最も新しい単語で上書き。既定: merge）")
+    dedupe_parser.set_defaults(func=command_dedupe)
+
+    compress_parser = subparsers.add_parser('compress', help="長い詳細を圧縮し直す（ジャンルごとの辞書の学習もできる）")
+    compress_parser.add_argument('--genre', type=int, help="対象のジャンルID（省略時は全ジャンル）")
+    compress_parser.add_argument('--train', action='store_true', help="ジャンルの詳細から圧縮用の辞書を学習する")
+    compress_parser.add_argument('--vacuum', action='store_true', help="圧縮して空いた領域をデータベースファイルから除く")
+    compress_parser.add_argument('--chunk-size', type=int, default=RECOMPRESS_CHUNK_SIZE,
+                                 help="1つのトランザクションで圧縮し直す単語数")
+    compress_parser.set_defaults(func=command_compress)
+
+    sync_parser = subparsers.add_parser('sync', help="別のデータベースと、前回の同期以降の変更だけをやり取りして同じ内容にする")
+    sync_parser.add_argument('other_db', help="同期する相手のデータベースファイル")
+    sync_parser.add_argument('--chunk-size', type=int, default=DELETE_CHUNK_SIZE,
+                             help="削除されたジャンルの単語を1つのトランザクションで削除する単語数")
+    sync_parser.set_defaults(func=command_sync)
+
+    search_parser = subparsers.add_parser('search', help="単語名と詳細を検索")
+    search_parser.add_argument('query', help="検索語（空白区切りで複数指定）")
+    search_parser.add_argument('--genre', type=int, help="検索するジャンルID（省略時は全ジャンル）")
+    search_parser.add_argument('--limit', type=int, default=20, help="表示する件数")
+    search_parser.add_argument('--offset', type=int, default=0, help="表示を始める位置")
+    search_parser.set_defaults(func=command_search)
+
+    reset_parser = subparsers.add_parser('reset-confidence', help="ジャンルの全単語の自信度をまとめて設定")
+    reset_parser.add_argument('genre_id', type=int, help="対象のジャンルID")
+    reset_parser.add_argument('--value', type=int, choices=[0, 1], default=0, help="設定する自信度（既定: 0）")
+    reset_parser.set_defaults(func=command_reset_confidence)
+
+    genre_parser = subparsers.add_parser('genre', help="ジャンルの追加・名前の変更・削除")
+    genre_subparsers = genre_parser.add_subparsers(dest='genre_command', required=True)
+    genre_add_parser = genre_subparsers.add_parser('add', help="ジャンルを追加し、そのIDを表示")
+    genre_add_parser.add_argument('name', help="ジャンル名")
+    genre_add_parser.set_defaults(func=command_genre_add)
+    genre_rename_parser = genre_subparsers.add_parser('rename', help="ジャンル名を変更")
+    genre_rename_parser.add_argument('genre_id', type=int, help="対象のジャンルID")
+    genre_rename_parser.add_argument('name', help="新しいジャンル名")
+    genre_rename_parser.set_defaults(func=command_genre_rename)
+    genre_delete_parser = genre_subparsers.add_parser('delete', help="ジャンルとその単語を削除")
+    genre_delete_parser.add_argument('genre_id', type=int, help="対象のジャンルID")
+    genre_delete_parser.add_argument('--chunk-size', type=int, default=DELETE_CHUNK_SIZE,
+                                     help="1つのトランザクションで削除する単語数")
+    genre_delete_parser.set_defaults(func=command_genre_delete)
+
+    quiz_parser = subparsers.add_parser('quiz', help="理解度チェック用の単語の組を書き出す")
+    quiz_parser.add_argument('genre_ids', type=int, nargs='+', help="出題するジャンルID（複数指定可）")
+    quiz_parser.add_argument('--count', type=int, default=20, help="単語数")
+    quiz_parser.add_argument('--weak-weight', type=float, default=1.0, help="自信がない単語を選びやすくする倍率")
+    quiz_parser.add_argument('--due', action='store_true', help="無作為ではなく、復習日時が来た単語を選ぶ")
+    quiz_parser.add_argument('--output', dest='file', default='-', help="書き出し先のファイル（既定: 標準出力）")
+    quiz_parser.add_argument('--format', choices=FORMATS, help="ファイル形式（省略時は拡張子から判定、標準出力ではcsv）")
+    quiz_parser.set_defaults(func=command_quiz)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    model = Model(args.db)
+    try:
+        return args.func(model, args)
+    except BrokenPipeError:
+        # headなどで出力が途中で閉じられた場合は、残りを捨てて終了する
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    finally:
+        model.connection.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
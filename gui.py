@@ -0,0 +1,1338 @@
+# My単語帳の画面（tkinterのフレーム）のモジュール
+import tkinter as tk
+from tkinter.scrolledtext import ScrolledText
+from typing import Type, Callable, Optional
+import tkinter.messagebox as messagebox
+import tkinter.filedialog as filedialog
+from collections import OrderedDict
+import time
+
+from instrumentation import get_tracer
+from model import (Model, AsyncModel, DuplicateWordError, QuizSession, read_word_file, local_day, log_error,
+                   GRADE_AGAIN, GRADE_GOOD, GRADE_EASY, BACKUP_PAGES_PER_STEP, DELETE_CHUNK_SIZE)
+
+
+# 表示済みのフレームを破棄せずに保持しておく、件数上限付きのキャッシュ（最も長く使われていないものから捨てる）
+# キーはフレームのクラスと引数から作られ、タグ（フレームが表示しているジャンルのID）ごとに無効化できる
+class FrameCache:
+    # 初期化
+    def __init__(self, max_size: int = 8):
+        self.max_size = max_size
+        # キー→(タグ, フレーム)。後ろほど最近使われたもの
+        self.entries = OrderedDict()
+        # キャッシュから取り出せた回数と、新たに作成した回数
+        self.hits = 0
+        self.misses = 0
+
+    # キーに対応するフレームを取得（ない場合はNone）
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    # キーに対応するフレームがキャッシュにあるか
+    def __contains__(self, key) -> bool:
+        return key in self.entries
+
+    # フレームを追加し、上限を超えた分の古いフレームのリストを返す（keepに指定したフレームは残す）
+    def put(self, key, tag, frame, keep=None) -> list:
+        self.entries[key] = (tag, frame)
+        self.entries.move_to_end(key)
+        evicted = []
+        for old_key in list(self.entries):
+            if len(self.entries) <= self.max_size:
+                break
+            if self.entries[old_key][1] is not keep:
+                evicted.append(self.entries.pop(old_key)[1])
+        return evicted
+
+    # 指定したタグのフレームを取り除き、そのリストを返す（タグがNoneの場合はすべて取り除く）
+    def invalidate(self, tag=None) -> list:
+        keys = [key for key, (entry_tag, frame) in self.entries.items() if tag is None or entry_tag == tag]
+        return [self.entries.pop(key)[1] for key in keys]
+
+    # フレームがキャッシュに保持されているか
+    def holds(self, frame) -> bool:
+        return any(entry_frame is frame for tag, entry_frame in self.entries.values())
+
+    # キャッシュの利用状況を取得
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {'size': len(self.entries), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0}
+
+
+# フレームの切り替えを行うクラス
+# cache_keyクラスメソッドを持つフレームは、切り替えた後も破棄せずにキャッシュしておき、再表示の時に使い回す
+# cache_keyはフレームの引数を受け取り、先頭の要素が表示しているジャンルのID（ジャンル一覧の場合はNone）のタプルを返す
+# refreshメソッドを持つフレームは、キャッシュから再表示する時にrefreshが呼ばれる
+class FrameSwitcher:
+    # 書き込み待ちの自信度の更新をデータベースに書き込む間隔（ミリ秒）
+    FLUSH_INTERVAL_MS = 2000
+
+    # 削除したジャンルの単語をワーカースレッドで削除する時の、1回の依頼で削除する回数と、次の依頼までの間隔（ミリ秒）
+    # 他の読み込みを長く待たせないように、少しずつ依頼する
+    PURGE_CHUNKS_PER_STEP = 1
+    PURGE_INTERVAL_MS = 30
+    # 単語の削除に失敗した時に、もう一度依頼するまでの間隔（ミリ秒）と、続けて失敗してもよい回数
+    PURGE_RETRY_INTERVAL_MS = 10000
+    PURGE_RETRY_LIMIT = 3
+
+    # 初期化
+    def __init__(self, parent, model: Model, *args):
+        # 親ウィジェットを保存
+        self.parent = parent
+        # 現在のフレーム（初期状態ではNone）
+        self.current_frame: tk.Frame = None
+        # データベース操作のためのModelを保存
+        self.model = model
+        # 表示済みのフレームのキャッシュ。データが変更されたら該当するフレームを捨てる
+        self.frame_cache = FrameCache()
+        self.model.add_change_listener(self.invalidate)
+        # 時間のかかる読み込みをワーカースレッドで行うためのAsyncModelを作成
+        self.async_model = AsyncModel(model, parent)
+        # 読み込み中に表示するラベル
+        self.loading_label = tk.Label(parent, text="読み込み中...", relief='ridge', padx=10, pady=5)
+        # 書き込み待ちの更新を定期的に書き込む
+        self.parent.after(self.FLUSH_INTERVAL_MS, self.on_flush_timer)
+        # 削除したジャンルの単語を削除中かどうかと、削除中に新たにジャンルが削除されたかどうか
+        self.purging = False
+        self.purge_pending = False
+        # 単語の削除に続けて失敗した回数
+        self.purge_failures = 0
+        # 前回の起動で削除しきれなかったジャンルの単語があれば削除する
+        self.start_purge()
+
+    # 削除済みのジャンルの単語の削除を始める（削除中の場合は、終わった後にもう一度確認する）
+    def start_purge(self):
+        self.purge_pending = True
+        if not self.purging:
+            self.purging = True
+            self.submit_purge_step()
+
+    # ワーカースレッドに単語の削除を少しだけ依頼
+    def submit_purge_step(self):
+        self.purge_pending = False
+        self.async_model.submit('purge_deleted_genres', DELETE_CHUNK_SIZE, self.PURGE_CHUNKS_PER_STEP,
+                                callback=self.on_purge_step, on_error=self.on_purge_error)
+
+    # 単語の削除を依頼した分だけ終えた時の処理（残っていれば少し待ってから続きを依頼する）
+    def on_purge_step(self, result: tuple):
+        deleted, finished = result
+        self.purge_failures = 0
+        if finished and not self.purge_pending:
+            self.purging = False
+            return
+        self.parent.after(self.PURGE_INTERVAL_MS, self.submit_purge_step)
+
+    # 単語の削除に失敗した時の処理（少し待ってからもう一度依頼し、続けて失敗した場合はエラーを表示して残りは次の起動時に削除する）
+    def on_purge_error(self, error: Exception):
+        self.purge_failures += 1
+        if self.purge_failures <= self.PURGE_RETRY_LIMIT:
+            self.parent.after(self.PURGE_RETRY_INTERVAL_MS, self.submit_purge_step)
+            return
+        self.purging = False
+        self.purge_failures = 0
+        messagebox.showerror("エラー", f"削除したジャンルの単語を削除できませんでした（残りは次の起動時に削除します）: {error}")
+
+    # 定期的に書き込み待ちの更新を書き込む
+    # 書き込みに失敗しても（データベースのロックや同期サーバーに接続できない場合など）、更新は書き込み待ちに残り、次の書き込みを予約する
+    # サーバーに接続している場合は、他の端末での変更の確認もワーカースレッドに依頼する
+    def on_flush_timer(self):
+        try:
+            self.async_model.flush_pending()
+            self.async_model.poll_changes()
+        except Exception as e:
+            log_error("書き込み待ちの更新を書き込めませんでした", e, __name__)
+        finally:
+            self.parent.after(self.FLUSH_INTERVAL_MS, self.on_flush_timer)
+
+    # Modelのメソッドをワーカースレッドで実行し、その結果を使ってフレームを切り替えるメソッド
+    # make_argsには結果が渡され、フレームに渡す引数のタプルを返す。実行中は読み込み中の表示を出す
+    # 新しい切り替えを依頼すると、まだ終わっていない切り替えは取り消される
+    def switch_after_load(self, frame_class: Type[tk.Frame], method_name: str, method_args: tuple,
+                          make_args: Callable[[object], tuple] = lambda result: ()):
+        self.loading_label.place(relx=0.5, rely=0.5, anchor='center')
+        self.loading_label.lift()
+        self.async_model.submit(method_name, *method_args, key='switch',
+                                callback=lambda result: self.switchTo(frame_class, *make_args(result)),
+                                on_error=self.on_load_error)
+
+    # 指定したジャンルの単語の(id, 単語名, 自信度)を読み込んで、単語リスト画面に切り替えるメソッド
+    # confidenceを指定すると自信度で絞り込む。キャッシュに単語リスト画面が残っている場合は読み込まずに切り替える
+    def switch_to_word_list(self, genre: list, confidence: bool = None):
+        # 書き込み待ちの更新を先に書き込む（書き込みで変更が通知されると、そのジャンルの単語リスト画面がキャッシュから捨てられるため）
+        self.async_model.flush_pending()
+        if self.make_cache_key(WordListFrame, (genre, None, confidence)) in self.frame_cache:
+            self.switchTo(WordListFrame, genre, None, confidence)
+            return
+        self.switch_after_load(WordListFrame, 'get_word_summaries', (genre[0], confidence),
+                               lambda word_list: (genre, word_list, confidence))
+
+    # フレームのクラスと引数からキャッシュのキーを作成（キャッシュしないフレームの場合はNone）
+    def make_cache_key(self, frame_class: Type[tk.Frame], args: tuple):
+        cache_key = getattr(frame_class, 'cache_key', None)
+        return None if cache_key is None else (frame_class, *cache_key(*args))
+
+    # 指定したジャンル（Noneの場合はすべて）のフレームをキャッシュから捨てる
+    def invalidate(self, genre_id: Optional[int] = None):
+        for frame in self.frame_cache.invalidate(genre_id):
+            # 表示中のフレームは、別の画面に切り替えた時に破棄する
+            if frame is not self.current_frame:
+                frame.destroy()
+
+    # キャッシュの利用状況を取得
+    def cache_stats(self) -> dict:
+        return self.frame_cache.stats()
+
+    # 読み込みに失敗した時の処理
+    def on_load_error(self, error: Exception):
+        self.loading_label.place_forget()
+        messagebox.showerror("エラー", f"読み込みに失敗しました: {error}")
+
+    # アプリケーション終了時の処理（書き込み待ちの更新を書き込み、ワーカースレッドを終了する）
+    def close(self):
+        self.async_model.flush_pending()
+        self.async_model.close()
+
+    # 指定したフレームに切り替えるメソッド
+    def switchTo(self, frame_class: Type[tk.Frame], *args):
+        # まだ終わっていない読み込み後の切り替えを取り消し、読み込み中の表示を消す
+        self.async_model.cancel('switch')
+        self.loading_label.place_forget()
+        # 画面を切り替える前に書き込み待ちの更新を書き込む
+        self.async_model.flush_pending()
+        # キャッシュにあるフレームは使い回し、ない場合は受け取ったクラスを利用してインスタンスを生成
+        start = time.perf_counter()
+        key = self.make_cache_key(frame_class, args)
+        frame = None if key is None else self.frame_cache.get(key)
+        cached = frame is not None
+        if frame is None:
+            frame = frame_class(self, self.model, *args)
+        elif hasattr(frame, 'refresh'):
+            # キャッシュから取り出したフレームのうち、refreshメソッドを持つものは表示内容を更新する
+            frame.refresh()
+        constructed = time.perf_counter()
+        # 現在のフレームが存在すれば、キャッシュに保持されていれば隠し、そうでなければ破棄する
+        if self.current_frame is not None and self.current_frame is not frame:
+            if self.frame_cache.holds(self.current_frame):
+                self.current_frame.pack_forget()
+            else:
+                self.current_frame.destroy()
+        # 新しいフレームをキャッシュに追加し、上限を超えた古いフレームを破棄する
+        if key is not None:
+            for evicted in self.frame_cache.put(key, key[1], frame, keep=frame):
+                evicted.destroy()
+        destroyed = time.perf_counter()
+
+        # 新しいフレームを現在のフレームに設定し、画面に表示
+        self.current_frame = frame
+        self.current_frame.pack(fill=tk.BOTH, expand=True)
+
+        # 計測が有効な場合は、描画が終わって処理待ちがなくなった時点で切り替えの時間を記録する
+        tracer = get_tracer()
+        if tracer is not None:
+            self.parent.after_idle(lambda: tracer.emit_switch(
+                frame_class.__name__, cached, (constructed - start) * 1000, (destroyed - constructed) * 1000,
+                (time.perf_counter() - destroyed) * 1000))
+
+
+# スタート画面のフレームを表現するクラス
+class StartFrame(tk.Frame):
+    # バックアップの進捗を表示する間隔（ミリ秒）
+    BACKUP_PROGRESS_INTERVAL_MS = 100
+
+    # キャッシュのキー（スタート画面は1つだけ）
+    @classmethod
+    def cache_key(cls):
+        return (None,)
+
+    # 初期化
+    def __init__(self, switcher: FrameSwitcher, model: Model):
+        super().__init__(switcher.parent)
+        # フレーム切り替えのためのFrameSwitcherを保存
+        self.switcher = switcher
+        # データベース操作のためのModelを保存
+        self.model = model
+
+        # "ジャンル"というラベルを作成
+        tk.Label(self, text="ジャンル").pack()
+
+        # ＋ボタンを作成
+        self.plus_button = tk.Button(self, text="＋", command=self.on_plus_button_click)
+        self.plus_button.place(relx=1.0, rely=0.0, anchor='ne')
+
+        # バックアップボタンを作成
+        self.backup_button = tk.Button(self, text="バックアップ", command=self.on_backup_button_click)
+        self.backup_button.place(relx=0.0, rely=0.0, anchor='nw')
+        # ワーカースレッドから通知されたバックアップの進捗（コピー済みのページ数, 全ページ数）
+        self.backup_progress = None
+
+        # 全ジャンルから単語を検索する検索欄を作成
+        self.search_frame = SearchBox(self, self.on_search)
+        self.search_frame.pack(pady=5)
+
+        # 今日の理解度チェックの解答数を表示するラベルを作成
+        self.activity_label = tk.Label(self, text=self.make_activity_label())
+        self.activity_label.pack()
+
+        # データベースから取得した各ジャンルに対して、単語数を表示するボタンを作成（ジャンルID→ボタン）
+        self.genre_buttons = {}
+        for genre_id, name, words, confident in model.get_genres_with_stats():
+            genre = (genre_id, name)
+            genre_button = tk.Button(self, text=self.make_genre_label(name, words, confident))
+            # 左クリックと右クリック時にはそれぞれ異なるイベントを発生させる
+            genre_button.bind("<Button-1>", lambda event, g=genre: self.on_genre_button_click(event, g))
+            genre_button.bind("<Button-2>", lambda event, g=genre: self.on_genre_button_click(event, g))
+            genre_button.bind("<Button-3>", lambda event, g=genre: self.on_genre_button_click(event, g))
+            genre_button.pack()
+            self.genre_buttons[genre_id] = genre_button
+
+        self.update()
+
+    # ジャンルボタンに表示する文字列（ジャンル名と、自信がある単語の数/単語数）
+    @staticmethod
+    def make_genre_label(name: str, words: int, confident: int) -> str:
+        return f"{name}（{confident}/{words}）"
+
+    # 今日の解答数と正解率を表す文字列（日ごとの集計テーブルから読むため、解答の記録の件数によらず速い）
+    def make_activity_label(self) -> str:
+        activity = self.model.get_daily_activity(None, local_day(time.time()))
+        if not activity:
+            return "今日の解答: 0問"
+        _, attempts, correct, new_words = activity[-1]
+        return f"今日の解答: {attempts}問（正解率 {correct / attempts:.0%}、初めての単語 {new_words}語）"
+
+    # キャッシュから再表示される時に、ジャンルごとの単語数を読み込み直す
+    # （単語の変更ではスタート画面はキャッシュから捨てられないため。集計テーブルから読むので単語数によらず速い）
+    def refresh(self):
+        self.activity_label.config(text=self.make_activity_label())
+        for genre_id, name, words, confident in self.model.get_genres_with_stats():
+            genre_button = self.genre_buttons.get(genre_id)
+            if genre_button is not None:
+                genre_button.config(text=self.make_genre_label(name, words, confident))
+
+    # ＋ボタンがクリックされた時の処理
+    def on_plus_button_click(self):
+        print("plus Button clicked!")
+        # ジャンル追加画面に切り替え
+        self.switcher.switchTo(AddGenreFrame)
+
+    # "バックアップ"ボタンがクリックされた時の処理
+    def on_backup_button_click(self):
+        print("バックアップButton clicked!")
+        # バックアップ先のファイルを選択
+        path = filedialog.asksaveasfilename(defaultextension=".db", filetypes=[("データベース", "*.db")])
+        if not path:
+            return
+        # 画面が固まらないようにワーカースレッドで少しずつコピーし、進捗はタイマーでボタンに表示する
+        self.backup_progress = None
+        self.backup_button.config(state='disabled', text="0%")
+        self.switcher.async_model.submit('backup', path, BACKUP_PAGES_PER_STEP, self.on_backup_progress,
+                                         callback=self.on_backup_done, on_error=self.on_backup_error)
+        self.after(self.BACKUP_PROGRESS_INTERVAL_MS, self.on_backup_progress_timer)
+
+    # バックアップの進捗を保存（ワーカースレッドから呼ばれるため、画面は操作しない）
+    def on_backup_progress(self, copied: int, total: int):
+        self.backup_progress = (copied, total)
+
+    # バックアップ中は定期的に進捗をボタンに表示
+    def on_backup_progress_timer(self):
+        # 完了するとボタンが有効に戻るので、表示をやめる
+        if str(self.backup_button['state']) == 'normal':
+            return
+        if self.backup_progress is not None:
+            copied, total = self.backup_progress
+            self.backup_button.config(text=f"{copied * 100 // max(total, 1)}%")
+        self.after(self.BACKUP_PROGRESS_INTERVAL_MS, self.on_backup_progress_timer)
+
+    # バックアップが完了した時の処理
+    def on_backup_done(self, pages: int):
+        self.backup_button.config(state='normal', text="バックアップ")
+        messagebox.showinfo("バックアップ完了", "データベースをバックアップしました")
+
+    # バックアップに失敗した時の処理
+    def on_backup_error(self, error: Exception):
+        self.backup_button.config(state='normal', text="バックアップ")
+        messagebox.showerror("バックアップ失敗", str(error))
+
+    # 検索欄で検索が実行された時の処理
+    def on_search(self, query: str):
+        print("検索Button clicked!")
+        # 全ジャンルを対象にした検索結果画面に切り替え
+        self.switcher.switchTo(SearchResultFrame, None, query)
+
+    # ジャンルボタンがクリックされた時の処理
+    def on_genre_button_click(self, event, genre: list):
+        if event.num == 1:
+            print("ジャンルButton left_clicked!")
+            # 左クリックの場合、選択したジャンルの単語リストを読み込んで単語リスト画面に切り替え
+            self.switcher.switch_to_word_list(genre)
+        elif event.num == 2 or event.num == 3:
+            print("ジャンルButton right_clicked!")
+            # 右クリックの場合、ジャンル編集画面に切り替え
+            self.switcher.switchTo(GenreEditFrame, genre)
+
+# 検索語の入力欄と"検索"ボタンをまとめたウィジェット
+class SearchBox(tk.Frame):
+    # 初期化（on_searchには入力された検索語が渡される）
+    def __init__(self, parent, on_search: Callable[[str], None], query: str = ""):
+        super().__init__(parent)
+        self.on_search = on_search
+
+        # 検索語の入力欄を作成（Enterキーでも検索できる）
+        self.query_entry = tk.Entry(self)
+        self.query_entry.insert(tk.END, query)
+        self.query_entry.bind("<Return>", lambda event: self.on_search_button_click())
+        self.query_entry.pack(side='left')
+
+        # "検索"ボタンを作成
+        self.search_button = tk.Button(self, text="検索", command=self.on_search_button_click)
+        self.search_button.pack(side='left')
+
+    # "検索"ボタンがクリックされた時の処理
+    def on_search_button_click(self):
+        query = self.query_entry.get().strip()
+        # 検索語が空の場合は何もしない
+        if query:
+            self.on_search(query)
+
+
+# 重複した単語の扱いを選ぶダイアログのボタン（表示名, Model.add_word/bulk_importのon_duplicate）
+DUPLICATE_CHOICES = [("スキップ", 'skip'), ("詳細を追記", 'merge'), ("上書き", 'overwrite'), ("キャンセル", None)]
+
+
+# 重複した単語の扱いを選ぶダイアログを表示し、選ばれた扱い（キャンセルや閉じた場合はNone）を返す
+def ask_duplicate_strategy(parent, message: str) -> Optional[str]:
+    dialog = tk.Toplevel(parent)
+    dialog.title("重複した単語")
+    dialog.transient(parent)
+    tk.Label(dialog, text=message, wraplength=320, justify='left').pack(padx=10, pady=10)
+    buttons = tk.Frame(dialog)
+    buttons.pack(padx=10, pady=(0, 10))
+    chosen = []
+
+    # ボタンがクリックされた時の処理
+    def on_choice(strategy: Optional[str]):
+        chosen.append(strategy)
+        dialog.destroy()
+
+    for text, strategy in DUPLICATE_CHOICES:
+        tk.Button(buttons, text=text, command=lambda strategy=strategy: on_choice(strategy)).pack(side='left', padx=2)
+    # ダイアログを閉じるまで他の画面を操作できないようにする
+    dialog.grab_set()
+    parent.wait_window(dialog)
+    return chosen[0] if chosen else None
+
+
+# 検索結果画面のフレームを表現するクラス
+class SearchResultFrame(tk.Frame):
+    # 1ページに表示する件数
+    PAGE_SIZE = 10
+
+    # 初期化（genreがNoneの場合は全ジャンルが検索対象）
+    def __init__(self, switcher: FrameSwitcher, model: Model, genre: list, query: str, offset: int = 0):
+        super().__init__(switcher.parent)
+        # フレームスイッチャー、データベース操作のためのModel、検索対象のジャンル、検索語、表示位置を保存
+        self.switcher = switcher
+        self.model = model
+        self.genre = genre
+        self.query = query
+        self.offset = offset
+
+        # 検索対象を表示するラベルを作成
+        tk.Label(self, text="検索: " + ("全ジャンル" if genre is None else genre[1])).pack()
+
+        # "戻る"ボタンを作成
+        self.back_button = tk.Button(self, text="戻る", command=self.on_back_button_click)
+        self.back_button.place(relx=0.0, rely=0.0, anchor='nw')
+
+        # 検索欄を作成
+        self.search_frame = SearchBox(self, self.on_search, query)
+        self.search_frame.pack(pady=5)
+
+        # 次のページの有無を調べるため1件多く取得
+        genre_id = None if genre is None else genre[0]
+        results = self.model.search(query, genre_id, limit=self.PAGE_SIZE + 1, offset=offset)
+
+        if not results:
+            tk.Label(self, text="見つかりませんでした").pack(pady=20)
+
+        # 検索結果の各単語について、単語名と詳細の抜粋を表示するボタンを作成
+        for word_id, word_genre_id, word_name, snippet in results[:self.PAGE_SIZE]:
+            tk.Button(self, text=f"{word_name}\n{snippet}", wraplength=450, justify='left',
+                      command=lambda w=word_id: self.on_result_button_click(w)).pack(fill='x', padx=10)
+
+        # "前へ"、"次へ"ボタンを作成
+        if offset > 0:
+            self.before_button = tk.Button(self, text="前へ", command=self.on_before_button_click)
+            self.before_button.place(relx=0.0, rely=1.0, anchor='sw')
+        if len(results) > self.PAGE_SIZE:
+            self.next_button = tk.Button(self, text="次へ", command=self.on_next_button_click)
+            self.next_button.place(relx=1.0, rely=1.0, anchor='se')
+
+        self.update()
+
+    # "戻る"ボタンがクリックされた時の処理
+    def on_back_button_click(self):
+        print("戻るButton clicked!")
+        if self.genre is None:
+            # 全ジャンル検索の場合はスタート画面に切り替え
+            self.switcher.switchTo(StartFrame)
+        else:
+            # ジャンル内検索の場合は単語リスト画面に切り替え
+            self.switcher.switch_to_word_list(self.genre)
+
+    # 検索欄で検索が実行された時の処理
+    def on_search(self, query: str):
+        print("検索Button clicked!")
+        self.switcher.switchTo(SearchResultFrame, self.genre, query)
+
+    # "前へ"ボタンがクリックされた時の処理
+    def on_before_button_click(self):
+        print("前へButton clicked!")
+        self.switcher.switchTo(SearchResultFrame, self.genre, self.query, max(self.offset - self.PAGE_SIZE, 0))
+
+    # "次へ"ボタンがクリックされた時の処理
+    def on_next_button_click(self):
+        print("次へButton clicked!")
+        self.switcher.switchTo(SearchResultFrame, self.genre, self.query, self.offset + self.PAGE_SIZE)
+
+    # 検索結果の単語がクリックされた時の処理
+    def on_result_button_click(self, word_id: int):
+        print("検索結果Button clicked!")
+        # 単語とそのジャンルを取得し、単語詳細画面に切り替え
+        word = self.model.get_word_summary(word_id)
+        genre = self.model.get_genre(self.model.get_word_genre_id(word_id))
+        self.switcher.switchTo(WordDetailFrame, genre, word)
+
+
+# ジャンル追加画面のフレームを表現するクラス
+class AddGenreFrame(tk.Frame):
+    # 初期化
+    def __init__(self, switcher: FrameSwitcher, model: Model):
+        super().__init__(switcher.parent)
+        # データベース操作のためのModelを保存
+        self.model = model
+        self.switcher = switcher
+
+        # ウィジェットを中央に配置するためのフレームを作成
+        self.center_frame = tk.Frame(self)
+        self.center_frame.place(relx=0.5, rely=0.5, anchor='center')
+
+        # "追加するジャンル名"というラベルを作成
+        tk.Label(self.center_frame, text="追加するジャンル名").grid(row=0, column=0, columnspan=2, pady=5)
+        # ジャンル名を入力するためのエントリーを作成
+        self.genre_name_entry = tk.Entry(self.center_frame)
+        self.genre_name_entry.grid(row=1, column=0, columnspan=2, pady=5)
+
+        # "完了"ボタンを作成
+        self.add_button = tk.Button(self.center_frame, text="完了", command=self.on_add_genre_button_click)
+        self.add_button.grid(row=2, column=1, pady=5)
+
+        # "キャンセル"ボタンを作成
+        self.cancel_button = tk.Button(self.center_frame, text="キャンセル", command=self.on_cancel_button_click)
+        self.cancel_button.grid(row=2, column=0, pady=5)
+        self.update()
+
+    # "キャンセル"ボタンがクリックされた時の処理
+    def on_cancel_button_click(self):
+        print("キャンセルbutton clicked!")
+        # スタート画面に切り替え
+        self.switcher.switchTo(StartFrame)
+
+    # "完了"ボタンがクリックされた時の処理
+    def on_add_genre_button_click(self):
+        print("完了button clicked!")
+        # エントリーからジャンル名を取得
+        genre_name = self.genre_name_entry.get()
+        # 新しいジャンルをデータベースに追加
+        self.model.add_genre(genre_name)
+        # スタート画面に切り替え
+        self.switcher.switchTo(StartFrame)
+
+
+
+# 単語ボタンと自信度チェックボックスの行を縦に並べた、スクロール可能なリスト
+# 画面に見えている行（と上下の数行）の分だけウィジェットを作っておき、
+# スクロールのたびに表示位置と表示内容を入れ替えるため、単語数によらず作成するウィジェット数は一定
+class VirtualWordList(tk.Frame):
+    # 1行の高さ（ピクセル）
+    ROW_HEIGHT = 30
+    # 見えている範囲の上下に余分に用意しておく行数
+    OVERSCAN = 2
+
+    # 初期化（on_word_clickには単語が、on_confidence_changeには単語と新しい自信度が渡される）
+    def __init__(self, parent, word_list: list, on_word_click: Callable, on_confidence_change: Callable):
+        super().__init__(parent)
+        self.word_list = word_list or []
+        self.on_word_click = on_word_click
+        self.on_confidence_change = on_confidence_change
+        # リスト上で変更された自信度（単語ID→自信度）。行を再利用しても表示が戻らないようにする
+        self.confidence_overrides = {}
+        # 各行のウィジェット、表示中の単語の位置、キャンバス上のウィンドウID
+        self.rows = []
+        self.row_indexes = []
+        self.row_windows = []
+        # 自信度の表示を更新している間はチェックボックスの変更を無視するためのフラグ
+        self.binding = False
+
+        # 行を配置するキャンバスとスクロールバーを作成
+        self.canvas = tk.Canvas(self, highlightthickness=0)
+        self.scrollbar = tk.Scrollbar(self, orient='vertical', command=self.canvas.yview)
+        self.canvas.config(yscrollcommand=self.on_canvas_scroll,
+                           scrollregion=(0, 0, 0, len(self.word_list) * self.ROW_HEIGHT))
+        self.scrollbar.pack(side='right', fill='y')
+        self.canvas.pack(side='left', fill='both', expand=True)
+
+        # キャンバスの大きさが決まったら必要な数の行を作成して表示
+        self.canvas.bind("<Configure>", self.on_canvas_configure)
+        self.bind_mouse_wheel(self.canvas)
+
+    # マウスホイールでスクロールできるようにする（Windows/macOSとX11の両方）
+    def bind_mouse_wheel(self, widget):
+        widget.bind("<MouseWheel>", lambda event: self.scroll(-1 if event.delta > 0 else 1))
+        widget.bind("<Button-4>", lambda event: self.scroll(-1))
+        widget.bind("<Button-5>", lambda event: self.scroll(1))
+
+    # 指定した行数だけスクロール
+    def scroll(self, rows: int):
+        self.canvas.yview_scroll(rows, 'units')
+
+    # キャンバスの大きさが変わった時の処理
+    def on_canvas_configure(self, event):
+        # 1回のスクロール量を1行分にする
+        self.canvas.config(yscrollincrement=self.ROW_HEIGHT)
+        # 見えている行数＋上下の余分な行数だけ行を用意
+        pool_size = -(-event.height // self.ROW_HEIGHT) + 2 * self.OVERSCAN
+        while len(self.rows) < pool_size:
+            self.add_row()
+        # 行をキャンバスの中央に揃える
+        for window in self.row_windows:
+            self.canvas.coords(window, event.width // 2, self.canvas.coords(window)[1])
+        self.render()
+
+    # 再利用する行（単語ボタンと自信度チェックボックス）を1つ作成
+    def add_row(self):
+        slot = len(self.rows)
+        frame = tk.Frame(self.canvas)
+        button = tk.Button(frame, command=lambda: self.on_row_click(slot))
+        button.pack(side='left')
+        confidence = tk.IntVar()
+        confidence.trace_add('write', lambda *args: self.on_row_toggle(slot))
+        tk.Checkbutton(frame, variable=confidence, onvalue=1, offvalue=0).pack(side='left')
+        for widget in (frame, *frame.winfo_children()):
+            self.bind_mouse_wheel(widget)
+
+        self.rows.append((button, confidence))
+        self.row_indexes.append(None)
+        self.row_windows.append(self.canvas.create_window(0, 0, window=frame, anchor='n',
+                                                          height=self.ROW_HEIGHT, state='hidden'))
+
+    # スクロールされた時の処理
+    def on_canvas_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.render()
+
+    # 見えている範囲の単語を各行に割り当てて表示
+    def render(self):
+        top = int(self.canvas.canvasy(0)) // self.ROW_HEIGHT
+        start = max(top - self.OVERSCAN, 0)
+        for slot, window in enumerate(self.row_windows):
+            index = start + slot
+            if index >= len(self.word_list):
+                self.canvas.itemconfigure(window, state='hidden')
+                self.row_indexes[slot] = None
+                continue
+            if self.row_indexes[slot] != index:
+                self.bind_row(slot, index)
+            self.canvas.coords(window, self.canvas.coords(window)[0], index * self.ROW_HEIGHT)
+            self.canvas.itemconfigure(window, state='normal')
+
+    # 行にindex番目の単語を表示
+    def bind_row(self, slot: int, index: int):
+        word = self.word_list[index]
+        button, confidence = self.rows[slot]
+        self.row_indexes[slot] = index
+        button.config(text=word[1])
+        self.binding = True
+        try:
+            confidence.set(self.confidence_overrides.get(word[0], int(bool(word[2]))))
+        finally:
+            self.binding = False
+
+    # 行の単語ボタンがクリックされた時の処理
+    def on_row_click(self, slot: int):
+        index = self.row_indexes[slot]
+        if index is not None:
+            self.on_word_click(self.word_list[index])
+
+    # 行の自信度チェックボックスが変更された時の処理
+    def on_row_toggle(self, slot: int):
+        index = self.row_indexes[slot]
+        if self.binding or index is None:
+            return
+        word = self.word_list[index]
+        value = self.rows[slot][1].get()
+        self.confidence_overrides[word[0]] = value
+        self.on_confidence_change(word, value)
+
+
+# 単語リスト表示フレームを表現するクラス
+class WordListFrame(tk.Frame):
+    # インポートで1つのexecutemanyで追加する単語数
+    IMPORT_BATCH_SIZE = 1000
+
+    # キャッシュのキー（ジャンルと、自信度での絞り込みごとに1つ）
+    @classmethod
+    def cache_key(cls, genre: list, word_list: list = None, confidence: bool = None):
+        return (genre[0], genre[1], confidence)
+
+    # 初期化（word_listは単語の(id, 単語名, 自信度)のリスト、confidenceは自信度での絞り込み）
+    def __init__(self, switcher: FrameSwitcher, model: Model, genre: list, word_list: list = None,
+                 confidence: bool = None):
+        super().__init__(switcher.parent)
+        # 選択したジャンルとデータベース操作のためのModel、フレームスイッチャー、単語リストを保存
+        self.genre = genre
+        self.model = model
+        self.switcher = switcher
+        self.word_list = word_list
+        self.confidence = confidence
+
+        # ジャンル名を表示するラベルを作成
+        tk.Label(self, text=genre[1]).pack(pady=(0,50))
+
+        # このジャンルの単語を検索する検索欄を作成
+        self.search_frame = SearchBox(self, self.on_search)
+        self.search_frame.pack(pady=(0,5))
+
+        # "＋"ボタンを作成
+        self.plus_button = tk.Button(self, text="＋", command=self.on_plus_button_click)
+        self.plus_button.place(relx=1.0, rely=0.0, anchor='ne')
+
+        # "戻る"ボタンを作成
+        self.back_button = tk.Button(self, text="戻る", command=self.on_back_button_click)
+        self.back_button.place(relx=0.0, rely=0.0, anchor='nw')
+
+        # "全て"、"自信あり⚪︎"、"自信なし×"の3つのボタンを作成
+        self.sort_frame = tk.Frame(self)
+        self.sort_frame.place(relx=0.5, rely=0.1, anchor='center')
+
+        self.sort_all_button = tk.Button(self.sort_frame, text="全て", command=self.on_sort_all_button_click)
+
+        self.sort_confidence_button = tk.Button(self.sort_frame, text="自信あり⚪︎", command=self.on_sort_confidence_button_click)
+
+        self.sort_no_confidence_button = tk.Button(self.sort_frame, text="自信なし×", command=self.on_sort_no_confidence_button_click)
+
+        self.sort_all_button.pack(side = 'left')
+        self.sort_confidence_button.pack(side = 'left')
+        self.sort_no_confidence_button.pack(side = 'left')
+
+        # "理解度チェック"ボタンを作成
+        self.understand_check_button = tk.Button(self, text="理解度チェック", command=self.on_understand_check_button_click)
+        self.understand_check_button.place(relx=0, rely=1, anchor='sw')
+
+        # "ランダム出題"ボタンを作成
+        self.random_check_button = tk.Button(self, text="ランダム出題", command=self.on_random_check_button_click)
+        self.random_check_button.place(relx=0.25, rely=1, anchor='sw')
+
+        # "インポート"ボタンを作成
+        self.import_button = tk.Button(self, text="インポート", command=self.on_import_button_click)
+        self.import_button.place(relx=1, rely=1, anchor='se')
+
+        # "エクスポート"ボタンを作成
+        self.export_button = tk.Button(self, text="エクスポート", command=self.on_export_button_click)
+        self.export_button.place(relx=0.82, rely=1, anchor='se')
+
+        # 単語リストを表示するスクロール可能なリストを作成（表示中の行の分だけウィジェットを作る）
+        self.word_list_view = VirtualWordList(self, self.word_list,
+                                              on_word_click=lambda w: self.on_word_button_click(self.genre, w),
+                                              on_confidence_change=self.on_confidence_change)
+        self.word_list_view.pack(fill='both', expand=True, pady=(0, 35))
+
+        self.update()
+
+    # "＋"ボタンがクリックされた時の処理
+    def on_plus_button_click(self):
+        print("追加Button clicked!")
+        # 単語追加画面に切り替え
+        self.switcher.switchTo(AddWordFrame, self.genre)
+
+    # "戻る"ボタンがクリックされた時の処理
+    def on_back_button_click(self):
+        print("戻るButton clicked!")
+        # スタート画面に切り替え
+        self.switcher.switchTo(StartFrame)
+
+    # "全て"ボタンがクリックされた時の処理
+    def on_sort_all_button_click(self):
+        print("全てButton clicked!")
+        # ジャンルに属する全ての単語を読み込んで、全ての単語を表示する画面に切り替え
+        self.switcher.switch_to_word_list(self.genre)
+
+    # "自信あり⚪︎"ボタンがクリックされた時の処理
+    def on_sort_confidence_button_click(self):
+        print("自信ありButton clicked!")
+        # 自信ありの単語のみを読み込んで、自信ありの単語を表示する画面に切り替え
+        self.switcher.switch_to_word_list(self.genre, True)
+
+    # "自信なし×"ボタンがクリックされた時の処理
+    def on_sort_no_confidence_button_click(self):
+        print("自信なしButton clicked!")
+        # 自信なしの単語のみを読み込んで、自信なしの単語を表示する画面に切り替え
+        self.switcher.switch_to_word_list(self.genre, False)
+
+    # 検索欄で検索が実行された時の処理
+    def on_search(self, query: str):
+        print("検索Button clicked!")
+        # このジャンルを対象にした検索結果画面に切り替え
+        self.switcher.switchTo(SearchResultFrame, self.genre, query)
+
+    # 単語ボタンがクリックされた時の処理
+    def on_word_button_click(self, genre: list, word: list):
+        print("単語Button clicked!")
+        # 単語詳細画面に切り替え
+        self.switcher.switchTo(WordDetailFrame, genre, word)
+
+    # "理解度チェック"ボタンがクリックされた時の処理
+    def on_understand_check_button_click(self):
+        print("理解度チェックButton clicked!")
+        # 復習日時が来た単語を読み込んで、理解度チェック画面に切り替え
+        self.switcher.switch_after_load(WordCheckFrame, 'get_due_words', (self.genre[0], WordCheckFrame.SESSION_SIZE),
+                                        lambda cards: (self.genre, QuizSession(cards)))
+
+    # "ランダム出題"ボタンがクリックされた時の処理
+    def on_random_check_button_click(self):
+        print("ランダム出題Button clicked!")
+        # 自信がない単語を多めに無作為に選び、1問ずつ読み込みながら理解度チェック画面に切り替え
+        cards = self.model.sample_words([self.genre[0]], WordCheckFrame.SESSION_SIZE, weak_weight=WordCheckFrame.WEAK_WEIGHT)
+        self.switcher.switchTo(WordCheckFrame, self.genre, QuizSession(cards))
+
+    # "インポート"ボタンがクリックされた時の処理
+    def on_import_button_click(self):
+        print("インポートButton clicked!")
+        # 読み込むファイルを選択
+        path = filedialog.askopenfilename(filetypes=[("単語ファイル", "*.csv *.tsv *.jsonl")])
+        if not path:
+            return
+        # 既に登録されている単語があった場合の扱いを選択
+        on_duplicate = ask_duplicate_strategy(self, "既に登録されている単語（大文字・小文字や全角・半角の違いも同じ単語とみなします）があった場合の扱いを選んでください")
+        if on_duplicate is None:
+            return
+        # 画面が固まらないようにワーカースレッドで読み込み、進捗は結果と同じようにメインスレッドに渡してボタンに表示する
+        self.import_button.config(state='disabled', text="0件...")
+        async_model = self.switcher.async_model
+        async_model.submit('bulk_import', self.genre[0], read_word_file(path), self.IMPORT_BATCH_SIZE,
+                           lambda count: async_model.report(self.on_import_progress, count), on_duplicate,
+                           callback=self.on_import_done, on_error=self.on_import_error)
+
+    # インポートが完了した時の処理
+    def on_import_done(self, count: int):
+        self.import_button.config(state='normal', text="インポート")
+        messagebox.showinfo("インポート完了", f"{count}件の単語を読み込みました")
+        # 単語リスト画面を更新
+        self.switcher.switch_to_word_list(self.genre)
+
+    # インポートに失敗した時の処理（1件も追加されない）
+    def on_import_error(self, error: Exception):
+        self.import_button.config(state='normal', text="インポート")
+        messagebox.showerror("インポート失敗", str(error))
+
+    # "エクスポート"ボタンがクリックされた時の処理
+    def on_export_button_click(self):
+        print("エクスポートButton clicked!")
+        # 書き出し先のファイルを選択
+        path = filedialog.asksaveasfilename(defaultextension=".csv",
+                                            filetypes=[("CSV", "*.csv"), ("TSV", "*.tsv"), ("JSONL", "*.jsonl")])
+        if not path:
+            return
+        # 画面が固まらないようにワーカースレッドで1件ずつ読み込みながら書き出す
+        self.export_button.config(state='disabled')
+        self.switcher.async_model.submit('export_word_file', path, self.genre[0],
+                                         callback=self.on_export_done, on_error=self.on_export_error)
+
+    # エクスポートが完了した時の処理
+    def on_export_done(self, count: int):
+        self.export_button.config(state='normal')
+        messagebox.showinfo("エクスポート完了", f"{count}件の単語を書き出しました")
+
+    # エクスポートに失敗した時の処理
+    def on_export_error(self, error: Exception):
+        self.export_button.config(state='normal')
+        messagebox.showerror("エクスポート失敗", str(error))
+
+    # インポートの進捗をボタンに表示
+    def on_import_progress(self, count: int):
+        self.import_button.config(text=f"{count}件...")
+
+    # 自信度チェックボタンがクリックされた時の処理
+    def on_confidence_change(self, word, confidence: int):
+        print("自信属性 Button clicked!")
+        # データベース内の自信属性の更新を書き込み待ちに追加
+        self.model.queue_word_confidence(word[0], confidence)
+
+
+
+# 単語追加フレームを表現するクラス
+class AddWordFrame(tk.Frame):
+    # 単語名の入力中に表示する似ている単語の数
+    SUGGESTION_COUNT = 3
+
+    # 初期化
+    def __init__(self, switcher: FrameSwitcher, model: Model, genre: list):
+        super().__init__(switcher.parent)
+        # データベース操作のためのModel、フレームスイッチャー、ジャンルを保存
+        self.model = model
+        self.switcher = switcher
+        self.genre = genre
+
+        # ウィジェットを中心に配置するためのフレームを作成
+        self.center_frame = tk.Frame(self)
+        self.center_frame.place(relx=0.5, rely=0.5, anchor='center')
+
+        # "単語名"というラベルを作成
+        tk.Label(self.center_frame, text="単語名").grid(row=0, column=0, columnspan=2, pady=5)
+        # 単語名を入力するテキストボックスを作成（入力するたびに似ている単語を探す）
+        self.word_name_entry = tk.Entry(self.center_frame)
+        self.word_name_entry.bind("<KeyRelease>", lambda event: self.on_word_name_change())
+        self.word_name_entry.grid(row=1, column=0, columnspan=2, pady=5)
+        # 似ている単語（つづりの間違いや、既に登録されている単語）を表示するラベルを作成
+        self.suggestion_label = tk.Label(self.center_frame, text="", fg="gray", wraplength=300)
+        self.suggestion_label.grid(row=2, column=0, columnspan=2)
+
+        # "単語の詳細"というラベルを作成
+        tk.Label(self.center_frame, text="単語の詳細").grid(row=3, column=0, columnspan=2, pady=5)
+        # 単語の詳細を入力するテキストボックスを作成
+        self.word_detail_entry = ScrolledText(self.center_frame, font=("", 15), height=10, width=30)
+        self.word_detail_entry.grid(row=4, column=0, columnspan=2, pady=5)
+
+        # "完了"ボタンを作成
+        self.add_button = tk.Button(self.center_frame, text="完了", command=self.on_add_button_click)
+        self.add_button.grid(row=5, column=1, pady=5)
+
+        # "キャンセル"ボタンを作成
+        self.cancel_button = tk.Button(self.center_frame, text="キャンセル", command=self.on_cancel_button_click)
+        self.cancel_button.grid(row=5, column=0, pady=5)
+
+        self.update()
+
+    # 単語名が入力された時の処理（ワーカースレッドで似ている単語を探す。前の入力の結果は捨てる）
+    def on_word_name_change(self):
+        word_name = self.word_name_entry.get()
+        if not word_name.strip():
+            self.switcher.async_model.cancel('did_you_mean')
+            self.suggestion_label.config(text="")
+            return
+        self.switcher.async_model.submit('fuzzy_lookup', word_name, self.genre[0], self.SUGGESTION_COUNT,
+                                         callback=self.on_suggestions, key='did_you_mean')
+
+    # 似ている単語が見つかった時の処理
+    def on_suggestions(self, rows: list):
+        if rows and rows[0][3] == 0:
+            self.suggestion_label.config(text=f"「{rows[0][2]}」は既に登録されています")
+        elif rows:
+            self.suggestion_label.config(text="もしかして: " + "、".join(row[2] for row in rows))
+        else:
+            self.suggestion_label.config(text="")
+
+    # "キャンセル"ボタンがクリックされた時の処理
+    def on_cancel_button_click(self):
+        print("キャンセルbutton clicked!")
+        # 単語リスト画面に切り替え
+        self.switcher.switch_to_word_list(self.genre)
+
+    # "完了"ボタンがクリックされた時の処理
+    def on_add_button_click(self):
+        print("完了button clicked!")
+        # 単語名と詳細を取得
+        word_name = self.word_name_entry.get()
+        word_detail = self.word_detail_entry.get('1.0','end - 1c')
+        # 新しい単語をデータベースに追加
+        try:
+            self.model.add_word(self.genre[0], word_name, word_detail)
+        except DuplicateWordError as e:
+            # 同じ単語が既にある場合は扱いを選択（キャンセルした場合は入力を残したまま戻る）
+            on_duplicate = ask_duplicate_strategy(self, f"{e}\nどうしますか？")
+            if on_duplicate is None:
+                return
+            self.model.add_word(self.genre[0], word_name, word_detail, on_duplicate=on_duplicate)
+        # 単語リスト画面に切り替え
+        self.switcher.switch_to_word_list(self.genre)
+
+
+
+# 単語詳細フレームを表現するクラス
+class WordDetailFrame(tk.Frame):
+    # 初期化
+    def __init__(self, switcher: FrameSwitcher, model: Model, genre: list, word: list):
+        super().__init__(switcher.parent)
+        # データベース操作のためのModel、フレームスイッチャー、ジャンル、単語を保存
+        self.model = model
+        self.switcher = switcher
+        self.genre = genre
+        self.word = word
+
+        # 単語名を表示するためのラベルを作成
+        word_name = tk.Label(self, text=word[1], font=("Helvetica",25))
+        word_name.place(relx=0.5, rely=0.15, anchor='center')
+
+        # "詳細"というラベルを作成
+        tk.Label(self,text="詳細").pack()
+
+        # 単語の詳細を表示するためのフレームを作成
+        word_detail_frame = tk.Frame(self)
+        word_detail_frame.place(relx=0.5, rely=0.5, anchor='center')
+
+        # 単語の詳細を表示するためのテキストウィジェットを作成
+        word_detail = tk.Text(word_detail_frame, font=("Helvetica", 20), wrap='word', height=10, width=30)
+        word_detail.insert('1.0', self.model.get_word_details(word[0]))  # 単語の詳細をテキストウィジェットに挿入
+        word_detail.pack(side='left', fill='both', expand=True)
+
+        # テキストウィジェットにスクロールバーを付けるためのスクロールバーを作成
+        scrollbar = tk.Scrollbar(word_detail_frame, command=word_detail.yview)
+        scrollbar.pack(side='right', fill='y')
+
+        # テキストウィジェットの編集を無効化
+        word_detail.config(state='disabled')
+
+        # テキストウィジェットとスクロールバーを連携させる
+        word_detail.config(yscrollcommand=scrollbar.set)
+
+        # "単語一覧へ"ボタンを作成
+        self.back_button = tk.Button(self, text="単語一覧へ", command=self.on_wordlist_back_button_click)
+        self.back_button.place(relx=0.0, rely=0.0, anchor='nw')
+
+        # "編集"ボタンを作成
+        self.edit_button = tk.Button(self, text="編集", command=self.on_edit_button_click)
+        self.edit_button.place(relx=1.0, rely=0.0, anchor='ne')
+
+        # "次へ"ボタンを作成
+        self.next_word = tk.Button(self, text="次へ", command=self.on_next_button_click)
+        self.next_word.place(relx=1.0, rely=1.0, anchor='se')
+
+        # "前へ"ボタンを作成
+        self.before_word  = tk.Button(self, text="前へ", command=self.on_before_button_click)
+        self.before_word.place(relx=0.88, rely=1.0, anchor='se')
+
+        # 先読みした前後の単語（1が次、-1が前）
+        self.adjacent_words = {}
+        self.prefetch_adjacent_words()
+
+        self.update()
+
+    # "単語一覧へ"ボタンがクリックされた時の処理
+    def on_wordlist_back_button_click(self):
+        print("単語一覧button clicked!")
+        # 単語リスト画面に切り替え
+        self.switcher.switch_to_word_list(self.genre)
+
+    # "編集"ボタンがクリックされた時の処理
+    def on_edit_button_click(self):
+        print("編集button clicked!")
+        # 単語編集画面に切り替え
+        self.switcher.switchTo(WordEditFrame, self.genre, self.word)
+
+    # 前後の単語とその詳細をワーカースレッドで先読みする
+    def prefetch_adjacent_words(self):
+        for direction in (1, -1):
+            self.switcher.async_model.submit(
+                'get_adjacent_word', self.genre[0], self.word[0], direction,
+                key=f'prefetch {direction}',
+                callback=lambda row, d=direction: self.on_adjacent_word_loaded(d, row))
+
+    # 前後の単語が読み込まれた時の処理（続けてその単語の詳細を読み込み、キャッシュに入れておく）
+    # ワーカースレッド側ではキャッシュを使わない（UIスレッドでの編集で古くならないようにするため）
+    # 読み込み中に単語が編集されると古い詳細が届くため、依頼した時のキャッシュの番号を渡し、その後に捨てられていれば追加しない
+    def on_adjacent_word_loaded(self, direction: int, word):
+        self.adjacent_words[direction] = word
+        if word is not None:
+            version = self.model.get_details_version()
+            self.switcher.async_model.submit(
+                'load_word_details', word[0], key=f'prefetch details {direction}',
+                callback=lambda details, word_id=word[0]: self.on_adjacent_details_loaded(word_id, details, version))
+
+    # 前後の単語の詳細が読み込まれた時の処理
+    def on_adjacent_details_loaded(self, word_id: int, details: Optional[str], version: int):
+        if details is not None:
+            self.model.cache_word_details(word_id, details, version)
+
+    # 前後の単語の詳細画面に切り替える（先読みが終わっていない場合はその場で取得）
+    def switch_to_adjacent_word(self, direction: int):
+        word = self.adjacent_words.get(direction)
+        if word is None:
+            word = self.model.get_adjacent_word(self.genre[0], self.word[0], direction)
+        if word is not None:
+            # 単語詳細画面に切り替え
+            self.switcher.switchTo(WordDetailFrame, self.genre, word)
+
+    # "次へ"ボタンがクリックされた時の処理
+    def on_next_button_click(self):
+        print("次へbutton clicked!")
+        # 次の単語を表示（現在の単語が最後の単語だった場合は最初の単語）
+        self.switch_to_adjacent_word(1)
+
+    # "前へ"ボタンがクリックされた時の処理
+    def on_before_button_click(self):
+        print("前へbutton clicked!")
+        # 前の単語を表示（現在の単語が最初の単語だった場合は最後の単語）
+        self.switch_to_adjacent_word(-1)
+
+# 単語確認フレームを表現するクラス
+class WordCheckFrame(tk.Frame):
+    # 1回の理解度チェックで出題する単語の最大数
+    SESSION_SIZE = 20
+    # ランダム出題で自信がない単語を選びやすくする倍率
+    WEAK_WEIGHT = 3
+
+    # 初期化（sessionは出題中の単語を保持するQuizSession）
+    def __init__(self, switcher: FrameSwitcher, model: Model, genre: list, session: QuizSession):
+        super().__init__(switcher.parent)
+        # データベース操作のためのModel、フレームスイッチャー、ジャンル、出題を保存
+        self.genre = genre
+        self.model = model
+        self.switcher = switcher
+        self.session = session
+
+        # "単語一覧へ"ボタンを作成
+        self.back_button = tk.Button(self, text="単語一覧へ", command=self.on_back_button_click)
+        self.back_button.place(relx=1.0, rely=0.0, anchor='ne')
+
+        # "解答へ"ボタンを作成
+        self.answer_button = tk.Button(self, text="解答へ", command=self.on_answer_button_click)
+        self.answer_button.place(relx=1.0, rely=1.0, anchor='se')
+
+        # 全単語を出題し終えたなら
+        if self.session.finished():
+            # "終了しました"と表示
+            label = tk.Label(self, text="終了しました", font=("Helvetica", 50))
+            label.place(relx=0.5, rely=0.5, anchor='center')
+            # "解答へ"ボタンを非表示に
+            self.answer_button.destroy()
+        else:
+            # それ以外の場合、出題中の単語を表示
+            label = tk.Label(self, text=self.session.current[1], font=("Helvetica", 50))
+            label.place(relx=0.5, rely=0.5, anchor='center')
+
+    # "単語一覧へ"ボタンがクリックされた時の処理
+    def on_back_button_click(self):
+        print("単語一覧Button clicked!")
+        # 単語リスト画面に切り替え
+        self.switcher.switch_to_word_list(self.genre)
+
+    # "解答へ"ボタンがクリックされた時の処理
+    def on_answer_button_click(self):
+        print("答えButton clicked!")
+        # 単語確認回答フレームに切り替え
+        self.switcher.switchTo(WordCheckAnswerFrame, self.genre, self.session)
+
+
+# 単語確認回答フレームを表現するクラス
+class WordCheckAnswerFrame(tk.Frame):
+    # 初期化
+    def __init__(self, switcher: FrameSwitcher, model: Model, genre: list, session: QuizSession):
+        super().__init__(switcher.parent)
+        # データベース操作のためのModel、フレームスイッチャー、ジャンル、出題を保存
+        self.genre = genre
+        self.model = model
+        self.switcher = switcher
+        self.session = session
+        word = session.current
+
+        # "単語一覧へ"ボタンを作成
+        self.back_button = tk.Button(self, text="単語一覧へ", command=self.on_back_button_click)
+        self.back_button.place(relx=1.0, rely=0.0, anchor='ne')
+
+        # 評価ボタン（"もう一度"、"正解"、"簡単"）を作成。押すと評価を記録して次の単語へ進む
+        self.grade_frame = tk.Frame(self)
+        self.grade_frame.place(relx=1.0, rely=1.0, anchor='se')
+        for text, grade in (("もう一度", GRADE_AGAIN), ("正解", GRADE_GOOD), ("簡単", GRADE_EASY)):
+            tk.Button(self.grade_frame, text=text, command=lambda g=grade: self.on_grade_button_click(g)).pack(side='left')
+
+        # 出題中の単語を表示
+        word_name = tk.Label(self, text=word[1], font=("Helvetica", 25))
+        word_name.place(relx=0.5, rely=0.2, anchor='center')
+
+        # 単語の詳細をテキストウィジェットを使用して表示
+        word_detail_frame = tk.Frame(self)
+        word_detail_frame.place(relx=0.5, rely=0.5, anchor='center')
+
+        word_detail = tk.Text(word_detail_frame, font=("Helvetica", 20), wrap='word', height=10, width=30)
+        word_detail.insert('1.0', self.model.get_word_details(word[0]))
+        word_detail.pack(side='left', fill='both', expand=True)
+
+        scrollbar = tk.Scrollbar(word_detail_frame, command=word_detail.yview)
+        scrollbar.pack(side='right', fill='y')
+
+        word_detail.config(yscrollcommand=scrollbar.set)
+
+        # 自信度のチェックボックスを作成
+        tk.Label(self, text="自信").place(relx=0.02, rely=0.995, anchor='sw')
+        confidence = tk.IntVar()
+        confidence.set(self.model.get_word_summary(word[0])[2])
+        handler = self.make_confidence_change_handler(word, confidence)
+        confidence.trace('w', handler)
+        confidence_button = tk.Checkbutton(self, variable=confidence,onvalue=1, offvalue=0)
+        confidence_button.place(relx=0.08, rely=1.0, anchor='sw')
+
+    # "単語一覧へ"ボタンがクリックされた時の処理
+    def on_back_button_click(self):
+        print("単語一覧Button clicked!")
+        # 単語リスト画面に切り替え
+        self.switcher.switch_to_word_list(self.genre)
+
+    # 評価ボタンがクリックされた時の処理
+    def on_grade_button_click(self, grade: int):
+        print("評価Button clicked!")
+        # 評価から次回の復習日時を計算し、書き込み待ちに追加
+        self.model.queue_review(self.session.current, grade)
+        self.session.advance()
+        # 理解度チェック画面に切り替え
+        self.switcher.switchTo(WordCheckFrame, self.genre, self.session)
+
+    # 自信度のチェックボックスが変更された時の処理
+    def on_confidence_change(self, word, confidence, *args):
+        print("自信属性 Button clicked!")
+        # データベース内の自信属性の更新を書き込み待ちに追加
+        self.model.queue_word_confidence(word[0], confidence.get())
+
+    # 自信度のチェックボックスが変更された時のイベントハンドラーを作成
+    def make_confidence_change_handler(self, word, confidence):
+        def handler(*args):
+            self.on_confidence_change(word, confidence)
+        return handler
+
+
+
+# 単語編集フレームを表現するクラス
+class WordEditFrame(tk.Frame):
+    # 初期化
+    def __init__(self, switcher: FrameSwitcher, model: Model, genre: list, word: list):
+        super().__init__(switcher.parent)
+        # データベース操作のためのModel、フレームスイッチャー、ジャンル、編集対象の単語を保存
+        self.model = model
+        self.switcher = switcher
+        self.genre = genre
+        self.word = word
+
+        # 中心フレームを作成
+        self.center_frame = tk.Frame(self)
+        self.center_frame.place(relx=0.5, rely=0.5, anchor='center')
+
+        # 単語名と単語詳細の入力欄を作成
+        tk.Label(self.center_frame, text="単語名").grid(row=0, column=0, columnspan=2, pady=5)
+        self.word_name_entry = tk.Entry(self.center_frame)
+        self.word_name_entry.insert(tk.END,word[1])
+        self.word_name_entry.grid(row=1, column=0, columnspan=2, pady=5)
+
+        tk.Label(self.center_frame, text="単語の詳細").grid(row=2, column=0, columnspan=2, pady=5)
+        self.word_detail_entry = ScrolledText(self.center_frame, font=("", 15), height=10, width=30)
+        self.word_detail_entry.insert(tk.END,self.model.get_word_details(word[0]))
+        self.word_detail_entry.grid(row=3, column=0, columnspan=2, pady=5)
+
+        # "完了"ボタンと"キャンセル"ボタンを作成
+        self.add_button = tk.Button(self.center_frame, text="完了", command=self.on_edit_button_click)
+        self.add_button.grid(row=4, column=1, pady=5)
+
+        self.cancel_button = tk.Button(self.center_frame, text="キャンセル", command=self.on_cancel_button_click)
+        self.cancel_button.grid(row=4, column=0, pady=5)
+
+        # "削除"ボタンを作成
+        self.delete_button = tk.Button(self, text="削除", command=self.on_delete_button_click)
+        self.delete_button.place(relx=1.0, rely=0.0, anchor='ne')
+
+    # "キャンセル"ボタンがクリックされた時の処理
+    def on_cancel_button_click(self):
+        print("キャンセルbutton clicked!")
+        # 単語リスト画面に切り替え
+        self.switcher.switch_to_word_list(self.genre)
+
+    # "完了"ボタンがクリックされた時の処理
+    def on_edit_button_click(self):
+        print("edit完了button clicked!")
+        word_name = self.word_name_entry.get()
+        word_detail = self.word_detail_entry.get('1.0','end - 1c')
+        # 単語の編集を行い、その後単語リストフレームに戻る
+        try:
+            self.model.edit_word(self.word[0], word_name, word_detail)
+        except DuplicateWordError as e:
+            messagebox.showerror("編集失敗", str(e))
+            return
+        # 単語リスト画面に切り替え
+        self.switcher.switch_to_word_list(self.genre)
+
+    # "削除"ボタンがクリックされた時の処理
+    def on_delete_button_click(self):
+        print("削除button clicked!")
+        # ユーザーに削除確認のダイアログを表示
+        result = messagebox.askyesno("削除確認", f"本当にこの単語({self.word[1]})を削除しますか？")
+        if result:
+            # はいを押した場合は、単語を削除し、その後単語リストフレームに戻る
+            self.model.delete_word(self.word[0])
+            # 単語リスト画面に切り替え
+            self.switcher.switch_to_word_list(self.genre)
+
+
+
+# ジャンル編集フレームを表現するクラス
+class GenreEditFrame(tk.Frame):
+    # 初期化
+    def __init__(self, switcher: FrameSwitcher, model: Model, genre: list):
+        super().__init__(switcher.parent)
+        # データベース操作のためのModel、フレームスイッチャー、編集対象のジャンルを保存
+        self.model = model
+        self.switcher = switcher
+        self.genre = genre
+
+        # 中心フレームを作成
+        self.center_frame = tk.Frame(self)
+        self.center_frame.place(relx=0.5, rely=0.5, anchor='center')
+
+        # ジャンル名の入力欄を作成
+        tk.Label(self.center_frame, text="追加するジャンル名").grid(row=0, column=0, columnspan=2, pady=5)
+        self.genre_name_entry = tk.Entry(self.center_frame)
+        self.genre_name_entry.insert(tk.END, genre[1])
+        self.genre_name_entry.grid(row=1, column=0, columnspan=2, pady=5)
+
+        # "完了"ボタンと"キャンセル"ボタンを作成
+        self.add_button = tk.Button(self.center_frame, text="完了", command=self.on_add_genre_button_click)
+        self.add_button.grid(row=2, column=1, pady=5)
+
+        self.cancel_button = tk.Button(self.center_frame, text="キャンセル", command=self.on_cancel_button_click)
+        self.cancel_button.grid(row=2, column=0, pady=5)
+
+        # "削除"ボタンを作成
+        self.delete_button = tk.Button(self, text="削除", command=self.on_delete_button_click)
+        self.delete_button.place(relx=1.0, rely=0.0, anchor='ne')
+
+    # "キャンセル"ボタンがクリックされた時の処理
+    def on_cancel_button_click(self):
+        print("キャンセルbutton clicked!")
+        # スタート画面に切り替え
+        self.switcher.switchTo(StartFrame)
+
+    # "完了"ボタンがクリックされた時の処理
+    def on_add_genre_button_click(self):
+        print("完了button clicked!")
+        genre_name = self.genre_name_entry.get()
+        # ジャンルの編集を行い、その後スタート画面に戻る
+        self.model.edit_genre(self.genre[0], genre_name)
+        # スタート画面に切り替え
+        self.switcher.switchTo(StartFrame)
+
+    # "削除"ボタンがクリックされた時の処理
+    def on_delete_button_click(self):
+        print("削除button clicked!")
+        # ユーザーに削除確認のダイアログを表示
+        if messagebox.askyesno('確認', f'{self.genre[1]}を削除してもよろしいですか？'):
+            # はいを押した場合は、ジャンルに削除済みの印を付けてすぐにスタート画面に戻る
+            # 単語はワーカースレッドで少しずつ削除する
+            self.model.delete_genre(self.genre[0])
+            self.switcher.start_purge()
+            self.switcher.switchTo(StartFrame)
+
+
+# スクリプトとして実行された場合のみアプリケーションを起動
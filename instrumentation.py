@@ -0,0 +1,277 @@
+# SQLの実行時間、画面切り替えの時間、イベントハンドラーの処理時間を計測してJSONLファイルに記録するモジュール
+# 環境変数で有効にする（有効にしない場合は何も記録せず、処理も遅くならない）
+#   MY_WORD_APP_TRACE          記録先のファイル（例: trace.jsonl）。指定すると計測を有効にする
+#   MY_WORD_APP_TRACE_MIN_MS   この時間（ミリ秒）未満の処理は記録しない（既定: 1）
+#   MY_WORD_APP_TRACE_PROFILE  1を指定すると、イベントハンドラーごとにcProfileで関数ごとの時間も記録する
+# 記録の集計: python instrumentation.py trace.jsonl [--top 20]
+# logging・cProfile・pstatsは読み込みに時間がかかるため、計測が有効な時だけ関数の中で読み込む
+# （このモジュールはmodelから読み込まれるので、Modelの読み込み時間に影響しないようにする）
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Optional
+
+# 記録ファイルの1ファイルあたりの上限と、残す古いファイルの数
+MAX_LOG_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+# 記録するSQLの最大文字数
+MAX_SQL_LENGTH = 300
+
+# cProfileの結果として記録する関数の数
+PROFILE_TOP_FUNCTIONS = 15
+
+
+# SQLの空白をまとめて、集計しやすい形にする
+def normalize_sql(sql: str) -> str:
+    return re.sub(r'\s+', ' ', sql).strip()[:MAX_SQL_LENGTH]
+
+
+# 計測結果をJSONLファイルに書き込むクラス（複数のスレッドから呼び出せる）
+class Tracer:
+    # 初期化（min_msはこの時間未満の処理を記録しないしきい値、profileはcProfileでの計測の有無）
+    def __init__(self, path: str, min_ms: float = 1.0, profile: bool = False,
+                 max_bytes: int = MAX_LOG_BYTES, backup_count: int = LOG_BACKUP_COUNT):
+        import logging
+        import logging.handlers
+        self.path = path
+        self.min_ms = min_ms
+        self.profile = profile
+        # ファイルの切り替え（ローテーション）とスレッド間の排他はloggingに任せる
+        self.logger = logging.getLogger(f"{__name__}.{path}")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count,
+                                                            encoding='utf-8')
+        self.handler.setFormatter(logging.Formatter('%(message)s'))
+        self.logger.addHandler(self.handler)
+
+    # 計測結果を1行のJSONとして記録（msがしきい値未満の場合は記録しない）
+    def emit(self, event: dict):
+        if event.get('ms', 0) < self.min_ms:
+            return
+        event = {'time': time.time(), 'thread': threading.current_thread().name, **event}
+        self.logger.info(json.dumps(event, ensure_ascii=False))
+
+    # 記録ファイルを閉じる
+    def close(self):
+        self.logger.removeHandler(self.handler)
+        self.handler.close()
+
+    # ModelのSQLの実行時間を記録するように、接続とカーソルを計測用のものに置き換える
+    def instrument_model(self, model):
+        connection = TimedConnection(model.connection, self)
+        model.connection = connection
+        model.cursor = TimedCursor(model.cursor, connection)
+
+    # Tkのイベントハンドラー（ボタンのcommandやafterで登録した関数など）の処理時間を記録する
+    # Tkは関数を登録する時にtkinter.CallWrapperで包むため、これを計測用のクラスに置き換える
+    # この関数を呼ぶ前に登録された関数は計測されない
+    def instrument_tk(self):
+        import tkinter
+        tracer = self
+
+        class TimedCallWrapper(tkinter.CallWrapper):
+            def __call__(self, *args):
+                return tracer.call_handler(self.func, super().__call__, *args)
+
+        tkinter.CallWrapper = TimedCallWrapper
+
+    # イベントハンドラーを実行し、処理時間（と、有効な場合はcProfileの結果）を記録
+    def call_handler(self, func, call, *args):
+        profiler = None
+        if self.profile:
+            import cProfile
+            profiler = cProfile.Profile()
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            return call(*args)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            elapsed = (time.perf_counter() - start) * 1000
+            if elapsed >= self.min_ms:
+                event = {'type': 'handler', 'name': getattr(func, '__qualname__', repr(func)), 'ms': elapsed}
+                if profiler is not None:
+                    event['profile'] = summarize_profile(profiler)
+                self.emit(event)
+
+    # 画面切り替えの時間を記録（construct_msはフレームの生成、destroy_msは前のフレームの破棄、
+    # paint_msは表示してから最初の描画が終わるまで。キャッシュから取り出した場合はconstruct_msが0）
+    def emit_switch(self, frame_name: str, cached: bool, construct_ms: float, destroy_ms: float, paint_ms: float):
+        self.emit({'type': 'switch', 'name': frame_name, 'cached': cached, 'ms': construct_ms + destroy_ms + paint_ms,
+                   'construct_ms': construct_ms, 'destroy_ms': destroy_ms, 'paint_ms': paint_ms})
+
+
+# cProfileの結果から、累積時間が長い関数の一覧を作成
+def summarize_profile(profiler) -> list:
+    import pstats
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, name), (_, calls, _, cumulative, _) in stats.stats.items():
+        rows.append({'function': f"{os.path.basename(filename)}:{line}({name})", 'calls': calls,
+                     'cumulative_ms': cumulative * 1000})
+    rows.sort(key=lambda row: row['cumulative_ms'], reverse=True)
+    return rows[:PROFILE_TOP_FUNCTIONS]
+
+
+# SQLiteの接続の代わりに使い、コミットなどの時間を記録するクラス（その他の操作は元の接続に任せる）
+# set_trace_callbackで、実際に実行された値の入ったSQLも記録する
+class TimedConnection:
+    # 初期化
+    def __init__(self, connection, tracer: Tracer):
+        self.connection = connection
+        self.tracer = tracer
+        # 最後に実行が始まったSQL（値が埋め込まれたもの）
+        self.last_statement = None
+        connection.set_trace_callback(self.on_statement)
+
+    # SQLiteがSQLの実行を始めた時に呼ばれる
+    def on_statement(self, statement: str):
+        self.last_statement = statement
+
+    # 処理を実行し、その時間をSQLとともに記録
+    def timed(self, sql: str, phase: str, call, *args):
+        self.last_statement = None
+        start = time.perf_counter()
+        try:
+            return call(*args)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            event = {'type': 'sql', 'name': normalize_sql(sql), 'phase': phase, 'ms': elapsed}
+            if self.last_statement is not None:
+                event['statement'] = self.last_statement[:MAX_SQL_LENGTH]
+            self.tracer.emit(event)
+
+    def execute(self, sql: str, *args):
+        return self.timed(sql, 'execute', self.connection.execute, sql, *args)
+
+    def commit(self):
+        return self.timed("COMMIT", 'commit', self.connection.commit)
+
+    def rollback(self):
+        return self.timed("ROLLBACK", 'commit', self.connection.rollback)
+
+    # その他の属性やメソッドは元の接続のものを使う
+    def __getattr__(self, name: str):
+        return getattr(self.connection, name)
+
+
+# SQLiteのカーソルの代わりに使い、SQLの実行と結果の取得の時間を記録するクラス
+class TimedCursor:
+    # 初期化
+    def __init__(self, cursor, connection: TimedConnection):
+        self.cursor = cursor
+        self.connection = connection
+        # 最後に実行したSQL（結果の取得時間の記録に使う）
+        self.sql = ""
+
+    def execute(self, sql: str, *args):
+        self.sql = sql
+        self.connection.timed(sql, 'execute', self.cursor.execute, sql, *args)
+        return self
+
+    def executemany(self, sql: str, *args):
+        self.sql = sql
+        self.connection.timed(sql, 'execute', self.cursor.executemany, sql, *args)
+        return self
+
+    def fetchone(self):
+        return self.connection.timed(self.sql, 'fetch', self.cursor.fetchone)
+
+    def fetchall(self):
+        return self.connection.timed(self.sql, 'fetch', self.cursor.fetchall)
+
+    def fetchmany(self, *args):
+        return self.connection.timed(self.sql, 'fetch', self.cursor.fetchmany, *args)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    # その他の属性（lastrowidなど）は元のカーソルのものを使う
+    def __getattr__(self, name: str):
+        return getattr(self.cursor, name)
+
+
+# 環境変数から作成したTracer（計測が無効な場合はNone）
+tracer: Optional[Tracer] = None
+tracer_loaded = False
+
+
+# 環境変数で計測が有効になっていればTracerを返す（最初の呼び出しで作成し、以降は同じものを返す）
+def get_tracer() -> Optional[Tracer]:
+    global tracer, tracer_loaded
+    if not tracer_loaded:
+        tracer_loaded = True
+        path = os.environ.get('MY_WORD_APP_TRACE')
+        if path:
+            tracer = Tracer(path, float(os.environ.get('MY_WORD_APP_TRACE_MIN_MS', '1')),
+                            os.environ.get('MY_WORD_APP_TRACE_PROFILE') == '1')
+    return tracer
+
+
+# 記録ファイル（ローテーションされた古いファイルも含む）から計測結果を順に読み込む
+def read_events(path: str):
+    paths = [f"{path}.{i}" for i in range(LOG_BACKUP_COUNT, 0, -1)] + [path]
+    for log_path in paths:
+        if not os.path.exists(log_path):
+            continue
+        with open(log_path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+# 計測結果を種類と名前ごとに集計し、合計時間の長い順に並べる
+# 各行は{'type', 'name', 'count', 'total_ms', 'max_ms', 'mean_ms'}（画面切り替えは内訳の平均も含む）
+def aggregate(events) -> list:
+    groups = defaultdict(list)
+    for event in events:
+        groups[(event['type'], event['name'])].append(event)
+    rows = []
+    for (event_type, name), group in groups.items():
+        total = sum(e['ms'] for e in group)
+        row = {'type': event_type, 'name': name, 'count': len(group), 'total_ms': total,
+               'max_ms': max(e['ms'] for e in group), 'mean_ms': total / len(group)}
+        if event_type == 'switch':
+            for part in ('construct_ms', 'destroy_ms', 'paint_ms'):
+                row[part] = sum(e[part] for e in group) / len(group)
+        rows.append(row)
+    rows.sort(key=lambda row: row['total_ms'], reverse=True)
+    return rows
+
+
+# 集計結果を表示
+def print_report(rows: list, top: int):
+    for event_type, title in (('switch', "画面切り替え"), ('handler', "イベントハンドラー"), ('sql', "SQL")):
+        selected = [row for row in rows if row['type'] == event_type][:top]
+        if not selected:
+            continue
+        print(f"=== {title}（合計時間の長い順） ===")
+        for row in selected:
+            line = (f"{row['total_ms']:10.1f} ms 合計  {row['mean_ms']:8.2f} ms 平均  {row['max_ms']:8.2f} ms 最大"
+                    f"  {row['count']:6d}回  {row['name']}")
+            if event_type == 'switch':
+                line += (f"  (生成 {row['construct_ms']:.1f} / 破棄 {row['destroy_ms']:.1f}"
+                         f" / 描画 {row['paint_ms']:.1f} ms)")
+            print(line)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="MY_WORD_APP_TRACEで記録した計測結果を集計します")
+    parser.add_argument('path', help="記録ファイル（ローテーションされた古いファイルもまとめて読み込む）")
+    parser.add_argument('--top', type=int, default=20, help="種類ごとに表示する件数")
+    args = parser.parse_args(argv)
+    print_report(aggregate(read_events(args.path)), args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
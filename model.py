@@ -0,0 +1,2326 @@
+# My単語帳のデータベース操作のモジュール（tkinterに依存しないため、画面を使わないスクリプトやテストからも読み込める）
+import sqlite3
+from typing import Iterable, Iterator, Callable, Optional
+import random
+import csv
+import json
+import os
+import re
+from itertools import islice
+import heapq
+from collections import OrderedDict, Counter
+from concurrent.futures import ThreadPoolExecutor, Future
+import queue
+import time
+import unicodedata
+import hashlib
+import struct
+import zlib
+import bisect
+import datetime
+
+from instrumentation import get_tracer
+
+
+# 単語ファイル（CSV/TSV/JSONL）を1行ずつ読み込み、(単語名, 詳細, 自信度)を順に返すジェネレータ
+# ファイル全体をメモリに載せないため、巨大な単語帳でも一定のメモリで読み込める
+def read_word_file(path: str, fmt: str = None) -> Iterator[tuple]:
+    if fmt is None:
+        # 形式が指定されていない場合は拡張子から判定
+        fmt = os.path.splitext(path)[1].lower().lstrip('.')
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        yield from read_word_stream(f, fmt)
+
+
+# ファイルオブジェクトから単語を1行ずつ読み込むジェネレータ（標準入力などにも使える）
+def read_word_stream(f, fmt: str) -> Iterator[tuple]:
+    if fmt == 'jsonl':
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            yield (row['word'], row.get('details', ''), bool(row.get('confidence', False)))
+    elif fmt in ('csv', 'tsv'):
+        reader = csv.reader(f, delimiter='\t' if fmt == 'tsv' else ',')
+        for i, row in enumerate(reader):
+            if not row:
+                continue
+            # 1行目がヘッダーの場合は読み飛ばす
+            if i == 0 and row[0].strip().lower() == 'word':
+                continue
+            details = row[1] if len(row) > 1 else ''
+            confidence = len(row) > 2 and row[2].strip().lower() in ('1', 'true', 'yes')
+            yield (row[0], details, confidence)
+    else:
+        raise ValueError(f"対応していないファイル形式です: {fmt}")
+
+
+# (単語名, 詳細, 自信度)を1行ずつ単語ファイルの形式で書き出し、書き出した件数を返す（read_word_streamで読み込める形式）
+def write_word_stream(f, fmt: str, rows: Iterable[tuple]) -> int:
+    count = 0
+    if fmt == 'jsonl':
+        for word, details, confidence in rows:
+            f.write(json.dumps({'word': word, 'details': details, 'confidence': bool(confidence)}, ensure_ascii=False))
+            f.write('\n')
+            count += 1
+    elif fmt in ('csv', 'tsv'):
+        writer = csv.writer(f, delimiter='\t' if fmt == 'tsv' else ',', lineterminator='\n')
+        writer.writerow(['word', 'details', 'confidence'])
+        for word, details, confidence in rows:
+            writer.writerow([word, details, int(bool(confidence))])
+            count += 1
+    else:
+        raise ValueError(f"対応していないファイル形式です: {fmt}")
+    return count
+
+
+# 重複の判定に使う単語名の正規化（NFKCで全角英数字・半角カナなどの文字幅をそろえ、大文字・小文字を区別せず、連続する空白を1つにまとめる）
+# データベースの関数normalize_wordとしても登録し、マイグレーションと重複の整理で使う
+def normalize_word(word: Optional[str]) -> Optional[str]:
+    if word is None:
+        return None
+    return ' '.join(unicodedata.normalize('NFKC', word).casefold().split())
+
+
+# 正規化した単語名（norm_key）のtrigramの集合（前後に空白を1つずつ付けて3文字ずつ切り出す。word_trigramsのトリガーと同じ規則）
+# 先頭からTRIGRAM_MAX_POSITIONS個までを使う
+def make_trigrams(norm_key: str) -> set:
+    padded = ' ' + norm_key + ' '
+    return {padded[i:i + 3] for i in range(min(len(norm_key), TRIGRAM_MAX_POSITIONS))}
+
+
+# 2つの文字列の編集距離（挿入・削除・置換の回数）を計算する
+# max_distanceを指定すると、それを超えることが分かった時点でmax_distance + 1を返す
+def edit_distance(a: str, b: str, max_distance: int = None) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+# 重複した単語の詳細をまとめる（追加する詳細が既に含まれている場合はそのまま）
+# SQLの関数merge_detailsとして登録し、bulk_importの'merge'でも使う
+def merge_details(details: Optional[str], other: Optional[str]) -> Optional[str]:
+    if not details:
+        return other
+    if not other or other in details:
+        return details
+    return details + '\n' + other
+
+
+# SQLで詳細の列（圧縮したものはBLOB）を文字列として読む式（columnは列の名前。圧縮していない詳細は関数を呼ばずにそのまま返す）
+def make_details_sql(column: str = 'details') -> str:
+    return f"CASE WHEN typeof({column}) = 'blob' THEN decompress_details({column}) ELSE {column} END"
+
+
+# 詳細を圧縮し、形式の番号と辞書のIDを先頭に付けたバイト列を返す（dictionaryは学習した辞書。Noneの場合は辞書を使わない）
+# zlibのヘッダーとチェックサムを省いた生のDeflate形式にする（短い詳細では6バイトでも差が出る）
+def pack_details(details: str, dictionary_id: int = 0, dictionary: bytes = None) -> bytes:
+    if dictionary:
+        compressor = zlib.compressobj(9, zlib.DEFLATED, -15, zdict=dictionary)
+    else:
+        compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+    data = compressor.compress(details.encode('utf-8')) + compressor.flush()
+    return COMPRESSED_DETAILS_HEADER.pack(COMPRESSED_DETAILS_FORMAT, dictionary_id) + data
+
+
+# pack_detailsで圧縮した詳細の辞書のIDを取得（辞書を使っていない場合は0）
+def get_details_dictionary_id(data: bytes) -> int:
+    details_format, dictionary_id = COMPRESSED_DETAILS_HEADER.unpack_from(data)
+    if details_format != COMPRESSED_DETAILS_FORMAT:
+        raise ValueError(f"対応していない詳細の圧縮形式です: {details_format}")
+    return dictionary_id
+
+
+# pack_detailsで圧縮した詳細を元に戻す（dictionaryは圧縮に使った辞書）
+def unpack_details(data: bytes, dictionary: bytes = None) -> str:
+    get_details_dictionary_id(data)
+    if not dictionary:
+        return zlib.decompress(data[COMPRESSED_DETAILS_HEADER.size:], -15).decode('utf-8')
+    decompressor = zlib.decompressobj(-15, zdict=dictionary)
+    return (decompressor.decompress(data[COMPRESSED_DETAILS_HEADER.size:]) + decompressor.flush()).decode('utf-8')
+
+
+# 同じジャンルに正規化した単語名が同じ単語がある場合のエラー（word_idは既にある単語のID）
+class DuplicateWordError(ValueError):
+    def __init__(self, word: str, word_id: int):
+        super().__init__(f"同じ単語が既に登録されています: {word}")
+        self.word = word
+        self.word_id = word_id
+
+
+# テキスト中の検索語を【】で囲む（大文字・小文字は区別しない）
+def highlight_terms(text: str, terms: list) -> str:
+    pattern = re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+    return pattern.sub(lambda m: HIGHLIGHT_START + m.group(0) + HIGHLIGHT_END, text)
+
+
+# テキストから最初に検索語が現れる付近を切り出し、検索語を【】で囲む
+def make_snippet(text: str, terms: list, width: int = 32) -> str:
+    lower = text.lower()
+    positions = [lower.find(term.lower()) for term in terms]
+    positions = [p for p in positions if p >= 0]
+    start = max(min(positions) - width // 4, 0) if positions else 0
+    snippet = text[start:start + width]
+    return ('…' if start > 0 else '') + highlight_terms(snippet, terms) + ('…' if start + width < len(text) else '')
+
+
+# イテラブルをbatch_size件ずつのリストに分割するジェネレータ
+def batched(iterable: Iterable, batch_size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+# 例外をログに記録する（loggingは読み込みに時間がかかるため、エラーが起きた時だけ関数の中で読み込む）
+# nameにはロガーの名前（記録するモジュールの__name__）を渡す
+def log_error(message: str, error: BaseException, name: str = __name__):
+    import logging
+    logging.getLogger(name).error("%s: %r", message, error, exc_info=error)
+
+
+# スキーマバージョン1: 単語テーブルの検索用インデックスを追加
+def migrate_add_word_indexes(cursor: sqlite3.Cursor):
+    # get_wordsのジャンル絞り込みとid順の並び替えに使う
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_words_genre_id ON words (genre_id, id)''')
+    # sort_confidence/sort_no_confidenceの自信度での絞り込みに使う
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_words_genre_confidence ON words (genre_id, confidence, id)''')
+
+
+# スキーマバージョン2: 単語名と詳細の全文検索用のFTS5テーブルを追加
+# 日本語は空白で区切られないため、部分一致で検索できるtrigramトークナイザーを使う
+def migrate_add_full_text_search(cursor: sqlite3.Cursor):
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS words_fts USING fts5(
+            word, details, content='words', content_rowid='id', tokenize='trigram'
+        )
+    ''')
+    # 単語テーブルの変更に合わせて検索用テーブルを更新するトリガー
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS words_fts_insert AFTER INSERT ON words BEGIN
+            INSERT INTO words_fts (rowid, word, details) VALUES (new.id, new.word, new.details);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS words_fts_delete AFTER DELETE ON words BEGIN
+            INSERT INTO words_fts (words_fts, rowid, word, details) VALUES ('delete', old.id, old.word, old.details);
+        END
+    ''')
+    # 自信度の更新では検索用テーブルを更新しない
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS words_fts_update AFTER UPDATE OF word, details ON words BEGIN
+            INSERT INTO words_fts (words_fts, rowid, word, details) VALUES ('delete', old.id, old.word, old.details);
+            INSERT INTO words_fts (rowid, word, details) VALUES (new.id, new.word, new.details);
+        END
+    ''')
+    # 単語名での一致を詳細での一致より重視して並べる（ORDER BY rankで使われる）
+    cursor.execute('''INSERT INTO words_fts (words_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')''')
+    # 既存の単語を検索用テーブルに登録
+    cursor.execute('''INSERT INTO words_fts (words_fts) VALUES ('rebuild')''')
+
+
+# スキーマバージョン3: 単語名順のページ取得用インデックスを追加
+def migrate_add_word_sort_indexes(cursor: sqlite3.Cursor):
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_words_genre_word ON words (genre_id, word, id)''')
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_words_genre_confidence_word ON words (genre_id, confidence, word, id)''')
+
+
+# スキーマバージョン4: 単語リスト用の(id, 単語名, 自信度)をテーブルを読まずに取得できるカバリングインデックスに置き換え
+def migrate_add_word_summary_indexes(cursor: sqlite3.Cursor):
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_words_genre_summary ON words (genre_id, id, word, confidence)''')
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_words_genre_confidence_summary ON words (genre_id, confidence, id, word)''')
+    # 新しいインデックスの先頭部分と同じで不要になったインデックスを削除
+    cursor.execute('''DROP INDEX IF EXISTS idx_words_genre_id''')
+    cursor.execute('''DROP INDEX IF EXISTS idx_words_genre_confidence''')
+
+
+# スキーマバージョン5: 理解度チェックの復習スケジュール（間隔・易しさ・連続正解数・次回の復習日時）を追加
+def migrate_add_review_schedule(cursor: sqlite3.Cursor):
+    cursor.execute('''ALTER TABLE words ADD COLUMN review_interval REAL NOT NULL DEFAULT 0''')
+    cursor.execute(f'''ALTER TABLE words ADD COLUMN ease REAL NOT NULL DEFAULT {INITIAL_EASE}''')
+    cursor.execute('''ALTER TABLE words ADD COLUMN repetitions INTEGER NOT NULL DEFAULT 0''')
+    # 未復習の単語はdue=0なので、すぐに復習対象になる
+    cursor.execute('''ALTER TABLE words ADD COLUMN due INTEGER NOT NULL DEFAULT 0''')
+    # 復習日時が来た単語を古い順に範囲読み込みするためのインデックス
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_words_genre_due ON words (genre_id, due, id)''')
+
+
+# スキーマバージョン6: ジャンルごとの単語数と自信がある単語の数を、単語テーブルのトリガーで更新する集計テーブルを追加
+# スタート画面で単語数を表示するたびにwordsを数えないようにする（読み込みはジャンルの数だけで、単語数によらない）
+def migrate_add_genre_stats(cursor: sqlite3.Cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS genre_stats (
+            genre_id INTEGER PRIMARY KEY,
+            words INTEGER NOT NULL DEFAULT 0,
+            confident INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    # 単語を追加したら、そのジャンルの行がなければ作成してから数を増やす
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS genre_stats_insert AFTER INSERT ON words BEGIN
+            INSERT OR IGNORE INTO genre_stats (genre_id) SELECT new.genre_id WHERE new.genre_id IS NOT NULL;
+            UPDATE genre_stats SET words = words + 1, confident = confident + (coalesce(new.confidence, 0) != 0)
+            WHERE genre_id = new.genre_id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS genre_stats_delete AFTER DELETE ON words BEGIN
+            UPDATE genre_stats SET words = words - 1, confident = confident - (coalesce(old.confidence, 0) != 0)
+            WHERE genre_id = old.genre_id;
+        END
+    ''')
+    # ジャンルか自信度が変わった場合だけ更新する（単語名や詳細、復習日時の更新では何もしない）
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS genre_stats_update AFTER UPDATE OF genre_id, confidence ON words
+        WHEN old.genre_id IS NOT new.genre_id OR (coalesce(old.confidence, 0) != 0) != (coalesce(new.confidence, 0) != 0)
+        BEGIN
+            UPDATE genre_stats SET words = words - 1, confident = confident - (coalesce(old.confidence, 0) != 0)
+            WHERE genre_id = old.genre_id;
+            INSERT OR IGNORE INTO genre_stats (genre_id) SELECT new.genre_id WHERE new.genre_id IS NOT NULL;
+            UPDATE genre_stats SET words = words + 1, confident = confident + (coalesce(new.confidence, 0) != 0)
+            WHERE genre_id = new.genre_id;
+        END
+    ''')
+    # ジャンルを削除したら、その行も削除する
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS genre_stats_genre_delete AFTER DELETE ON genres BEGIN
+            DELETE FROM genre_stats WHERE genre_id = old.id;
+        END
+    ''')
+    # 既存の単語を数える
+    rebuild_genre_stats(cursor)
+
+
+# ジャンルごとの単語数と自信がある単語の数を単語テーブルから数え直す
+def rebuild_genre_stats(cursor: sqlite3.Cursor):
+    cursor.execute('''DELETE FROM genre_stats''')
+    cursor.execute('''
+        INSERT INTO genre_stats (genre_id, words, confident)
+        SELECT genre_id, count(*), sum(coalesce(confidence, 0) != 0) FROM words
+        WHERE genre_id IS NOT NULL GROUP BY genre_id
+    ''')
+
+
+# スキーマバージョン7: ジャンルを削除するとその単語も削除されるように、単語テーブルの外部キーにON DELETE CASCADEを付ける
+# SQLiteでは外部キーを変更できないため、新しいテーブルに単語を移して置き換える（インデックスとトリガーは元の定義で作り直す）
+# 最初からCASCADEが付いているデータベース（このバージョン以降に作成したもの）では何もしない
+def migrate_cascade_word_genre(cursor: sqlite3.Cursor):
+    cursor.execute('''PRAGMA foreign_key_list(words)''')
+    # 各行は(id, seq, 参照先のテーブル, 列, 参照先の列, ON UPDATE, ON DELETE, MATCH)
+    if any(row[2] == 'genres' and row[6] == 'CASCADE' for row in cursor.fetchall()):
+        return
+    cursor.execute('''SELECT sql FROM sqlite_master WHERE tbl_name = 'words' AND type IN ('index', 'trigger') AND sql IS NOT NULL''')
+    definitions = [row[0] for row in cursor.fetchall()]
+    cursor.execute(f'''
+        CREATE TABLE words_new (
+            id INTEGER PRIMARY KEY,
+            genre_id INTEGER,
+            word TEXT,
+            details TEXT,
+            confidence BOOLEAN,
+            review_interval REAL NOT NULL DEFAULT 0,
+            ease REAL NOT NULL DEFAULT {INITIAL_EASE},
+            repetitions INTEGER NOT NULL DEFAULT 0,
+            due INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY(genre_id) REFERENCES genres(id) ON DELETE CASCADE
+        )
+    ''')
+    # idをそのまま移すため、全文検索用テーブル（rowidが単語のid）は作り直さなくてよい
+    columns = ', '.join(('id', 'genre_id', 'word', 'details', 'confidence', 'review_interval', 'ease', 'repetitions', 'due'))
+    cursor.execute(f'''INSERT INTO words_new ({columns}) SELECT {columns} FROM words''')
+    cursor.execute('''DROP TABLE words''')
+    cursor.execute('''ALTER TABLE words_new RENAME TO words''')
+    for sql in definitions:
+        cursor.execute(sql)
+
+
+# スキーマバージョン8: ジャンルの削除済みの印を追加
+# 削除したジャンルはすぐに一覧から見えなくし、単語はpurge_deleted_genresで少しずつ削除する
+def migrate_add_genre_soft_delete(cursor: sqlite3.Cursor):
+    cursor.execute('''ALTER TABLE genres ADD COLUMN deleted INTEGER NOT NULL DEFAULT 0''')
+    # 起動時などに削除待ちのジャンルを探す時に、ジャンルテーブル全体を読まないようにする
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_genres_deleted ON genres (id) WHERE deleted = 1''')
+
+
+# スキーマバージョン9: 重複の判定に使う正規化した単語名（normalize_word）の列と、ジャンルごとに一意なインデックスを追加
+# 既存の重複は、正規化した単語名の順に1回だけ読んで最も古い単語にだけキーを付ける（残りはキーがNULLのまま、dedupe_wordsでまとめる）
+def migrate_add_word_norm_key(cursor: sqlite3.Cursor):
+    cursor.execute('''ALTER TABLE words ADD COLUMN norm_key TEXT''')
+    cursor.execute('''UPDATE words SET norm_key = normalize_word(word)''')
+    cursor.execute('''SELECT id, genre_id, norm_key FROM words ORDER BY genre_id, norm_key, id''')
+    duplicate_ids = []
+    previous = None
+    for word_id, genre_id, norm_key in cursor.fetchall():
+        if (genre_id, norm_key) == previous:
+            duplicate_ids.append((word_id,))
+        previous = (genre_id, norm_key)
+    cursor.executemany('''UPDATE words SET norm_key = NULL WHERE id = ?''', duplicate_ids)
+    # NULLどうしは重複とみなされないため、キーのない単語はいくつあってもよい
+    cursor.execute('''CREATE UNIQUE INDEX IF NOT EXISTS idx_words_genre_norm_key ON words (genre_id, norm_key)''')
+    # UPSERT（INSERT ... ON CONFLICT）から呼ばれたトリガーの中ではINSERT OR IGNOREが効かず一意制約の違反になるため、
+    # 集計テーブルの行がない場合だけ作成するようにトリガーを作り直す
+    cursor.execute('''DROP TRIGGER IF EXISTS genre_stats_insert''')
+    cursor.execute('''
+        CREATE TRIGGER genre_stats_insert AFTER INSERT ON words BEGIN
+            INSERT INTO genre_stats (genre_id) SELECT new.genre_id
+            WHERE new.genre_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM genre_stats WHERE genre_id = new.genre_id);
+            UPDATE genre_stats SET words = words + 1, confident = confident + (coalesce(new.confidence, 0) != 0)
+            WHERE genre_id = new.genre_id;
+        END
+    ''')
+    cursor.execute('''DROP TRIGGER IF EXISTS genre_stats_update''')
+    cursor.execute('''
+        CREATE TRIGGER genre_stats_update AFTER UPDATE OF genre_id, confidence ON words
+        WHEN old.genre_id IS NOT new.genre_id OR (coalesce(old.confidence, 0) != 0) != (coalesce(new.confidence, 0) != 0)
+        BEGIN
+            UPDATE genre_stats SET words = words - 1, confident = confident - (coalesce(old.confidence, 0) != 0)
+            WHERE genre_id = old.genre_id;
+            INSERT INTO genre_stats (genre_id) SELECT new.genre_id
+            WHERE new.genre_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM genre_stats WHERE genre_id = new.genre_id);
+            UPDATE genre_stats SET words = words + 1, confident = confident + (coalesce(new.confidence, 0) != 0)
+            WHERE genre_id = new.genre_id;
+        END
+    ''')
+
+
+# スキーマバージョン10: 単語名のあいまい検索（fuzzy_lookup）用のtrigramの転置インデックスを追加
+# 正規化した単語名のtrigramごとに単語のIDを持ち、単語の追加・編集・削除のトリガーで更新する
+# trigramはtrigram_positions（1〜TRIGRAM_MAX_POSITIONSの整数）と結合して切り出す（トリガーの中ではWITH RECURSIVEを使えないため）
+def migrate_add_word_trigrams(cursor: sqlite3.Cursor):
+    cursor.execute('''CREATE TABLE IF NOT EXISTS trigram_positions (i INTEGER PRIMARY KEY)''')
+    cursor.executemany('''INSERT OR IGNORE INTO trigram_positions (i) VALUES (?)''',
+                       [(i,) for i in range(1, TRIGRAM_MAX_POSITIONS + 1)])
+    # ジャンルで絞り込む場合は(trigram, genre_id)の範囲だけを読む
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS word_trigrams (
+            trigram TEXT NOT NULL,
+            genre_id INTEGER NOT NULL,
+            word_id INTEGER NOT NULL,
+            PRIMARY KEY (trigram, genre_id, word_id)
+        ) WITHOUT ROWID
+    ''')
+    # 同じtrigramが単語に2回以上現れる場合（bananaのanaなど）は1行だけにする
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS word_trigrams_insert AFTER INSERT ON words
+        WHEN new.norm_key IS NOT NULL AND new.genre_id IS NOT NULL
+        BEGIN
+            INSERT INTO word_trigrams (trigram, genre_id, word_id)
+            SELECT DISTINCT substr(' ' || new.norm_key || ' ', i, 3), new.genre_id, new.id FROM trigram_positions
+            WHERE i <= length(new.norm_key);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS word_trigrams_delete AFTER DELETE ON words
+        WHEN old.norm_key IS NOT NULL AND old.genre_id IS NOT NULL
+        BEGIN
+            DELETE FROM word_trigrams WHERE genre_id = old.genre_id AND word_id = old.id AND trigram IN (
+                SELECT substr(' ' || old.norm_key || ' ', i, 3) FROM trigram_positions WHERE i <= length(old.norm_key));
+        END
+    ''')
+    # 正規化した単語名かジャンルが変わった場合だけ更新する（詳細や自信度の更新では何もしない）
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS word_trigrams_update AFTER UPDATE OF genre_id, norm_key ON words
+        WHEN old.norm_key IS NOT new.norm_key OR old.genre_id IS NOT new.genre_id
+        BEGIN
+            DELETE FROM word_trigrams WHERE genre_id = old.genre_id AND word_id = old.id AND trigram IN (
+                SELECT substr(' ' || old.norm_key || ' ', i, 3) FROM trigram_positions WHERE i <= length(old.norm_key));
+            INSERT INTO word_trigrams (trigram, genre_id, word_id)
+            SELECT DISTINCT substr(' ' || new.norm_key || ' ', i, 3), new.genre_id, new.id FROM trigram_positions
+            WHERE i <= length(new.norm_key) AND new.genre_id IS NOT NULL;
+        END
+    ''')
+    # 既存の単語を登録
+    cursor.execute('''
+        INSERT OR IGNORE INTO word_trigrams (trigram, genre_id, word_id)
+        SELECT substr(' ' || norm_key || ' ', i, 3), genre_id, id FROM words JOIN trigram_positions ON i <= length(norm_key)
+        WHERE norm_key IS NOT NULL AND genre_id IS NOT NULL
+    ''')
+
+
+# マイグレーション前から登録されていた行の同期用のID（コピーしたデータベースどうしで同じ行が同じIDになるように、行の内容から作る）
+def make_legacy_uid(*parts) -> bytes:
+    return hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=16).digest()
+
+
+# スキーマバージョン11: データベースどうしの差分の同期（Model.sync_with）のための変更の記録を追加
+# ジャンルと単語に、データベースをまたいで同じ行を表すID（uid）、変更した時のこのデータベースの版番号（version）、変更日時（updated_at）を付ける
+# 削除した行は削除の記録（sync_tombstones）に残す。sync_stateはこのデータベースのIDと版番号、sync_peersは相手ごとの受け取り済みの版番号
+def migrate_add_sync_log(cursor: sqlite3.Cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            replica_id BLOB NOT NULL,
+            clock INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''INSERT INTO sync_state (id, replica_id, clock) SELECT 1, randomblob(16), 0
+                      WHERE NOT EXISTS (SELECT 1 FROM sync_state)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS sync_peers (replica_id BLOB PRIMARY KEY, version INTEGER NOT NULL)''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_tombstones (
+            uid BLOB PRIMARY KEY,
+            kind TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            updated_at INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_sync_tombstones_version ON sync_tombstones (version)''')
+    # 既存の行は版番号0（まだ同期したことのない相手にはすべて送る）
+    for table in ('genres', 'words'):
+        cursor.execute(f'''ALTER TABLE {table} ADD COLUMN uid BLOB''')
+        cursor.execute(f'''ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 0''')
+        cursor.execute(f'''ALTER TABLE {table} ADD COLUMN updated_at INTEGER NOT NULL DEFAULT 0''')
+    cursor.connection.create_function('make_legacy_uid', -1, make_legacy_uid, deterministic=True)
+    cursor.execute('''UPDATE genres SET uid = make_legacy_uid('genre', id, name)''')
+    # 単語のuidはジャンルのIDではなくジャンルのuidから作る（別々に作ったデータベースでは、同じIDが別のジャンルのことがあるため）
+    cursor.execute('''
+        UPDATE words SET uid = make_legacy_uid('word', (SELECT uid FROM genres WHERE genres.id = words.genre_id), id,
+                                               normalize_word(word))
+    ''')
+    cursor.execute('''CREATE UNIQUE INDEX IF NOT EXISTS idx_genres_uid ON genres (uid)''')
+    cursor.execute('''CREATE UNIQUE INDEX IF NOT EXISTS idx_words_uid ON words (uid)''')
+    # 前回の同期以降に変更した単語だけを範囲読み込みするためのインデックス
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_words_version ON words (version)''')
+    # 単語の削除を記録する（削除済みのジャンルの単語はジャンルの削除として送るため記録しない）
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS sync_words_delete AFTER DELETE ON words
+        WHEN old.uid IS NOT NULL AND NOT EXISTS (SELECT 1 FROM genres WHERE id = old.genre_id AND deleted = 1)
+        BEGIN
+            UPDATE sync_state SET clock = clock + 1 WHERE id = 1;
+            INSERT OR REPLACE INTO sync_tombstones (uid, kind, version, updated_at)
+            SELECT old.uid, 'word', clock, {SQL_NOW_MS} FROM sync_state WHERE id = 1;
+        END
+    ''')
+    # ジャンルの削除を記録する（削除済みの印は既に送っているため、印を付けた時の版番号のまま記録する）
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS sync_genres_delete AFTER DELETE ON genres
+        WHEN old.uid IS NOT NULL
+        BEGIN
+            UPDATE sync_state SET clock = clock + 1 WHERE id = 1 AND old.deleted = 0;
+            INSERT OR REPLACE INTO sync_tombstones (uid, kind, version, updated_at)
+            SELECT old.uid, 'genre', CASE WHEN old.deleted THEN old.version ELSE clock END,
+                   CASE WHEN old.deleted THEN old.updated_at ELSE {SQL_NOW_MS} END
+            FROM sync_state WHERE id = 1;
+        END
+    ''')
+
+
+
+# スキーマバージョン12: 長い詳細の圧縮（Model.encode_details）と、ジャンルごとに学習した圧縮用の辞書のテーブルを追加
+# 圧縮した詳細はBLOBとして保存し、全文検索用テーブルには元の文字列を登録する（SQLの関数decompress_detailsで戻す）
+# 辞書のIDは圧縮した詳細に記録するため、AUTOINCREMENTで削除した辞書のIDを使い回さないようにする
+def migrate_compress_details(cursor: sqlite3.Cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS details_dictionaries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            genre_id INTEGER NOT NULL,
+            data BLOB NOT NULL
+        )
+    ''')
+    # ジャンルの最新の辞書を引くためのインデックス
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_details_dictionaries_genre ON details_dictionaries (genre_id, id)''')
+    for name in ('words_fts_insert', 'words_fts_delete', 'words_fts_update'):
+        cursor.execute(f'''DROP TRIGGER IF EXISTS {name}''')
+    cursor.execute(f'''
+        CREATE TRIGGER words_fts_insert AFTER INSERT ON words BEGIN
+            INSERT INTO words_fts (rowid, word, details) VALUES (new.id, new.word, {make_details_sql('new.details')});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER words_fts_delete AFTER DELETE ON words BEGIN
+            INSERT INTO words_fts (words_fts, rowid, word, details)
+            VALUES ('delete', old.id, old.word, {make_details_sql('old.details')});
+        END
+    ''')
+    # 既存の詳細を圧縮する（内容は変わらないため、全文検索用テーブルを更新するトリガーを作り直す前に行う）
+    cursor.execute('''UPDATE words SET details = compress_details(details, genre_id) WHERE length(details) >= ?''',
+                   (DETAILS_COMPRESS_THRESHOLD,))
+    cursor.execute(f'''
+        CREATE TRIGGER words_fts_update AFTER UPDATE OF word, details ON words BEGIN
+            INSERT INTO words_fts (words_fts, rowid, word, details)
+            VALUES ('delete', old.id, old.word, {make_details_sql('old.details')});
+            INSERT INTO words_fts (rowid, word, details) VALUES (new.id, new.word, {make_details_sql('new.details')});
+        END
+    ''')
+
+
+# スキーマバージョン13: 理解度チェックの解答を1件ずつ追記する記録（attempts）と、画面に表示する集計のテーブルを追加
+# dayは解答した日（ローカル時刻の1970-01-01からの日数）、elapsedは同じ単語の前回の解答からの秒数（初回はNULL）、
+# bucketはelapsedの区分（RETENTION_BUCKET_DAYS）。集計のテーブルはトリガーで更新するため、記録の件数によらず速く読める
+# 単語とジャンルは削除しても変わらないuidで表す（IDは削除した後に追加した単語やジャンルに使い回され、別の単語やジャンルの記録と混ざるため）
+def migrate_add_attempts(cursor: sqlite3.Cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS attempts (
+            id INTEGER PRIMARY KEY,
+            word_uid BLOB NOT NULL,
+            genre_uid BLOB NOT NULL,
+            answered_at INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            grade INTEGER NOT NULL,
+            correct INTEGER NOT NULL,
+            elapsed INTEGER,
+            bucket INTEGER
+        )
+    ''')
+    # 単語の前回の解答日時を引くためのインデックスと、ジャンルと期間で絞り込んで読み込むためのインデックス
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_attempts_word ON attempts (word_uid, answered_at)''')
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_attempts_genre_day ON attempts (genre_uid, day)''')
+    # ジャンルと日ごとの解答数、正解数、初めて解答した単語の数
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS attempt_daily_stats (
+            genre_uid BLOB NOT NULL,
+            day INTEGER NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            correct INTEGER NOT NULL DEFAULT 0,
+            new_words INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (genre_uid, day)
+        ) WITHOUT ROWID
+    ''')
+    # すべてのジャンルの日ごとの数を、日で絞り込んで合計するためのインデックス
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_attempt_daily_stats_day ON attempt_daily_stats (day)''')
+    # ジャンルと前回の解答からの経過の区分ごとの解答数と正解数（ジャンルの記憶の定着の曲線）
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS attempt_retention_stats (
+            genre_uid BLOB NOT NULL,
+            bucket INTEGER NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            correct INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (genre_uid, bucket)
+        ) WITHOUT ROWID
+    ''')
+    # 単語ごとの解答数と正解数
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS word_attempt_stats (
+            word_uid BLOB PRIMARY KEY,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            correct INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    # 解答を追記したら、それぞれの集計の行がなければ作成してから数を増やす
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS attempts_stats_insert AFTER INSERT ON attempts BEGIN
+            INSERT INTO attempt_daily_stats (genre_uid, day) SELECT new.genre_uid, new.day
+            WHERE NOT EXISTS (SELECT 1 FROM attempt_daily_stats WHERE genre_uid = new.genre_uid AND day = new.day);
+            UPDATE attempt_daily_stats
+            SET attempts = attempts + 1, correct = correct + new.correct, new_words = new_words + (new.elapsed IS NULL)
+            WHERE genre_uid = new.genre_uid AND day = new.day;
+            INSERT INTO attempt_retention_stats (genre_uid, bucket) SELECT new.genre_uid, new.bucket
+            WHERE new.bucket IS NOT NULL
+            AND NOT EXISTS (SELECT 1 FROM attempt_retention_stats WHERE genre_uid = new.genre_uid AND bucket = new.bucket);
+            UPDATE attempt_retention_stats SET attempts = attempts + 1, correct = correct + new.correct
+            WHERE genre_uid = new.genre_uid AND bucket = new.bucket;
+            INSERT INTO word_attempt_stats (word_uid) SELECT new.word_uid
+            WHERE NOT EXISTS (SELECT 1 FROM word_attempt_stats WHERE word_uid = new.word_uid);
+            UPDATE word_attempt_stats SET attempts = attempts + 1, correct = correct + new.correct WHERE word_uid = new.word_uid;
+        END
+    ''')
+    # 記録は追記のみ（変更や削除をすると集計と食い違うため）
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS attempts_no_update BEFORE UPDATE ON attempts BEGIN
+            SELECT RAISE(ABORT, '解答の記録は変更できません');
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS attempts_no_delete BEFORE DELETE ON attempts BEGIN
+            SELECT RAISE(ABORT, '解答の記録は削除できません');
+        END
+    ''')
+
+
+# マイグレーションの一覧（i番目の関数を適用するとPRAGMA user_versionがi+1になる）
+# 既存の関数は変更せず、スキーマを変更する場合は末尾に追加すること
+MIGRATIONS = [
+    migrate_add_word_indexes,
+    migrate_add_full_text_search,
+    migrate_add_word_sort_indexes,
+    migrate_add_word_summary_indexes,
+    migrate_add_review_schedule,
+    migrate_add_genre_stats,
+    migrate_cascade_word_genre,
+    migrate_add_genre_soft_delete,
+    migrate_add_word_norm_key,
+    migrate_add_word_trigrams,
+    migrate_add_sync_log,
+    migrate_compress_details,
+    migrate_add_attempts,
+]
+
+# ページ取得で指定できる並び順と、並び替え・続きの位置の指定に使う列
+WORD_SORT_KEYS = {
+    'id': ('id',),
+    'word': ('word', 'id'),
+}
+
+# 単語の行の列の並び（get_wordsやget_wordなどで取得した行の各要素に対応）
+WORD_COLUMNS = ('id', 'genre_id', 'word', 'details', 'confidence', 'review_interval', 'ease', 'repetitions', 'due',
+                'norm_key')
+
+# 単語の行を取得するSELECTの列（同期用の列は含めない。圧縮した詳細は文字列に戻す）
+WORD_SELECT_LIST = ', '.join(f'{make_details_sql()} AS details' if column == 'details' else column for column in WORD_COLUMNS)
+
+# 単語リスト用の列の並び（get_word_summariesなどで取得した行の各要素に対応）
+SUMMARY_COLUMNS = ('id', 'word', 'confidence')
+
+# 復習対象の単語の列の並び（get_due_wordsで取得した行の各要素に対応）
+CARD_COLUMNS = ('id', 'word', 'confidence', 'review_interval', 'ease', 'repetitions')
+
+# ランダム出題で1回のクエリで調べる単語IDの数と、1問あたりに許す空振りの回数
+# 空振りが続く場合（ジャンルのIDがまばらな場合や、出題数よりジャンルの単語が少ない場合）は索引を順に読んで残りを選ぶ
+SAMPLE_PROBE_BATCH = 16
+SAMPLE_MAX_MISSES_PER_CARD = 32
+
+# バックアップで1回にコピーするページ数（1ページは通常4KB）。コピーの合間に他の接続が読み書きできる
+BACKUP_PAGES_PER_STEP = 1024
+
+# 削除したジャンルの単語を1つのトランザクションで削除する件数（1回の削除でデータベースをロックする時間を短くする）
+DELETE_CHUNK_SIZE = 1000
+
+# 書き出しで1回に取得する単語数
+EXPORT_FETCH_SIZE = 1000
+
+# 重複した単語の扱い（'skip': 追加しない、'merge': 既にある単語に詳細を追記する、'overwrite': 既にある単語を上書きする）
+# それぞれに対応するINSERTのON CONFLICT句。自信度と復習スケジュールは、上書きでも自信度だけを置き換える
+DUPLICATE_CONFLICT_CLAUSES = {
+    'skip': 'DO NOTHING',
+    'merge': '''DO UPDATE SET details = compress_details(
+        merge_details(decompress_details(details), decompress_details(excluded.details)), genre_id)''',
+    'overwrite': 'DO UPDATE SET word = excluded.word, details = excluded.details, confidence = excluded.confidence',
+}
+DUPLICATE_STRATEGIES = tuple(DUPLICATE_CONFLICT_CLAUSES)
+
+# 単語名のtrigramを切り出す位置の上限（これより長い単語名は先頭の部分だけで探す）
+TRIGRAM_MAX_POSITIONS = 64
+
+# あいまい検索で編集距離を計算する候補の数（共通するtrigramが多い順）と、既定の最大の編集距離
+FUZZY_CANDIDATE_LIMIT = 200
+FUZZY_MAX_DISTANCE = 2
+
+# SQLで現在時刻をUNIX時間のミリ秒で求める式（同期に使う変更日時。Pythonではint(time.time() * 1000)）
+SQL_NOW_MS = "CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)"
+
+# 同期で相手の変更を反映する時に、1回のクエリでまとめて調べる行数
+SYNC_BATCH_SIZE = 500
+
+# 同期で送る単語の列の並び（ジャンルは同期用のIDで表す）
+SYNC_WORD_COLUMNS = ('uid', 'genre_uid', 'word', 'details', 'confidence', 'review_interval', 'ease', 'repetitions', 'due',
+                     'updated_at')
+
+# 詳細を圧縮して保存する最短の文字数（短い詳細は圧縮してもほとんど小さくならないため、文字列のまま保存する）
+DETAILS_COMPRESS_THRESHOLD = 200
+
+# 圧縮した詳細の先頭に付ける、形式の番号（1バイト）と辞書のID（4バイト、辞書を使わない場合は0）
+COMPRESSED_DETAILS_HEADER = struct.Struct('>BI')
+COMPRESSED_DETAILS_FORMAT = 1
+
+# 学習する辞書の最大の大きさ（zlibが参照できるのは直前の32KBまで）と、学習に使う詳細の数
+# 見本を辞書を使って圧縮した大きさが、辞書を使わない場合のDETAILS_DICTIONARY_MIN_GAIN倍以下になる場合だけ辞書を使う
+DETAILS_DICTIONARY_SIZE = 32768
+DETAILS_DICTIONARY_SAMPLES = 1000
+DETAILS_DICTIONARY_MIN_GAIN = 0.9
+
+# 辞書の学習で詳細を区切る断片（文・行・読点の区切りまで）と、辞書に入れる断片の最短の文字数
+DETAILS_FRAGMENT_PATTERN = re.compile(r'[^。．.!?！？、,，\n]*[。．.!?！？、,，\n]?')
+DETAILS_FRAGMENT_MIN_LENGTH = 4
+
+# 詳細を圧縮し直す時に、1つのトランザクションで処理する単語数
+RECOMPRESS_CHUNK_SIZE = 5000
+
+# 削除済み（単語の削除待ち）のジャンルの単語を除く条件（全ジャンルを対象にする検索や書き出しで使う）
+LIVE_GENRE_FILTER = 'NOT EXISTS (SELECT 1 FROM genres WHERE genres.id = words.genre_id AND genres.deleted)'
+
+# 検索結果の一致箇所を囲む記号
+HIGHLIGHT_START = "【"
+HIGHLIGHT_END = "】"
+
+# trigramトークナイザーで検索できる最短の文字数
+MIN_FTS_QUERY_LENGTH = 3
+
+# 現在のスキーマバージョン
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+# 単語を追加するINSERT文（パラメータはジャンルID、単語名、詳細、自信度、正規化した単語名、版番号、変更日時）
+# on_duplicateで、同じジャンルに正規化した単語名が同じ単語がある場合の扱いを指定する
+def make_insert_word_sql(on_duplicate: str) -> str:
+    if on_duplicate not in DUPLICATE_CONFLICT_CLAUSES:
+        raise ValueError(f"重複した単語の扱いは{', '.join(DUPLICATE_STRATEGIES)}のいずれかを指定してください: {on_duplicate}")
+    clause = DUPLICATE_CONFLICT_CLAUSES[on_duplicate]
+    if clause.startswith('DO UPDATE'):
+        # 既にある単語を変更した場合も同期で送るように、版番号と変更日時を付け直す
+        clause += ', version = excluded.version, updated_at = excluded.updated_at'
+    return f'''
+        INSERT INTO words (genre_id, word, details, confidence, norm_key, uid, version, updated_at)
+        VALUES (?, ?, ?, ?, ?, randomblob(16), ?, ?)
+        ON CONFLICT (genre_id, norm_key) {clause}
+    '''
+
+
+# 詳細の見本から、zlibの辞書（圧縮の前に読み込んでおく、よく現れる文字列を並べたバイト列）を作る
+# 文・行・読点で区切った断片のうち2回以上現れるものを、(回数 - 1) × バイト数が大きい順にsizeバイトまで選ぶ
+# zlibは近くにある文字列ほど短い符号で参照できるため、よく現れる断片ほど辞書の後ろに置く。共通する断片がなければ空のバイト列
+def build_details_dictionary(samples: Iterable[str], size: int = DETAILS_DICTIONARY_SIZE) -> bytes:
+    counts = Counter()
+    for details in samples:
+        counts.update(fragment.encode('utf-8') for fragment in DETAILS_FRAGMENT_PATTERN.findall(details)
+                      if len(fragment) >= DETAILS_FRAGMENT_MIN_LENGTH)
+    chosen = []
+    total = 0
+    for fragment, count in sorted(counts.items(), key=lambda item: (item[1] - 1) * len(item[0]), reverse=True):
+        if count < 2:
+            break
+        if total + len(fragment) > size:
+            continue
+        chosen.append((count, fragment))
+        total += len(fragment)
+    chosen.sort(key=lambda item: item[0])
+    return b''.join(fragment for _, fragment in chosen)
+
+
+# 復習の評価（SM-2の0〜5の評価のうち、理解度チェックの解答画面のボタンで使うもの）
+GRADE_AGAIN = 1
+GRADE_GOOD = 4
+GRADE_EASY = 5
+
+# 易しさ（次の間隔を前回の間隔の何倍にするか）の初期値と下限
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+
+# 1日の秒数（復習間隔は日単位、復習日時はUNIX時間の秒で保存する）
+SECONDS_PER_DAY = 86400
+
+
+# SM-2アルゴリズムで復習の評価から次の(間隔, 易しさ, 連続正解数, 次回の復習日時)を計算
+# gradeは0〜5（3以上が正解）。不正解の場合は最初からやり直し、易しさは変えない
+def schedule_review(interval: float, ease: float, repetitions: int, grade: int, now: float) -> tuple:
+    if not 0 <= grade <= 5:
+        raise ValueError(f"評価は0〜5で指定してください: {grade}")
+    if grade < 3:
+        repetitions = 0
+        interval = 1
+    else:
+        if repetitions == 0:
+            interval = 1
+        elif repetitions == 1:
+            interval = 6
+        else:
+            interval = round(interval * ease)
+        repetitions += 1
+        ease = max(MIN_EASE, ease + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02))
+    return interval, ease, repetitions, int(now + interval * SECONDS_PER_DAY)
+
+
+# 前回の解答からの経過日数の区分の境界（i番目の区分はRETENTION_BUCKET_DAYS[i-1]日以上RETENTION_BUCKET_DAYS[i]日未満、
+# 最後の区分は最後の境界以上）。記憶の定着の曲線はこの区分ごとの正解率
+RETENTION_BUCKET_DAYS = (1, 2, 4, 7, 14, 30, 60, 120, 365)
+
+
+# UNIX時間の秒から、ローカル時刻での1970-01-01からの日数を求める（日ごとの集計に使う）
+def local_day(timestamp: float) -> int:
+    return int((timestamp + time.localtime(timestamp).tm_gmtoff) // SECONDS_PER_DAY)
+
+
+# 日数（local_dayの値）を日付にする
+def day_to_date(day: int) -> datetime.date:
+    return datetime.date(1970, 1, 1) + datetime.timedelta(days=day)
+
+
+# 前回の解答からの経過秒数の区分を求める（初回の解答はNone）
+def retention_bucket(elapsed: Optional[float]) -> Optional[int]:
+    if elapsed is None:
+        return None
+    return bisect.bisect_right(RETENTION_BUCKET_DAYS, elapsed / SECONDS_PER_DAY)
+
+
+# 単語の詳細を保持する、文字数の上限付きのキャッシュ（最も長く使われていないものから捨てる）
+class DetailsCache:
+    # 初期化（max_charsは保持する詳細の合計文字数の上限）
+    def __init__(self, max_chars: int = 1_000_000):
+        self.max_chars = max_chars
+        self.size = 0
+        # 単語ID→詳細。後ろほど最近使われたもの
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # 詳細を捨てるたびに増やす番号（別のスレッドで読み込んだ詳細を追加する時に、読み込み中に捨てられていないかを確かめる）
+        self.version = 0
+
+    # 単語の詳細を取得（ない場合はNone）
+    def get(self, word_id: int) -> Optional[str]:
+        details = self.entries.get(word_id)
+        if details is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(word_id)
+        return details
+
+    # 単語の詳細を追加し、上限を超えた分を古いものから捨てる
+    # versionを指定した場合、その時点の後に詳細が捨てられていれば（編集などで古くなっている可能性があるため）追加しない
+    def put(self, word_id: int, details: str, version: int = None):
+        if version is not None and version != self.version:
+            return
+        old_details = self.entries.pop(word_id, None)
+        if old_details is not None:
+            self.size -= len(old_details)
+        # 上限より大きい詳細は保持しない
+        if len(details) > self.max_chars:
+            return
+        self.entries[word_id] = details
+        self.size += len(details)
+        while self.size > self.max_chars:
+            old_word_id, old_details = self.entries.popitem(last=False)
+            self.size -= len(old_details)
+
+    # 単語の詳細を捨てる
+    def discard(self, word_id: int):
+        details = self.entries.pop(word_id, None)
+        if details is not None:
+            self.size -= len(details)
+        self.version += 1
+
+    # すべての詳細を捨てる
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+        self.version += 1
+
+    # キャッシュの利用状況を取得
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {'entries': len(self.entries), 'chars': self.size, 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0}
+
+
+# データベース操作のためのクラス
+class Model:
+    def __init__(self, db_name: str):
+        self.db_name = db_name
+        # SQLiteデータベースに接続
+        self.connection = sqlite3.connect(db_name)
+        # マイグレーションと重複の整理で使う単語名の正規化をSQLから呼べるようにする
+        self.connection.create_function('normalize_word', 1, normalize_word, deterministic=True)
+        # 詳細の圧縮と展開、重複した単語の詳細のまとめ方もSQLから呼べるようにする（全文検索用テーブルのトリガーやbulk_importで使う）
+        self.connection.create_function('compress_details', 2, self.encode_details)
+        self.connection.create_function('decompress_details', 1, self.decode_details, deterministic=True)
+        self.connection.create_function('merge_details', 2, merge_details, deterministic=True)
+        # この文字数以上の詳細を圧縮して保存する（Noneの場合は圧縮しない）
+        self.compress_threshold = DETAILS_COMPRESS_THRESHOLD
+        # 読み込んだ圧縮用の辞書（辞書のID→辞書）と、ジャンルごとの最新の辞書（ジャンルID→(辞書のID, 辞書)）
+        self.details_dictionaries = {}
+        self.genre_dictionaries = {}
+        self.cursor = self.connection.cursor()
+        # 環境変数で計測が有効になっている場合は、SQLの実行時間を記録する
+        tracer = get_tracer()
+        if tracer is not None:
+            tracer.instrument_model(self)
+        # まだデータベースに書き込んでいない自信度の更新（単語ID→自信度）
+        self.pending_confidence = {}
+        # まだデータベースに書き込んでいない復習結果（単語ID→(間隔, 易しさ, 連続正解数, 次回の復習日時)）
+        self.pending_reviews = {}
+        # まだデータベースに書き込んでいない解答の記録（(単語ID, 評価, 解答日時)のリスト。同じ単語の解答もすべて残す）
+        self.pending_attempts = []
+        # 書き込み待ちがこの件数に達したらまとめて書き込む
+        self.pending_limit = 100
+        # データが変更された時に呼び出す関数のリスト
+        self.change_listeners = []
+        # 単語の詳細のキャッシュ（get_word_detailsで使う）
+        self.details_cache = DetailsCache()
+
+        # ジャンルテーブルが存在しない場合には作成
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS genres (
+                id INTEGER PRIMARY KEY,
+                name TEXT
+            )
+        ''')
+
+        # 単語テーブルが存在しない場合には作成。ジャンルテーブルへの外部キーを含む（ジャンルを削除すると単語も削除される）
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS words (
+                id INTEGER PRIMARY KEY,
+                genre_id INTEGER,
+                word TEXT,
+                details TEXT,
+                confidence BOOLEAN,
+                FOREIGN KEY(genre_id) REFERENCES genres(id) ON DELETE CASCADE
+            )
+        ''')
+        self.connection.commit()
+
+        # 既存のデータベースを最新のスキーマに更新
+        self.migrate()
+
+        # 外部キーの制約を有効にする（マイグレーションでテーブルを作り直す間は無効にしておく必要がある）
+        self.cursor.execute('''PRAGMA foreign_keys = ON''')
+
+    # 同じデータベースに接続する別のModelを作成（別のスレッドで使う。AsyncModelのワーカースレッドなど）
+    def open_copy(self) -> 'Model':
+        return Model(self.db_name)
+
+    # データベースとの接続を閉じる
+    def close(self):
+        self.connection.close()
+
+    # 現在のスキーマバージョンを取得
+    def get_schema_version(self) -> int:
+        self.cursor.execute('''PRAGMA user_version''')
+        return self.cursor.fetchone()[0]
+
+    # 未適用のマイグレーションを順に適用（1つのマイグレーションごとに1トランザクション）
+    def migrate(self):
+        version = self.get_schema_version()
+        for next_version, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            self.cursor.execute('''BEGIN''')
+            try:
+                migration(self.cursor)
+                self.cursor.execute(f'''PRAGMA user_version = {next_version}''')
+            except BaseException:
+                self.connection.rollback()
+                raise
+            self.connection.commit()
+
+    # このデータベースの版番号を1つ進め、(版番号, 現在時刻のミリ秒)を返す（変更する行に付けて、同期で送る行を見分ける）
+    # 同じトランザクションで変更する行には同じ版番号を付ける
+    def next_change(self) -> tuple:
+        self.cursor.execute('''UPDATE sync_state SET clock = clock + 1 WHERE id = 1''')
+        self.cursor.execute('''SELECT clock FROM sync_state WHERE id = 1''')
+        return self.cursor.fetchone()[0], int(time.time() * 1000)
+
+    # データが変更された時に呼び出す関数を登録（関数には変更されたジャンルのIDが渡される）
+    # ジャンルの一覧が変わった場合や、どのジャンルか分からない場合はNoneが渡される
+    def add_change_listener(self, listener: Callable[[Optional[int]], None]):
+        self.change_listeners.append(listener)
+
+    # データが変更されたことを登録された関数に通知
+    def notify_change(self, genre_id: Optional[int] = None):
+        for listener in self.change_listeners:
+            listener(genre_id)
+
+    # 別の接続でデータが変更された時の処理（キャッシュを捨ててから変更を通知）
+    def notify_external_change(self, genre_id: Optional[int] = None):
+        self.details_cache.clear()
+        # 別の接続で辞書が学習された場合に、新しい辞書で圧縮するようにする
+        self.genre_dictionaries.clear()
+        self.notify_change(genre_id)
+
+    # 単語が属するジャンルのIDを取得
+    def get_word_genre_id(self, word_id: int) -> Optional[int]:
+        self.cursor.execute('''SELECT genre_id FROM words WHERE id = ?''', (word_id,))
+        row = self.cursor.fetchone()
+        return None if row is None else row[0]
+
+    # 新たにジャンルを追加
+    def add_genre(self, name: str):
+        self.cursor.execute('''INSERT INTO genres (name, uid, version, updated_at) VALUES (?, randomblob(16), ?, ?)''',
+                            (name, *self.next_change()))
+        self.connection.commit()
+        self.notify_change()
+
+    # ジャンル名を編集
+    def edit_genre(self, id: int, genre_name: str):
+        self.cursor.execute('''
+        UPDATE genres
+        SET name=?,version=?,updated_at=?
+        WHERE id=?
+        ''', (genre_name, *self.next_change(), id))
+        self.connection.commit()
+        self.notify_change()
+
+    # ジャンルを削除（削除済みの印を付けてすぐに一覧から見えなくし、単語はpurge_deleted_genresで少しずつ削除する）
+    # 単語が多いジャンルでも、1つのUPDATEで終わるためデータベースを長くロックしない
+    def delete_genre(self, genre_id: int):
+        # 書き込み待ちの解答は削除する前に記録する（単語が削除された後では記録できないため）
+        self.flush_reviews()
+        self.cursor.execute('''UPDATE genres SET deleted = 1, version = ?, updated_at = ? WHERE id = ?''',
+                            (*self.next_change(), genre_id))
+        self.connection.commit()
+        self.details_cache.clear()
+        self.notify_change()
+
+    # 削除済みのジャンルの単語をchunk_size件ずつ、1回ごとに1つのトランザクションで削除し、単語がなくなったジャンルを削除する
+    # max_chunksを指定するとその回数の削除で止める。途中で止めたり異常終了したりしても、次に呼び出せば続きから削除する
+    # 戻り値は(削除した単語数, 削除済みのジャンルがすべてなくなったか)
+    def purge_deleted_genres(self, chunk_size: int = DELETE_CHUNK_SIZE, max_chunks: int = None,
+                             progress: Optional[Callable[[int], None]] = None) -> tuple:
+        self.cursor.execute('''SELECT id FROM genres WHERE deleted = 1 ORDER BY id''')
+        genre_ids = [row[0] for row in self.cursor.fetchall()]
+        deleted = 0
+        chunks = 0
+        for genre_id in genre_ids:
+            while True:
+                if max_chunks is not None and chunks >= max_chunks:
+                    return deleted, False
+                self.cursor.execute('''DELETE FROM words WHERE id IN (SELECT id FROM words WHERE genre_id = ? LIMIT ?)''',
+                                    (genre_id, chunk_size))
+                count = self.cursor.rowcount
+                chunks += 1
+                if count < chunk_size:
+                    # 単語がなくなったので、同じトランザクションでジャンルと圧縮用の辞書も削除する
+                    self.cursor.execute('''DELETE FROM genres WHERE id = ?''', (genre_id,))
+                    self.cursor.execute('''DELETE FROM details_dictionaries WHERE genre_id = ?''', (genre_id,))
+                    self.genre_dictionaries.pop(genre_id, None)
+                self.connection.commit()
+                deleted += count
+                if progress is not None:
+                    progress(deleted)
+                if count < chunk_size:
+                    break
+        return deleted, True
+
+    # すべてのジャンルを取得（削除済みのジャンルは除く）
+    def get_genres(self):
+        self.cursor.execute('''SELECT id, name FROM genres WHERE deleted = 0''')
+        return self.cursor.fetchall()
+
+    # IDを指定してジャンルを取得（削除済みのジャンルの場合はNone）
+    def get_genre(self, genre_id: int):
+        self.cursor.execute('''SELECT id, name FROM genres WHERE id = ? AND deleted = 0''', (genre_id,))
+        return self.cursor.fetchone()
+
+    # すべてのジャンルを、単語数と自信がある単語の数とともに取得（各行は(id, 名前, 単語数, 自信がある単語の数)）
+    # 数はトリガーで更新される集計テーブルから読むため、単語数によらずジャンルの数だけの時間で済む
+    def get_genres_with_stats(self):
+        # 書き込み待ちの自信度も数に含めるため、先に書き込む
+        self.flush_confidence()
+        self.cursor.execute('''
+            SELECT genres.id, genres.name, coalesce(genre_stats.words, 0), coalesce(genre_stats.confident, 0)
+            FROM genres LEFT JOIN genre_stats ON genre_stats.genre_id = genres.id
+            WHERE genres.deleted = 0 ORDER BY genres.id
+        ''')
+        return self.cursor.fetchall()
+
+    # 集計テーブルの数を単語テーブルから数え直した数と比べ、食い違うジャンルの一覧を返す
+    # 各要素は(ジャンルID, 集計テーブルの(単語数, 自信がある単語の数), 数え直した(単語数, 自信がある単語の数))
+    # rebuildがTrueで食い違いがある場合は、集計テーブルを作り直す
+    def check_genre_stats(self, rebuild: bool = False) -> list:
+        self.cursor.execute('''SELECT genre_id, words, confident FROM genre_stats''')
+        stored = {genre_id: (words, confident) for genre_id, words, confident in self.cursor.fetchall()}
+        self.cursor.execute('''
+            SELECT genre_id, count(*), sum(coalesce(confidence, 0) != 0) FROM words
+            WHERE genre_id IS NOT NULL GROUP BY genre_id
+        ''')
+        actual = {genre_id: (words, confident) for genre_id, words, confident in self.cursor.fetchall()}
+        mismatches = []
+        for genre_id in sorted(stored.keys() | actual.keys()):
+            # 単語がすべて削除されたジャンルは、集計テーブルに0件の行が残る
+            if stored.get(genre_id, (0, 0)) != actual.get(genre_id, (0, 0)):
+                mismatches.append((genre_id, stored.get(genre_id, (0, 0)), actual.get(genre_id, (0, 0))))
+        if mismatches and rebuild:
+            try:
+                rebuild_genre_stats(self.cursor)
+            except BaseException:
+                self.connection.rollback()
+                raise
+            self.connection.commit()
+            self.notify_change()
+        return mismatches
+
+    # 新たに単語を追加し、単語のIDを返す
+    # 同じジャンルに正規化した単語名が同じ単語がある場合、on_duplicateを省略するとDuplicateWordErrorを送出する
+    # on_duplicateにDUPLICATE_STRATEGIESのいずれかを指定すると、その方法で既にある単語に反映し、その単語のIDを返す
+    def add_word(self, genre_id: int, word: str, details: str,confidence: bool = False,
+                 on_duplicate: Optional[str] = None) -> int:
+        if on_duplicate is None:
+            duplicate = self.find_duplicate(genre_id, word)
+            if duplicate is not None:
+                raise DuplicateWordError(word, duplicate[0])
+            self.cursor.execute('''
+                INSERT INTO words (genre_id, word, details, confidence, norm_key, uid, version, updated_at)
+                VALUES (?, ?, ?, ?, ?, randomblob(16), ?, ?)
+            ''', (genre_id, word, self.encode_details(details, genre_id), confidence, normalize_word(word), *self.next_change()))
+            word_id = self.cursor.lastrowid
+        else:
+            self.cursor.execute(make_insert_word_sql(on_duplicate),
+                                (genre_id, word, self.encode_details(details, genre_id), confidence, normalize_word(word),
+                                 *self.next_change()))
+            word_id = self.find_duplicate(genre_id, word)[0]
+            self.details_cache.discard(word_id)
+        self.connection.commit()
+        self.notify_change(genre_id)
+        return word_id
+
+    # 同じジャンルで正規化した単語名が同じ単語の(id, 単語名, 自信度)を取得（ない場合はNone）
+    # 一意なインデックスを引くため、ジャンルの単語数によらずO(log n)で済む
+    def find_duplicate(self, genre_id: int, word: str):
+        self.cursor.execute('''SELECT id, word, confidence FROM words WHERE genre_id = ? AND norm_key = ?''',
+                            (genre_id, normalize_word(word)))
+        return self.cursor.fetchone()
+
+    # 単語をまとめて追加（rowsは(単語名, 詳細, 自信度)のイテラブル）
+    # batch_size件ずつexecutemanyで挿入し、全体を1つのトランザクションでコミットする
+    # 呼び出し元がトランザクションを開始している場合は、そのトランザクションの中で追加する（コミットは呼び出し元が行う）
+    # 重複した単語はon_duplicate（DUPLICATE_STRATEGIESのいずれか）の方法で扱う。戻り値は重複も含めて処理した件数
+    def bulk_import(self, genre_id: int, rows: Iterable[tuple], batch_size: int = 1000,
+                    progress: Optional[Callable[[int], None]] = None, on_duplicate: str = 'skip') -> int:
+        sql = make_insert_word_sql(on_duplicate)
+        count = 0
+        # DROP TRIGGERも同じトランザクションに含めるため、セーブポイントで明示的に開始する
+        # （呼び出し元のトランザクションの中でも、失敗した時はこのメソッドで変更した分だけを取り消せる）
+        self.cursor.execute('''SAVEPOINT bulk_import''')
+        try:
+            # trigramの転置インデックスには1件ずつトリガーで登録せず、最後に追加した単語の分をtrigram順にまとめて登録する
+            # （離れたページへの書き込みが減るため速い。トリガーは同じトランザクションで元の定義に戻す）
+            self.cursor.execute('''SELECT coalesce(max(id), 0) FROM words''')
+            last_id = self.cursor.fetchone()[0]
+            self.cursor.execute('''SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'word_trigrams_insert' ''')
+            trigger_sql = self.cursor.fetchone()[0]
+            self.cursor.execute('''DROP TRIGGER word_trigrams_insert''')
+            version, updated_at = self.next_change()
+            for batch in batched(rows, batch_size):
+                self.cursor.executemany(
+                    sql, [(genre_id, word, self.encode_details(details, genre_id), confidence, normalize_word(word),
+                           version, updated_at) for word, details, confidence in batch])
+                count += len(batch)
+                # 進捗を通知
+                if progress is not None:
+                    progress(count)
+            self.cursor.execute('''
+                INSERT INTO word_trigrams (trigram, genre_id, word_id)
+                SELECT DISTINCT substr(' ' || norm_key || ' ', i, 3), genre_id, id FROM words JOIN trigram_positions ON i <= length(norm_key)
+                WHERE id > ? AND norm_key IS NOT NULL AND genre_id IS NOT NULL ORDER BY 1, 2, 3
+            ''', (last_id,))
+            self.cursor.execute(trigger_sql)
+        except BaseException:
+            # 途中で失敗した場合は1件も追加しない
+            self.cursor.execute('''ROLLBACK TO bulk_import''')
+            self.cursor.execute('''RELEASE bulk_import''')
+            raise
+        # 呼び出し元のトランザクションがなければ、ここでコミットされる
+        self.cursor.execute('''RELEASE bulk_import''')
+        if on_duplicate != 'skip':
+            # 既にある単語の詳細が変わった可能性がある
+            self.details_cache.clear()
+        self.notify_change(genre_id)
+        return count
+
+    # 単語とその詳細を編集（同じジャンルに正規化した単語名が同じ別の単語がある場合はDuplicateWordErrorを送出する）
+    def edit_word(self, id:int, word: str, details: str):
+        norm_key = normalize_word(word)
+        self.cursor.execute('''
+            SELECT id FROM words WHERE genre_id = (SELECT genre_id FROM words WHERE id = ?) AND norm_key = ? AND id != ?
+        ''', (id, norm_key, id))
+        duplicate = self.cursor.fetchone()
+        if duplicate is not None:
+            raise DuplicateWordError(word, duplicate[0])
+        self.cursor.execute('''
+        UPDATE words
+        SET word=?,details=compress_details(?, genre_id),norm_key=?,version=?,updated_at=?
+        WHERE id=?
+        ''', (word, details, norm_key, *self.next_change(), id))
+        self.connection.commit()
+        self.details_cache.discard(id)
+        self.notify_change(self.get_word_genre_id(id))
+
+    # 同じジャンルで正規化した単語名が同じ単語を1つにまとめ、削除した単語数を返す（スキーマバージョン9より前に登録された重複の整理用）
+    # 正規化した単語名の順に単語テーブルを1回だけ読み、隣り合う同じ単語のうちキーを持つ単語（なければ最も古い単語）を残す
+    # strategyは残す単語への反映方法（'skip': そのまま、'merge': 詳細を追記、'overwrite': 最も新しい単語の内容で上書き）
+    def dedupe_words(self, strategy: str = 'merge') -> int:
+        if strategy not in DUPLICATE_STRATEGIES:
+            raise ValueError(f"重複した単語の扱いは{', '.join(DUPLICATE_STRATEGIES)}のいずれかを指定してください: {strategy}")
+        self.flush_pending()
+        cursor = self.connection.execute(f'''
+            SELECT id, genre_id, word, {make_details_sql()}, confidence, norm_key, normalize_word(word) AS key FROM words
+            WHERE genre_id IS NOT NULL ORDER BY genre_id, key, norm_key IS NULL, id
+        ''')
+        removed_ids = []
+        # 内容を変える単語と、キーだけを付ける単語（単語名と詳細を更新しないため、全文検索用テーブルのトリガーが動かない）
+        updates = []
+        key_updates = []
+        group = []
+
+        # 同じ単語のまとまりを1つにし、残す単語の更新と削除する単語を記録する
+        def resolve(group: list):
+            kept = group[0]
+            kept_id, _, word, details, confidence, norm_key, key = kept
+            for other in group[1:]:
+                if strategy == 'merge':
+                    details = merge_details(details, other[3])
+                elif strategy == 'overwrite':
+                    word, details, confidence = other[2], other[3], other[4]
+                removed_ids.append((other[0],))
+            if (word, details, confidence) != kept[2:5]:
+                updates.append((word, details, confidence, key, kept_id))
+            elif norm_key != key:
+                key_updates.append((key, kept_id))
+
+        try:
+            for row in cursor:
+                if group and (row[1], row[6]) != (group[0][1], group[0][6]):
+                    resolve(group)
+                    group = []
+                group.append(row)
+            if group:
+                resolve(group)
+        finally:
+            cursor.close()
+        try:
+            # 残す単語にキーを付ける前に、同じキーを持つかもしれない単語を削除する
+            self.cursor.executemany('''DELETE FROM words WHERE id = ?''', removed_ids)
+            self.cursor.executemany('''UPDATE words SET norm_key = ? WHERE id = ?''', key_updates)
+            if updates:
+                # 内容を変えた単語は同期で送る（正規化した単語名は同期しないため、キーだけの更新では付けない）
+                version, updated_at = self.next_change()
+                self.cursor.executemany('''
+                    UPDATE words SET word = ?, details = compress_details(?, genre_id), confidence = ?, norm_key = ?, version = ?,
+                                     updated_at = ?
+                    WHERE id = ?
+                ''', [(*update[:4], version, updated_at, update[4]) for update in updates])
+        except BaseException:
+            self.connection.rollback()
+            raise
+        self.connection.commit()
+        if removed_ids or updates or key_updates:
+            self.details_cache.clear()
+            self.notify_change()
+        return len(removed_ids)
+
+    # 単語を削除
+    def delete_word(self, word_id: int):
+        # 書き込み待ちの解答は削除する前に記録する（削除した後では、IDを使い回した別の単語の解答になりうるため）
+        self.flush_reviews()
+        genre_id = self.get_word_genre_id(word_id)
+        self.cursor.execute('''DELETE FROM words WHERE id = ?''', (word_id,))
+        self.connection.commit()
+        self.details_cache.discard(word_id)
+        self.notify_change(genre_id)
+
+    # 特定のジャンルの単語をすべて取得
+    def get_words(self, genre_id: int):
+        self.cursor.execute(f'''SELECT {WORD_SELECT_LIST} FROM words WHERE genre_id = ? ORDER BY id''', (genre_id,))
+        return self.apply_pending_confidence(self.cursor.fetchall())
+
+    # 特定のジャンルの単語を1ページ分取得（キーセット方式のページ送り）
+    # afterには前のページで返された続きの位置を渡す。OFFSETと違い、何ページ目でも取得にかかる時間は変わらない
+    # confidenceを指定すると自信度で絞り込む。戻り値は(単語のリスト, 続きの位置)で、最後のページでは続きの位置がNone
+    def get_words_page(self, genre_id: int, after: tuple = None, limit: int = 100,
+                       sort: str = 'id', confidence: bool = None):
+        columns = WORD_SORT_KEYS[sort]
+        conditions = ['genre_id = ?']
+        params = [genre_id]
+        if confidence is not None:
+            # 自信度で絞り込むため、先に書き込み待ちの更新を書き込む
+            self.flush_confidence()
+            conditions.append('confidence = ?')
+            params.append(confidence)
+        if after is not None:
+            # 並び替えに使う列の組で前のページの最後の単語より後ろを指定
+            conditions.append(f"({', '.join(columns)}) > ({', '.join('?' * len(columns))})")
+            params.extend(after)
+        # 次のページがあるかを調べるため1件多く取得
+        self.cursor.execute(f'''
+            SELECT {WORD_SELECT_LIST} FROM words WHERE {' AND '.join(conditions)}
+            ORDER BY {', '.join(columns)} LIMIT ?
+        ''', (*params, limit + 1))
+        rows = self.apply_pending_confidence(self.cursor.fetchall())
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        last = rows[-1]
+        return rows, tuple(last[WORD_COLUMNS.index(column)] for column in columns)
+
+    # 特定のジャンルの単語をページ単位で順に返すジェネレータ（ジャンル全体を一度に読み込まない）
+    def iter_word_pages(self, genre_id: int, page_size: int = 500, sort: str = 'id', confidence: bool = None):
+        after = None
+        while True:
+            rows, after = self.get_words_page(genre_id, after, page_size, sort, confidence)
+            if rows:
+                yield rows
+            if after is None:
+                return
+
+    # 特定のジャンル（Noneの場合はすべてのジャンル）の単語の(単語名, 詳細, 自信度)をid順に返すジェネレータ
+    # 1つのSELECTの結果をfetch_size件ずつ取り出すため、ページごとにクエリを実行するiter_word_pagesより速く、メモリも一定
+    # 他の処理にself.cursorを使えるように専用のカーソルで読み込む
+    def iter_words(self, genre_id: int = None, fetch_size: int = EXPORT_FETCH_SIZE) -> Iterator[tuple]:
+        # 書き込み待ちの自信度も含めるため、先に書き込む
+        self.flush_confidence()
+        if genre_id is None:
+            cursor = self.connection.execute(f'''
+                SELECT word, {make_details_sql()}, confidence FROM words WHERE {LIVE_GENRE_FILTER} ORDER BY id
+            ''')
+        else:
+            cursor = self.connection.execute(f'''SELECT word, {make_details_sql()}, confidence FROM words WHERE genre_id = ? ORDER BY id''',
+                                             (genre_id,))
+        try:
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            cursor.close()
+
+    # 特定のジャンル（Noneの場合はすべてのジャンル）の単語を単語ファイルに書き出し、書き出した件数を返す
+    # 形式を省略すると拡張子から判定する。1行ずつ書き出すため、単語数によらず一定のメモリで動く
+    def export_word_file(self, path: str, genre_id: int = None, fmt: str = None) -> int:
+        if fmt is None:
+            fmt = os.path.splitext(path)[1].lower().lstrip('.')
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            return write_word_stream(f, fmt, self.iter_words(genre_id))
+
+    # 特定のジャンルの単語の(id, 単語名, 自信度)をid順にすべて取得（詳細は読み込まない）
+    # confidenceを指定すると自信度で絞り込む
+    def get_word_summaries(self, genre_id: int, confidence: bool = None):
+        if confidence is None:
+            self.cursor.execute('''SELECT id, word, confidence FROM words WHERE genre_id = ? ORDER BY id''', (genre_id,))
+            return self.apply_pending_confidence(self.cursor.fetchall(), SUMMARY_COLUMNS.index('confidence'))
+        # 自信度で絞り込むため、先に書き込み待ちの更新を書き込む
+        self.flush_confidence()
+        self.cursor.execute('''SELECT id, word, confidence FROM words WHERE genre_id = ? AND confidence = ? ORDER BY id''',
+                            (genre_id, confidence))
+        return self.cursor.fetchall()
+
+    # IDを指定して単語の(id, 単語名, 自信度)を取得
+    def get_word_summary(self, word_id: int):
+        self.cursor.execute('''SELECT id, word, confidence FROM words WHERE id = ?''', (word_id,))
+        row = self.cursor.fetchone()
+        return row if row is None else self.apply_pending_confidence([row], SUMMARY_COLUMNS.index('confidence'))[0]
+
+    # IDを指定して単語の詳細を取得（最近読み込んだ詳細はキャッシュから返す）
+    def get_word_details(self, word_id: int) -> Optional[str]:
+        details = self.details_cache.get(word_id)
+        if details is None:
+            details = self.load_word_details(word_id)
+            if details is not None:
+                self.details_cache.put(word_id, details)
+        return details
+
+    # IDを指定して単語の詳細をキャッシュを使わずにデータベースから読み込む（単語が見つからない場合はNone）
+    def load_word_details(self, word_id: int) -> Optional[str]:
+        self.cursor.execute(f'''SELECT {make_details_sql()} FROM words WHERE id = ?''', (word_id,))
+        row = self.cursor.fetchone()
+        return row if row is None else row[0]
+
+    # 詳細のキャッシュの現在の番号を取得（別の接続で詳細を読み込む前に取得し、cache_word_detailsに渡す）
+    def get_details_version(self) -> int:
+        return self.details_cache.version
+
+    # 別の接続で読み込んだ単語の詳細をキャッシュに追加
+    # versionを指定した場合、その時点の後に編集などで詳細が捨てられていれば、古い詳細の可能性があるため追加しない
+    def cache_word_details(self, word_id: int, details: str, version: int = None):
+        self.details_cache.put(word_id, details, version)
+
+    # 詳細を保存する形に変換（compress_threshold文字以上で、圧縮すると小さくなる場合は、ジャンルの最新の辞書で圧縮したバイト列）
+    # SQLの関数compress_details(詳細, ジャンルID)としても呼べる
+    def encode_details(self, details: Optional[str], genre_id: Optional[int]):
+        if details is None or self.compress_threshold is None or len(details) < self.compress_threshold:
+            return details
+        dictionary_id, dictionary = self.get_genre_dictionary(genre_id)
+        data = pack_details(details, dictionary_id, dictionary)
+        return data if len(data) < len(details.encode('utf-8')) else details
+
+    # 保存した詳細を文字列に戻す（圧縮していない詳細はそのまま返す）。SQLの関数decompress_details(詳細)としても呼べる
+    def decode_details(self, value):
+        if not isinstance(value, bytes):
+            return value
+        dictionary_id = get_details_dictionary_id(value)
+        return unpack_details(value, self.get_details_dictionary(dictionary_id) if dictionary_id else None)
+
+    # IDを指定して圧縮用の辞書を取得（辞書のIDは使い回さないため、一度読み込んだ辞書はそのまま使える）
+    # SQLの関数の中から呼ばれてもself.cursorの結果を壊さないように、別のカーソルで読み込む
+    def get_details_dictionary(self, dictionary_id: int) -> bytes:
+        dictionary = self.details_dictionaries.get(dictionary_id)
+        if dictionary is None:
+            row = self.connection.execute('''SELECT data FROM details_dictionaries WHERE id = ?''', (dictionary_id,)).fetchone()
+            if row is None:
+                raise ValueError(f"詳細の圧縮用の辞書が見つかりません: {dictionary_id}")
+            dictionary = self.details_dictionaries[dictionary_id] = row[0]
+        return dictionary
+
+    # ジャンルの最新の圧縮用の辞書の(辞書のID, 辞書)を取得（辞書がない場合は(0, None)）
+    def get_genre_dictionary(self, genre_id: Optional[int]) -> tuple:
+        if genre_id not in self.genre_dictionaries:
+            row = self.connection.execute('''
+                SELECT id, data FROM details_dictionaries WHERE genre_id = ? ORDER BY id DESC LIMIT 1
+            ''', (genre_id,)).fetchone()
+            if row is None:
+                self.genre_dictionaries[genre_id] = (0, None)
+            else:
+                self.details_dictionaries[row[0]] = row[1]
+                self.genre_dictionaries[genre_id] = tuple(row)
+        return self.genre_dictionaries[genre_id]
+
+    # ジャンルの詳細の見本（id順に最大sample_size件の、圧縮する長さの詳細）から圧縮用の辞書を学習し、
+    # 辞書を使うと十分に小さくなる場合は保存して、ジャンルの詳細を圧縮し直す。戻り値は辞書のID（辞書を作らなかった場合はNone）
+    def train_details_dictionary(self, genre_id: int, sample_size: int = DETAILS_DICTIONARY_SAMPLES) -> Optional[int]:
+        if self.compress_threshold is None:
+            return None
+        cursor = self.connection.execute(f'''SELECT {make_details_sql()} FROM words WHERE genre_id = ? ORDER BY id''',
+                                         (genre_id,))
+        try:
+            samples = list(islice((details for details, in cursor if details and len(details) >= self.compress_threshold),
+                                  sample_size))
+        finally:
+            cursor.close()
+        dictionary = build_details_dictionary(samples)
+        if not dictionary:
+            return None
+        plain_size = sum(len(pack_details(details)) for details in samples)
+        trained_size = sum(len(pack_details(details, 0, dictionary)) for details in samples)
+        if trained_size > plain_size * DETAILS_DICTIONARY_MIN_GAIN:
+            return None
+        self.cursor.execute('''INSERT INTO details_dictionaries (genre_id, data) VALUES (?, ?)''', (genre_id, dictionary))
+        dictionary_id = self.cursor.lastrowid
+        self.connection.commit()
+        self.details_dictionaries[dictionary_id] = dictionary
+        self.genre_dictionaries[genre_id] = (dictionary_id, dictionary)
+        self.recompress_details(genre_id)
+        return dictionary_id
+
+    # ジャンルの詳細を今の設定（compress_thresholdとジャンルの最新の辞書）で圧縮し直し、書き直した単語数を返す
+    # chunk_size件ずつ、1回ごとに1つのトランザクションで書き直す（呼び出し元のトランザクションの中では、そのトランザクションで書き直す）。内容は変わらないため、全文検索用テーブルは更新せず、同期でも送らない
+    def recompress_details(self, genre_id: int, chunk_size: int = RECOMPRESS_CHUNK_SIZE) -> int:
+        self.cursor.execute('''SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'words_fts_update' ''')
+        trigger_sql = self.cursor.fetchone()[0]
+        count = 0
+        last_id = 0
+        while True:
+            # DROP TRIGGERも同じトランザクションに含めるため、セーブポイントで明示的に開始する
+            # （呼び出し元のトランザクションの中でも、失敗した時はこのメソッドで変更した分だけを取り消せる）
+            self.cursor.execute('''SAVEPOINT recompress_details''')
+            try:
+                self.cursor.execute('''SELECT max(id) FROM (SELECT id FROM words WHERE genre_id = ? AND id > ? ORDER BY id LIMIT ?)''',
+                                    (genre_id, last_id, chunk_size))
+                end_id = self.cursor.fetchone()[0]
+                if end_id is not None:
+                    self.cursor.execute('''DROP TRIGGER words_fts_update''')
+                    self.cursor.execute('''
+                        UPDATE words SET details = compress_details(decompress_details(details), genre_id)
+                        WHERE genre_id = ? AND id > ? AND id <= ? AND (typeof(details) = 'blob' OR length(details) >= ?)
+                    ''', (genre_id, last_id, end_id, self.compress_threshold))
+                    count += self.cursor.rowcount
+                    self.cursor.execute(trigger_sql)
+            except BaseException:
+                self.cursor.execute('''ROLLBACK TO recompress_details''')
+                self.cursor.execute('''RELEASE recompress_details''')
+                raise
+            # 呼び出し元のトランザクションがなければ、ここでコミットされる
+            self.cursor.execute('''RELEASE recompress_details''')
+            if end_id is None:
+                return count
+            last_id = end_id
+
+    # 並び順で前後にある同じジャンルの単語の(id, 単語名, 自信度)を取得（directionが1なら次、-1なら前。端では反対側の端に戻る）
+    # 並び順と自信度での絞り込みはget_words_pageと同じ。単語が見つからない場合はNone
+    def get_adjacent_word(self, genre_id: int, word_id: int, direction: int = 1,
+                          sort: str = 'id', confidence: bool = None):
+        columns = WORD_SORT_KEYS[sort]
+        if sort == 'id':
+            current = (word_id,)
+        else:
+            self.cursor.execute(f'''SELECT {', '.join(columns)} FROM words WHERE id = ?''', (word_id,))
+            current = self.cursor.fetchone()
+            if current is None:
+                return None
+        conditions = ['genre_id = ?']
+        params = [genre_id]
+        if confidence is not None:
+            # 自信度で絞り込むため、先に書き込み待ちの更新を書き込む
+            self.flush_confidence()
+            conditions.append('confidence = ?')
+            params.append(confidence)
+        operator, order = ('>', '') if direction > 0 else ('<', ' DESC')
+        order_by = ', '.join(column + order for column in columns)
+        # 現在の単語の直後（直前）の単語を取得
+        self.cursor.execute(f'''
+            SELECT id, word, confidence FROM words
+            WHERE {' AND '.join(conditions)} AND ({', '.join(columns)}) {operator} ({', '.join('?' * len(columns))})
+            ORDER BY {order_by} LIMIT 1
+        ''', (*params, *current))
+        row = self.cursor.fetchone()
+        if row is None:
+            # 端に達した場合は反対側の端の単語を取得
+            self.cursor.execute(f'''
+                SELECT id, word, confidence FROM words WHERE {' AND '.join(conditions)} ORDER BY {order_by} LIMIT 1
+            ''', params)
+            row = self.cursor.fetchone()
+        return row if row is None else self.apply_pending_confidence([row], SUMMARY_COLUMNS.index('confidence'))[0]
+
+    # IDを指定して単語を取得
+    def get_word(self, word_id: int):
+        self.cursor.execute(f'''SELECT {WORD_SELECT_LIST} FROM words WHERE id = ?''', (word_id,))
+        row = self.cursor.fetchone()
+        return row if row is None else self.apply_pending_confidence([row])[0]
+
+    # 単語名と詳細から単語を検索（空白区切りの語をすべて含む単語を関連度順に返す）
+    # 戻り値は(単語ID, ジャンルID, 単語名, 詳細の抜粋)のリストで、一致箇所は【】で囲まれる
+    def search(self, query: str, genre_id: int = None, limit: int = 20, offset: int = 0):
+        terms = query.split()
+        if not terms:
+            return []
+        genre_filter = f'AND {LIVE_GENRE_FILTER}' if genre_id is None else 'AND words.genre_id = ?'
+        genre_params = () if genre_id is None else (genre_id,)
+
+        if all(len(term) >= MIN_FTS_QUERY_LENGTH for term in terms):
+            # 各語をフレーズとして囲み、FTS5の検索構文として解釈されないようにする
+            match = ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+            # 全文検索用テーブルは詳細を単語テーブルから読むため、圧縮した詳細にはsnippetを使えない。抜粋は文字列に戻してから作る
+            self.cursor.execute(f'''
+                SELECT words.id, words.genre_id, highlight(words_fts, 0, ?, ?), {make_details_sql('words.details')}
+                FROM words_fts JOIN words ON words.id = words_fts.rowid
+                WHERE words_fts MATCH ? {genre_filter}
+                ORDER BY rank
+                LIMIT ? OFFSET ?
+            ''', (HIGHLIGHT_START, HIGHLIGHT_END, match, *genre_params, limit, offset))
+            return [(id, genre_id, word, make_snippet(details or '', terms))
+                    for id, genre_id, word, details in self.cursor.fetchall()]
+
+        # trigramで検索できない短い語を含む場合は部分一致で探す（単語数に比例して遅くなる）
+        like_filter = ' AND '.join(f'''(word LIKE ? ESCAPE '\\' OR {make_details_sql()} LIKE ? ESCAPE '\\')''' for _ in terms)
+        like_params = []
+        for term in terms:
+            pattern = '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            like_params += [pattern, pattern]
+        self.cursor.execute(f'''
+            SELECT words.id, words.genre_id, words.word, {make_details_sql('words.details')} FROM words
+            WHERE {like_filter} {genre_filter}
+            ORDER BY id
+            LIMIT ? OFFSET ?
+        ''', (*like_params, *genre_params, limit, offset))
+        return [(id, genre_id, highlight_terms(word, terms), make_snippet(details or '', terms))
+                for id, genre_id, word, details in self.cursor.fetchall()]
+
+    # 単語名が似ている単語を、編集距離の近い順に最大k件取得（各行は(id, ジャンルID, 単語名, 編集距離)）
+    # 正規化した単語名のtrigramの転置インデックスから、共通するtrigramが多い単語をFUZZY_CANDIDATE_LIMIT件まで選び、
+    # その候補だけ編集距離を計算する。1回の編集で変わるtrigramは3つまでなので、共通するtrigramが
+    # (textのtrigramの数 - 3 × max_distance)より少ない単語は候補にしない（trigramが1つも共通しない単語も候補にしない）
+    # genre_idがNoneの場合は全ジャンル（削除済みのジャンルを除く）から探す
+    def fuzzy_lookup(self, text: str, genre_id: int = None, k: int = 10, max_distance: int = FUZZY_MAX_DISTANCE) -> list:
+        key = normalize_word(text)
+        trigrams = make_trigrams(key)
+        if not trigrams:
+            return []
+        counts = Counter()
+        for trigram in trigrams:
+            if genre_id is None:
+                self.cursor.execute('''SELECT word_id FROM word_trigrams WHERE trigram = ?''', (trigram,))
+            else:
+                self.cursor.execute('''SELECT word_id FROM word_trigrams WHERE trigram = ? AND genre_id = ?''',
+                                    (trigram, genre_id))
+            counts.update(row[0] for row in self.cursor.fetchall())
+        min_shared = max(1, len(trigrams) - 3 * max_distance)
+        candidates = [word_id for word_id, shared in counts.most_common(FUZZY_CANDIDATE_LIMIT) if shared >= min_shared]
+        if not candidates:
+            return []
+        genre_filter = f'AND {LIVE_GENRE_FILTER}' if genre_id is None else ''
+        self.cursor.execute(f'''
+            SELECT id, genre_id, word, norm_key FROM words WHERE id IN ({', '.join('?' * len(candidates))}) {genre_filter}
+        ''', candidates)
+        results = []
+        for word_id, word_genre_id, word, norm_key in self.cursor.fetchall():
+            distance = edit_distance(key, norm_key, max_distance)
+            if distance <= max_distance:
+                results.append((distance, -counts[word_id], word_id, word_genre_id, word))
+        return [(word_id, word_genre_id, word, distance)
+                for distance, _, word_id, word_genre_id, word in heapq.nsmallest(k, results)]
+
+    # 指定したジャンルの単語から重複なくcount件を無作為に選び、1件ずつ返すジェネレータ
+    # 各行はget_due_wordsと同じ(id, 単語名, 自信度, 間隔, 易しさ, 連続正解数)
+    # weak_weightを1より大きくすると、自信がない単語がその倍率で選ばれやすくなる
+    # ジャンルのIDの範囲から無作為に選んだIDを主キーで調べ、そのジャンルの単語だった場合だけ採用する（棄却法）
+    # ため、ジャンル全体を読み込まずに一様に選べる
+    def sample_words(self, genre_ids: Iterable[int], count: int = 20, weak_weight: float = 1.0,
+                     rng: random.Random = None) -> Iterator[tuple]:
+        if weak_weight < 1:
+            raise ValueError(f"weak_weightは1以上で指定してください: {weak_weight}")
+        rng = rng or random.Random()
+        genre_ids = list(dict.fromkeys(genre_ids))
+        # 各ジャンルのIDの範囲（(ジャンルID, 最小ID, 範囲の大きさ)）
+        spans = []
+        for genre_id in genre_ids:
+            self.cursor.execute('''
+                SELECT (SELECT min(id) FROM words WHERE genre_id = ?), (SELECT max(id) FROM words WHERE genre_id = ?)
+            ''', (genre_id, genre_id))
+            low, high = self.cursor.fetchone()
+            if low is not None:
+                spans.append((genre_id, low, high - low + 1))
+        total = sum(size for _, _, size in spans)
+        chosen = set()
+        misses = 0
+        while spans and len(chosen) < count and misses < count * SAMPLE_MAX_MISSES_PER_CARD:
+            probes = []
+            for _ in range(SAMPLE_PROBE_BATCH):
+                position = rng.randrange(total)
+                for genre_id, low, size in spans:
+                    if position < size:
+                        probes.append((genre_id, low + position))
+                        break
+                    position -= size
+            word_ids = list({word_id for _, word_id in probes})
+            self.cursor.execute(f'''
+                SELECT id, word, confidence, review_interval, ease, repetitions, genre_id FROM words
+                WHERE id IN ({', '.join('?' * len(word_ids))})
+            ''', word_ids)
+            rows = {row[0]: row for row in self.cursor.fetchall()}
+            for genre_id, word_id in probes:
+                row = rows.get(word_id)
+                if row is None or row[-1] != genre_id or word_id in chosen:
+                    misses += 1
+                    continue
+                card = self.apply_pending_confidence([row[:-1]], CARD_COLUMNS.index('confidence'))[0]
+                # 自信がある単語は1/weak_weightの確率でだけ採用する
+                if card[2] and rng.random() * weak_weight >= 1:
+                    misses += 1
+                    continue
+                chosen.add(word_id)
+                yield card
+                if len(chosen) == count:
+                    return
+        if not spans or len(chosen) == count:
+            return
+        # 残りは索引を順に読み、重み付きの無作為なキーが大きいものから選ぶ（Efraimidis-Spirakis法）
+        cursor = self.connection.execute(f'''
+            SELECT id, word, confidence, review_interval, ease, repetitions FROM words
+            WHERE genre_id IN ({', '.join('?' * len(genre_ids))})
+        ''', genre_ids)
+        candidates = (self.apply_pending_confidence([row], CARD_COLUMNS.index('confidence'))[0]
+                      for row in cursor if row[0] not in chosen)
+        yield from heapq.nlargest(count - len(chosen), candidates,
+                                  key=lambda card: rng.random() ** (1 if card[2] else 1 / weak_weight))
+
+    # 単語リストをシャッフル
+    def make_shuffle_list(self, word_list: list):
+        shuffle_list = word_list
+        random.shuffle(shuffle_list)
+        return shuffle_list
+
+    # 単語の自信度を更新
+    def update_word_confidence(self, word_id: int, new_confidence: bool):
+        # 書き込み待ちの古い値で上書きされないように取り除く
+        self.pending_confidence.pop(word_id, None)
+        self.cursor.execute('''UPDATE words SET confidence = ?, version = ?, updated_at = ? WHERE id = ?''',
+                            (new_confidence, *self.next_change(), word_id))
+        self.connection.commit()
+        self.notify_change(self.get_word_genre_id(word_id))
+
+    # ジャンルのすべての単語の自信度をまとめて設定し、変更した単語の数を返す
+    def reset_confidence(self, genre_id: int, confidence: bool = False) -> int:
+        # 書き込み待ちの古い値で上書きされないように、先に書き込む
+        self.flush_confidence()
+        self.cursor.execute('''
+            UPDATE words SET confidence = ?, version = ?, updated_at = ? WHERE genre_id = ? AND confidence IS NOT ?
+        ''', (confidence, *self.next_change(), genre_id, confidence))
+        count = self.cursor.rowcount
+        self.connection.commit()
+        self.notify_change(genre_id)
+        return count
+
+    # 単語の自信度の更新を書き込み待ちに追加（すぐにはコミットせず、flush_confidenceでまとめて書き込む）
+    # 同じ単語を何度更新しても書き込まれるのは最後の値だけ
+    def queue_word_confidence(self, word_id: int, new_confidence: bool):
+        self.pending_confidence[word_id] = bool(new_confidence)
+        if len(self.pending_confidence) >= self.pending_limit:
+            self.flush_confidence()
+
+    # 書き込み待ちの自信度の更新を1つのトランザクションで書き込む
+    def flush_confidence(self) -> int:
+        if not self.pending_confidence:
+            return 0
+        pending = self.pending_confidence
+        self.pending_confidence = {}
+        try:
+            version, updated_at = self.next_change()
+            self.cursor.executemany('''UPDATE words SET confidence = ?, version = ?, updated_at = ? WHERE id = ?''',
+                                    [(confidence, version, updated_at, word_id) for word_id, confidence in pending.items()])
+        except BaseException:
+            # 書き込みに失敗した場合は書き込み待ちに戻す（その後に追加された更新を優先）
+            self.connection.rollback()
+            self.pending_confidence = {**pending, **self.pending_confidence}
+            raise
+        self.connection.commit()
+        if self.change_listeners:
+            # 更新した単語が属するジャンルに変更を通知
+            word_ids = list(pending)
+            self.cursor.execute(f'''SELECT DISTINCT genre_id FROM words WHERE id IN ({', '.join('?' * len(word_ids))})''',
+                                word_ids)
+            for (genre_id,) in self.cursor.fetchall():
+                self.notify_change(genre_id)
+        return len(pending)
+
+    # 復習日時が来た同じジャンルの単語を、復習日時が古い順（同じ場合はid順）にlimit件取得
+    # 各行は(id, 単語名, 自信度, 間隔, 易しさ, 連続正解数)。nowを省略すると現在時刻
+    def get_due_words(self, genre_id: int, limit: int = 20, now: float = None) -> list:
+        # 復習日時で絞り込むため、先に書き込み待ちの復習結果を書き込む
+        self.flush_reviews()
+        self.cursor.execute('''
+            SELECT id, word, confidence, review_interval, ease, repetitions FROM words
+            WHERE genre_id = ? AND due <= ?
+            ORDER BY due, id LIMIT ?
+        ''', (genre_id, int(time.time() if now is None else now), limit))
+        return self.apply_pending_confidence(self.cursor.fetchall(), CARD_COLUMNS.index('confidence'))
+
+    # 復習の評価を書き込み待ちに追加し、次回の復習日時を返す（すぐにはコミットせず、flush_reviewsでまとめて書き込む）
+    # 評価は解答の記録（attempts）にも追記する。cardはget_due_wordsで取得した行。nowを省略すると現在時刻
+    def queue_review(self, card: tuple, grade: int, now: float = None) -> int:
+        now = time.time() if now is None else now
+        interval, ease, repetitions = card[CARD_COLUMNS.index('review_interval'):]
+        schedule = schedule_review(interval, ease, repetitions, grade, now)
+        self.pending_reviews[card[0]] = schedule
+        self.pending_attempts.append((card[0], grade, int(now)))
+        if len(self.pending_reviews) >= self.pending_limit or len(self.pending_attempts) >= self.pending_limit:
+            self.flush_reviews()
+        return schedule[-1]
+
+    # 書き込み待ちの復習結果と解答の記録を1つのトランザクションで書き込む
+    def flush_reviews(self) -> int:
+        if not self.pending_reviews and not self.pending_attempts:
+            return 0
+        pending = self.pending_reviews
+        attempts = self.pending_attempts
+        self.pending_reviews = {}
+        self.pending_attempts = []
+        try:
+            if pending:
+                version, updated_at = self.next_change()
+                self.cursor.executemany('''
+                    UPDATE words SET review_interval = ?, ease = ?, repetitions = ?, due = ?, version = ?, updated_at = ? WHERE id = ?
+                ''', [(*schedule, version, updated_at, word_id) for word_id, schedule in pending.items()])
+            self.insert_attempts(attempts)
+        except BaseException:
+            # 書き込みに失敗した場合は書き込み待ちに戻す（その後に追加された結果を優先）
+            self.connection.rollback()
+            self.pending_reviews = {**pending, **self.pending_reviews}
+            self.pending_attempts = attempts + self.pending_attempts
+            raise
+        self.connection.commit()
+        return len(pending)
+
+    # 解答の記録（(単語ID, 評価, 解答日時)のリスト）をまとめて追記する（コミットは呼び出し側で行う）
+    # 記録は単語とジャンルのuidで追記する。前回の解答からの経過秒数は、データベースの最後の解答と、同じリストの前の解答から求める
+    # 削除された単語の解答は追記しない
+    def insert_attempts(self, attempts: list):
+        if not attempts:
+            return
+        # 単語ID→(単語のuid, ジャンルのuid, 最後の解答日時)
+        words = {}
+        rows = []
+        for word_id, grade, answered_at in attempts:
+            if word_id not in words:
+                self.cursor.execute('''
+                    SELECT words.uid, genres.uid, (SELECT max(answered_at) FROM attempts WHERE word_uid = words.uid)
+                    FROM words JOIN genres ON genres.id = words.genre_id
+                    WHERE words.id = ? AND words.uid IS NOT NULL AND genres.uid IS NOT NULL
+                ''', (word_id,))
+                words[word_id] = self.cursor.fetchone()
+            word = words[word_id]
+            if word is None:
+                continue
+            uid, genre_uid, previous = word
+            # 時計が戻った場合などは経過0秒とする
+            elapsed = None if previous is None else max(answered_at - previous, 0)
+            rows.append((uid, genre_uid, answered_at, local_day(answered_at), grade, int(grade >= 3), elapsed,
+                         retention_bucket(elapsed)))
+            words[word_id] = (uid, genre_uid, answered_at if previous is None else max(previous, answered_at))
+        self.cursor.executemany('''
+            INSERT INTO attempts (word_uid, genre_uid, answered_at, day, grade, correct, elapsed, bucket)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+
+    # 書き込み待ちの自信度の更新と復習結果をすべて書き込む
+    def flush_pending(self):
+        self.flush_confidence()
+        self.flush_reviews()
+
+    # ジャンル（Noneの場合はすべて）の日ごとの解答数を、古い日から順に取得（各行は(日, 解答数, 正解数, 初めて解答した単語の数)）
+    # 日はlocal_dayの値（day_to_dateで日付にする）。since_dayを指定するとその日以降に絞り込む
+    # トリガーで更新される集計テーブルから読むため、解答の記録の件数によらず日数（とジャンルの数）だけの時間で済む
+    def get_daily_activity(self, genre_id: int = None, since_day: int = None) -> list:
+        # 書き込み待ちの解答も数に含めるため、先に書き込む
+        self.flush_reviews()
+        since_day = -2 ** 63 if since_day is None else since_day
+        if genre_id is None:
+            self.cursor.execute('''
+                SELECT day, sum(attempts), sum(correct), sum(new_words) FROM attempt_daily_stats
+                WHERE day >= ? GROUP BY day ORDER BY day
+            ''', (since_day,))
+        else:
+            self.cursor.execute('''
+                SELECT day, attempts, correct, new_words FROM attempt_daily_stats
+                WHERE genre_uid = (SELECT uid FROM genres WHERE id = ?) AND day >= ? ORDER BY day
+            ''', (genre_id, since_day))
+        return self.cursor.fetchall()
+
+    # ジャンルの記憶の定着の曲線を取得（各行は(経過の区分, 解答数, 正解数)。区分はRETENTION_BUCKET_DAYSの順）
+    def get_retention_curve(self, genre_id: int) -> list:
+        self.flush_reviews()
+        self.cursor.execute('''
+            SELECT bucket, attempts, correct FROM attempt_retention_stats
+            WHERE genre_uid = (SELECT uid FROM genres WHERE id = ?) ORDER BY bucket
+        ''', (genre_id,))
+        return self.cursor.fetchall()
+
+    # ジャンルの解答したことがある単語の正解率を、正解率が低い順（同じ場合は解答数が多い順、id順）に取得
+    # 各行は(id, 単語名, 解答数, 正解数)
+    def get_word_accuracy(self, genre_id: int) -> list:
+        self.flush_reviews()
+        self.cursor.execute('''
+            SELECT words.id, words.word, word_attempt_stats.attempts, word_attempt_stats.correct
+            FROM words JOIN word_attempt_stats ON word_attempt_stats.word_uid = words.uid
+            WHERE words.genre_id = ?
+        ''', (genre_id,))
+        rows = self.cursor.fetchall()
+        # 正解率の順はSQLでは索引を使えないため、取得してから並べる
+        rows.sort(key=lambda row: (row[3] / row[2], -row[2], row[0]))
+        return rows
+
+    # 同期の状態として(このデータベースのID, 現在の版番号)を取得
+    def get_sync_state(self) -> tuple:
+        self.cursor.execute('''SELECT replica_id, clock FROM sync_state WHERE id = 1''')
+        return self.cursor.fetchone()
+
+    # 相手のデータベースから受け取り済みの版番号を取得（まだ同期したことがない場合は-1）
+    def get_peer_version(self, replica_id: bytes) -> int:
+        self.cursor.execute('''SELECT version FROM sync_peers WHERE replica_id = ?''', (replica_id,))
+        row = self.cursor.fetchone()
+        return -1 if row is None else row[0]
+
+    # 相手のデータベースから受け取り済みの版番号を記録
+    def set_peer_version(self, replica_id: bytes, version: int):
+        self.cursor.execute('''
+            INSERT INTO sync_peers (replica_id, version) VALUES (?, ?)
+            ON CONFLICT (replica_id) DO UPDATE SET version = excluded.version
+        ''', (replica_id, version))
+
+    # 版番号がsinceより後でuntil以下の変更を、ジャンル・単語・削除の記録の順に(種類, 行)で返すジェネレータ
+    # 単語の行はSYNC_WORD_COLUMNSの並び。版番号のインデックスで変更した行だけを読むため、変更が少なければ単語数によらず速い
+    # 削除済みのジャンルの単語は送らない（ジャンルの削除として送る）
+    def iter_changes(self, since: int, until: int) -> Iterator[tuple]:
+        queries = (
+            ('genre', '''SELECT uid, name, deleted, updated_at FROM genres WHERE version > ? AND version <= ? AND uid IS NOT NULL'''),
+            ('word', f'''
+                SELECT words.uid, genres.uid, word, {make_details_sql()}, confidence, review_interval, ease, repetitions, due,
+                       words.updated_at
+                FROM words JOIN genres ON genres.id = words.genre_id
+                WHERE words.version > ? AND words.version <= ? AND words.uid IS NOT NULL AND genres.deleted = 0
+            '''),
+            ('tombstone', '''SELECT uid, kind, updated_at FROM sync_tombstones WHERE version > ? AND version <= ?'''),
+        )
+        for kind, sql in queries:
+            cursor = self.connection.execute(sql, (since, until))
+            try:
+                for row in cursor:
+                    yield kind, row
+            finally:
+                cursor.close()
+
+    # 相手のデータベースの変更（iter_changesが返す(種類, 行)）を反映し、(受け取った行数, 反映した行数, 送り直す行)を返す
+    # 同じ行が両方で変更されていた場合は、変更日時が新しい方（同じ場合は内容を比べて大きい方）を残す
+    # ジャンルの削除はどちらかで削除されていれば削除し、単語の削除は削除した日時が単語の変更日時より新しい場合だけ反映する
+    # 同じジャンルに正規化した単語名が同じ別の単語がある場合は、変更日時（同じ場合は同期用のID）が新しい方を残す
+    # 送り直す行は、相手の変更より新しいのに相手が既に受け取った版番号（resend_since以下）の行。コミットせずに返すため、
+    # 呼び出し側はコミットした後にresend_changesに渡して、次の同期で相手に送られるようにする
+    def apply_changes(self, changes: Iterable[tuple], resend_since: int = -1) -> tuple:
+        received = 0
+        applied = 0
+        resend = {'genre': [], 'word': []}
+        version = None
+        # 同期用のIDからジャンルのID（ない場合や削除済みの場合はNone）
+        genre_ids = {}
+        batch = []
+        for kind, row in changes:
+            if version is None:
+                version, _ = self.next_change()
+            received += 1
+            if kind == 'word':
+                batch.append(row)
+                if len(batch) >= SYNC_BATCH_SIZE:
+                    applied += self.apply_word_changes(batch, version, genre_ids, resend_since, resend)
+                    batch = []
+                continue
+            if batch:
+                applied += self.apply_word_changes(batch, version, genre_ids, resend_since, resend)
+                batch = []
+            if kind == 'genre':
+                applied += self.apply_genre_change(row, version, resend_since, resend)
+                genre_ids.clear()
+            else:
+                applied += self.apply_tombstone(row, version, resend_since, resend)
+        if batch:
+            applied += self.apply_word_changes(batch, version, genre_ids, resend_since, resend)
+        if applied:
+            self.details_cache.clear()
+        return received, applied, resend
+
+    # 相手のジャンルの変更を1件反映し、反映した場合は1を返す
+    def apply_genre_change(self, row: tuple, version: int, resend_since: int, resend: dict) -> int:
+        uid, name, deleted, updated_at = row
+        self.cursor.execute('''SELECT id, name, deleted, updated_at, version FROM genres WHERE uid = ?''', (uid,))
+        current = self.cursor.fetchone()
+        if current is None:
+            # こちらで削除したジャンルは作り直さない
+            self.cursor.execute('''SELECT 1 FROM sync_tombstones WHERE uid = ?''', (uid,))
+            if self.cursor.fetchone() is not None:
+                return 0
+            self.cursor.execute('''INSERT INTO genres (name, deleted, uid, version, updated_at) VALUES (?, ?, ?, ?, ?)''',
+                                (name, deleted, uid, version, updated_at))
+            return 1
+        genre_id, current_name, current_deleted, current_updated_at, current_version = current
+        if (updated_at, name or '') > (current_updated_at, current_name or ''):
+            current_name, current_updated_at = name, updated_at
+        elif (updated_at, name or '') < (current_updated_at, current_name or '') and current_version <= resend_since:
+            resend['genre'].append(genre_id)
+        deleted = max(deleted, current_deleted)
+        if (current_name, deleted) == current[1:3]:
+            return 0
+        self.cursor.execute('''UPDATE genres SET name = ?, deleted = ?, version = ?, updated_at = ? WHERE id = ?''',
+                            (current_name, deleted, version, current_updated_at, genre_id))
+        return 1
+
+    # 相手の単語の変更をまとめて反映し、反映した件数を返す（同期用のIDで今の単語と削除の記録をまとめて引く）
+    def apply_word_changes(self, rows: list, version: int, genre_ids: dict, resend_since: int, resend: dict) -> int:
+        uids = [row[0] for row in rows]
+        placeholders = ', '.join('?' * len(uids))
+        self.cursor.execute(f'''
+            SELECT uid, id, word, {make_details_sql()}, confidence, review_interval, ease, repetitions, due, updated_at, version
+            FROM words WHERE uid IN ({placeholders})
+        ''', uids)
+        current_words = {row[0]: row[1:] for row in self.cursor.fetchall()}
+        self.cursor.execute(f'''SELECT uid, updated_at FROM sync_tombstones WHERE uid IN ({placeholders})''', uids)
+        tombstones = dict(self.cursor.fetchall())
+        applied = 0
+        for uid, genre_uid, *values, updated_at in rows:
+            if genre_uid not in genre_ids:
+                self.cursor.execute('''SELECT id FROM genres WHERE uid = ? AND deleted = 0''', (genre_uid,))
+                genre = self.cursor.fetchone()
+                genre_ids[genre_uid] = None if genre is None else genre[0]
+            genre_id = genre_ids[genre_uid]
+            if genre_id is None:
+                continue
+            current = current_words.get(uid)
+            if current is not None:
+                order = (updated_at, repr(tuple(values)))
+                current_order = (current[-2], repr(tuple(current[1:-2])))
+                if order <= current_order:
+                    if order < current_order and current[-1] <= resend_since:
+                        resend['word'].append(current[0])
+                    continue
+            elif uid in tombstones and tombstones[uid] >= updated_at:
+                continue
+            norm_key = normalize_word(values[0])
+            # 同じジャンルに正規化した単語名が同じ別の単語がある場合は、変更日時（同じ場合は同期用のID）が新しい方を残す
+            self.cursor.execute('''SELECT id, uid, updated_at, version FROM words WHERE genre_id = ? AND norm_key = ? AND uid IS NOT ?''',
+                                (genre_id, norm_key, uid))
+            clash = self.cursor.fetchone()
+            if clash is not None:
+                if (updated_at, uid) < (clash[2], clash[1] or b''):
+                    resend['word'].append(clash[0])
+                    continue
+                self.cursor.execute('''DELETE FROM words WHERE id = ?''', (clash[0],))
+            # 詳細はこちらのジャンルの辞書で圧縮し直す
+            values[1] = self.encode_details(values[1], genre_id)
+            if current is None:
+                self.cursor.execute('''
+                    INSERT INTO words (genre_id, word, details, confidence, review_interval, ease, repetitions, due, norm_key,
+                                       uid, version, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (genre_id, *values, norm_key, uid, version, updated_at))
+                self.cursor.execute('''DELETE FROM sync_tombstones WHERE uid = ?''', (uid,))
+            else:
+                self.cursor.execute('''
+                    UPDATE words SET genre_id = ?, word = ?, details = ?, confidence = ?, review_interval = ?, ease = ?,
+                                     repetitions = ?, due = ?, norm_key = ?, version = ?, updated_at = ?
+                    WHERE id = ?
+                ''', (genre_id, *values, norm_key, version, updated_at, current[0]))
+            applied += 1
+        return applied
+
+    # 相手の削除の記録を1件反映し、反映した場合は1を返す
+    def apply_tombstone(self, row: tuple, version: int, resend_since: int, resend: dict) -> int:
+        uid, kind, updated_at = row
+        if kind == 'genre':
+            # ジャンルは削除済みの印を付ける（単語はpurge_deleted_genresで少しずつ削除する）
+            self.cursor.execute('''UPDATE genres SET deleted = 1, version = ? WHERE uid = ? AND deleted = 0''', (version, uid))
+            if self.cursor.rowcount:
+                return 1
+        else:
+            self.cursor.execute('''SELECT id, updated_at, version FROM words WHERE uid = ?''', (uid,))
+            current = self.cursor.fetchone()
+            if current is not None:
+                if current[1] > updated_at:
+                    # 削除より後に変更された単語は残す
+                    if current[2] <= resend_since:
+                        resend['word'].append(current[0])
+                    return 0
+                self.cursor.execute('''DELETE FROM words WHERE id = ?''', (current[0],))
+                # トリガーで記録した削除の日時を、相手で削除した日時にそろえる
+                self.cursor.execute('''
+                    INSERT INTO sync_tombstones (uid, kind, version, updated_at) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (uid) DO UPDATE SET updated_at = excluded.updated_at
+                ''', (uid, kind, version, updated_at))
+                return 1
+        # こちらにない行の削除も記録しておき、さらに別のデータベースと同期する時に送る
+        self.cursor.execute('''
+            INSERT INTO sync_tombstones (uid, kind, version, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT (uid) DO UPDATE SET version = excluded.version, updated_at = excluded.updated_at
+            WHERE excluded.updated_at > updated_at
+        ''', (uid, kind, version, updated_at))
+        return self.cursor.rowcount
+
+    # apply_changesが返した送り直す行に新しい版番号を付け、次の同期で相手に送られるようにする
+    def resend_changes(self, resend: dict):
+        if not resend['genre'] and not resend['word']:
+            return
+        version, _ = self.next_change()
+        for table in ('genre', 'word'):
+            for batch in batched(resend[table], SYNC_BATCH_SIZE):
+                self.cursor.execute(f'''UPDATE {table}s SET version = ? WHERE id IN ({', '.join('?' * len(batch))})''',
+                                    (version, *batch))
+        self.connection.commit()
+
+    # 別のデータベースと、前回の同期以降の変更だけをやり取りして同じ内容にし、(送った行数, 受け取った行数)を返す
+    # 互いに相手から受け取り済みの版番号を記録しておき、それより新しい版番号の行と削除の記録だけを送る
+    # 同期中は両方のデータベースへの書き込みを待たせる（読み込みは待たせない）
+    def sync_with(self, other: 'Model') -> tuple:
+        self.flush_pending()
+        other.flush_pending()
+        replica_id = self.get_sync_state()[0]
+        if other.get_sync_state()[0] == replica_id:
+            # データベースファイルをコピーした場合は、コピーした側を別のデータベースとして扱う
+            other.cursor.execute('''UPDATE sync_state SET replica_id = randomblob(16) WHERE id = 1''')
+            other.connection.commit()
+        other.cursor.execute('''BEGIN IMMEDIATE''')
+        try:
+            other_id, other_before = other.get_sync_state()
+            since_mine = other.get_peer_version(replica_id)
+            self.cursor.execute('''BEGIN IMMEDIATE''')
+            try:
+                # 1. 相手の変更をこちらに反映する（反映した行は次の同期で相手に送り返さないように、反映後の版番号を記録する）
+                _, self_before = self.get_sync_state()
+                since_theirs = self.get_peer_version(other_id)
+                received, _, resend_here = self.apply_changes(other.iter_changes(since_theirs, other_before), since_theirs)
+                self.set_peer_version(other_id, other_before)
+                self_after = self.get_sync_state()[1]
+            except BaseException:
+                self.connection.rollback()
+                raise
+            self.connection.commit()
+            # 2. こちらの変更（1で反映した行を除く）を相手に反映する
+            sent, _, resend_there = other.apply_changes(self.iter_changes(since_mine, self_before), since_mine)
+            other.set_peer_version(replica_id, self_after)
+            other_after = other.get_sync_state()[1]
+        except BaseException:
+            other.connection.rollback()
+            raise
+        other.connection.commit()
+        # 3. 2で相手に反映した行を次の同期で受け取らないようにする
+        self.set_peer_version(other_id, other_after)
+        self.connection.commit()
+        self.resend_changes(resend_here)
+        other.resend_changes(resend_there)
+        if received:
+            self.notify_change()
+        if sent:
+            other.notify_change()
+        return sent, received
+
+    # データベースを別のファイルにバックアップし、コピーしたページ数を返す（アプリの使用中でも安全にコピーできる）
+    # pagesページずつコピーし、その合間は他の接続が読み書きできる。progressには(コピー済みのページ数, 全ページ数)が渡される
+    # コピー中に別の接続で書き込まれた場合、SQLiteは最初からコピーし直す
+    def backup(self, path: str, pages: int = BACKUP_PAGES_PER_STEP,
+               progress: Optional[Callable[[int, int], None]] = None) -> int:
+        # 書き込み待ちの更新もバックアップに含める
+        self.flush_pending()
+        target = sqlite3.connect(path)
+        try:
+            self.connection.backup(
+                target, pages=pages,
+                progress=None if progress is None else lambda status, remaining, total: progress(total - remaining, total))
+            return target.execute('''PRAGMA page_count''').fetchone()[0]
+        finally:
+            target.close()
+
+    # 取得した単語に書き込み待ちの自信度を反映（書き込み前でも最新の値を読めるようにする）
+    # confidence_indexは各行の中の自信度の位置（既定ではWORD_COLUMNSの並びの行）
+    def apply_pending_confidence(self, rows: list, confidence_index: int = WORD_COLUMNS.index('confidence')) -> list:
+        if not self.pending_confidence:
+            return rows
+        return [row[:confidence_index] + (self.pending_confidence[row[0]],) + row[confidence_index + 1:]
+                if row[0] in self.pending_confidence else row for row in rows]
+
+    # 自信がある単語を取得
+    def sort_confidence(self, genre_id: int):
+        # 自信度で絞り込むため、先に書き込み待ちの更新を書き込む
+        self.flush_confidence()
+        self.cursor.execute(f'''SELECT {WORD_SELECT_LIST} FROM words WHERE genre_id = ? AND confidence = ? ORDER BY id''',
+                            (genre_id, True))
+        return self.cursor.fetchall()
+
+    # 自信がない単語を取得
+    def sort_no_confidence(self, genre_id: int):
+        # 自信度で絞り込むため、先に書き込み待ちの更新を書き込む
+        self.flush_confidence()
+        self.cursor.execute(f'''SELECT {WORD_SELECT_LIST} FROM words WHERE genre_id = ? AND confidence = ? ORDER BY id''',
+                            (genre_id, False))
+        return self.cursor.fetchall()
+
+
+# Modelの処理を専用のワーカースレッドで実行するクラス
+# ワーカースレッドは自分専用の接続を持ち、結果はTkのメインスレッドでコールバックに渡される
+class AsyncModel:
+    # 結果を確認する間隔（ミリ秒）
+    POLL_INTERVAL_MS = 20
+
+    # 初期化（parentを指定した場合は、そのウィジェットのafterで定期的に結果を確認する）
+    def __init__(self, model: Model, parent=None):
+        # 書き込み待ちの更新を書き込むため、画面側のModelを保存
+        self.model = model
+        self.parent = parent
+        # ワーカースレッド専用のModel（ワーカースレッドの中で作成する）
+        self.worker_model: Model = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-worker",
+                                           initializer=self.open_worker_model)
+        # 完了した処理（キー、コールバック、エラー時のコールバック、Future）
+        self.results = queue.Queue()
+        # キーごとの最新の処理（同じキーで新しい処理を依頼すると古い処理の結果は捨てられる）
+        self.latest = {}
+        # ワーカースレッドで変更されたジャンルのID（メインスレッドのModelから改めて通知する）
+        self.changes = queue.Queue()
+        if parent is not None:
+            parent.after(self.POLL_INTERVAL_MS, self.on_poll_timer)
+
+    # ワーカースレッドの中でデータベースに接続
+    def open_worker_model(self):
+        self.worker_model = self.model.open_copy()
+        self.worker_model.add_change_listener(self.changes.put)
+
+    # ワーカースレッドでModelのメソッドを実行
+    def call(self, method_name: str, args: tuple):
+        return getattr(self.worker_model, method_name)(*args)
+
+    # Modelのメソッドの実行を依頼し、Futureを返す
+    # callbackには結果が、on_errorには例外がメインスレッドで渡される
+    # keyを指定すると、同じキーの実行前の処理は取り消され、実行中の処理の結果は捨てられる
+    def submit(self, method_name: str, *args, callback: Callable = None, on_error: Callable = None,
+               key: str = None) -> Future:
+        # ワーカースレッドの接続から見えるように、書き込み待ちの更新を書き込む
+        self.flush_pending()
+        return self.enqueue(method_name, args, callback, on_error, key)
+
+    # submitと同じくModelのメソッドの実行を依頼し、Futureを返す（書き込み待ちの更新は書き込まない）
+    def enqueue(self, method_name: str, args: tuple, callback: Callable = None, on_error: Callable = None,
+                key: str = None) -> Future:
+        if key is not None:
+            self.cancel(key)
+        future = self.executor.submit(self.call, method_name, args)
+        if key is not None:
+            self.latest[key] = future
+        future.add_done_callback(lambda f: self.results.put((key, callback, on_error, f)))
+        return future
+
+    # ワーカースレッドから、メインスレッドでcallbackにvalueを渡すよう依頼する（進捗の表示など。pollで完了した処理の結果と同じ順に呼ばれる）
+    def report(self, callback: Callable, value):
+        future = Future()
+        future.set_result(value)
+        self.results.put((None, callback, None, future))
+
+    # 書き込み待ちの更新を書き込む（メインスレッドで呼び出すこと）
+    # サーバーに接続している場合（Modelにtake_pendingがある場合）は、通信を待たないように書き込み待ちを取り出して
+    # ワーカースレッドで送る。ワーカースレッドは依頼された順に実行するため、後から依頼した処理からは送った更新が見える
+    # 送れなかった場合はログに記録し、ワーカースレッドの書き込み待ちに残して次に送る時に送り直す
+    def flush_pending(self):
+        take_pending = getattr(self.model, 'take_pending', None)
+        if take_pending is None:
+            self.model.flush_pending()
+            return
+        pending = take_pending()
+        if pending is not None:
+            self.enqueue('write_pending', pending)
+
+    # 他の端末での変更の確認をワーカースレッドに依頼する（サーバーに接続している場合のみ。変更はpollで通知される）
+    # 確認が終わる前に次の確認を依頼した場合は、まだ始まっていない方を取り消す
+    def poll_changes(self):
+        if hasattr(self.model, 'poll_changes'):
+            self.enqueue('poll_changes', (), key='poll_changes')
+
+    # 指定したキーの処理を取り消す（実行中の場合は結果を捨てる）
+    def cancel(self, key: str):
+        future = self.latest.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    # 完了した処理のコールバックを呼び出す（メインスレッドで呼び出すこと）
+    # コールバックが例外を送出しても、ログに記録して残りの結果を渡し続ける
+    def poll(self):
+        # ワーカースレッドでの変更を、結果を渡す前にメインスレッド側へ通知
+        while True:
+            try:
+                genre_id = self.changes.get_nowait()
+            except queue.Empty:
+                break
+            self.model.notify_external_change(genre_id)
+        while True:
+            try:
+                key, callback, on_error, future = self.results.get_nowait()
+            except queue.Empty:
+                return
+            if future.cancelled():
+                continue
+            if key is not None:
+                # 新しい処理に置き換えられた処理の結果は捨てる
+                if self.latest.get(key) is not future:
+                    continue
+                del self.latest[key]
+            error = future.exception()
+            try:
+                if error is not None:
+                    if on_error is not None:
+                        on_error(error)
+                    else:
+                        # 受け取る関数がない場合はログに記録する
+                        log_error("ワーカースレッドでエラーが発生しました", error)
+                elif callback is not None:
+                    callback(future.result())
+            except Exception as e:
+                # 例えば画面を閉じた後に結果が届くと、破棄済みのウィジェットを操作してTclErrorになる
+                log_error("ワーカースレッドの結果を受け取る関数でエラーが発生しました", e)
+
+    # 定期的に完了した処理を確認（確認に失敗しても次の確認は必ず予約する）
+    def on_poll_timer(self):
+        try:
+            self.poll()
+        finally:
+            self.parent.after(self.POLL_INTERVAL_MS, self.on_poll_timer)
+
+    # ワーカースレッドを終了し、接続を閉じる
+    def close(self):
+        self.executor.submit(self.close_worker_model)
+        self.executor.shutdown(wait=True)
+
+    # ワーカースレッドの中で、送れずに残った書き込み待ちの更新を書き込んでから接続を閉じる
+    def close_worker_model(self):
+        try:
+            self.worker_model.flush_pending()
+        finally:
+            self.worker_model.close()
+
+
+# 理解度チェックの出題を表すクラス
+# 単語を1件ずつ取り出すイテレーター（get_due_wordsの結果やsample_wordsのジェネレータ）を受け取り、出題中の単語を保持する
+class QuizSession:
+    # 初期化
+    def __init__(self, cards: Iterable[tuple]):
+        self.cards = iter(cards)
+        # 出題済みの単語数と出題中の単語（すべて出題し終えたらNone）
+        self.count = 0
+        self.current = next(self.cards, None)
+
+    # 次の単語に進む
+    def advance(self):
+        self.count += 1
+        self.current = next(self.cards, None)
+
+    # すべての単語を出題し終えたかどうか
+    def finished(self) -> bool:
+        return self.current is None
@@ -0,0 +1,415 @@
+# My単語帳のサーバー（server.py）に接続し、Modelと同じメソッドでデータを読み書きするクライアントのモジュール
+# 画面（FrameSwitcher）はModelの代わりにRemoteModelを受け取れる（python app.py --server http://127.0.0.1:8765/ で起動する）
+import http.client
+import json
+import os
+import sqlite3
+import time
+import uuid
+from typing import Iterable, Iterator, Callable, Optional
+from urllib.parse import urlsplit
+
+from model import (DetailsCache, DuplicateWordError, schedule_review, write_word_stream, CARD_COLUMNS,
+                   DELETE_CHUNK_SIZE, FUZZY_MAX_DISTANCE)
+
+# 接続を待つ時間（秒）
+REQUEST_TIMEOUT = 30
+
+
+# 行のリスト（JSONではリストのリスト）をタプルのリストにする
+def to_rows(rows: list) -> list:
+    return [tuple(row) for row in rows]
+
+
+# 1行（JSONではリストかnull）をタプルにする
+def to_row(row: Optional[list]) -> Optional[tuple]:
+    return None if row is None else tuple(row)
+
+
+# サーバーに接続してModelの操作を行うクラス
+# 自信度の更新と復習結果はModelと同じく書き込み待ちにためておき、flush_pendingでまとめて送る
+# 他の端末での変更はpoll_changesでサーバーに問い合わせ、登録された関数に通知する
+# 画面ではAsyncModelが書き込み待ちの送信と変更の問い合わせをワーカースレッドで行い、画面のスレッドでは通信を待たない
+class RemoteModel:
+    # 初期化（urlはサーバーのURL。例: http://127.0.0.1:8765/）
+    # client_idはサーバーで自分の変更を区別するためのID（open_copyで作ったRemoteModelは同じIDを使う）
+    def __init__(self, url: str, client_id: str = None):
+        self.url = url
+        self.client_id = client_id or uuid.uuid4().hex
+        parts = urlsplit(url)
+        if parts.scheme != 'http' or not parts.hostname:
+            raise ValueError(f"サーバーのURLはhttp://ホスト:ポート/の形式で指定してください: {url}")
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.connection = http.client.HTTPConnection(self.host, self.port, timeout=REQUEST_TIMEOUT)
+        # まだサーバーに送っていない自信度の更新（単語ID→自信度）と復習結果（単語ID→(間隔, 易しさ, 連続正解数, 次回の復習日時)）
+        self.pending_confidence = {}
+        self.pending_reviews = {}
+        # まだサーバーに送っていない解答の記録（(単語ID, 評価, 解答日時)のリスト）
+        self.pending_attempts = []
+        # 書き込み待ちがこの件数に達したらまとめて送る
+        self.pending_limit = 100
+        # データが変更された時に呼び出す関数のリスト
+        self.change_listeners = []
+        # 単語の詳細のキャッシュ（get_word_detailsで使う）
+        self.details_cache = DetailsCache()
+        # 確認済みのサーバーでの変更の通し番号
+        self.change_sequence = self.call('get_changes', 0)[0]
+
+    # サーバーでModelのメソッドを実行し、結果を返す（サーバーでの例外はModelと同じ種類の例外にして送出する）
+    def call(self, method_name: str, *args, **kwargs):
+        body = json.dumps({'args': args, 'kwargs': kwargs}, ensure_ascii=False).encode('utf-8')
+        try:
+            status, data = self.send(method_name, body)
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            # 使い回していた接続が切れていた場合は、接続し直して1回だけ送り直す
+            self.connection.close()
+            status, data = self.send(method_name, body)
+        response = json.loads(data)
+        if status == 200:
+            return response['result']
+        message = response.get('error', '')
+        error_type = response.get('type')
+        if error_type == 'DuplicateWordError':
+            raise DuplicateWordError(response['word'], response['word_id'])
+        if status == 404:
+            raise AttributeError(message)
+        if status == 500:
+            error_class = getattr(sqlite3, error_type or '', None)
+            if isinstance(error_class, type) and issubclass(error_class, sqlite3.Error):
+                raise error_class(message)
+            # データベース以外のサーバーでの例外
+            raise RuntimeError(f"{error_type}: {message}")
+        if error_type == 'TypeError':
+            raise TypeError(message)
+        raise ValueError(message)
+
+    # リクエストを送り、(ステータスコード, 応答の本文)を返す
+    def send(self, method_name: str, body: bytes) -> tuple:
+        self.connection.request('POST', f'/api/{method_name}', body,
+                                {'Content-Type': 'application/json', 'X-Client-Id': self.client_id})
+        response = self.connection.getresponse()
+        return response.status, response.read()
+
+    # 同じサーバーに接続する別のRemoteModelを作成（別のスレッドで使う。AsyncModelのワーカースレッドなど）
+    # ワーカースレッドでの変更はAsyncModelが通知するため、同じクライアントIDにしてpoll_changesで重ねて通知しないようにする
+    def open_copy(self) -> 'RemoteModel':
+        return RemoteModel(self.url, self.client_id)
+
+    # サーバーとの接続を閉じる
+    def close(self):
+        self.connection.close()
+
+    # データが変更された時に呼び出す関数を登録（Model.add_change_listenerと同じ）
+    def add_change_listener(self, listener: Callable[[Optional[int]], None]):
+        self.change_listeners.append(listener)
+
+    # データが変更されたことを登録された関数に通知
+    def notify_change(self, genre_id: Optional[int] = None):
+        for listener in self.change_listeners:
+            listener(genre_id)
+
+    # 別の接続でデータが変更された時の処理（キャッシュを捨ててから変更を通知）
+    def notify_external_change(self, genre_id: Optional[int] = None):
+        self.details_cache.clear()
+        self.notify_change(genre_id)
+
+    # サーバーに前回の確認以降の他の端末での変更を問い合わせ、登録された関数に通知する
+    def poll_changes(self):
+        latest, genre_ids = self.call('get_changes', self.change_sequence, self.client_id)
+        if latest == self.change_sequence:
+            return
+        self.change_sequence = latest
+        if genre_ids is None:
+            self.notify_external_change()
+            return
+        if genre_ids:
+            self.details_cache.clear()
+        for genre_id in genre_ids:
+            self.notify_change(genre_id)
+
+    # 単語が属するジャンルのIDを取得
+    def get_word_genre_id(self, word_id: int) -> Optional[int]:
+        return self.call('get_word_genre_id', word_id)
+
+    # 新たにジャンルを追加
+    def add_genre(self, name: str):
+        self.call('add_genre', name)
+        self.notify_change()
+
+    # ジャンル名を編集
+    def edit_genre(self, id: int, genre_name: str):
+        self.call('edit_genre', id, genre_name)
+        self.notify_change()
+
+    # ジャンルを削除（単語はpurge_deleted_genresで少しずつ削除する）
+    def delete_genre(self, genre_id: int):
+        self.call('delete_genre', genre_id)
+        self.details_cache.clear()
+        self.notify_change()
+
+    # 削除済みのジャンルの単語を少しずつ削除し、(削除した単語数, 削除済みのジャンルがすべてなくなったか)を返す
+    # 進捗はサーバーからは受け取れないため、progressには終わった時に1回だけ削除した単語数が渡される
+    def purge_deleted_genres(self, chunk_size: int = DELETE_CHUNK_SIZE, max_chunks: int = None,
+                             progress: Optional[Callable[[int], None]] = None) -> tuple:
+        deleted, finished = self.call('purge_deleted_genres', chunk_size, max_chunks)
+        if progress is not None:
+            progress(deleted)
+        return deleted, finished
+
+    # すべてのジャンルを取得
+    def get_genres(self):
+        return to_rows(self.call('get_genres'))
+
+    # IDを指定してジャンルを取得
+    def get_genre(self, genre_id: int):
+        return to_row(self.call('get_genre', genre_id))
+
+    # すべてのジャンルを、単語数と自信がある単語の数とともに取得
+    def get_genres_with_stats(self):
+        # 書き込み待ちの自信度も数に含めるため、先に送る
+        self.flush_confidence()
+        return to_rows(self.call('get_genres_with_stats'))
+
+    # 新たに単語を追加し、単語のIDを返す（重複した場合の扱いはModel.add_wordと同じ）
+    def add_word(self, genre_id: int, word: str, details: str, confidence: bool = False,
+                 on_duplicate: Optional[str] = None) -> int:
+        word_id = self.call('add_word', genre_id, word, details, confidence, on_duplicate)
+        self.details_cache.discard(word_id)
+        self.notify_change(genre_id)
+        return word_id
+
+    # 同じジャンルで正規化した単語名が同じ単語の(id, 単語名, 自信度)を取得（ない場合はNone）
+    def find_duplicate(self, genre_id: int, word: str):
+        return to_row(self.call('find_duplicate', genre_id, word))
+
+    # 単語をまとめて追加（サーバーの1つのトランザクションで追加するため、1回のリクエストですべて送る）
+    # 進捗はサーバーからは受け取れないため、progressには送る前に読み込んだ件数が渡される
+    def bulk_import(self, genre_id: int, rows: Iterable[tuple], batch_size: int = 1000,
+                    progress: Optional[Callable[[int], None]] = None, on_duplicate: str = 'skip') -> int:
+        rows = [list(row) for row in rows]
+        if progress is not None:
+            progress(len(rows))
+        count = self.call('bulk_import', genre_id, rows, batch_size, on_duplicate=on_duplicate)
+        if on_duplicate != 'skip':
+            self.details_cache.clear()
+        self.notify_change(genre_id)
+        return count
+
+    # 単語とその詳細を編集
+    def edit_word(self, id: int, word: str, details: str):
+        self.call('edit_word', id, word, details)
+        self.details_cache.discard(id)
+        self.notify_change(self.get_word_genre_id(id))
+
+    # 同じジャンルで正規化した単語名が同じ単語を1つにまとめ、削除した単語数を返す
+    def dedupe_words(self, strategy: str = 'merge') -> int:
+        self.flush_pending()
+        removed = self.call('dedupe_words', strategy)
+        self.details_cache.clear()
+        self.notify_change()
+        return removed
+
+    # 単語を削除
+    def delete_word(self, word_id: int):
+        # 書き込み待ちの更新は削除する前に送る（Model.delete_wordと同じく、削除した後では解答を記録できないため）
+        self.flush_pending()
+        genre_id = self.get_word_genre_id(word_id)
+        self.call('delete_word', word_id)
+        self.details_cache.discard(word_id)
+        self.notify_change(genre_id)
+
+    # 特定のジャンルの単語を1ページ分取得し、(単語のリスト, 続きの位置)を返す
+    def get_words_page(self, genre_id: int, after: tuple = None, limit: int = 100,
+                       sort: str = 'id', confidence: bool = None):
+        self.flush_confidence()
+        rows, after = self.call('get_words_page', genre_id, after, limit, sort, confidence)
+        return to_rows(rows), to_row(after)
+
+    # 特定のジャンル（Noneの場合はすべてのジャンル）の単語の(単語名, 詳細, 自信度)をid順に返すジェネレータ
+    # サーバーからページ単位で取得する（すべてのジャンルの場合はジャンルごとに取得する）
+    def iter_words(self, genre_id: int = None, page_size: int = 1000) -> Iterator[tuple]:
+        genre_ids = [genre_id] if genre_id is not None else [genre[0] for genre in self.get_genres()]
+        for genre_id in genre_ids:
+            after = None
+            while True:
+                rows, after = self.get_words_page(genre_id, after, page_size)
+                for row in rows:
+                    yield row[2], row[3], row[4]
+                if after is None:
+                    break
+
+    # 特定のジャンル（Noneの場合はすべてのジャンル）の単語をこのコンピューターの単語ファイルに書き出し、書き出した件数を返す
+    def export_word_file(self, path: str, genre_id: int = None, fmt: str = None) -> int:
+        if fmt is None:
+            fmt = os.path.splitext(path)[1].lower().lstrip('.')
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            return write_word_stream(f, fmt, self.iter_words(genre_id))
+
+    # 特定のジャンルの単語の(id, 単語名, 自信度)をid順にすべて取得
+    def get_word_summaries(self, genre_id: int, confidence: bool = None):
+        self.flush_confidence()
+        return to_rows(self.call('get_word_summaries', genre_id, confidence))
+
+    # IDを指定して単語の(id, 単語名, 自信度)を取得
+    def get_word_summary(self, word_id: int):
+        self.flush_confidence()
+        return to_row(self.call('get_word_summary', word_id))
+
+    # IDを指定して単語の詳細を取得（最近読み込んだ詳細はキャッシュから返す）
+    def get_word_details(self, word_id: int) -> Optional[str]:
+        details = self.details_cache.get(word_id)
+        if details is None:
+            details = self.load_word_details(word_id)
+            if details is not None:
+                self.details_cache.put(word_id, details)
+        return details
+
+    # IDを指定して単語の詳細をキャッシュを使わずにサーバーから読み込む
+    def load_word_details(self, word_id: int) -> Optional[str]:
+        return self.call('load_word_details', word_id)
+
+    # 詳細のキャッシュの現在の番号を取得（Model.get_details_versionと同じ）
+    def get_details_version(self) -> int:
+        return self.details_cache.version
+
+    # 別の接続で読み込んだ単語の詳細をキャッシュに追加（versionの扱いはModel.cache_word_detailsと同じ）
+    def cache_word_details(self, word_id: int, details: str, version: int = None):
+        self.details_cache.put(word_id, details, version)
+
+    # 並び順で前後にある同じジャンルの単語の(id, 単語名, 自信度)を取得
+    def get_adjacent_word(self, genre_id: int, word_id: int, direction: int = 1,
+                          sort: str = 'id', confidence: bool = None):
+        self.flush_confidence()
+        return to_row(self.call('get_adjacent_word', genre_id, word_id, direction, sort, confidence))
+
+    # IDを指定して単語を取得
+    def get_word(self, word_id: int):
+        self.flush_confidence()
+        return to_row(self.call('get_word', word_id))
+
+    # 単語名と詳細から単語を検索
+    def search(self, query: str, genre_id: int = None, limit: int = 20, offset: int = 0):
+        return to_rows(self.call('search', query, genre_id, limit, offset))
+
+    # 単語名のつづりが近い単語を探す
+    def fuzzy_lookup(self, text: str, genre_id: int = None, k: int = 10, max_distance: int = FUZZY_MAX_DISTANCE) -> list:
+        return to_rows(self.call('fuzzy_lookup', text, genre_id, k, max_distance))
+
+    # 理解度チェックに出題する単語を無作為に選ぶ（乱数はサーバーで生成する）
+    def sample_words(self, genre_ids: Iterable[int], count: int = 20, weak_weight: float = 1.0) -> Iterator[tuple]:
+        self.flush_confidence()
+        yield from to_rows(self.call('sample_words', list(genre_ids), count, weak_weight))
+
+    # 単語の自信度を更新
+    def update_word_confidence(self, word_id: int, new_confidence: bool):
+        self.pending_confidence.pop(word_id, None)
+        self.call('update_word_confidence', word_id, new_confidence)
+        self.notify_change(self.get_word_genre_id(word_id))
+
+    # ジャンルのすべての単語の自信度をまとめて設定し、変更した単語の数を返す
+    def reset_confidence(self, genre_id: int, confidence: bool = False) -> int:
+        self.flush_confidence()
+        count = self.call('reset_confidence', genre_id, confidence)
+        self.notify_change(genre_id)
+        return count
+
+    # 単語の自信度の更新を書き込み待ちに追加（flush_confidenceでまとめて送る）
+    def queue_word_confidence(self, word_id: int, new_confidence: bool):
+        self.pending_confidence[word_id] = bool(new_confidence)
+        if len(self.pending_confidence) >= self.pending_limit:
+            self.flush_confidence()
+
+    # 書き込み待ちの自信度の更新を1回のリクエストで送り、サーバーの1つのトランザクションで書き込む
+    def flush_confidence(self) -> int:
+        if not self.pending_confidence:
+            return 0
+        pending = self.pending_confidence
+        self.pending_confidence = {}
+        try:
+            count, genre_ids = self.call('write_confidence', list(pending.items()))
+        except BaseException:
+            # 送れなかった場合は書き込み待ちに戻す（その後に追加された更新を優先）
+            self.pending_confidence = {**pending, **self.pending_confidence}
+            raise
+        # 更新した単語が属するジャンルに変更を通知
+        for genre_id in genre_ids:
+            self.notify_change(genre_id)
+        return count
+
+    # 復習日時が来た同じジャンルの単語を、復習日時が古い順にlimit件取得
+    def get_due_words(self, genre_id: int, limit: int = 20, now: float = None) -> list:
+        self.flush_pending()
+        return to_rows(self.call('get_due_words', genre_id, limit, now))
+
+    # 復習の評価を書き込み待ちに追加し、次回の復習日時を返す（解答の記録とともにflush_reviewsでまとめて送る）
+    def queue_review(self, card: tuple, grade: int, now: float = None) -> int:
+        now = time.time() if now is None else now
+        interval, ease, repetitions = card[CARD_COLUMNS.index('review_interval'):]
+        schedule = schedule_review(interval, ease, repetitions, grade, now)
+        self.pending_reviews[card[0]] = schedule
+        self.pending_attempts.append((card[0], grade, int(now)))
+        if len(self.pending_reviews) >= self.pending_limit or len(self.pending_attempts) >= self.pending_limit:
+            self.flush_reviews()
+        return schedule[-1]
+
+    # 書き込み待ちの復習結果と解答の記録を1回のリクエストで送り、サーバーの1つのトランザクションで書き込む
+    def flush_reviews(self) -> int:
+        if not self.pending_reviews and not self.pending_attempts:
+            return 0
+        pending = self.pending_reviews
+        attempts = self.pending_attempts
+        self.pending_reviews = {}
+        self.pending_attempts = []
+        try:
+            self.call('write_reviews', [[word_id, list(schedule)] for word_id, schedule in pending.items()],
+                      [list(attempt) for attempt in attempts])
+        except BaseException:
+            self.pending_reviews = {**pending, **self.pending_reviews}
+            self.pending_attempts = attempts + self.pending_attempts
+            raise
+        return len(pending)
+
+    # ジャンル（Noneの場合はすべて）の日ごとの解答数を取得
+    def get_daily_activity(self, genre_id: int = None, since_day: int = None) -> list:
+        self.flush_reviews()
+        return to_rows(self.call('get_daily_activity', genre_id, since_day))
+
+    # ジャンルの記憶の定着の曲線を取得
+    def get_retention_curve(self, genre_id: int) -> list:
+        self.flush_reviews()
+        return to_rows(self.call('get_retention_curve', genre_id))
+
+    # ジャンルの解答したことがある単語の正解率を、正解率が低い順に取得
+    def get_word_accuracy(self, genre_id: int) -> list:
+        self.flush_reviews()
+        return to_rows(self.call('get_word_accuracy', genre_id))
+
+    # 書き込み待ちの更新をすべて送る
+    def flush_pending(self):
+        self.flush_confidence()
+        self.flush_reviews()
+
+    # 書き込み待ちの更新を取り出して空にし、(自信度の更新, 復習結果, 解答の記録)を返す（書き込み待ちがない場合はNone）
+    # AsyncModelが画面のスレッドで取り出し、ワーカースレッドのRemoteModelのwrite_pendingで送る
+    def take_pending(self) -> Optional[tuple]:
+        if not self.pending_confidence and not self.pending_reviews and not self.pending_attempts:
+            return None
+        pending = (self.pending_confidence, self.pending_reviews, self.pending_attempts)
+        self.pending_confidence = {}
+        self.pending_reviews = {}
+        self.pending_attempts = []
+        return pending
+
+    # 別のRemoteModelのtake_pendingで取り出した更新を書き込み待ちに加えて送る
+    # 送れなかった更新はこのRemoteModelの書き込み待ちに残り、次に送る時に送り直す
+    def write_pending(self, confidence: dict, reviews: dict, attempts: list):
+        self.pending_confidence = {**self.pending_confidence, **confidence}
+        self.pending_reviews = {**self.pending_reviews, **reviews}
+        self.pending_attempts = self.pending_attempts + attempts
+        self.flush_pending()
+
+    # バックアップはサーバーのコンピューターで行う（データベースファイルはサーバーにあるため）
+    def backup(self, path: str, pages: int = None, progress: Optional[Callable[[int, int], None]] = None) -> int:
+        raise ValueError("サーバーに接続している場合は、サーバーのコンピューターでバックアップしてください"
+                         "（python cli.py --db ファイル backup 保存先）")
@@ -0,0 +1,241 @@
+# My単語帳のデータベースを複数の端末から共有するためのHTTP/JSONサーバーのモジュール
+# 使い方: python server.py [--db ファイル] [--host 127.0.0.1] [--port 8765] [--readers 4]
+# クライアント（remote.RemoteModel、python app.py --server URL）は POST /api/<メソッド名> に
+# {"args": [...], "kwargs": {...}} を送り、{"result": ...} を受け取る（X-Client-Idヘッダーで自分の変更を区別できる）
+# データベースはWALモードにし、読み込みは接続を持つ複数のスレッド（読み込み用の接続のプール）で並行に、
+# 書き込みは1つのスレッド（1つの接続）で順に実行する。WALモードでは書き込み中も読み込みが待たされない
+# 認証はないため、信頼できるネットワークの中だけで使うこと（既定ではこのコンピューターからしか接続できない）
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, Optional
+
+from model import Model, DuplicateWordError
+
+# 読み込み用の接続で実行するModelのメソッド
+READ_METHODS = {
+    'get_genres', 'get_genre', 'get_genres_with_stats', 'get_word_genre_id',
+    'get_word', 'get_word_summary', 'get_word_summaries', 'get_words_page', 'load_word_details',
+    'get_adjacent_word', 'get_due_words', 'sample_words', 'search', 'fuzzy_lookup', 'find_duplicate',
+    'get_daily_activity', 'get_retention_curve', 'get_word_accuracy',
+}
+
+# 書き込み用の接続で順に実行するModelのメソッド
+WRITE_METHODS = {
+    'add_genre', 'edit_genre', 'delete_genre', 'purge_deleted_genres',
+    'add_word', 'bulk_import', 'edit_word', 'delete_word', 'dedupe_words',
+    'update_word_confidence', 'reset_confidence',
+}
+
+# 変更の履歴として保持する件数（これより古い位置からの問い合わせには「すべて変更された」と返す）
+CHANGE_LOG_SIZE = 1000
+
+# 既定のポート番号
+DEFAULT_PORT = 8765
+
+
+# 書き込み待ちの自信度の更新（[単語ID, 自信度]の配列）を受け取り、1つのトランザクションで書き込む
+# 戻り値は[書き込んだ件数, 更新した単語が属するジャンルIDのリスト]（クライアントが自分の画面に変更を通知するために使う）
+def write_confidence(model: Model, updates: list) -> list:
+    genre_ids = []
+    model.add_change_listener(genre_ids.append)
+    try:
+        model.pending_confidence.update((word_id, confidence) for word_id, confidence in updates)
+        count = model.flush_confidence()
+    finally:
+        model.change_listeners.remove(genre_ids.append)
+    return [count, genre_ids]
+
+
+# 書き込み待ちの復習結果（[単語ID, [間隔, 易しさ, 連続正解数, 次回の復習日時]]の配列）と
+# 解答の記録（[単語ID, 評価, 解答日時]の配列）を受け取り、1つのトランザクションで書き込む
+def write_reviews(model: Model, schedules: list, attempts: list = ()) -> int:
+    model.pending_reviews.update((word_id, tuple(schedule)) for word_id, schedule in schedules)
+    model.pending_attempts.extend(tuple(attempt) for attempt in attempts)
+    return model.flush_reviews()
+
+
+# 書き込み用の接続で実行する、Modelのメソッド以外の処理
+WRITE_FUNCTIONS = {
+    'write_confidence': write_confidence,
+    'write_reviews': write_reviews,
+}
+
+
+# 読み込み用の接続のプールと書き込み用の接続を管理し、Modelのメソッドを実行するクラス
+class ModelService:
+    # 初期化（readersは読み込み用の接続の数）
+    def __init__(self, db_name: str, readers: int = 4, journal_mode: str = 'wal'):
+        self.db_name = db_name
+        self.readers = readers
+        # マイグレーションを済ませ、ジャーナルモードを設定する（WALモードはデータベースファイルに記録される）
+        model = Model(db_name)
+        model.cursor.execute(f'''PRAGMA journal_mode = {journal_mode}''')
+        self.journal_mode = model.cursor.fetchone()[0]
+        model.close()
+        # 各スレッドのModel（スレッドごとに1つの接続を持つ）
+        self.local = threading.local()
+        self.reader_executor = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="reader",
+                                                  initializer=self.open_model)
+        self.writer_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="writer",
+                                                  initializer=self.open_writer)
+        # 変更の履歴（(通し番号, ジャンルID, 変更したクライアントのID)。ジャンルIDがNoneの場合はジャンルの一覧の変更）
+        self.changes = deque(maxlen=CHANGE_LOG_SIZE)
+        self.change_sequence = 0
+        self.changes_lock = threading.Lock()
+
+    # スレッドの中でデータベースに接続
+    def open_model(self):
+        self.local.model = Model(self.db_name)
+
+    # 書き込み用のスレッドの中でデータベースに接続し、変更を履歴に記録する
+    def open_writer(self):
+        self.open_model()
+        self.local.model.add_change_listener(self.record_change)
+
+    # 変更を履歴に記録（書き込み用のスレッドで、実行中のリクエストのクライアントIDとともに記録する）
+    def record_change(self, genre_id: Optional[int]):
+        with self.changes_lock:
+            self.change_sequence += 1
+            self.changes.append((self.change_sequence, genre_id, self.local.client_id))
+
+    # 指定した通し番号より後の変更を取得し、[最新の通し番号, 変更されたジャンルIDのリスト]を返す
+    # client_idを指定すると、そのクライアント自身の変更は除く（クライアントは自分の変更を既に通知しているため）
+    # 履歴が残っていない場合やジャンルの一覧が変更された場合は、ジャンルIDのリストの代わりにNoneを返す
+    def get_changes(self, since: int, client_id: str = None) -> list:
+        with self.changes_lock:
+            latest = self.change_sequence
+            if since >= latest:
+                return [latest, []]
+            if not self.changes or self.changes[0][0] > since + 1:
+                return [latest, None]
+            genre_ids = [genre_id for sequence, genre_id, changed_by in self.changes
+                         if sequence > since and (client_id is None or changed_by != client_id)]
+        if None in genre_ids:
+            return [latest, None]
+        return [latest, sorted(set(genre_ids))]
+
+    # スレッドのModelでメソッドを実行（ジェネレータの結果はリストにする）
+    def run(self, method_name: str, args: list, kwargs: dict, client_id: Optional[str]):
+        self.local.client_id = client_id
+        if method_name in WRITE_FUNCTIONS:
+            return WRITE_FUNCTIONS[method_name](self.local.model, *args, **kwargs)
+        result = getattr(self.local.model, method_name)(*args, **kwargs)
+        if isinstance(result, Iterator):
+            result = list(result)
+        return result
+
+    # メソッドを読み込み用または書き込み用のスレッドで実行し、結果を返す（メソッドが公開されていない場合はKeyError）
+    # client_idはリクエストを送ったクライアントのID（変更の履歴に記録する）
+    def call(self, method_name: str, args: list, kwargs: dict, client_id: Optional[str] = None):
+        if method_name == 'get_changes':
+            return self.get_changes(*args, **kwargs)
+        if method_name in READ_METHODS:
+            executor = self.reader_executor
+        elif method_name in WRITE_METHODS or method_name in WRITE_FUNCTIONS:
+            executor = self.writer_executor
+        else:
+            raise KeyError(method_name)
+        return executor.submit(self.run, method_name, args, kwargs, client_id).result()
+
+    # スレッドを終了する（スレッドが終了すると、スレッドごとのModelも破棄されて接続が閉じられる）
+    def close(self):
+        self.reader_executor.shutdown(wait=True)
+        self.writer_executor.shutdown(wait=True)
+
+
+# APIのリクエストを処理するクラス（HTTP/1.1で接続を使い回せる）
+class RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # ヘッダーと本文を別々に送るため、Nagleアルゴリズムを無効にしないと遅延ACKと重なって1回に約40ミリ秒待たされる
+    disable_nagle_algorithm = True
+
+    # POST /api/<メソッド名> の処理
+    def do_POST(self):
+        if not self.path.startswith('/api/'):
+            self.send_json(404, {'error': f"見つかりません: {self.path}"})
+            return
+        method_name = self.path[len('/api/'):]
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+            result = self.server.service.call(method_name, request.get('args', []), request.get('kwargs', {}),
+                                              self.headers.get('X-Client-Id'))
+        except KeyError as e:
+            if e.args == (method_name,):
+                self.send_json(404, {'error': f"公開されていないメソッドです: {method_name}"})
+            else:
+                self.send_error_json(400, e)
+            return
+        except DuplicateWordError as e:
+            self.send_json(409, {'error': str(e), 'type': 'DuplicateWordError', 'word': e.word, 'word_id': e.word_id})
+            return
+        except (ValueError, TypeError) as e:
+            self.send_error_json(400, e)
+            return
+        except sqlite3.Error as e:
+            self.send_error_json(500, e)
+            return
+        except Exception as e:
+            # それ以外の例外（壊れた圧縮データのzlib.errorなど）も、接続を切らずにエラーとして返す
+            self.send_error_json(500, e)
+            return
+        self.send_json(200, {'result': result})
+
+    # エラーの種類とメッセージを返す
+    def send_error_json(self, status: int, error: Exception):
+        self.send_json(status, {'error': str(error), 'type': type(error).__name__})
+
+    # JSONの応答を返す
+    def send_json(self, status: int, body: dict):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    # アクセスログは表示しない（負荷が高い時に標準エラー出力への書き込みで遅くならないようにする）
+    def log_message(self, format, *args):
+        pass
+
+
+# ModelServiceを使ってリクエストを処理するHTTPサーバーを作成（portに0を指定すると空いているポートを使う）
+def create_server(db_name: str, host: str = '127.0.0.1', port: int = DEFAULT_PORT, readers: int = 4,
+                  journal_mode: str = 'wal') -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), RequestHandler)
+    server.daemon_threads = True
+    server.service = ModelService(db_name, readers, journal_mode)
+    return server
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="My単語帳のデータベースをHTTP/JSONで共有するサーバーを起動します")
+    parser.add_argument('--db', default="my_word_app.db", help="データベースファイル（既定: my_word_app.db）")
+    parser.add_argument('--host', default='127.0.0.1', help="待ち受けるアドレス（他の端末から接続する場合は0.0.0.0など）")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"ポート番号（既定: {DEFAULT_PORT}、0で空いているポート）")
+    parser.add_argument('--readers', type=int, default=4, help="読み込み用の接続の数")
+    parser.add_argument('--journal-mode', default='wal', choices=['wal', 'delete'],
+                        help="ジャーナルモード（既定: wal。deleteは比較用）")
+    args = parser.parse_args(argv)
+    server = create_server(args.db, args.host, args.port, args.readers, args.journal_mode)
+    host, port = server.server_address[:2]
+    # 負荷試験などで起動を待てるように、待ち受けを始めたことを表示する
+    print(f"http://{host}:{port}/ で待ち受けています（ジャーナルモード: {server.service.journal_mode}）", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
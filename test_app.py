@@ -1,6 +1,26 @@
 import unittest
 import os
-from app import Model
+import random
+import sqlite3
+import io
+import json
+import contextlib
+import datetime
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest.mock
+import zlib
+from instrumentation import Tracer, read_events, aggregate
+from model import (Model, AsyncModel, DetailsCache, DuplicateWordError, QuizSession, edit_distance, local_day,
+                   make_trigrams, normalize_word, pack_details, read_word_file, retention_bucket, schedule_review,
+                   unpack_details, SCHEMA_VERSION, SECONDS_PER_DAY, WORD_SELECT_LIST)
+from gui import FrameCache, FrameSwitcher, WordListFrame
+from remote import RemoteModel
+from server import create_server
+import analytics
+import cli
 
 class TestModel(unittest.TestCase):
     def setUp(self):
@@ -32,7 +52,7 @@ class TestModel(unittest.TestCase):
 
         # ジャンルを取得
         genres = self.model.get_genres()
-        genre_id = genres[0][0]
+        genre_id = genres[-1][0]
 
         word = "Test Word"
         details = "This is a test word."
@@ -78,6 +98,1791 @@ class TestModel(unittest.TestCase):
         self.assertIn(word3, sorted_word_names)
         self.assertNotIn(word2, sorted_word_names)
 
+    def test_bulk_import(self):
+        # CSVとJSONLのファイルから単語をまとめて追加できることを確認するテスト
+        csv_name = "test_words.csv"
+        jsonl_name = "test_words.jsonl"
+        with open(csv_name, "w", encoding="utf-8") as f:
+            f.write("word,details,confidence\nCSV Word 1,CSV Details 1,1\nCSV Word 2,CSV Details 2,0\nCSV Word 3,CSV Details 3,0\n")
+        with open(jsonl_name, "w", encoding="utf-8") as f:
+            f.write('{"word": "JSON Word", "details": "JSON Details", "confidence": true}\n')
+        self.addCleanup(os.remove, csv_name)
+        self.addCleanup(os.remove, jsonl_name)
+
+        # 進捗がバッチごとに通知されることを確認
+        progress = []
+        count = self.model.bulk_import(1, read_word_file(csv_name), batch_size=2, progress=progress.append)
+        self.assertEqual(count, 3)
+        self.assertEqual(progress, [2, 3])
+        self.model.bulk_import(1, read_word_file(jsonl_name))
+
+        words = self.model.get_words(1)
+        self.assertEqual([w[2] for w in words], ["Test Word", "CSV Word 1", "CSV Word 2", "CSV Word 3", "JSON Word"])
+        self.assertEqual([w[2] for w in self.model.sort_confidence(1)], ["CSV Word 1", "JSON Word"])
+
+    def test_bulk_import_rollback(self):
+        # 途中で失敗した場合は1件も追加されないことを確認するテスト
+        def rows():
+            yield ("Word 1", "Details 1", False)
+            yield ("Word 2", "Details 2", False)
+            raise ValueError("broken row")
+
+        with self.assertRaises(ValueError):
+            self.model.bulk_import(1, rows(), batch_size=1)
+        self.assertEqual(len(self.model.get_words(1)), 1)
+        # 一時的に削除したtrigramの転置インデックスのトリガーも元に戻っている
+        self.model.add_word(1, "Word 3", "Details 3")
+        self.assertEqual(self.model.fuzzy_lookup("Word 3", 1), [(2, 1, "Word 3", 0)])
+
+    def test_bulk_import_in_caller_transaction(self):
+        # 呼び出し元のトランザクションの中では、失敗してもこのメソッドの変更だけを取り消し、呼び出し元の変更は残ることを確認するテスト
+        def rows():
+            yield ("Word 1", "Details 1", False)
+            raise ValueError("broken row")
+
+        self.model.cursor.execute('''UPDATE words SET confidence = 1 WHERE id = 1''')
+        with self.assertRaises(ValueError):
+            self.model.bulk_import(1, rows())
+        self.assertTrue(self.model.connection.in_transaction)
+        self.assertEqual([(w[2], w[4]) for w in self.model.get_words(1)], [("Test Word", 1)])
+        # 成功した場合もコミットせず、呼び出し元のトランザクションと一緒に取り消せる
+        self.model.bulk_import(1, [("Word 2", "Details 2", False)])
+        self.assertTrue(self.model.connection.in_transaction)
+        self.model.connection.rollback()
+        self.assertEqual([(w[2], w[4]) for w in self.model.get_words(1)], [("Test Word", 0)])
+
+
+class TestWriteBehind(unittest.TestCase):
+    def setUp(self):
+        self.db_name = "test.db"
+        self.model = Model(self.db_name)
+        self.model.add_genre("Test Genre")
+        self.model.bulk_import(1, ((f"Word {i}", f"Details {i}", False) for i in range(5)))
+
+    def tearDown(self):
+        self.model.connection.close()
+        os.remove(self.db_name)
+
+    # 別の接続からデータベースに書き込まれている自信度を取得
+    def committed_confidence(self, word_id):
+        connection = sqlite3.connect(self.db_name)
+        try:
+            return connection.execute("SELECT confidence FROM words WHERE id = ?", (word_id,)).fetchone()[0]
+        finally:
+            connection.close()
+
+    def test_read_your_writes(self):
+        # 書き込み前の更新がModelからの読み込みに反映されることを確認するテスト
+        self.model.queue_word_confidence(1, True)
+        self.model.queue_word_confidence(2, True)
+        self.model.queue_word_confidence(2, False)
+        self.assertEqual(self.model.pending_confidence, {1: True, 2: False})
+        self.assertEqual(self.committed_confidence(1), 0)
+        self.assertTrue(self.model.get_word(1)[4])
+        self.assertTrue(self.model.get_words(1)[0][4])
+
+        # 自信度で絞り込む取得では先に書き込まれることを確認
+        self.assertEqual([w[0] for w in self.model.sort_confidence(1)], [1])
+        self.assertEqual(self.model.pending_confidence, {})
+        self.assertEqual(self.committed_confidence(1), 1)
+
+    def test_flush(self):
+        # 書き込み待ちがまとめて書き込まれることを確認するテスト
+        for word_id in range(1, 6):
+            self.model.queue_word_confidence(word_id, True)
+        self.assertEqual(self.model.flush_confidence(), 5)
+        self.assertEqual(self.model.flush_confidence(), 0)
+        self.assertEqual(self.committed_confidence(5), 1)
+
+        # 件数が上限に達すると自動的に書き込まれることを確認
+        self.model.pending_limit = 2
+        self.model.queue_word_confidence(1, False)
+        self.assertEqual(self.committed_confidence(1), 1)
+        self.model.queue_word_confidence(2, False)
+        self.assertEqual(self.committed_confidence(1), 0)
+        self.assertEqual(self.model.pending_confidence, {})
+
+        # 即時の更新は書き込み待ちの古い値で上書きされないことを確認
+        self.model.queue_word_confidence(3, False)
+        self.model.update_word_confidence(3, True)
+        self.model.flush_confidence()
+        self.assertEqual(self.committed_confidence(3), 1)
+
+
+class TestAsyncModel(unittest.TestCase):
+    def setUp(self):
+        self.db_name = "test.db"
+        self.model = Model(self.db_name)
+        self.model.add_genre("Test Genre")
+        self.model.add_word(1, "Test Word", "Test Details", False)
+        self.async_model = AsyncModel(self.model)
+
+    def tearDown(self):
+        self.async_model.close()
+        self.model.connection.close()
+        os.remove(self.db_name)
+
+    def test_callback_on_poll(self):
+        # ワーカースレッドの結果がpollを呼んだスレッドでコールバックに渡されることを確認するテスト
+        results = []
+        # 書き込み待ちの更新がワーカースレッドの接続から見えることも確認
+        self.model.queue_word_confidence(1, True)
+        future = self.async_model.submit("get_words", 1, callback=results.append)
+        self.assertTrue(future.result(timeout=5)[0][4])
+        self.assertEqual(results, [])
+        self.async_model.poll()
+        self.assertEqual([[w[2] for w in r] for r in results], [["Test Word"]])
+
+    def test_superseded_request(self):
+        # 同じキーで新しい処理を依頼すると、古い処理の結果が捨てられることを確認するテスト
+        results = []
+        first = self.async_model.submit("get_genre", 1, callback=results.append, key="genre")
+        second = self.async_model.submit("get_genre", 2, callback=results.append, key="genre")
+        for future in (first, second):
+            if not future.cancelled():
+                future.result(timeout=5)
+        self.async_model.poll()
+        self.assertEqual(results, [None])
+
+    def test_error_callback(self):
+        # 例外がon_errorに渡されることを確認するテスト
+        errors = []
+        future = self.async_model.submit("get_words_page", 1, None, 10, "unknown", on_error=errors.append)
+        with self.assertRaises(KeyError):
+            future.result(timeout=5)
+        self.async_model.poll()
+        self.assertEqual(len(errors), 1)
+
+    def test_error_without_callback_is_logged(self):
+        # on_errorを指定しない場合、例外が標準出力ではなくログに記録されることを確認するテスト
+        future = self.async_model.submit("get_words_page", 1, None, 10, "unknown")
+        with self.assertRaises(KeyError):
+            future.result(timeout=5)
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout), self.assertLogs("model", level="ERROR") as logs:
+            self.async_model.poll()
+        self.assertEqual(stdout.getvalue(), "")
+        self.assertIn("KeyError", logs.output[0])
+
+    def test_progress_report(self):
+        # ワーカースレッドからの進捗が、pollを呼んだスレッドで結果より先に渡されることを確認するテスト
+        events = []
+        rows = ((f"Word {i}", "", False) for i in range(5))
+        future = self.async_model.submit("bulk_import", 1, rows, 2,
+                                         lambda count: self.async_model.report(lambda c: events.append(("progress", c)), count),
+                                         "skip", callback=lambda count: events.append(("done", count)))
+        self.assertEqual(future.result(timeout=5), 5)
+        self.assertEqual(events, [])
+        self.async_model.poll()
+        self.assertEqual(events, [("progress", 2), ("progress", 4), ("progress", 5), ("done", 5)])
+        self.assertEqual(len(self.model.get_words(1)), 6)
+
+    def test_raising_callback(self):
+        # コールバックが例外を送出しても、ログに記録して後の結果を渡し、次の確認も予約することを確認するテスト
+        def fail(result):
+            raise RuntimeError("invalid command name")
+
+        results = []
+        futures = [self.async_model.submit("get_genre", 1, callback=fail),
+                   self.async_model.submit("get_genre", 1, callback=results.append)]
+        for future in futures:
+            future.result(timeout=5)
+        self.async_model.parent = unittest.mock.Mock()
+        with self.assertLogs("model", level="ERROR") as logs:
+            self.async_model.on_poll_timer()
+        self.assertIn("RuntimeError", logs.output[0])
+        self.assertEqual(len(results), 1)
+        self.async_model.parent.after.assert_called_once_with(AsyncModel.POLL_INTERVAL_MS, self.async_model.on_poll_timer)
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db_name = os.path.join(self.tmp.name, "test.db")
+        # 空いているポートでサーバーを起動し、2つのクライアント（別々の端末のつもり）から接続する
+        self.server = create_server(self.db_name, port=0, readers=2)
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,))
+        self.thread.start()
+        url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        self.client = RemoteModel(url)
+        self.other = RemoteModel(url)
+
+    def tearDown(self):
+        self.client.close()
+        self.other.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.server.service.close()
+
+    def test_wal_mode(self):
+        # サーバーがデータベースをWALモードにすることを確認するテスト
+        self.assertEqual(self.server.service.journal_mode, "wal")
+        connection = sqlite3.connect(self.db_name)
+        self.assertEqual(connection.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        connection.close()
+
+    def test_same_results_as_model(self):
+        # サーバー経由でもModelと同じ形（タプル）の結果が返ることを確認するテスト
+        self.client.add_genre("English")
+        word_id = self.client.add_word(1, "apple", "a red fruit")
+        self.client.bulk_import(1, [("banana", "a yellow fruit", True), ("cherry", "", False)])
+        model = Model(self.db_name)
+        self.addCleanup(model.close)
+        self.assertEqual(self.client.get_genres_with_stats(), model.get_genres_with_stats())
+        self.assertEqual(self.client.get_word_summaries(1), model.get_word_summaries(1))
+        self.assertEqual(self.client.get_word(word_id), model.get_word(word_id))
+        self.assertEqual(self.client.get_words_page(1, None, 2), model.get_words_page(1, None, 2))
+        self.assertEqual(self.client.get_word_details(word_id), "a red fruit")
+        self.assertEqual(self.client.search("fruit"), model.search("fruit"))
+        self.assertEqual(self.client.fuzzy_lookup("aple", 1), model.fuzzy_lookup("aple", 1))
+        self.assertEqual(sorted(card[0] for card in self.client.sample_words([1], 10)), [1, 2, 3])
+        self.assertIsNone(self.client.get_genre(2))
+        # 解答の記録は復習結果とともに送られ、集計を読める
+        for card in self.client.get_due_words(1, 3, 0):
+            self.client.queue_review(card, 4 if card[0] % 2 else 1, 0)
+        self.assertEqual(self.client.get_daily_activity(), model.get_daily_activity())
+        self.assertEqual(self.client.get_daily_activity(), [(local_day(0), 3, 2, 3)])
+        self.assertEqual(self.client.get_word_accuracy(1), model.get_word_accuracy(1))
+        self.assertEqual(self.client.get_retention_curve(1), [])
+
+    def test_errors(self):
+        # サーバーでの例外がModelと同じ種類の例外として送出されることを確認するテスト
+        self.client.add_genre("English")
+        word_id = self.client.add_word(1, "apple", "")
+        with self.assertRaises(DuplicateWordError) as raised:
+            self.client.add_word(1, "Apple", "")
+        self.assertEqual(raised.exception.word_id, word_id)
+        with self.assertRaises(ValueError):
+            self.client.dedupe_words("unknown")
+        with self.assertRaises(AttributeError):
+            self.client.call("get_schema_version")
+        # データベース以外の例外でも接続は切れず、エラーとして返される
+        with unittest.mock.patch.object(Model, "get_genres", side_effect=zlib.error("invalid stored block lengths")):
+            with self.assertRaises(RuntimeError) as raised:
+                self.client.get_genres()
+        self.assertEqual(str(raised.exception), "error: invalid stored block lengths")
+        self.assertEqual(self.client.get_genres(), [(1, "English")])
+
+    def test_write_behind_and_changes(self):
+        # 書き込み待ちの自信度が1回で送られ、他のクライアントには変更として通知されることを確認するテスト
+        self.client.add_genre("English")
+        self.client.bulk_import(1, [("apple", "", False), ("banana", "", False)])
+        self.other.poll_changes()
+        own, others = [], []
+        self.client.add_change_listener(own.append)
+        self.other.add_change_listener(others.append)
+        self.client.queue_word_confidence(1, True)
+        self.client.queue_word_confidence(2, True)
+        self.assertEqual(self.other.get_word_summaries(1), [(1, "apple", 0), (2, "banana", 0)])
+        self.client.flush_pending()
+        self.assertEqual(own, [1])
+        self.assertEqual(self.other.get_word_summaries(1), [(1, "apple", 1), (2, "banana", 1)])
+        self.other.poll_changes()
+        self.assertEqual(others, [1])
+        # 自分の変更はpoll_changesで重ねて通知されない
+        self.client.poll_changes()
+        self.assertEqual(own, [1])
+        # ジャンルの一覧の変更はNoneで通知される
+        self.client.add_genre("Other")
+        self.other.poll_changes()
+        self.assertEqual(others, [1, None])
+
+    def test_delete_word_sends_pending_answers(self):
+        # 単語を削除する前に書き込み待ちの解答が送られ、記録が失われないことを確認するテスト
+        self.client.add_genre("English")
+        self.client.add_word(1, "apple", "")
+        self.client.queue_review(self.client.get_due_words(1)[0], 4, 0)
+        self.client.queue_word_confidence(1, True)
+        self.client.delete_word(1)
+        self.assertEqual((self.client.pending_confidence, self.client.pending_reviews, self.client.pending_attempts), ({}, {}, []))
+        self.assertEqual(self.client.get_daily_activity(), [(local_day(0), 1, 1, 1)])
+
+    def test_async_model(self):
+        # AsyncModelのワーカースレッドでもサーバーに接続できることを確認するテスト
+        self.client.add_genre("English")
+        self.client.add_word(1, "apple", "")
+        async_model = AsyncModel(self.client)
+        self.addCleanup(async_model.close)
+        future = async_model.submit("get_word_summaries", 1)
+        self.assertEqual(future.result(timeout=5), [(1, "apple", 0)])
+
+    def test_async_model_does_not_block(self):
+        # 書き込み待ちの送信と他の端末での変更の確認が、画面のスレッドではなくワーカースレッドで行われることを確認するテスト
+        self.client.add_genre("English")
+        self.client.add_word(1, "apple", "")
+        async_model = AsyncModel(self.client)
+        self.addCleanup(async_model.close)
+        async_model.submit("get_genres").result(timeout=5)
+        changes = []
+        self.client.add_change_listener(changes.append)
+        self.client.queue_word_confidence(1, True)
+        self.other.add_word(1, "banana", "")
+        with unittest.mock.patch.object(self.client, "call", side_effect=AssertionError("画面のスレッドで通信した")):
+            async_model.flush_pending()
+            async_model.poll_changes()
+            future = async_model.submit("get_word_summaries", 1)
+            self.assertEqual(future.result(timeout=5), [(1, "apple", 1), (2, "banana", 0)])
+            async_model.poll()
+        self.assertEqual(self.client.pending_confidence, {})
+        # 自分の自信度の更新と、他の端末での単語の追加が通知される
+        self.assertEqual(changes, [1, 1])
+
+
+class TestFrameCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        # 上限を超えると最も長く使われていないフレームが捨てられることを確認するテスト
+        cache = FrameCache(max_size=2)
+        self.assertEqual(cache.put("a", 1, "frame a"), [])
+        self.assertEqual(cache.put("b", 2, "frame b"), [])
+        self.assertEqual(cache.get("a"), "frame a")
+        self.assertEqual(cache.put("c", 3, "frame c"), ["frame b"])
+        self.assertIsNone(cache.get("b"))
+        # 表示中のフレームは上限を超えても捨てられないことを確認
+        self.assertEqual(cache.put("d", 4, "frame d", keep="frame a"), ["frame c"])
+        self.assertEqual(cache.stats(), {"size": 2, "hits": 1, "misses": 1, "hit_rate": 0.5})
+
+    def test_invalidate(self):
+        # タグを指定した無効化とすべての無効化を確認するテスト
+        cache = FrameCache()
+        cache.put("start", None, "start frame")
+        cache.put("list 1", 1, "list frame 1")
+        cache.put("list 2", 2, "list frame 2")
+        self.assertEqual(cache.invalidate(1), ["list frame 1"])
+        self.assertTrue(cache.holds("list frame 2"))
+        self.assertNotIn("list 1", cache)
+        self.assertEqual(cache.invalidate(), ["start frame", "list frame 2"])
+        self.assertEqual(cache.stats()["size"], 0)
+
+
+class TestSwitchToWordList(unittest.TestCase):
+    # 画面を作らずにFrameSwitcher.switch_to_word_listを呼ぶための代わりのクラス（切り替えの依頼を記録する）
+    class StubSwitcher:
+        switch_to_word_list = FrameSwitcher.switch_to_word_list
+        make_cache_key = FrameSwitcher.make_cache_key
+
+        def __init__(self, model: Model):
+            self.model = model
+            self.async_model = AsyncModel(model)
+            self.frame_cache = FrameCache()
+            self.current_frame = None
+            self.calls = []
+            model.add_change_listener(self.invalidate)
+
+        def invalidate(self, genre_id=None):
+            self.frame_cache.invalidate(genre_id)
+
+        def switchTo(self, frame_class, *args):
+            self.calls.append(("switchTo", frame_class, args))
+
+        def switch_after_load(self, frame_class, method_name, method_args, make_args=None):
+            self.calls.append(("switch_after_load", frame_class, method_name))
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.model = Model(os.path.join(self.tmp.name, "test.db"))
+        self.addCleanup(self.model.close)
+        self.model.add_genre("Test Genre")
+        self.model.add_word(1, "apple", "")
+        self.switcher = self.StubSwitcher(self.model)
+        self.addCleanup(self.switcher.async_model.close)
+        self.genre = (1, "Test Genre")
+        self.switcher.frame_cache.put((WordListFrame, 1, "Test Genre", None), 1, "word list frame")
+
+    def test_cached_frame_is_used(self):
+        # キャッシュに単語リスト画面があれば、読み込まずに切り替えることを確認するテスト
+        self.switcher.switch_to_word_list(self.genre)
+        self.assertEqual(self.switcher.calls, [("switchTo", WordListFrame, (self.genre, None, None))])
+
+    def test_pending_changes_are_flushed_first(self):
+        # 書き込み待ちの自信度を書き込むとキャッシュから捨てられるため、単語を読み込み直して切り替えることを確認するテスト
+        self.model.queue_word_confidence(1, True)
+        self.switcher.switch_to_word_list(self.genre)
+        self.assertEqual(self.switcher.calls, [("switch_after_load", WordListFrame, "get_word_summaries")])
+        self.assertEqual(self.model.pending_confidence, {})
+
+
+class TestFlushTimer(unittest.TestCase):
+    # 画面を作らずにFrameSwitcher.on_flush_timerを呼ぶための代わりのクラス
+    class StubSwitcher:
+        FLUSH_INTERVAL_MS = FrameSwitcher.FLUSH_INTERVAL_MS
+        on_flush_timer = FrameSwitcher.on_flush_timer
+
+        def __init__(self, model: Model):
+            self.model = model
+            self.async_model = AsyncModel(model)
+            self.parent = unittest.mock.Mock()
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.model = Model(os.path.join(self.tmp.name, "test.db"))
+        self.addCleanup(self.model.close)
+        self.model.add_genre("Test Genre")
+        self.model.add_word(1, "apple", "")
+        self.switcher = self.StubSwitcher(self.model)
+        self.addCleanup(self.switcher.async_model.close)
+
+    def test_failed_flush_is_rescheduled(self):
+        # 書き込みに失敗しても、ログに記録して更新を書き込み待ちに残し、次の書き込みを予約することを確認するテスト
+        self.model.queue_word_confidence(1, True)
+        with unittest.mock.patch.object(self.model, "next_change", side_effect=sqlite3.OperationalError("database is locked")), \
+                self.assertLogs("gui", level="ERROR") as logs:
+            self.switcher.on_flush_timer()
+        self.assertIn("database is locked", logs.output[0])
+        self.assertEqual(self.model.pending_confidence, {1: True})
+        self.switcher.parent.after.assert_called_once_with(FrameSwitcher.FLUSH_INTERVAL_MS, self.switcher.on_flush_timer)
+        # 次の書き込みで書き込まれる
+        self.switcher.on_flush_timer()
+        self.assertEqual(self.model.pending_confidence, {})
+
+
+class TestPurgeRetry(unittest.TestCase):
+    # 画面を作らずにFrameSwitcherの単語の削除の処理を呼ぶための代わりのクラス（依頼と予約した処理を記録する）
+    class StubSwitcher:
+        PURGE_CHUNKS_PER_STEP = FrameSwitcher.PURGE_CHUNKS_PER_STEP
+        PURGE_INTERVAL_MS = FrameSwitcher.PURGE_INTERVAL_MS
+        PURGE_RETRY_INTERVAL_MS = FrameSwitcher.PURGE_RETRY_INTERVAL_MS
+        PURGE_RETRY_LIMIT = FrameSwitcher.PURGE_RETRY_LIMIT
+        start_purge = FrameSwitcher.start_purge
+        submit_purge_step = FrameSwitcher.submit_purge_step
+        on_purge_step = FrameSwitcher.on_purge_step
+        on_purge_error = FrameSwitcher.on_purge_error
+
+        def __init__(self):
+            self.purging = False
+            self.purge_pending = False
+            self.purge_failures = 0
+            self.submitted = []
+            self.scheduled = []
+            self.parent = unittest.mock.Mock()
+            self.parent.after.side_effect = lambda delay, function: self.scheduled.append((delay, function))
+            self.async_model = unittest.mock.Mock()
+            self.async_model.submit.side_effect = lambda method_name, *args, **kwargs: self.submitted.append(method_name)
+
+    def setUp(self):
+        self.switcher = self.StubSwitcher()
+        self.switcher.start_purge()
+
+    # 予約された処理を実行し、その待ち時間を返す
+    def run_scheduled(self) -> int:
+        delay, function = self.switcher.scheduled.pop(0)
+        function()
+        return delay
+
+    def test_retry_after_error(self):
+        # 削除に失敗すると少し待ってからもう一度依頼し、成功すれば失敗の回数を戻すことを確認するテスト
+        with unittest.mock.patch("gui.messagebox.showerror") as showerror:
+            self.switcher.on_purge_error(sqlite3.OperationalError("database is locked"))
+            self.assertEqual(self.run_scheduled(), FrameSwitcher.PURGE_RETRY_INTERVAL_MS)
+            self.assertEqual(self.switcher.submitted, ['purge_deleted_genres'] * 2)
+            self.assertTrue(self.switcher.purging)
+            self.switcher.on_purge_step((0, True))
+        showerror.assert_not_called()
+        self.assertFalse(self.switcher.purging)
+        self.assertEqual(self.switcher.purge_failures, 0)
+
+    def test_error_shown_after_retry_limit(self):
+        # 続けて失敗した回数が上限を超えるとエラーを表示し、削除をやめることを確認するテスト
+        with unittest.mock.patch("gui.messagebox.showerror") as showerror:
+            for _ in range(FrameSwitcher.PURGE_RETRY_LIMIT):
+                self.switcher.on_purge_error(sqlite3.OperationalError("database is locked"))
+                self.run_scheduled()
+            self.switcher.on_purge_error(sqlite3.OperationalError("database is locked"))
+        showerror.assert_called_once()
+        self.assertEqual(self.switcher.scheduled, [])
+        self.assertEqual(len(self.switcher.submitted), FrameSwitcher.PURGE_RETRY_LIMIT + 1)
+        self.assertFalse(self.switcher.purging)
+        # 新たにジャンルが削除されると、もう一度削除を始める
+        self.switcher.start_purge()
+        self.assertTrue(self.switcher.purging)
+
+
+class TestChangeListener(unittest.TestCase):
+    def setUp(self):
+        self.db_name = "test.db"
+        self.model = Model(self.db_name)
+        self.model.add_genre("Test Genre")
+        self.model.add_genre("Other Genre")
+        self.model.add_word(2, "Test Word", "Test Details", False)
+        self.changes = []
+        self.model.add_change_listener(self.changes.append)
+
+    def tearDown(self):
+        self.model.connection.close()
+        os.remove(self.db_name)
+
+    def test_notifications(self):
+        # データを変更するとジャンルのIDが通知されることを確認するテスト
+        self.model.add_word(1, "Word", "Details")
+        self.model.edit_word(1, "Edited Word", "Edited Details")
+        self.model.queue_word_confidence(1, True)
+        self.model.flush_confidence()
+        self.model.delete_word(1)
+        self.model.edit_genre(1, "Edited Genre")
+        self.assertEqual(self.changes, [1, 2, 2, 2, None])
+
+    def test_worker_changes_forwarded(self):
+        # ワーカースレッドでの変更がメインスレッドのModelから通知されることを確認するテスト
+        async_model = AsyncModel(self.model)
+        self.addCleanup(async_model.close)
+        async_model.submit("add_word", 1, "Worker Word", "Worker Details").result(timeout=5)
+        self.assertEqual(self.changes, [])
+        async_model.poll()
+        self.assertEqual(self.changes, [1])
+
+
+class TestWordPages(unittest.TestCase):
+    def setUp(self):
+        self.db_name = "test.db"
+        self.model = Model(self.db_name)
+        self.model.add_genre("Test Genre")
+        self.model.add_genre("Other Genre")
+        self.model.bulk_import(1, ((f"Word {i % 7} ({i})", f"Details {i}", i % 3 == 0) for i in range(25)))
+        self.model.add_word(2, "Other Word", "Other Details")
+
+    def tearDown(self):
+        self.model.connection.close()
+        os.remove(self.db_name)
+
+    def test_pages_cover_genre(self):
+        # ページを順にたどると、ジャンルの全単語を重複なくid順に取得できることを確認するテスト
+        rows, after = self.model.get_words_page(1, limit=10)
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(after, (rows[-1][0],))
+        pages = list(self.model.iter_word_pages(1, page_size=10))
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual([w for page in pages for w in page], self.model.get_words(1))
+
+        # 件数がページサイズの倍数でも、最後に空のページを返さないことを確認
+        self.assertEqual([len(page) for page in self.model.iter_word_pages(1, page_size=5)], [5] * 5)
+
+    def test_adjacent_word(self):
+        # 前後の単語をid順に取得でき、端では反対側の端に戻ることを確認するテスト
+        ids = [w[0] for w in self.model.get_words(1)]
+        self.assertEqual(self.model.get_adjacent_word(1, ids[0], 1)[0], ids[1])
+        self.assertEqual(self.model.get_adjacent_word(1, ids[-1], 1)[0], ids[0])
+        self.assertEqual(self.model.get_adjacent_word(1, ids[0], -1)[0], ids[-1])
+        self.assertEqual(self.model.get_adjacent_word(1, ids[5], -1)[0], ids[4])
+        # 単語が1つしかないジャンルでは自分自身を返す
+        other_id = self.model.get_words(2)[0][0]
+        self.assertEqual(self.model.get_adjacent_word(2, other_id, 1)[0], other_id)
+
+    def test_adjacent_word_sorted_by_word(self):
+        # 単語名順・自信度での絞り込みで前後の単語を取得できることを確認するテスト
+        expected = sorted(self.model.get_word_summaries(1, False), key=lambda w: (w[1], w[0]))
+        for i, word in enumerate(expected):
+            following = self.model.get_adjacent_word(1, word[0], 1, "word", False)
+            previous = self.model.get_adjacent_word(1, word[0], -1, "word", False)
+            self.assertEqual(following, expected[(i + 1) % len(expected)])
+            self.assertEqual(previous, expected[i - 1])
+
+    def test_pages_sorted_by_word_with_filter(self):
+        # 単語名順（同名はid順）と自信度での絞り込みを確認するテスト
+        words = [w for page in self.model.iter_word_pages(1, page_size=4, sort='word', confidence=True) for w in page]
+        expected = sorted(self.model.sort_confidence(1), key=lambda w: (w[2], w[0]))
+        self.assertEqual(words, expected)
+
+    def test_word_summaries(self):
+        # 単語リスト用の(id, 単語名, 自信度)が単語の取得結果と一致することを確認するテスト
+        self.assertEqual(self.model.get_word_summaries(1), [(w[0], w[2], w[4]) for w in self.model.get_words(1)])
+        self.assertEqual(self.model.get_word_summaries(1, True), [(w[0], w[2], w[4]) for w in self.model.sort_confidence(1)])
+        self.assertEqual(self.model.get_word_summary(26), (26, "Other Word", False))
+        self.assertIsNone(self.model.get_word_summary(100))
+
+        # 書き込み待ちの自信度も反映される
+        self.model.queue_word_confidence(2, True)
+        self.assertEqual(self.model.get_word_summaries(1)[1], (2, "Word 1 (1)", True))
+        self.assertEqual(self.model.get_word_summary(2), (2, "Word 1 (1)", True))
+
+    def test_word_details_cache(self):
+        # 詳細がキャッシュから返され、編集・削除でキャッシュが捨てられることを確認するテスト
+        self.assertEqual(self.model.get_word_details(1), "Details 0")
+        self.assertEqual(self.model.get_word_details(1), "Details 0")
+        self.assertEqual(self.model.details_cache.stats()['hits'], 1)
+        self.model.edit_word(1, "Word 0", "New Details")
+        self.assertEqual(self.model.get_word_details(1), "New Details")
+        self.model.delete_word(1)
+        self.assertIsNone(self.model.get_word_details(1))
+
+        # 別の接続での変更を通知されるとキャッシュを捨てる
+        self.model.cache_word_details(2, "Stale Details")
+        self.assertEqual(self.model.get_word_details(2), "Stale Details")
+        self.model.notify_external_change(1)
+        self.assertEqual(self.model.get_word_details(2), "Details 1")
+
+        # 先読みを依頼した後に編集された場合、届いた古い詳細はキャッシュに追加しない
+        version = self.model.get_details_version()
+        stale = self.model.load_word_details(3)
+        self.model.edit_word(3, "Word 2", "Edited Details")
+        self.model.cache_word_details(3, stale, version)
+        self.assertEqual(self.model.get_word_details(3), "Edited Details")
+        # 依頼した後に捨てられていなければ追加する
+        version = self.model.get_details_version()
+        self.model.cache_word_details(4, "Prefetched Details", version)
+        self.assertEqual(self.model.get_word_details(4), "Prefetched Details")
+
+    def test_iter_words_and_export(self):
+        # 1つのカーソルで読み込んだ単語がページ単位の取得と一致し、書き出したファイルを読み込めることを確認するテスト
+        self.model.queue_word_confidence(2, True)
+        expected = [(w[2], w[3], w[4]) for w in self.model.get_words(1)]
+        self.assertEqual(list(self.model.iter_words(1, fetch_size=4)), expected)
+        self.assertEqual(len(list(self.model.iter_words())), 26)
+        self.assertEqual(self.model.pending_confidence, {})
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "words.jsonl")
+            self.assertEqual(self.model.export_word_file(path, 1), 25)
+            self.assertEqual(list(read_word_file(path)), expected)
+
+    def test_backup(self):
+        # 書き込み待ちの更新も含めてバックアップされ、進捗が最後のページまで通知されることを確認するテスト
+        self.model.queue_word_confidence(3, True)
+        progress = []
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "backup.db")
+            pages = self.model.backup(path, pages=1, progress=lambda copied, total: progress.append((copied, total)))
+            self.assertEqual(progress[-1], (pages, pages))
+            self.assertEqual(len(progress), pages)
+            backup = Model(path)
+            self.assertEqual(backup.get_words(1), self.model.get_words(1))
+            self.assertEqual(backup.search("Other")[0][2], "【Other】 Word")
+            backup.connection.close()
+
+
+class TestGenreStats(unittest.TestCase):
+    def setUp(self):
+        self.db_name = "test.db"
+        self.model = Model(self.db_name)
+        self.model.add_genre("Test Genre")
+        self.model.add_genre("Other Genre")
+        self.model.add_genre("Empty Genre")
+        self.model.bulk_import(1, ((f"Word {i}", f"Details {i}", i % 3 == 0) for i in range(10)))
+        self.model.add_word(2, "Other Word", "Other Details", True)
+
+    def tearDown(self):
+        self.model.connection.close()
+        os.remove(self.db_name)
+
+    # 単語テーブルを数え直した(id, 名前, 単語数, 自信がある単語の数)
+    def counted_stats(self):
+        return [(genre_id, name, len(self.model.get_words(genre_id)), len(self.model.sort_confidence(genre_id)))
+                for genre_id, name in self.model.get_genres()]
+
+    def test_counters_follow_changes(self):
+        # 追加・自信度の更新・削除のたびに、集計が単語テーブルを数え直した結果と一致することを確認するテスト
+        self.assertEqual(self.model.get_genres_with_stats(),
+                         [(1, "Test Genre", 10, 4), (2, "Other Genre", 1, 1), (3, "Empty Genre", 0, 0)])
+        self.model.queue_word_confidence(2, True)
+        self.model.queue_word_confidence(1, True)
+        self.assertEqual(self.model.get_genres_with_stats()[0], (1, "Test Genre", 10, 5))
+        self.model.update_word_confidence(1, False)
+        self.model.edit_word(2, "Edited Word", "Edited Details")
+        self.model.delete_word(4)
+        self.model.reset_confidence(2)
+        self.model.add_word(3, "New Word", "New Details")
+        self.assertEqual(self.model.get_genres_with_stats(), self.counted_stats())
+        self.model.delete_genre(1)
+        self.assertEqual(self.model.get_genres_with_stats(), self.counted_stats())
+        self.assertEqual(self.model.check_genre_stats(), [])
+
+    def test_check_and_rebuild(self):
+        # 集計が食い違った場合に検出し、作り直せることを確認するテスト
+        self.model.connection.execute("UPDATE genre_stats SET words = 99 WHERE genre_id = 1")
+        self.model.connection.execute("DELETE FROM genre_stats WHERE genre_id = 2")
+        self.model.connection.commit()
+        expected = [(1, (99, 4), (10, 4)), (2, (0, 0), (1, 1))]
+        self.assertEqual(self.model.check_genre_stats(), expected)
+        self.assertEqual(self.model.check_genre_stats(rebuild=True), expected)
+        self.assertEqual(self.model.check_genre_stats(), [])
+        self.assertEqual(self.model.get_genres_with_stats(), self.counted_stats())
+
+
+class TestGenreDeletion(unittest.TestCase):
+    def setUp(self):
+        self.db_name = "test.db"
+        self.model = Model(self.db_name)
+        self.model.add_genre("Deleted Genre")
+        self.model.add_genre("Kept Genre")
+        self.model.bulk_import(1, ((f"Word {i}", f"Details {i}", i % 2 == 0) for i in range(25)))
+        self.model.add_word(2, "Kept Word", "Kept Details")
+
+    def tearDown(self):
+        self.model.connection.close()
+        os.remove(self.db_name)
+
+    # ジャンルに残っている単語の数（削除済みのジャンルも含む）
+    def count_words(self, genre_id):
+        return self.model.connection.execute("SELECT count(*) FROM words WHERE genre_id = ?", (genre_id,)).fetchone()[0]
+
+    def test_deleted_genre_is_hidden(self):
+        # 削除したジャンルは単語が残っていても一覧・検索・書き出しに現れないことを確認するテスト
+        self.model.delete_genre(1)
+        self.assertEqual(self.model.get_genres(), [(2, "Kept Genre")])
+        self.assertIsNone(self.model.get_genre(1))
+        self.assertEqual(self.model.get_genres_with_stats(), [(2, "Kept Genre", 1, 0)])
+        self.assertEqual([r[0] for r in self.model.search("Word")], [26])
+        self.assertEqual([r[0] for r in self.model.search("Wo")], [26])
+        self.assertEqual(list(self.model.iter_words()), [("Kept Word", "Kept Details", 0)])
+        self.assertEqual(self.count_words(1), 25)
+
+    def test_purge_in_chunks_and_resume(self):
+        # 単語が少しずつ削除され、途中で止めても別の接続（再起動後）から続きを削除できることを確認するテスト
+        self.model.delete_genre(1)
+        progress = []
+        self.assertEqual(self.model.purge_deleted_genres(chunk_size=10, max_chunks=2, progress=progress.append),
+                         (20, False))
+        self.assertEqual(progress, [10, 20])
+        self.assertEqual(self.count_words(1), 5)
+
+        restarted = Model(self.db_name)
+        self.addCleanup(restarted.connection.close)
+        self.assertEqual(restarted.purge_deleted_genres(chunk_size=10), (5, True))
+        self.assertEqual(restarted.purge_deleted_genres(chunk_size=10), (0, True))
+        self.assertEqual(self.count_words(1), 0)
+        self.assertEqual(self.model.connection.execute("SELECT id FROM genres").fetchall(), [(2,)])
+        self.assertEqual(self.model.check_genre_stats(), [])
+        self.assertEqual(self.model.connection.execute("SELECT count(*) FROM words_fts").fetchone()[0], 1)
+
+    def test_foreign_keys(self):
+        # ジャンルの行を削除すると単語も削除され、存在しないジャンルには単語を追加できないことを確認するテスト
+        self.model.connection.execute("DELETE FROM genres WHERE id = 2")
+        self.model.connection.commit()
+        self.assertEqual(self.count_words(2), 0)
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.model.add_word(3, "Orphan Word", "Orphan Details")
+
+
+class TestDuplicateWords(unittest.TestCase):
+    def setUp(self):
+        self.db_name = "test.db"
+        self.model = Model(self.db_name)
+        self.model.add_genre("Test Genre")
+        self.model.add_genre("Other Genre")
+        self.model.add_word(1, "Apple", "a round fruit", True)
+
+    def tearDown(self):
+        self.model.connection.close()
+        os.remove(self.db_name)
+
+    def test_normalize_word(self):
+        # 全角・半角、大文字・小文字、空白の違いを同じ単語とみなすことを確認するテスト
+        self.assertEqual(normalize_word("Ａｐｐｌｅ　Pie"), "apple pie")
+        self.assertEqual(normalize_word("  apple\tPIE "), "apple pie")
+        self.assertEqual(normalize_word("ｶﾀｶﾅ"), normalize_word("カタカナ"))
+        self.assertEqual(normalize_word("Straße"), normalize_word("STRASSE"))
+        self.assertIsNone(normalize_word(None))
+
+    def test_add_word_duplicate(self):
+        # 同じジャンルの重複はエラーになり、指定した方法で既にある単語に反映されることを確認するテスト
+        with self.assertRaises(DuplicateWordError) as raised:
+            self.model.add_word(1, "ａｐｐｌｅ", "a company")
+        self.assertEqual(raised.exception.word_id, 1)
+        self.assertEqual(self.model.find_duplicate(1, " APPLE "), (1, "Apple", 1))
+        self.assertIsNone(self.model.find_duplicate(2, "Apple"))
+        # 別のジャンルには同じ単語を追加できる
+        self.assertEqual(self.model.add_word(2, "Apple", "a company"), 2)
+
+        self.assertEqual(self.model.add_word(1, "apple", "ignored", on_duplicate="skip"), 1)
+        self.assertEqual(self.model.get_word_details(1), "a round fruit")
+        self.assertEqual(self.model.add_word(1, "apple", "a company", on_duplicate="merge"), 1)
+        self.assertEqual(self.model.get_word_details(1), "a round fruit\na company")
+        self.model.add_word(1, "APPLE", "a company", on_duplicate="merge")
+        self.assertEqual(self.model.get_word_details(1), "a round fruit\na company")
+        self.model.add_word(1, "apple", "a fruit", False, on_duplicate="overwrite")
+        self.assertEqual(self.model.get_word(1)[2:5], ("apple", "a fruit", 0))
+        self.assertEqual(self.model.get_genres_with_stats(), [(1, "Test Genre", 1, 0), (2, "Other Genre", 1, 0)])
+        self.assertEqual([r[0] for r in self.model.search("fruit", 1)], [1])
+
+    def test_bulk_import_duplicates(self):
+        # まとめて追加する単語の中の重複と、既にある単語との重複を指定した方法で扱うことを確認するテスト
+        rows = [("Apple", "a company", False), ("Banana", "yellow", False), ("banana", "long", True)]
+        self.assertEqual(self.model.bulk_import(1, rows), 3)
+        self.assertEqual([(w[2], w[3]) for w in self.model.get_words(1)], [("Apple", "a round fruit"), ("Banana", "yellow")])
+        self.model.bulk_import(1, rows, on_duplicate="merge")
+        self.assertEqual([(w[2], w[3]) for w in self.model.get_words(1)],
+                         [("Apple", "a round fruit\na company"), ("Banana", "yellow\nlong")])
+        self.model.bulk_import(1, rows, on_duplicate="overwrite")
+        self.assertEqual([(w[2], w[3], w[4]) for w in self.model.get_words(1)], [("Apple", "a company", 0), ("banana", "long", 1)])
+        with self.assertRaises(ValueError):
+            self.model.bulk_import(1, rows, on_duplicate="append")
+
+    def test_edit_word_duplicate(self):
+        # 編集で同じジャンルの別の単語と重複する場合はエラーになり、自分自身の表記の変更はできることを確認するテスト
+        self.model.add_word(1, "Banana", "yellow")
+        with self.assertRaises(DuplicateWordError):
+            self.model.edit_word(2, "APPLE", "yellow")
+        self.model.edit_word(1, "APPLE", "a round fruit")
+        self.assertEqual(self.model.find_duplicate(1, "apple")[1], "APPLE")
+
+    def test_dedupe_words(self):
+        # キーのない古い重複（スキーマバージョン9より前のデータ）を1つにまとめられることを確認するテスト
+        self.model.connection.executemany(
+            "INSERT INTO words (genre_id, word, details, confidence) VALUES (?, ?, ?, ?)",
+            [(1, "apple", "a company", 0), (1, "Banana", "yellow", 0), (1, "BANANA", "long", 1), (2, "banana", "", 0)])
+        self.model.connection.commit()
+        self.assertEqual(self.model.dedupe_words("merge"), 2)
+        self.assertEqual([(w[2], w[3], w[9]) for w in self.model.get_words(1)],
+                         [("Apple", "a round fruit\na company", "apple"), ("Banana", "yellow\nlong", "banana")])
+        self.assertEqual(self.model.find_duplicate(2, "Banana")[0], 5)
+        self.assertEqual(self.model.dedupe_words(), 0)
+        self.assertEqual(self.model.check_genre_stats(), [])
+
+        self.model.connection.execute("INSERT INTO words (genre_id, word, details, confidence) VALUES (1, 'APPLE', 'new', 1)")
+        self.model.connection.commit()
+        self.assertEqual(self.model.dedupe_words("overwrite"), 1)
+        self.assertEqual(self.model.get_word(1)[2:5], ("APPLE", "new", 1))
+
+
+class TestFuzzyLookup(unittest.TestCase):
+    def setUp(self):
+        self.db_name = "test.db"
+        self.model = Model(self.db_name)
+        self.model.add_genre("English")
+        self.model.add_genre("Other")
+        self.model.bulk_import(1, [("apple", "", False), ("apply", "", False), ("banana", "", False),
+                                   ("pineapple", "", False), ("Application", "", False)])
+        self.model.add_word(2, "apples", "")
+
+    def tearDown(self):
+        self.model.connection.close()
+        os.remove(self.db_name)
+
+    # 転置インデックスの内容が、単語テーブルの正規化した単語名から作り直したものと一致することを確認
+    def assert_index_consistent(self):
+        stored = set(self.model.connection.execute("SELECT trigram, genre_id, word_id FROM word_trigrams"))
+        expected = {(trigram, genre_id, word_id)
+                    for word_id, genre_id, norm_key in self.model.connection.execute(
+                        "SELECT id, genre_id, norm_key FROM words WHERE norm_key IS NOT NULL")
+                    for trigram in make_trigrams(norm_key)}
+        self.assertEqual(stored, expected)
+
+    def test_edit_distance(self):
+        # 編集距離と、上限を超えた場合の打ち切りを確認するテスト
+        self.assertEqual(edit_distance("apple", "aple"), 1)
+        self.assertEqual(edit_distance("kitten", "sitting"), 3)
+        self.assertEqual(edit_distance("", "abc"), 3)
+        self.assertEqual(edit_distance("kitten", "sitting", 1), 2)
+        self.assertEqual(make_trigrams("ab"), {" ab", "ab "})
+
+    def test_lookup_typos(self):
+        # つづりを間違えた単語名から、編集距離の近い順に単語を取得できることを確認するテスト
+        self.assertEqual(self.model.fuzzy_lookup("aple", 1), [(1, 1, "apple", 1), (2, 1, "apply", 2)])
+        self.assertEqual(self.model.fuzzy_lookup("ＡＰＰＬＥ", 1, k=1), [(1, 1, "apple", 0)])
+        self.assertEqual([r[2] for r in self.model.fuzzy_lookup("banan", 1)], ["banana"])
+        self.assertEqual([r[2] for r in self.model.fuzzy_lookup("aplication", 1)], ["Application"])
+        self.assertEqual([r[2] for r in self.model.fuzzy_lookup("apple", max_distance=1)], ["apple", "apples", "apply"])
+        self.assertEqual(self.model.fuzzy_lookup("xyz"), [])
+        self.assertEqual(self.model.fuzzy_lookup(" "), [])
+
+    def test_index_follows_changes(self):
+        # 単語の追加・編集・削除・重複の整理・ジャンルの削除で転置インデックスが更新されることを確認するテスト
+        self.assert_index_consistent()
+        self.model.edit_word(3, "bandana", "")
+        self.assertEqual([r[2] for r in self.model.fuzzy_lookup("bandanna", 1)], ["bandana"])
+        self.model.delete_word(1)
+        self.model.add_word(1, "APPLE", "a fruit", on_duplicate="merge")
+        self.model.bulk_import(1, [("apply", "again", False)], on_duplicate="overwrite")
+        self.model.connection.execute("INSERT INTO words (genre_id, word, details, confidence) VALUES (1, 'Banana', '', 0)")
+        self.model.connection.commit()
+        self.model.dedupe_words()
+        self.assert_index_consistent()
+
+        self.model.delete_genre(2)
+        self.assertEqual([r[2] for r in self.model.fuzzy_lookup("apples")], ["APPLE", "apply"])
+        self.model.purge_deleted_genres()
+        self.assert_index_consistent()
+
+
+class TestSync(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.a = Model(os.path.join(self.tmp.name, "a.db"))
+        self.b = Model(os.path.join(self.tmp.name, "b.db"))
+        self.addCleanup(self.b.close)
+        self.addCleanup(self.a.close)
+        self.a.add_genre("English")
+        self.a.bulk_import(1, [(f"word{i}", f"details {i}", False) for i in range(1, 51)])
+        self.assertEqual(self.a.sync_with(self.b), (51, 0))
+
+    # ジャンル名と単語の内容（同期用のIDを含む）をまとめて取得
+    def contents(self, model: Model) -> list:
+        return model.connection.execute('''
+            SELECT genres.name, genres.deleted, words.uid, word, details, confidence, due FROM words
+            JOIN genres ON genres.id = words.genre_id ORDER BY words.uid
+        ''').fetchall()
+
+    def test_only_changes_are_sent(self):
+        # 両方で変更した行だけがやり取りされ、同じ内容になることを確認するテスト
+        self.assertEqual(self.contents(self.a), self.contents(self.b))
+        self.assertEqual(len(self.contents(self.b)), 50)
+        self.a.edit_word(1, "word1", "new details " * 50)
+        self.a.queue_word_confidence(2, True)
+        b_genre = self.b.get_genres()[0][0]
+        self.b.add_word(b_genre, "extra", "added on b")
+        self.b.add_genre("Math")
+        self.assertEqual(self.a.sync_with(self.b), (2, 2))
+        self.assertEqual(self.contents(self.a), self.contents(self.b))
+        self.assertEqual(self.b.get_word_details(1), "new details " * 50)
+        self.assertEqual([genre[1] for genre in self.a.get_genres_with_stats()], ["English", "Math"])
+        self.assertEqual(self.a.get_genres_with_stats()[0][2:], (51, 1))
+        # 反映した行は送り返されない
+        self.assertEqual(self.a.sync_with(self.b), (0, 0))
+        self.assertEqual(self.b.sync_with(self.a), (0, 0))
+
+    def test_conflict_resolution(self):
+        # 両方で同じ単語を変更した場合は、どちら向きに同期しても変更日時が新しい方が残ることを確認するテスト
+        self.a.edit_word(1, "word1", "edited on a")
+        self.b.edit_word(1, "word1", "edited on b")
+        self.b.cursor.execute("UPDATE words SET updated_at = updated_at + 1000 WHERE id = 1")
+        self.b.connection.commit()
+        self.b.sync_with(self.a)
+        self.assertEqual(self.a.get_word_details(1), "edited on b")
+        self.assertEqual(self.contents(self.a), self.contents(self.b))
+        # 同じ単語名を両方で追加した場合は、1つにまとまる
+        self.a.add_word(1, "Apple", "from a")
+        self.b.add_word(1, "apple", "from b")
+        self.a.sync_with(self.b)
+        self.a.sync_with(self.b)
+        self.assertEqual(self.contents(self.a), self.contents(self.b))
+        self.assertEqual(len(self.contents(self.a)), 51)
+
+    def test_deletes(self):
+        # 単語とジャンルの削除が伝わり、削除より後に変更された単語は残ることを確認するテスト
+        self.a.delete_word(3)
+        self.a.delete_word(4)
+        self.b.edit_word(4, "word4", "edited after the delete")
+        self.b.cursor.execute("UPDATE words SET updated_at = updated_at + 1000 WHERE id = 4")
+        self.b.connection.commit()
+        self.a.sync_with(self.b)
+        self.assertIsNone(self.b.get_word(3))
+        self.assertEqual(self.a.get_word_details(self.a.find_duplicate(1, "word4")[0]), "edited after the delete")
+        self.assertEqual(self.contents(self.a), self.contents(self.b))
+        self.b.delete_genre(1)
+        self.b.purge_deleted_genres()
+        self.b.add_genre("Math")
+        self.assertEqual(self.b.sync_with(self.a), (2, 0))
+        self.assertEqual(self.a.get_genres(), [(2, "Math")])
+        self.a.purge_deleted_genres()
+        self.assertEqual(self.contents(self.a), [])
+        self.assertEqual(self.a.sync_with(self.b), (0, 0))
+
+    def test_copied_database(self):
+        # データベースファイルをコピーした場合も、別のデータベースとして同期できることを確認するテスト
+        path = os.path.join(self.tmp.name, "copy.db")
+        self.a.backup(path)
+        copy = Model(path)
+        self.addCleanup(copy.close)
+        copy.edit_word(5, "word5", "edited on the copy")
+        self.a.sync_with(copy)
+        self.assertNotEqual(self.a.get_sync_state()[0], copy.get_sync_state()[0])
+        self.assertEqual(self.a.get_word_details(5), "edited on the copy")
+        self.assertEqual(self.contents(self.a), self.contents(copy))
+
+    def test_legacy_databases(self):
+        # 同期を導入する前に別々に作ったデータベースで、同じIDの別のジャンルにある同じIDと単語名の単語が、別の単語として同期されることを確認するテスト
+        models = []
+        for name, genre in (("english.db", "English"), ("french.db", "French")):
+            db_name = os.path.join(self.tmp.name, name)
+            connection = sqlite3.connect(db_name)
+            connection.execute('''CREATE TABLE genres (id INTEGER PRIMARY KEY, name TEXT)''')
+            connection.execute('''CREATE TABLE words (id INTEGER PRIMARY KEY, genre_id INTEGER, word TEXT, details TEXT,
+                                  confidence BOOLEAN, FOREIGN KEY(genre_id) REFERENCES genres(id))''')
+            connection.execute('''INSERT INTO genres (name) VALUES (?)''', (genre,))
+            connection.execute('''INSERT INTO words (genre_id, word, details, confidence) VALUES (1, 'table', ?, 0)''', (genre,))
+            connection.commit()
+            connection.close()
+            models.append(Model(db_name))
+            self.addCleanup(models[-1].close)
+        english, french = models
+        self.assertEqual(english.sync_with(french), (2, 2))
+        self.assertEqual(sorted((row[0], row[4]) for row in self.contents(english)),
+                         [("English", "English"), ("French", "French")])
+        self.assertEqual(self.contents(english), self.contents(french))
+
+
+class TestDetailsCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        # 合計文字数が上限を超えると、最も長く使われていない詳細から捨てることを確認するテスト
+        cache = DetailsCache(max_chars=10)
+        cache.put(1, "aaaa")
+        cache.put(2, "bbbb")
+        self.assertEqual(cache.get(1), "aaaa")
+        cache.put(3, "cccc")
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(1), "aaaa")
+        self.assertEqual(cache.stats()['chars'], 8)
+
+        # 上限より大きい詳細は保持しない
+        cache.put(4, "d" * 11)
+        self.assertIsNone(cache.get(4))
+        self.assertEqual(len(cache.entries), 2)
+
+
+class TestDetailsCompression(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db_name = os.path.join(self.tmp.name, "test.db")
+        self.model = Model(self.db_name)
+        self.addCleanup(self.model.close)
+        self.model.add_genre("Dictionary")
+
+    # 辞書の見出し語のような、決まった書式の長い詳細
+    def make_details(self, i: int) -> str:
+        return (f"【品詞】名詞。【意味】見出し語{i}の意味の説明です。"
+                f"【例文】This is an example sentence for word {i}, used in a typical context.\n"
+                "【解説】この語は日常会話でもよく使われ、書き言葉でも頻繁に現れます。" * 3)
+
+    # 単語テーブルに保存されている詳細の型（圧縮したものは'blob'）
+    def stored_type(self, word_id: int) -> str:
+        return self.model.connection.execute("SELECT typeof(details) FROM words WHERE id = ?", (word_id,)).fetchone()[0]
+
+    def test_pack_round_trip(self):
+        # 辞書の有無にかかわらず、圧縮した詳細を元に戻せることを確認するテスト
+        details = self.make_details(1)
+        self.assertEqual(unpack_details(pack_details(details)), details)
+        self.assertEqual(unpack_details(pack_details(details, 3, b"dictionary"), b"dictionary"), details)
+
+    def test_long_details_are_compressed_transparently(self):
+        # 長い詳細だけが圧縮して保存され、すべての読み込み方で元の文字列が返ることを確認するテスト
+        long_details = self.make_details(1)
+        long_id = self.model.add_word(1, "apple", long_details)
+        short_id = self.model.add_word(1, "banana", "a yellow fruit")
+        self.assertEqual(self.stored_type(long_id), "blob")
+        self.assertEqual(self.stored_type(short_id), "text")
+        self.assertEqual(self.model.get_word(long_id)[3], long_details)
+        self.assertEqual(self.model.load_word_details(long_id), long_details)
+        self.assertEqual([w[3] for w in self.model.get_words(1)], [long_details, "a yellow fruit"])
+        self.assertEqual(self.model.get_words_page(1)[0][0][3], long_details)
+        self.assertEqual(list(self.model.iter_words(1))[0], ("apple", long_details, 0))
+
+        # 全文検索（trigram）と部分一致の検索は元の文字列で一致し、抜粋も元の文字列から作られる
+        results = self.model.search("example")
+        self.assertEqual([r[0] for r in results], [long_id])
+        self.assertIn("【example】", results[0][3])
+        self.assertEqual([r[0] for r in self.model.search("例文")], [long_id])
+
+        # 編集すると新しい詳細で検索でき、古い詳細では見つからなくなる
+        self.model.edit_word(long_id, "apple", long_details.replace("example", "sample") + "（改訂）")
+        self.assertEqual(self.stored_type(long_id), "blob")
+        self.assertEqual(self.model.search("example"), [])
+        self.assertEqual([r[0] for r in self.model.search("改訂")], [long_id])
+        self.model.delete_word(long_id)
+        self.assertEqual(self.model.search("sample"), [])
+
+    def test_merge_duplicates(self):
+        # 圧縮した詳細に重複した単語の詳細を追記できることを確認するテスト
+        self.model.add_word(1, "apple", self.make_details(1))
+        self.model.bulk_import(1, [("Apple", "追加の説明", False), ("APPLE", "追加の説明", False)], on_duplicate='merge')
+        self.assertEqual(self.model.get_word_details(1), self.make_details(1) + "\n追加の説明")
+
+    def test_trained_dictionary(self):
+        # 学習した辞書でジャンルの詳細が圧縮し直され、小さくなり、別の接続からも読めることを確認するテスト
+        self.model.bulk_import(1, ((f"word{i}", self.make_details(i), False) for i in range(200)))
+        size = "SELECT sum(length(details)) FROM words"
+        before = self.model.connection.execute(size).fetchone()[0]
+        dictionary_id = self.model.train_details_dictionary(1)
+        self.assertIsNotNone(dictionary_id)
+        self.assertLess(self.model.connection.execute(size).fetchone()[0], before * 0.9)
+        word_id = self.model.add_word(1, "new word", self.make_details(1000))
+        other = Model(self.db_name)
+        self.addCleanup(other.close)
+        self.assertEqual(other.get_word_details(5), self.make_details(4))
+        self.assertEqual(other.get_word_details(word_id), self.make_details(1000))
+        self.assertEqual([r[0] for r in other.search("見出し語1000")], [word_id])
+
+        # 圧縮しない設定で圧縮し直すと、すべて文字列に戻る
+        self.model.compress_threshold = None
+        self.assertEqual(self.model.recompress_details(1), 201)
+        self.assertEqual(self.stored_type(5), "text")
+        self.assertEqual(self.model.get_word_details(5), self.make_details(4))
+
+        # ジャンルを削除すると辞書も削除される
+        self.model.delete_genre(1)
+        self.model.purge_deleted_genres()
+        self.assertEqual(self.model.connection.execute("SELECT count(*) FROM details_dictionaries").fetchone()[0], 0)
+
+    def test_migration_compresses_existing_details(self):
+        # 圧縮を導入する前のデータベースの長い詳細が、マイグレーションで圧縮され、検索もできることを確認するテスト
+        db_name = os.path.join(self.tmp.name, "old.db")
+        connection = sqlite3.connect(db_name)
+        connection.execute('''CREATE TABLE genres (id INTEGER PRIMARY KEY, name TEXT)''')
+        connection.execute('''CREATE TABLE words (id INTEGER PRIMARY KEY, genre_id INTEGER, word TEXT, details TEXT,
+                              confidence BOOLEAN, FOREIGN KEY(genre_id) REFERENCES genres(id))''')
+        connection.execute('''INSERT INTO genres (name) VALUES ('Old Genre')''')
+        connection.execute('''INSERT INTO words (genre_id, word, details, confidence) VALUES (1, 'Old Word', ?, 0)''',
+                           (self.make_details(1),))
+        connection.commit()
+        connection.close()
+
+        model = Model(db_name)
+        self.addCleanup(model.close)
+        self.assertEqual(model.connection.execute("SELECT typeof(details) FROM words").fetchone()[0], "blob")
+        self.assertEqual(model.get_word_details(1), self.make_details(1))
+        self.assertEqual([r[0] for r in model.search("example sentence")], [1])
+        model.edit_word(1, "Old Word", "short")
+        self.assertEqual(model.search("example sentence"), [])
+
+
+class TestReviewSchedule(unittest.TestCase):
+    def setUp(self):
+        self.db_name = "test.db"
+        self.model = Model(self.db_name)
+        self.model.add_genre("Test Genre")
+        self.model.add_genre("Other Genre")
+        self.model.bulk_import(1, ((f"Word {i}", f"Details {i}", False) for i in range(5)))
+        self.model.add_word(2, "Other Word", "Other Details")
+
+    def tearDown(self):
+        self.model.connection.close()
+        os.remove(self.db_name)
+
+    def test_schedule_review(self):
+        # 正解が続くと間隔が1日、6日、その後は易しさ倍に伸び、不正解で最初に戻ることを確認するテスト
+        state = (0, 2.5, 0)
+        intervals = []
+        for _ in range(3):
+            interval, ease, repetitions, due = schedule_review(*state, 4, 0)
+            intervals.append(interval)
+            state = (interval, ease, repetitions)
+        self.assertEqual(intervals, [1, 6, 15])
+        self.assertEqual(due, 15 * SECONDS_PER_DAY)
+        self.assertEqual(schedule_review(*state, 1, 0)[:3:2], (1, 0))
+        # 不正解では易しさは変わらず、正解の評価が低いと下がる（下限より小さくはならない）
+        self.assertEqual(schedule_review(*state, 0, 0)[1], state[1])
+        self.assertAlmostEqual(schedule_review(6, 2.5, 2, 3, 0)[1], 2.36)
+        self.assertEqual(schedule_review(1, 1.3, 1, 3, 0)[1], 1.3)
+        with self.assertRaises(ValueError):
+            schedule_review(1, 2.5, 1, 6, 0)
+
+    def test_due_queue(self):
+        # 復習日時が来た単語だけが古い順に取得され、評価後は次回の復習日時まで出題されないことを確認するテスト
+        now = 1000 * SECONDS_PER_DAY
+        cards = self.model.get_due_words(1, limit=3, now=now)
+        self.assertEqual([c[0] for c in cards], [1, 2, 3])
+        self.assertEqual(cards[0][1:], ("Word 0", False, 0, 2.5, 0))
+
+        self.model.queue_review(cards[0], 4, now)
+        self.model.queue_review(cards[1], 1, now - 10)
+        # 書き込み前でも取得時には反映される
+        self.assertEqual([c[0] for c in self.model.get_due_words(1, now=now)], [3, 4, 5])
+        self.assertEqual(self.model.pending_reviews, {})
+        # 1日後には両方とも復習対象に戻り、先に期限が来た単語が先に並ぶ
+        self.assertEqual([c[0] for c in self.model.get_due_words(1, now=now + SECONDS_PER_DAY)], [3, 4, 5, 2, 1])
+        self.assertEqual(self.model.get_due_words(1, now=now + SECONDS_PER_DAY)[-1][3:], (1, 2.5, 1))
+
+    def test_reviews_are_batched(self):
+        # 評価がpending_limit件たまるまでデータベースに書き込まれないことを確認するテスト
+        self.model.pending_limit = 3
+        cards = self.model.get_due_words(1, now=0)
+        statements = []
+        self.model.connection.set_trace_callback(statements.append)
+        for card in cards[:2]:
+            self.model.queue_review(card, 4, 0)
+        self.assertFalse([s for s in statements if s.startswith("UPDATE")])
+        self.model.queue_review(cards[2], 4, 0)
+        self.model.connection.set_trace_callback(None)
+        self.assertEqual(self.model.pending_reviews, {})
+        self.assertEqual([c[0] for c in self.model.get_due_words(1, now=0)], [4, 5])
+
+
+class TestAttempts(unittest.TestCase):
+    def setUp(self):
+        self.db_name = "test.db"
+        self.model = Model(self.db_name)
+        self.model.add_genre("Test Genre")
+        self.model.add_genre("Other Genre")
+        self.model.bulk_import(1, ((f"Word {i}", f"Details {i}", False) for i in range(5)))
+        self.model.add_word(2, "Other Word", "Other Details")
+        self.now = 1000 * SECONDS_PER_DAY
+
+    def tearDown(self):
+        self.model.connection.close()
+        os.remove(self.db_name)
+
+    # 単語IDと評価の組を、days日後の解答として書き込み待ちに追加
+    def answer(self, grades: list, days: float = 0):
+        for word_id, grade in grades:
+            card = self.model.connection.execute(
+                "SELECT id, word, confidence, review_interval, ease, repetitions FROM words WHERE id = ?", (word_id,)).fetchone()
+            self.model.queue_review(card, grade, self.now + days * SECONDS_PER_DAY)
+
+    # 単語のuid
+    def uid(self, word_id: int) -> bytes:
+        return self.model.connection.execute("SELECT uid FROM words WHERE id = ?", (word_id,)).fetchone()[0]
+
+    # ジャンルのuid
+    def genre_uid(self, genre_id: int) -> bytes:
+        return self.model.connection.execute("SELECT uid FROM genres WHERE id = ?", (genre_id,)).fetchone()[0]
+
+    def test_attempts_are_appended(self):
+        # 解答がまとめて追記され、前回の解答からの経過が記録されること、記録を変更・削除できないことを確認するテスト
+        self.model.pending_limit = 3
+        self.answer([(1, 4), (2, 1)])
+        self.assertEqual(self.model.connection.execute("SELECT count(*) FROM attempts").fetchone()[0], 0)
+        # 同じ単語を続けて解答しても、それぞれの解答が残る
+        self.answer([(1, 1)], days=3)
+        self.assertEqual(self.model.pending_attempts, [])
+        rows = self.model.connection.execute(
+            "SELECT word_uid, genre_uid, day, grade, correct, elapsed, bucket FROM attempts ORDER BY id").fetchall()
+        day = local_day(self.now)
+        genre = self.genre_uid(1)
+        self.assertEqual(rows, [(self.uid(1), genre, day, 4, 1, None, None), (self.uid(2), genre, day, 1, 0, None, None),
+                                (self.uid(1), genre, local_day(self.now + 3 * SECONDS_PER_DAY), 1, 0, 3 * SECONDS_PER_DAY, 2)])
+        # 次の書き込みでは、データベースの最後の解答からの経過になる
+        self.answer([(1, 4)], days=10)
+        self.model.flush_pending()
+        self.assertEqual(self.model.connection.execute("SELECT elapsed FROM attempts WHERE id = 4").fetchone(),
+                         (7 * SECONDS_PER_DAY,))
+        # 削除された単語の解答は記録しない
+        self.model.pending_attempts.append((99, 4, self.now))
+        self.model.flush_pending()
+        self.assertEqual(self.model.connection.execute("SELECT count(*) FROM attempts").fetchone()[0], 4)
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.model.connection.execute("UPDATE attempts SET grade = 5")
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.model.connection.execute("DELETE FROM attempts")
+        self.assertEqual([retention_bucket(d * SECONDS_PER_DAY) for d in (0.5, 1, 6.9, 365, 1000)], [0, 1, 3, 9, 9])
+
+    def test_deleted_word_id_is_reused(self):
+        # 削除した単語のIDを使い回した単語は、削除した単語の解答を引き継がないことを確認するテスト
+        self.answer([(6, 1)])
+        self.model.delete_word(6)
+        self.assertEqual(self.model.add_word(2, "banana", ""), 6)
+        self.assertEqual(self.model.get_word_accuracy(2), [])
+        self.answer([(6, 4)], days=3)
+        self.assertEqual(self.model.get_word_accuracy(2), [(6, "banana", 1, 1)])
+        rows = self.model.connection.execute("SELECT elapsed, bucket FROM attempts ORDER BY id").fetchall()
+        self.assertEqual(rows, [(None, None), (None, None)])
+        self.assertEqual(self.model.get_daily_activity(2)[-1][1:], (1, 1, 1))
+        self.assertEqual(self.model.get_retention_curve(2), [])
+        # 書き込み待ちの解答は削除する前に記録され、後から追加した単語の解答にならない
+        self.answer([(6, 1)], days=4)
+        self.model.delete_word(6)
+        self.assertEqual(self.model.add_word(2, "cherry", ""), 6)
+        self.assertEqual(self.model.get_word_accuracy(2), [])
+        self.assertEqual(self.model.connection.execute("SELECT count(*) FROM attempts").fetchone()[0], 3)
+        self.assertEqual(analytics.check_attempt_stats(self.model), [])
+
+    def test_deleted_genre_id_is_reused(self):
+        # 削除したジャンルのIDを使い回したジャンルは、削除したジャンルの解答を引き継がないことを確認するテスト
+        self.answer([(6, 4)])
+        self.answer([(6, 1)], days=3)
+        self.model.delete_genre(2)
+        self.model.purge_deleted_genres()
+        self.model.add_genre("B")
+        self.assertEqual(self.model.get_genres(), [(1, "Test Genre"), (2, "B")])
+        self.assertEqual(self.model.get_daily_activity(2), [])
+        self.assertEqual(self.model.get_retention_curve(2), [])
+        self.assertEqual(self.model.get_word_accuracy(2), [])
+        self.assertEqual(analytics.daily_activity(analytics.load_attempt_columns(self.model, 2)), [])
+        # 新しいジャンルの解答だけが数えられる
+        self.model.add_word(2, "New Word", "")
+        self.answer([(6, 4)], days=5)
+        self.assertEqual(self.model.get_daily_activity(2), [(local_day(self.now + 5 * SECONDS_PER_DAY), 1, 1, 1)])
+        # 削除したジャンルの解答も、すべてのジャンルの数には残る
+        self.assertEqual(sum(row[1] for row in self.model.get_daily_activity()), 3)
+        self.assertEqual(analytics.check_attempt_stats(self.model), [])
+
+    def test_rollups(self):
+        # 日ごと、経過ごと、単語ごとの集計がトリガーで更新されることを確認するテスト
+        self.answer([(1, 4), (2, 1), (3, 4), (6, 4)])
+        self.answer([(1, 4), (2, 4)], days=1)
+        self.answer([(1, 1)], days=7)
+        day = local_day(self.now)
+        days = [local_day(self.now + d * SECONDS_PER_DAY) for d in (0, 1, 7)]
+        self.assertEqual(self.model.get_daily_activity(), [(days[0], 4, 3, 4), (days[1], 2, 2, 0), (days[2], 1, 0, 0)])
+        self.assertEqual(self.model.get_daily_activity(1, day + 1), [(days[1], 2, 2, 0), (days[2], 1, 0, 0)])
+        self.assertEqual(self.model.get_daily_activity(2), [(day, 1, 1, 1)])
+        self.assertEqual(self.model.get_retention_curve(1), [(1, 2, 2), (3, 1, 0)])
+        self.assertEqual(self.model.get_retention_curve(2), [])
+        # 正解率が低い順
+        self.assertEqual(self.model.get_word_accuracy(1),
+                         [(2, "Word 1", 2, 1), (1, "Word 0", 3, 2), (3, "Word 2", 1, 1)])
+
+    def test_analytics_matches_rollups(self):
+        # 解答の記録を列ごとに集計した結果が集計テーブルと一致し、食い違いを作り直せることを確認するテスト
+        rng = random.Random(0)
+        for days in range(30):
+            self.answer([(rng.randint(1, 6), rng.choice([1, 4, 5])) for _ in range(10)], days=days + rng.random())
+        modes = [False] + ([True] if analytics.numpy is not None else [])
+        for use_numpy in modes:
+            with self.subTest(use_numpy=use_numpy):
+                columns = analytics.load_attempt_columns(self.model, use_numpy=use_numpy)
+                self.assertEqual(len(columns["word"]), 300)
+                self.assertEqual(analytics.daily_activity(columns), self.model.get_daily_activity())
+                curves = analytics.retention_curves(columns)
+                for genre_id in (1, 2):
+                    self.assertEqual([row[:3] for row in curves.get(self.genre_uid(genre_id), [])],
+                                     self.model.get_retention_curve(genre_id))
+                accuracy = {row[0]: row[1:3] for row in analytics.word_accuracy(columns)}
+                self.assertEqual(accuracy, {self.uid(row[0]): row[2:]
+                                            for genre_id in (1, 2) for row in self.model.get_word_accuracy(genre_id)})
+                # ジャンルと期間で絞り込める
+                since = local_day(self.now + 20 * SECONDS_PER_DAY)
+                columns = analytics.load_attempt_columns(self.model, 2, since, use_numpy=use_numpy)
+                self.assertEqual(analytics.daily_activity(columns), self.model.get_daily_activity(2, since))
+                self.assertEqual(analytics.check_attempt_stats(self.model, use_numpy=use_numpy), [])
+        self.model.connection.execute("UPDATE word_attempt_stats SET attempts = attempts + 1 WHERE word_uid = ?", (self.uid(1),))
+        self.model.connection.execute("DELETE FROM attempt_retention_stats WHERE genre_uid = ? AND bucket = 1", (self.genre_uid(1),))
+        mismatches = analytics.check_attempt_stats(self.model, rebuild=True)
+        self.assertEqual([row[:2] for row in mismatches],
+                         [("attempt_retention_stats", (self.genre_uid(1), 1)), ("word_attempt_stats", (self.uid(1),))])
+        self.assertEqual(analytics.check_attempt_stats(self.model), [])
+        self.assertEqual(analytics.daily_activity(analytics.load_attempt_columns(self.model, 2, 10 ** 6)), [])
+        self.assertEqual(analytics.bucket_label(0), "1日未満")
+        self.assertEqual(analytics.bucket_label(3), "4〜7日")
+
+
+class TestSampleWords(unittest.TestCase):
+    def setUp(self):
+        self.db_name = "test.db"
+        self.model = Model(self.db_name)
+        self.model.add_genre("Test Genre")
+        self.model.add_genre("Other Genre")
+        # ジャンル1と2の単語のIDが交互に並ぶようにする
+        for i in range(200):
+            self.model.add_word(i % 2 + 1, f"Word {i}", f"Details {i}", i % 4 == 0)
+
+    def tearDown(self):
+        self.model.connection.close()
+        os.remove(self.db_name)
+
+    def test_sample_without_duplicates(self):
+        # 指定したジャンルの単語だけが重複なく選ばれることを確認するテスト
+        cards = list(self.model.sample_words([1], 20, rng=random.Random(0)))
+        self.assertEqual(len(cards), 20)
+        self.assertEqual(len({c[0] for c in cards}), 20)
+        self.assertTrue(all(c[0] % 2 == 1 for c in cards))
+        self.assertEqual(cards[0][1:], (f"Word {cards[0][0] - 1}", cards[0][0] % 4 == 1, 0, 2.5, 0))
+
+        # 複数のジャンルからも選べる
+        cards = list(self.model.sample_words([1, 2], 50, rng=random.Random(0)))
+        self.assertEqual({c[0] % 2 for c in cards}, {0, 1})
+
+    def test_sample_more_than_genre(self):
+        # 出題数がジャンルの単語数より多い場合は、ジャンルの全単語を返すことを確認するテスト
+        self.model.add_genre("Small Genre")
+        for i in range(3):
+            self.model.add_word(3, f"Small {i}", "")
+        self.assertEqual(sorted(c[1] for c in self.model.sample_words([3], 20)), ["Small 0", "Small 1", "Small 2"])
+        self.assertEqual(list(self.model.sample_words([4], 20)), [])
+
+    def test_weak_weight(self):
+        # weak_weightを大きくすると自信がない単語が選ばれやすくなることを確認するテスト
+        rng = random.Random(0)
+        uniform = sum(c[2] for _ in range(20) for c in self.model.sample_words([1], 10, rng=rng))
+        weighted = sum(c[2] for _ in range(20) for c in self.model.sample_words([1], 10, weak_weight=10, rng=rng))
+        self.assertLess(weighted, uniform)
+        with self.assertRaises(ValueError):
+            list(self.model.sample_words([1], 10, weak_weight=0.5))
+
+    def test_sample_is_lazy(self):
+        # 1問目を取り出すまで単語を読み込まず、ジャンル全体を読み込まないことを確認するテスト
+        statements = []
+        self.model.connection.set_trace_callback(statements.append)
+        cards = self.model.sample_words([1], 5, rng=random.Random(0))
+        self.assertEqual(statements, [])
+        session = QuizSession(cards)
+        self.assertIsNotNone(session.current)
+        self.model.connection.set_trace_callback(None)
+        self.assertFalse([s for s in statements if "IN (" not in s and "min(id)" not in s])
+
+        # 出題を最後まで進めると終了になる
+        while not session.finished():
+            session.advance()
+        self.assertEqual(session.count, 5)
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.log_path = os.path.join(self.tmp.name, "trace.jsonl")
+
+    def test_sql_timings(self):
+        # SQLの実行・結果の取得・コミットの時間が、実行された値の入ったSQLとともに記録されることを確認するテスト
+        tracer = Tracer(self.log_path, min_ms=0)
+        model = Model(os.path.join(self.tmp.name, "test.db"))
+        tracer.instrument_model(model)
+        model.add_genre("Test Genre")
+        model.add_word(1, "Test Word", "Test Details")
+        self.assertEqual(model.get_words(1)[0][2], "Test Word")
+        model.connection.close()
+        tracer.close()
+
+        events = list(read_events(self.log_path))
+        self.assertTrue(all(e['type'] == 'sql' and e['ms'] >= 0 for e in events))
+        get_words_sql = f"SELECT {WORD_SELECT_LIST} FROM words WHERE genre_id = ? ORDER BY id"
+        selects = [e for e in events if e['name'] == get_words_sql]
+        self.assertEqual([e['phase'] for e in selects], ['execute', 'fetch'])
+        self.assertIn("genre_id = 1", selects[0]['statement'])
+        self.assertIn('commit', {e['phase'] for e in events})
+
+        rows = aggregate(events)
+        self.assertEqual(sum(row['count'] for row in rows), len(events))
+        self.assertEqual(rows, sorted(rows, key=lambda row: row['total_ms'], reverse=True))
+
+    def test_threshold_and_rotation(self):
+        # しきい値未満の処理は記録されず、ファイルが上限を超えると古いファイルに切り替わることを確認するテスト
+        tracer = Tracer(self.log_path, min_ms=5, max_bytes=200, backup_count=2)
+        tracer.emit({'type': 'sql', 'name': "fast", 'ms': 1})
+        for i in range(10):
+            tracer.emit({'type': 'switch', 'name': "StartFrame", 'ms': 10, 'construct_ms': 6, 'destroy_ms': 1,
+                         'paint_ms': 3})
+        tracer.close()
+        self.assertTrue(os.path.exists(self.log_path + ".1"))
+        rows = aggregate(read_events(self.log_path))
+        self.assertEqual([(row['name'], row['construct_ms']) for row in rows], [("StartFrame", 6)])
+
+    def test_handler_profile(self):
+        # イベントハンドラーの処理時間とcProfileの結果が記録されることを確認するテスト
+        tracer = Tracer(self.log_path, min_ms=0, profile=True)
+
+        def on_button_click(n):
+            return sum(range(n))
+        self.assertEqual(tracer.call_handler(on_button_click, on_button_click, 1000), sum(range(1000)))
+        tracer.close()
+        event, = read_events(self.log_path)
+        self.assertEqual(event['name'], on_button_click.__qualname__)
+        self.assertTrue(any("on_button_click" in row['function'] for row in event['profile']))
+
+
+class TestImport(unittest.TestCase):
+    def test_import_without_gui(self):
+        # modelとappのどちらからModelを読み込んでも、tkinterが読み込まれずデータベースも作られないことを確認するテスト
+        for module in ("model", "app"):
+            with self.subTest(module=module):
+                script = (f"import os, sys\nfrom {module} import Model\n"
+                          "print('tkinter' in sys.modules, os.path.exists('my_word_app.db'))")
+                with tempfile.TemporaryDirectory() as tmp:
+                    env = {**os.environ, 'PYTHONPATH': os.path.dirname(os.path.abspath(__file__))}
+                    output = subprocess.run([sys.executable, "-c", script], cwd=tmp, env=env, capture_output=True,
+                                            text=True, check=True).stdout
+                self.assertEqual(output.split(), ["False", "False"])
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db_name = os.path.join(self.tmp.name, "test.db")
+
+    # サブコマンドを実行し、(終了コード, 標準出力)を返す
+    def run_cli(self, *argv, stdin: str = ""):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(io.StringIO()):
+            original_stdin, cli.sys.stdin = cli.sys.stdin, io.StringIO(stdin)
+            try:
+                code = cli.main(["--db", self.db_name, *argv])
+            finally:
+                cli.sys.stdin = original_stdin
+        return code, stdout.getvalue()
+
+    def test_import_export_round_trip(self):
+        # 標準入力から追加した単語を、同じ形式で標準出力に書き出せることを確認するテスト
+        self.assertEqual(self.run_cli("genre", "add", "English"), (0, "1\n"))
+        words = "word,details,confidence\napple,\"a round, red fruit\",1\nbanana,a yellow fruit,0\n"
+        self.assertEqual(self.run_cli("import", "1", "-", stdin=words)[0], 0)
+        self.assertEqual(self.run_cli("export", "1"), (0, words))
+        code, output = self.run_cli("export", "1", "--format", "jsonl", "--fetch-size", "1")
+        self.assertEqual([json.loads(line)['word'] for line in output.splitlines()], ["apple", "banana"])
+
+        # 存在しないジャンルはエラーになる
+        self.assertEqual(self.run_cli("export", "2")[0], 1)
+
+    def test_stats_reset_and_genres(self):
+        # ジャンルごとの単語数の表示、自信度のまとめての設定、ジャンル名の変更と削除を確認するテスト
+        self.run_cli("genre", "add", "English")
+        self.run_cli("genre", "add", "Empty")
+        self.run_cli("import", "1", "-", stdin="apple,,1\nbanana,,0\ngrape,,0\n")
+        self.assertEqual(self.run_cli("stats")[1].splitlines()[1:], ["1\tEnglish\t3\t1\t2", "2\tEmpty\t0\t0\t0"])
+
+        self.run_cli("reset-confidence", "1", "--value", "1")
+        self.run_cli("genre", "rename", "1", "英語")
+        self.run_cli("genre", "delete", "2")
+        self.assertEqual(self.run_cli("stats")[1].splitlines()[1:], ["1\t英語\t3\t3\t0"])
+        self.run_cli("reset-confidence", "1")
+        self.assertEqual(self.run_cli("stats")[1].splitlines()[1:], ["1\t英語\t3\t0\t3"])
+        self.assertEqual(self.run_cli("check-stats"), (0, ""))
+
+    def test_import_duplicates_and_dedupe(self):
+        # 重複した単語の扱いを指定して追加でき、古い重複をまとめられることを確認するテスト
+        self.run_cli("genre", "add", "English")
+        self.run_cli("import", "1", "-", stdin="apple,a round fruit,0\nApple,a company,0\n")
+        self.assertEqual(self.run_cli("export", "1")[1].splitlines()[1:], ["apple,a round fruit,0"])
+        self.run_cli("import", "1", "-", "--on-duplicate", "overwrite", stdin="ＡＰＰＬＥ,a company,1\n")
+        self.assertEqual(self.run_cli("export", "1")[1].splitlines()[1:], ["ＡＰＰＬＥ,a company,1"])
+        self.assertEqual(self.run_cli("dedupe", "--strategy", "skip"), (0, ""))
+
+    def test_search_and_quiz(self):
+        # 検索結果と理解度チェック用の単語の組を書き出せることを確認するテスト
+        self.run_cli("genre", "add", "English")
+        self.run_cli("import", "1", "-", stdin="apple,a round fruit,0\npineapple,a tropical fruit,0\nbanana,yellow,0\n")
+        lines = self.run_cli("search", "apple")[1].splitlines()
+        self.assertEqual([line.split("\t")[2] for line in lines[1:]], ["【apple】", "pine【apple】"])
+
+        code, output = self.run_cli("quiz", "1", "--count", "2", "--format", "tsv")
+        rows = output.splitlines()
+        self.assertEqual(rows[0], "word\tdetails\tconfidence")
+        self.assertEqual(len(rows), 3)
+        code, output = self.run_cli("quiz", "1", "--count", "5", "--due", "--format", "jsonl")
+        self.assertEqual([json.loads(line)['word'] for line in output.splitlines()], ["apple", "pineapple", "banana"])
+
+    def test_backup(self):
+        # バックアップしたファイルから同じ単語を書き出せることを確認するテスト
+        self.run_cli("genre", "add", "English")
+        self.run_cli("import", "1", "-", stdin="apple,a round fruit,1\nbanana,yellow,0\n")
+        backup_name = os.path.join(self.tmp.name, "backup.db")
+        self.assertEqual(self.run_cli("backup", backup_name, "--pages", "1")[0], 0)
+        exported = self.run_cli("export", "1")
+        self.db_name = backup_name
+        self.assertEqual(self.run_cli("export", "1"), exported)
+
+    def test_compress(self):
+        # 詳細を圧縮し直しても、同じ単語を書き出せることを確認するテスト
+        self.run_cli("genre", "add", "English")
+        words = "".join(f"word{i},\"{'the same long explanation, repeated. ' * 10}{i}\",0\n" for i in range(50))
+        self.run_cli("import", "1", "-", stdin=words)
+        exported = self.run_cli("export", "1")
+        self.assertEqual(self.run_cli("compress", "--train", "--vacuum"), (0, ""))
+        self.assertEqual(self.run_cli("export", "1"), exported)
+
+    def test_sync(self):
+        # 別のデータベースファイルと同期し、両方に同じ単語が揃うことを確認するテスト
+        self.run_cli("genre", "add", "English")
+        self.run_cli("import", "1", "-", stdin="apple,a round fruit,1\nbanana,yellow,0\n")
+        other_name = os.path.join(self.tmp.name, "other.db")
+        self.assertEqual(self.run_cli("sync", os.path.join(self.tmp.name, "missing.db"))[0], 1)
+        Model(other_name).close()
+        self.assertEqual(self.run_cli("sync", other_name), (0, ""))
+        exported = self.run_cli("export", "1")
+        self.db_name = other_name
+        self.assertEqual(self.run_cli("export", "1"), exported)
+
+
+    def test_activity(self):
+        # 解答の集計を表示し、集計の確認と作り直しができることを確認するテスト
+        self.run_cli("genre", "add", "English")
+        self.run_cli("import", "1", "-", stdin="apple,a round fruit,0\nbanana,yellow,0\n")
+        model = Model(self.db_name)
+        for card in model.get_due_words(1):
+            model.queue_review(card, 4 if card[0] == 1 else 1, 0)
+        model.flush_pending()
+        model.close()
+        self.assertEqual(self.run_cli("activity"), (0, f"date\tattempts\tcorrect\taccuracy\tnew_words\n"
+                                                       f"{datetime.date(1970, 1, 1) + datetime.timedelta(local_day(0))}\t2\t1\t0.500\t2\n"))
+        self.assertEqual(self.run_cli("activity", "--days", "7"), (0, "date\tattempts\tcorrect\taccuracy\tnew_words\n"))
+        self.assertEqual(self.run_cli("activity", "words", "--genre", "1"),
+                         (0, "genre_id\tid\tword\tattempts\tcorrect\taccuracy\n"
+                             "1\t2\tbanana\t1\t0\t0.000\n1\t1\tapple\t1\t1\t1.000\n"))
+        self.assertEqual(self.run_cli("activity", "retention"), (0, "genre_id\telapsed\tattempts\tcorrect\taccuracy\n"))
+        self.assertEqual(self.run_cli("activity", "--genre", "9")[0], 1)
+        self.assertEqual(self.run_cli("check-activity"), (0, ""))
+        connection = sqlite3.connect(self.db_name)
+        connection.execute("DELETE FROM attempt_daily_stats")
+        connection.commit()
+        connection.close()
+        self.assertEqual(self.run_cli("check-activity")[0], 1)
+        self.assertEqual(self.run_cli("check-activity", "--rebuild")[0], 0)
+        self.assertEqual(self.run_cli("check-activity"), (0, ""))
+
+
+class TestSearch(unittest.TestCase):
+    def setUp(self):
+        self.db_name = "test.db"
+        self.model = Model(self.db_name)
+        self.model.add_genre("English")
+        self.model.add_genre("日本語")
+        self.model.add_word(1, "apple", "a round fruit", False)
+        self.model.add_word(1, "pineapple", "a tropical fruit", False)
+        self.model.add_word(1, "banana", "a yellow fruit, not an apple", False)
+        self.model.add_word(2, "林檎", "りんごは赤い果物です", False)
+
+    def tearDown(self):
+        self.model.connection.close()
+        os.remove(self.db_name)
+
+    def test_search_ranking_and_highlight(self):
+        # 単語名での一致が詳細での一致より上位に並び、一致箇所が【】で囲まれることを確認するテスト
+        results = self.model.search("apple")
+        self.assertEqual([r[0] for r in results], [1, 2, 3])
+        self.assertEqual(results[0][2], "【apple】")
+        self.assertIn("【apple】", results[2][3])
+
+        # ジャンルでの絞り込みと表示位置の指定
+        self.assertEqual(self.model.search("apple", genre_id=2), [])
+        self.assertEqual([r[0] for r in self.model.search("apple", limit=1, offset=1)], [2])
+
+    def test_search_follows_word_changes(self):
+        # 単語の追加・編集・削除が検索結果に反映されることを確認するテスト
+        self.model.edit_word(1, "grape", "a small fruit")
+        self.model.delete_word(2)
+        self.assertEqual([r[0] for r in self.model.search("apple")], [3])
+        self.assertEqual([r[0] for r in self.model.search("grape")], [1])
+
+    def test_search_short_and_special_terms(self):
+        # 3文字未満の語や検索構文の記号を含む語でも検索できることを確認するテスト
+        results = self.model.search("赤い")
+        self.assertEqual([r[0] for r in results], [4])
+        self.assertIn("【赤い】", results[0][3])
+        self.assertEqual([r[0] for r in self.model.search("りんご 果物")], [4])
+        self.assertEqual(self.model.search('"apple OR'), [])
+        self.assertEqual(self.model.search("   "), [])
+
+
+class TestMigration(unittest.TestCase):
+    def setUp(self):
+        self.db_name = "test.db"
+
+    def tearDown(self):
+        os.remove(self.db_name)
+
+    def test_upgrade_existing_database(self):
+        # マイグレーション導入前のデータベースがそのまま最新のスキーマに更新されることを確認するテスト
+        connection = sqlite3.connect(self.db_name)
+        connection.execute('''CREATE TABLE genres (id INTEGER PRIMARY KEY, name TEXT)''')
+        connection.execute('''CREATE TABLE words (id INTEGER PRIMARY KEY, genre_id INTEGER, word TEXT, details TEXT,
+                              confidence BOOLEAN, FOREIGN KEY(genre_id) REFERENCES genres(id))''')
+        connection.execute('''INSERT INTO genres (name) VALUES ('Old Genre')''')
+        connection.execute('''INSERT INTO words (genre_id, word, details, confidence) VALUES (1, 'Old Word', 'Old Details', 0)''')
+        connection.execute('''INSERT INTO words (genre_id, word, details, confidence) VALUES (1, 'old  word', 'Copy', 0)''')
+        connection.commit()
+        connection.close()
+
+        model = Model(self.db_name)
+        self.addCleanup(model.connection.close)
+        self.assertEqual(model.get_schema_version(), SCHEMA_VERSION)
+        self.assertEqual([w[2] for w in model.get_words(1)], ["Old Word", "old  word"])
+        self.assertEqual(model.get_genres_with_stats(), [(1, "Old Genre", 2, 0)])
+
+        # 既存の重複は最も古い単語にだけキーが付き、dedupe_wordsでまとめられることを確認
+        self.assertEqual([w[9] for w in model.get_words(1)], ["old word", None])
+        self.assertEqual(model.dedupe_words(), 1)
+        self.assertEqual(model.get_words(1)[0][2:4], ("Old Word", "Old Details\nCopy"))
+        self.assertEqual(model.get_genres_with_stats(), [(1, "Old Genre", 1, 0)])
+
+        # 単語テーブルが外部キーのCASCADE付きで作り直され、インデックスとトリガーも残っていることを確認
+        foreign_keys = model.connection.execute("PRAGMA foreign_key_list(words)").fetchall()
+        self.assertEqual([(row[2], row[6]) for row in foreign_keys], [("genres", "CASCADE")])
+        model.add_word(1, "New Word", "New Details")
+        self.assertEqual(sorted(r[0] for r in model.search("Word")), [1, 2])
+        self.assertEqual(model.get_genres_with_stats(), [(1, "Old Genre", 2, 0)])
+        self.assertEqual([r[2] for r in model.fuzzy_lookup("old wrd", 1)], ["Old Word"])
+        indexes = {row[0] for row in model.connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertIn("idx_words_genre_summary", indexes)
+        # 既存の行にも同期用のIDが付いていることを確認
+        self.assertEqual(model.connection.execute("SELECT COUNT(*) FROM words WHERE uid IS NULL").fetchone()[0], 0)
+        self.assertEqual(model.connection.execute("SELECT COUNT(*) FROM genres WHERE uid IS NULL").fetchone()[0], 0)
+
+        # 2回目以降の起動ではマイグレーションが再適用されないことを確認
+        model.migrate()
+        self.assertEqual(model.get_schema_version(), SCHEMA_VERSION)
+
+
+class TestQueryPlan(unittest.TestCase):
+    # 全件取得が目的のため、テーブル全体の走査を許可するメソッド
+    FULL_SCAN_ALLOWED = {"get_genres", "get_genres_with_stats", "check_genre_stats"}
+
+    # 条件に合う行だけを持つ部分インデックス（走査しても、条件に合う行だけを読む）
+    PARTIAL_INDEXES = {"idx_genres_deleted"}
+
+    def setUp(self):
+        self.db_name = "test.db"
+        self.model = Model(self.db_name)
+        self.model.add_genre("Test Genre")
+        self.model.bulk_import(1, ((f"Word {i}", f"Details {i}", i % 2 == 0) for i in range(100)))
+
+    def tearDown(self):
+        self.model.connection.close()
+        os.remove(self.db_name)
+
+    # メソッドの実行中に発行されたSELECT/UPDATE/DELETE文を重複なく収集
+    def collect_statements(self, method, *args):
+        statements = []
+        self.model.connection.set_trace_callback(statements.append)
+        try:
+            method(*args)
+        finally:
+            self.model.connection.set_trace_callback(None)
+        return [s for s in dict.fromkeys(statements) if s.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE"))]
+
+    # 実行計画にテーブル走査や一時B木によるソートが含まれていないことを確認
+    def assert_uses_index(self, method, *args):
+        statements = self.collect_statements(method, *args)
+        self.assertTrue(statements, f"{method.__name__}でSQLが発行されていません")
+        for sql in statements:
+            plan = self.model.connection.execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+            for row in plan:
+                detail = row[3]
+                with self.subTest(method=method.__name__, sql=sql.strip(), detail=detail):
+                    # FTS5のMATCH（idxStrが"M"を含む）は全文検索インデックスを使った検索
+                    fts_match = "VIRTUAL TABLE INDEX" in detail and ":M" in detail
+                    partial_index = any(detail.endswith(f"USING INDEX {name}") for name in self.PARTIAL_INDEXES)
+                    if method.__name__ not in self.FULL_SCAN_ALLOWED and not fts_match and not partial_index:
+                        # "SCAN CONSTANT ROW"はFROMのないSELECT（サブクエリの結果をまとめるだけ）
+                        self.assertFalse(detail.startswith("SCAN") and detail != "SCAN CONSTANT ROW", "テーブル全体を走査しています")
+                    self.assertNotIn("USE TEMP B-TREE", detail)
+
+    def test_query_plans(self):
+        # Modelの各クエリメソッドがインデックスを使うことを確認するテスト
+        self.assert_uses_index(self.model.get_genres)
+        self.assert_uses_index(self.model.get_words, 1)
+        self.assert_uses_index(self.model.sort_confidence, 1)
+        self.assert_uses_index(self.model.sort_no_confidence, 1)
+        self.assert_uses_index(self.model.get_words_page, 1, (10,), 10)
+        self.assert_uses_index(self.model.get_words_page, 1, ("Word 5", 10), 10, "word")
+        self.assert_uses_index(self.model.get_words_page, 1, (10,), 10, "id", True)
+        self.assert_uses_index(self.model.get_words_page, 1, ("Word 5", 10), 10, "word", False)
+        self.assert_uses_index(self.model.get_adjacent_word, 1, 50, 1)
+        self.assert_uses_index(self.model.get_adjacent_word, 1, 100, 1)
+        self.assert_uses_index(self.model.get_adjacent_word, 1, 1, -1)
+        self.assert_uses_index(self.model.get_adjacent_word, 1, 50, -1, "word", True)
+        self.assert_uses_index(self.model.get_word_summaries, 1)
+        self.assert_uses_index(self.model.get_word_summaries, 1, True)
+        self.assert_uses_index(self.model.get_word_summary, 1)
+        self.assert_uses_index(self.model.get_word_details, 1)
+        self.assert_uses_index(self.model.get_due_words, 1, 20, 0)
+        self.assert_uses_index(lambda *args: list(self.model.sample_words(*args)), [1], 5)
+        self.assert_uses_index(lambda *args: list(self.model.iter_words(*args)), 1)
+        self.assert_uses_index(self.model.get_genres_with_stats)
+        self.assert_uses_index(self.model.check_genre_stats)
+        self.assert_uses_index(self.model.get_genre, 1)
+        self.assert_uses_index(self.model.get_word, 1)
+        self.assert_uses_index(self.model.find_duplicate, 1, "WORD 5")
+        self.assert_uses_index(self.model.fuzzy_lookup, "Wrod 5", 1)
+        self.assert_uses_index(self.model.fuzzy_lookup, "Wrod 5")
+        self.assert_uses_index(self.model.add_word, 1, "word 5", "More Details", False, "merge")
+        self.assert_uses_index(self.model.search, "Details", 1)
+        self.assert_uses_index(self.model.update_word_confidence, 1, True)
+        self.model.add_change_listener(lambda genre_id: None)
+        self.model.queue_word_confidence(2, True)
+        self.assert_uses_index(self.model.flush_confidence)
+        self.model.queue_review(self.model.get_due_words(1, 1, 0)[0], 4, 0)
+        self.assert_uses_index(self.model.flush_reviews)
+        self.assert_uses_index(self.model.reset_confidence, 1, True)
+        self.assert_uses_index(self.model.get_daily_activity)
+        self.assert_uses_index(self.model.get_daily_activity, 1, 0)
+        self.assert_uses_index(self.model.get_retention_curve, 1)
+        self.assert_uses_index(self.model.get_word_accuracy, 1)
+        self.assert_uses_index(self.model.edit_word, 1, "Edited Word", "Edited Details")
+        self.assert_uses_index(self.model.edit_genre, 1, "Edited Genre")
+        self.assert_uses_index(self.model.delete_word, 1)
+        self.assert_uses_index(self.model.delete_genre, 1)
+        self.assert_uses_index(self.model.purge_deleted_genres, 2)
+
+    def test_word_summaries_use_covering_index(self):
+        # 単語リスト用の取得がテーブル本体（詳細）を読まずにインデックスだけで済むことを確認するテスト
+        for args in ((1,), (1, True)):
+            sql, = self.collect_statements(self.model.get_word_summaries, *args)
+            plan = self.model.connection.execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+            with self.subTest(args=args):
+                self.assertIn("COVERING INDEX", plan[0][3])
+
 
 if __name__ == "__main__":
     unittest.main()